@@ -13,6 +13,11 @@
 # limitations under the License.
 
 #!/bin/bash
+# Generates the protos, unless they were already built by setup.py.
+if [ ! -f vizier/service/vizier_service_pb2.py ]; then
+  bash build_protos.sh || exit 1
+fi
+
 # Runs all core Python unit tests in the Vizier package.
 pytest vizier --ignore=vizier/_src/benchmarks/ --ignore=vizier/_src/algorithms/
 
@@ -14,7 +14,7 @@
 
 """Binary classifiers for Bayesian Optimization."""
 
-from typing import Optional
+from typing import Optional, Union
 
 import attr
 import chex
@@ -22,17 +22,47 @@ import numpy as np
 from sklearn.gaussian_process import GaussianProcessClassifier
 from sklearn.gaussian_process.kernels import ConstantKernel
 from sklearn.gaussian_process.kernels import RBF
+from sklearn.kernel_approximation import RBFSampler
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+from sklearn.pipeline import Pipeline
 
 # TODO: Replace the sklearn GP classifier with TFP GP classifier
 # once implemented.
 
 
+def random_fourier_features_classifier(length_scale: float = 1.0,
+                                       n_components: int = 500,
+                                       seed: Optional[int] = None) -> Pipeline:
+  """Approximates GaussianProcessClassifier with an RBF kernel for large data.
+
+  GaussianProcessClassifier fits in O(n^3) time for n samples. This classifier
+  maps the features to `n_components` random Fourier features, whose inner
+  products approximate the RBF kernel, and fits a logistic regression on them
+  in O(n * n_components) time per iteration.
+
+  Args:
+    length_scale: Length scale of the approximated RBF kernel.
+    n_components: The number of random Fourier features.
+    seed: Seed of the random features.
+
+  Returns:
+    A classifier that can be passed to SklearnClassifier.
+  """
+  return make_pipeline(
+      RBFSampler(
+          gamma=0.5 / length_scale**2,
+          n_components=n_components,
+          random_state=seed), LogisticRegression())
+
+
 @attr.define
 class SklearnClassifier:
   """Class for Sklearn classifiers.
 
   Attributes:
     classifier: a sklearn classifier such as SVM and GaussianProcessClassifier.
+      For many samples, use `random_fourier_features_classifier()`.
     features: (n, d) shaped array of n samples in dimension d.
     labels: (n, 1) shaped array of binary labels in {0, 1}.
     features_test: (m, d) shaped array of m samples in dimension d.
@@ -41,7 +71,7 @@ class SklearnClassifier:
       and `decision` which estimates a non-probability based metric such as the
       margin from the classification boundary.
   """
-  classifier: Optional[GaussianProcessClassifier] = attr.field(
+  classifier: Optional[Union[GaussianProcessClassifier, Pipeline]] = attr.field(
       kw_only=True,
       default=GaussianProcessClassifier(
           kernel=ConstantKernel(1.) * RBF(length_scale=1.)))
@@ -28,6 +28,7 @@ from absl.testing import parameterized
 svm_classifier = svm.SVC(kernel='rbf', C=1.)
 gpc_classifier = GaussianProcessClassifier(
     kernel=ConstantKernel(1.) * RBF(length_scale=1.))
+rff_classifier = classifiers.random_fourier_features_classifier(seed=0)
 
 
 # TODO: convert it into a generic ClassifierTest for all subclasses.
@@ -53,7 +54,8 @@ class SklearnClassifierTest(parameterized.TestCase):
 
   @parameterized.parameters([
       dict(classifier=svm_classifier, eval_metric='decision'),
-      dict(classifier=gpc_classifier, eval_metric='probability')
+      dict(classifier=gpc_classifier, eval_metric='probability'),
+      dict(classifier=rff_classifier, eval_metric='probability')
   ])
   def test_scores_shape(self, classifier, eval_metric):
     classifier_instance = classifiers.SklearnClassifier(
@@ -67,7 +69,8 @@ class SklearnClassifierTest(parameterized.TestCase):
 
   @parameterized.parameters([
       dict(classifier=svm_classifier, eval_metric='decision', threshold=0.),
-      dict(classifier=gpc_classifier, eval_metric='probability', threshold=0.5)
+      dict(classifier=gpc_classifier, eval_metric='probability', threshold=0.5),
+      dict(classifier=rff_classifier, eval_metric='probability', threshold=0.5)
   ])
   def test_labels_shape(self, classifier, eval_metric, threshold):
     classifier_instance = classifiers.SklearnClassifier(
@@ -96,7 +99,8 @@ class SklearnClassifierTest(parameterized.TestCase):
 
   @parameterized.parameters([
       dict(classifier=svm_classifier, eval_metric='decision'),
-      dict(classifier=gpc_classifier, eval_metric='probability')
+      dict(classifier=gpc_classifier, eval_metric='probability'),
+      dict(classifier=rff_classifier, eval_metric='probability')
   ])
   def test_scores_range(self, classifier, eval_metric):
     classifier_instance = classifiers.SklearnClassifier(
@@ -118,7 +122,8 @@ class SklearnClassifierTest(parameterized.TestCase):
 
   @parameterized.parameters([
       dict(classifier=svm_classifier, eval_metric='decision', threshold=0.),
-      dict(classifier=gpc_classifier, eval_metric='probability', threshold=0.5)
+      dict(classifier=gpc_classifier, eval_metric='probability', threshold=0.5),
+      dict(classifier=rff_classifier, eval_metric='probability', threshold=0.5)
   ])
   def test_prediction_on_train_data(self, classifier, eval_metric, threshold):
     classifier_instance = classifiers.SklearnClassifier(
@@ -131,6 +136,20 @@ class SklearnClassifierTest(parameterized.TestCase):
     labels_test_pred = (scores >= threshold).astype(float)
     self.assertTrue((labels_test_pred == self.labels_train).all())
 
+  def test_random_fourier_features_on_many_samples(self):
+    rng = np.random.default_rng(0)
+    features = rng.uniform(-1., 1., size=(5000, 2))
+    labels = (np.sum(np.square(features), axis=-1) < 0.5).astype(int)
+    classifier_instance = classifiers.SklearnClassifier(
+        classifier=classifiers.random_fourier_features_classifier(
+            length_scale=0.5, seed=0),
+        features=features[:4000],
+        labels=labels[:4000],
+        features_test=features[4000:],
+        eval_metric='probability')
+    labels_test_pred = (classifier_instance() >= 0.5).astype(int)
+    self.assertGreater(np.mean(labels_test_pred == labels[4000:]), 0.95)
+
 
 if __name__ == '__main__':
   absltest.main()
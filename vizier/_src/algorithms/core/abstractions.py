@@ -15,6 +15,7 @@
 """Abstractions."""
 
 import abc
+import datetime
 from typing import Optional, Sequence, TypeVar
 
 import attr
@@ -89,6 +90,21 @@ class Designer(_SuggestionAlgorithm):
     pass
 
 
+class DeadlineAwareDesigner(Designer):
+  """Designer whose `suggest()` can be bounded in time.
+
+  Designer policies call `set_deadline()` before every `suggest()` with the
+  deadline of the Pythia computation. `suggest()` should scale its work to the
+  time remaining, e.g. by passing the deadline to its acquisition optimizer,
+  and return its best suggestions so far when the deadline is reached.
+  """
+
+  @abc.abstractmethod
+  def set_deadline(self, deadline: Optional[datetime.datetime]) -> None:
+    """Sets the deadline of the next `suggest()` calls. None means no limit."""
+    pass
+
+
 class PartiallySerializableDesigner(Designer,
                                     serializable.PartiallySerializable):
   pass
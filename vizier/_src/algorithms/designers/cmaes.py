@@ -13,7 +13,6 @@
 # limitations under the License.
 
 """CMA-ES designer."""
-import json
 import queue
 from typing import Optional, Sequence
 
@@ -24,7 +23,7 @@ import numpy as np
 from vizier import algorithms as vza
 from vizier import pyvizier as vz
 from vizier.pyvizier import converters
-from vizier.utils import json_utils
+from vizier.utils import state_codec
 
 
 class CMAESDesigner(vza.PartiallySerializableDesigner):
@@ -109,13 +108,11 @@ class CMAESDesigner(vza.PartiallySerializableDesigner):
     ]
 
   def load(self, metadata: vz.Metadata) -> None:
-    cma_state = json.loads(
-        metadata.ns('cma')['state'], object_hook=json_utils.numpy_hook)
+    cma_state = state_codec.loads(metadata.ns('cma')['state'])
     self._cma_es_jax.load_state(cma_state)
 
   def dump(self) -> vz.Metadata:
     cma_state = self._cma_es_jax.save_state()
     metadata = vz.Metadata()
-    metadata.ns('cma')['state'] = json.dumps(
-        cma_state, cls=json_utils.NumpyEncoder)
+    metadata.ns('cma')['state'] = state_codec.dumps(cma_state)
     return metadata
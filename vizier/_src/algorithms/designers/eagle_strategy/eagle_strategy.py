@@ -42,7 +42,9 @@ OSS Vizier Implementation Summary
 We maintain a pool of fireflies. Each firefly stores the best trial it created.
 During 'Suggest' each firefly on its turn is used to suggest a new trial. The
 best trial parameters are used to compute distances and to generate new
-suggested parameters by calling the '_mutate' and '_perturb' methods. During
+suggested parameters by calling the '_mutate' and '_perturb' methods. The pool
+stores the parameters, objective values and perturbations of the fireflies in
+arrays, so that the pulls and distances of the whole pool are vectorized. During
 'Update' the trial results comeback and we create a new firefly if needed or
 update/remove the associated firefly in the pool. To facilitate this
 association, during 'Suggest', the newly created suggested trial stores in
@@ -74,7 +76,6 @@ from vizier.interfaces import serializable
 
 EagleStrategyUtils = eagle_strategy_utils.EagleStrategyUtils
 FireflyAlgorithmConfig = eagle_strategy_utils.FireflyAlgorithmConfig
-Firefly = eagle_strategy_utils.Firefly
 FireflyPool = eagle_strategy_utils.FireflyPool
 
 
@@ -146,7 +147,7 @@ class EagleStrategyDesigner(vza.PartiallySerializableDesigner):
     metadata.ns('eagle')[
         'firefly_pool'] = serialization.partially_serialize_firefly_pool(
             self._firefly_pool)
-    metadata.ns('eagle')['serialization_version'] = 'v1'
+    metadata.ns('eagle')['serialization_version'] = 'v2'
     metadata.ns('eagle')['dump_timestamp'] = str(time.time())
     return metadata
 
@@ -196,8 +197,8 @@ class EagleStrategyDesigner(vza.PartiallySerializableDesigner):
     """Generates a single suggestion based on the current pool of flies.
 
     In order to generate a trial suggestion, we find the next fly that should be
-    moved and create a copy of it. Then we mutate and perturb its trial
-    parameters inplace and assign them to the suggested trial.
+    moved. Then we mutate and perturb its features and assign the resulting
+    parameters to the suggested trial.
 
     Returns:
       The suggested trial
@@ -214,12 +215,11 @@ class EagleStrategyDesigner(vza.PartiallySerializableDesigner):
       parent_fly_id = self._firefly_pool.generate_new_fly_id()
       logging.info('Suggested a random trial.')
     else:
-      # The pool is full. Use a copy of the next fly in line to be moved.
-      moving_fly = self._firefly_pool.get_next_moving_fly_copy()
-      self._mutate_fly(moving_fly)
-      self._perturb_fly(moving_fly)
-      suggested_parameters = moving_fly.trial.parameters
-      parent_fly_id = moving_fly.id_
+      # The pool is full. Move the next fly in line.
+      parent_fly_id = self._firefly_pool.get_next_moving_fly_id()
+      features = self._mutate_fly(parent_fly_id)
+      features = self._perturb_fly(parent_fly_id, features)
+      suggested_parameters = self._utils.features_to_parameters(features)
       logging.info('Created a trial from parent fly ID: %s.', parent_fly_id)
 
     suggested_trial.parameters = suggested_parameters
@@ -228,58 +228,50 @@ class EagleStrategyDesigner(vza.PartiallySerializableDesigner):
                  self._utils.display_trial(suggested_trial.to_trial(-1)))
     return suggested_trial
 
-  def _mutate_fly(self, moving_fly: Firefly) -> None:
-    """Mutates fly's trial parameters inplace.
+  def _mutate_fly(self, moving_fly_id: int) -> np.ndarray:
+    """Mutates the fly's features.
 
-    Apply pulls from the rest of the pool's flies on `moving_fly` to mutate
-    its trial's parameters.
+    Apply pulls from the pool's flies on the moving fly to mutate its features.
 
     Args:
-      moving_fly: the fire from the pool to mutate its trial parameters.
+      moving_fly_id: The id of the fly from the pool to mutate.
+
+    Returns:
+      The mutated features of shape (n_parameters,).
     """
-    # Access the moving fly's trial parameters to be modified.
-    mutated_parameters = moving_fly.trial.parameters
-    # Shuffle the ordering, so to apply the attracting and repelling forces
-    # in random order every time. Creates a deep copy of the pool members.
-    shuffled_flies = self._firefly_pool.get_shuffled_flies(self._rng)
-    for other_fly in shuffled_flies:
-      is_other_fly_better = self._utils.is_better_than(other_fly.trial,
-                                                       moving_fly.trial)
-      # Compute 'other_fly' pull weights by parameter type. In the paper
-      # this is called "attractivness" and is denoted by beta(r).
-      pull_weights = self._utils.compute_pull_weight_by_type(
-          other_fly.trial.parameters, mutated_parameters, is_other_fly_better)
-      # Apply the pulls from 'other_fly' on the moving fly's parameters.
-      for param_config in self.problem.search_space.parameters:
-        pull_weight = pull_weights[param_config.type]
-        # Accentuate 'other_fly' pull using 'exploration_rate'.
-        if pull_weight > 0.5:
-          explore_pull_weight = self.config.explore_rate * pull_weight + (
-              1 - self.config.explore_rate) * 1.0
-        else:
-          explore_pull_weight = self.config.explore_rate * pull_weight
-        # Update the parameters using 'other_fly' and 'explore_pull_rate'.
-        mutated_parameters[
-            param_config.name] = self._utils.combine_two_parameters(
-                param_config, other_fly.trial.parameters, mutated_parameters,
-                explore_pull_weight)
-
-  def _perturb_fly(self, moving_fly: Firefly) -> None:
-    """Perturbs the fly's trial parameters inplace.
-
-    Apply random perturbation to the fly's parameter values based on the
-    moving_fly's 'perturbation' value.
+    pool = self._firefly_pool
+    index = pool.find_index(moving_fly_id)
+    moving_features = pool.features[index]
+    is_better = pool.rewards > pool.rewards[index]
+    # Compute the pull weights of every fly on every parameter. In the paper
+    # this is called "attractivness" and is denoted by beta(r).
+    pull_weights = self._utils.compute_pull_weights(pool.features,
+                                                    moving_features, is_better)
+    # Accentuate the pulls using 'exploration_rate'.
+    explore_rate = self.config.explore_rate
+    pull_weights = np.where(pull_weights > 0.5,
+                            explore_rate * pull_weights + (1 - explore_rate),
+                            explore_rate * pull_weights)
+    return self._utils.combine_features(pool.features, moving_features,
+                                        pull_weights)
+
+  def _perturb_fly(self, moving_fly_id: int,
+                   features: np.ndarray) -> np.ndarray:
+    """Perturbs the fly's mutated features.
+
+    Apply random perturbation to the features based on the moving fly's
+    'perturbation' value.
 
     Args:
-      moving_fly: the fire from the pool to mutate its trial parameters.
+      moving_fly_id: The id of the fly from the pool to mutate.
+      features: The mutated features of the fly.
+
+    Returns:
+      The perturbed features of shape (n_parameters,).
     """
-    suggested_parameters = moving_fly.trial.parameters
-    perturbations = self._utils.create_perturbations(moving_fly.perturbation)
-    for i, param_config in enumerate(self.problem.search_space.parameters):
-      perturbed_value = self._utils.perturb_parameter(
-          param_config, suggested_parameters[param_config.name].value,
-          perturbations[i])
-      suggested_parameters[param_config.name] = perturbed_value
+    index = self._firefly_pool.find_index(moving_fly_id)
+    return self._utils.perturb_features(
+        features, self._firefly_pool.perturbations[index])
 
   def update(self, delta: vza.CompletedTrials) -> None:
     """Update the pool.
@@ -306,12 +298,12 @@ class EagleStrategyDesigner(vza.PartiallySerializableDesigner):
   def _update_one(self, trial: vz.Trial) -> None:
     """Update the pool using a single trial."""
     parent_fly_id = int(trial.metadata.ns('eagle').get('parent_fly_id'))
-    parent_fly = self._firefly_pool.find_parent_fly(parent_fly_id)
-    if parent_fly is None:
+    if self._firefly_pool.find_index(parent_fly_id) is None:
       logging.info('Parent fly ID: %s is not in pool.', parent_fly_id)
       if trial.infeasible:
         # Ignore infeasible trials without parent fly.
         logging.info('Got infeasible trial without a parent fly in the pool.')
+        parent_fly_id = None
       elif self._firefly_pool.size < self._firefly_pool.capacity:
         # Pool is below capacity. Create a new firefly or update existing one.
         logging.info(
@@ -321,34 +313,30 @@ class EagleStrategyDesigner(vza.PartiallySerializableDesigner):
         return
       else:
         # Pool is at capacity. Try assigning a parent to utilize the trial info.
-        parent_fly = self._assign_closest_parent(trial)
+        parent_fly_id = self._assign_closest_parent(trial)
 
-    if parent_fly is None:
+    if parent_fly_id is None:
       # Parent fly wasn't established. No need to continue.
       logging.info('Parent fly was not established.')
       return
 
-    elif not trial.infeasible and self._utils.is_better_than(
-        trial, parent_fly.trial):
+    parent_reward = self._firefly_pool.rewards[self._firefly_pool.find_index(
+        parent_fly_id)]
+    if not trial.infeasible and self._utils.get_reward(trial) > parent_reward:
       # If there's an improvement, we update the parent with the new trial.
       logging.info(
-          'Good step:\nParent trial (val=%s): %s\nChild trial (val=%s): %s\n',
-          self._utils.get_metric(parent_fly.trial),
-          self._utils.display_trial(parent_fly.trial),
-          self._utils.get_metric(trial), self._utils.display_trial(trial))
-      parent_fly.trial = trial
-      parent_fly.generation += 1
+          'Good step:\nParent fly ID: %s (reward=%s)\nChild trial: %s\n',
+          parent_fly_id, parent_reward, self._utils.display_trial(trial))
+      self._firefly_pool.update_fly(parent_fly_id, trial)
     else:
       # If there's no improvement, we penalize the parent by decreasing its
       # exploration capability and potenitally remove it from the pool.
       logging.info(
-          'Bad step:\nParent trial (val=%s): %s\nChild trial (val=%s): %s\n',
-          self._utils.get_metric(parent_fly.trial),
-          self._utils.display_trial(parent_fly.trial),
-          self._utils.get_metric(trial), self._utils.display_trial(trial))
-      self._penalize_parent_fly(parent_fly, trial)
+          'Bad step:\nParent fly ID: %s (reward=%s)\nChild trial: %s\n',
+          parent_fly_id, parent_reward, self._utils.display_trial(trial))
+      self._penalize_parent_fly(parent_fly_id, trial)
 
-  def _assign_closest_parent(self, trial: vz.Trial) -> Optional[Firefly]:
+  def _assign_closest_parent(self, trial: vz.Trial) -> Optional[int]:
     """Finds the closest parent fly and checks that the trial improves on it.
 
     Note that the trial's `parent_fly_id` won't exist in the pool when:
@@ -366,16 +354,17 @@ class EagleStrategyDesigner(vza.PartiallySerializableDesigner):
       trial:
 
     Returns:
-      None or a fly from the pool that is closest to the trial.
+      None or the id of the fly from the pool that is closest to the trial.
     """
-    closest_parent_fly = self._firefly_pool.find_closest_parent(trial)
-    if self._utils.is_better_than(trial, closest_parent_fly.trial):
+    closest_parent_fly_id = self._firefly_pool.find_closest_parent(trial)
+    index = self._firefly_pool.find_index(closest_parent_fly_id)
+    if self._utils.get_reward(trial) > self._firefly_pool.rewards[index]:
       # Only returns the closest fly if there's improvement. Otherwise, we don't
       # return it to not count it as a failure, as the closest parent is not
       # reponsible for it.
-      return closest_parent_fly
+      return closest_parent_fly_id
 
-  def _penalize_parent_fly(self, parent_fly: Firefly, trial: vz.Trial) -> None:
+  def _penalize_parent_fly(self, parent_fly_id: int, trial: vz.Trial) -> None:
     """Penalizes a parent fly.
 
     The method is called on a fly after its generated trial didn't improve the
@@ -383,32 +372,34 @@ class EagleStrategyDesigner(vza.PartiallySerializableDesigner):
     capability and potentially removing it from the pool.
 
     Args:
-      parent_fly: The parent fly with to be penalized.
+      parent_fly_id: The id of the parent fly to be penalized.
       trial: The generated trial from the parent fly that didn't imporove.
     """
-    if trial.parameters == parent_fly.trial.parameters:
+    index = self._firefly_pool.find_index(parent_fly_id)
+    perturbation = self._firefly_pool.perturbations[index]
+    if np.array_equal(
+        self._utils.parameters_to_features(trial.parameters),
+        self._firefly_pool.features[index]):
       # If the new trial is identical to the parent trial, it means that the
       # fly is stuck, and so we increase its perturbation.
-      parent_fly.perturbation = min(parent_fly.perturbation * 10,
-                                    self.config.max_perturbation)
+      perturbation = min(perturbation * 10, self.config.max_perturbation)
       logging.info(
           'Penalize Parent Id: %s. Parameters are stuck. '
-          'New perturbation factor: %s', parent_fly.id_,
-          parent_fly.perturbation)
+          'New perturbation factor: %s', parent_fly_id, perturbation)
     else:
       # Otherwise, penalize the parent by decreasing its perturbation factor.
-      parent_fly.perturbation *= 0.9
+      perturbation *= 0.9
       logging.info(
           'Penalize Parent Id: %s. Decrease perturbation factor. '
-          'New perturbation factor: %s', parent_fly.id_,
-          parent_fly.perturbation)
-    if parent_fly.perturbation < self.config.perturbation_lower_bound:
+          'New perturbation factor: %s', parent_fly_id, perturbation)
+    self._firefly_pool.set_perturbation(parent_fly_id, perturbation)
+    if perturbation < self.config.perturbation_lower_bound:
       # If the perturbation factor is too low we attempt to eliminate the
       # unsuccessful parent fly from the pool.
       if self._firefly_pool.size == self._firefly_pool.capacity:
         # Only remove if the pool is at capacity. This is critical in studies
         # with few feasible/safe trials to retain the feasible trials.
-        if not self._firefly_pool.is_best_fly(parent_fly):
+        if not self._firefly_pool.is_best_fly(parent_fly_id):
           # Check that the fly is not the best one we have thus far.
-          self._firefly_pool.remove_fly(parent_fly)
-          logging.info('Removed fly ID: %s from pool.', parent_fly.id_)
+          self._firefly_pool.remove_fly(parent_fly_id)
+          logging.info('Removed fly ID: %s from pool.', parent_fly_id)
@@ -67,7 +67,9 @@ class EagleStrategyTest(parameterized.TestCase):
     trial = testing.create_fake_trial(
         parent_fly_id=98, x_value=1.42, obj_value=100.0)
     eagle_designer._update_one(trial)
-    self.assertIs(eagle_designer._firefly_pool._pool[3].trial, trial)
+    self.assertEqual(eagle_designer._firefly_pool.get_fly(3).trial.parameters,
+                     trial.parameters)
+    self.assertEqual(eagle_designer._firefly_pool.get_fly(3).generation, 2)
 
   def test_update_capacitated_pool_no_parent_fly_trial_is_not_better(self):
     eagle_designer = testing.create_fake_populated_eagle_designer(
@@ -75,9 +77,10 @@ class EagleStrategyTest(parameterized.TestCase):
         obj_values=[1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11])
     trial = testing.create_fake_trial(
         parent_fly_id=98, x_value=1.42, obj_value=-80.0)
-    prev_trial = eagle_designer._firefly_pool._pool[3].trial
+    prev_trial = eagle_designer._firefly_pool.get_fly(3).trial
     eagle_designer._update_one(trial)
-    self.assertIs(eagle_designer._firefly_pool._pool[3].trial, prev_trial)
+    self.assertEqual(eagle_designer._firefly_pool.get_fly(3).trial.parameters,
+                     prev_trial.parameters)
 
   def test_update_capacitated_pool_with_parent_fly_trial_is_better(self):
     eagle_designer = testing.create_fake_populated_eagle_designer(
@@ -86,7 +89,8 @@ class EagleStrategyTest(parameterized.TestCase):
     trial = testing.create_fake_trial(
         parent_fly_id=2, x_value=3.3, obj_value=80.0)
     eagle_designer._update_one(trial)
-    self.assertIs(eagle_designer._firefly_pool._pool[2].trial, trial)
+    self.assertEqual(eagle_designer._firefly_pool.get_fly(2).trial.parameters,
+                     trial.parameters)
 
   def test_update_capacitated_pool_with_parent_fly_trial_is_not_better(self):
     eagle_designer = testing.create_fake_populated_eagle_designer(
@@ -94,16 +98,19 @@ class EagleStrategyTest(parameterized.TestCase):
         obj_values=[1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11])
     trial = testing.create_fake_trial(
         parent_fly_id=2, x_value=3.3, obj_value=-80.0)
-    prev_trial = eagle_designer._firefly_pool._pool[2].trial
+    prev_trial = eagle_designer._firefly_pool.get_fly(2).trial
     eagle_designer._update_one(trial)
-    self.assertIs(eagle_designer._firefly_pool._pool[2].trial, prev_trial)
+    self.assertEqual(eagle_designer._firefly_pool.get_fly(2).trial.parameters,
+                     prev_trial.parameters)
+    self.assertLess(eagle_designer._firefly_pool.get_fly(2).perturbation, 1.0)
 
   def test_update_empty_pool(self):
     eagle_designer = testing.create_fake_empty_eagle_designer()
     trial = testing.create_fake_trial(
         parent_fly_id=0, x_value=3.3, obj_value=0.0)
     eagle_designer._update_one(trial)
-    self.assertIs(eagle_designer._firefly_pool._pool[0].trial, trial)
+    self.assertEqual(eagle_designer._firefly_pool.get_fly(0).trial.parameters,
+                     trial.parameters)
 
   def test_linear_scale(self):
     problem = vz.ProblemStatement(metric_information=[
@@ -15,10 +15,9 @@
 """Utils functions to support Eagle Strategy designer."""
 
 import collections
-import copy
 import logging
 import math
-from typing import Optional, Dict, DefaultDict
+from typing import Optional, Dict, DefaultDict, List
 import attr
 import numpy as np
 from vizier import pyvizier as vz
@@ -28,6 +27,15 @@ from vizier._src.algorithms.random import random_sample
 # serializing trials as part of the FireflyPool.
 OBJECTIVE_NAME = 'objective'
 
+# The parameter types in the order of the columns of the squared distances and
+# the pull weights by type.
+_PARAMETER_TYPES = (
+    vz.ParameterType.DOUBLE,
+    vz.ParameterType.INTEGER,
+    vz.ParameterType.DISCRETE,
+    vz.ParameterType.CATEGORICAL,
+)
+
 
 @attr.define
 class FireflyAlgorithmConfig:
@@ -56,6 +64,9 @@ class FireflyAlgorithmConfig:
 class Firefly:
   """The Firefly class represents a single firefly in the pool.
 
+  The FireflyPool stores its fireflies as arrays, and a Firefly is a snapshot
+  of one of them. Modifying it doesn't modify the pool.
+
   Attributes:
     id_: A unique firefly identifier. This is used to associate trials with
       their parent fireflies.
@@ -92,6 +103,19 @@ class EagleStrategyUtils:
       init=False, factory=lambda: collections.defaultdict(int))
   _original_metric_name: str = attr.field(init=False)
   _goal: vz.ObjectiveMetricGoal = attr.field(init=False)
+  # Attributes of the parameters used by the array operations on features.
+  _parameter_configs: List[vz.ParameterConfig] = attr.field(
+      init=False, repr=False)
+  _feasible_values: List[Optional[list]] = attr.field(init=False, repr=False)
+  _category_indices: List[Optional[Dict[str, int]]] = attr.field(
+      init=False, repr=False)
+  _lower_bounds: np.ndarray = attr.field(init=False, repr=False)
+  _upper_bounds: np.ndarray = attr.field(init=False, repr=False)
+  _ranges: np.ndarray = attr.field(init=False, repr=False)
+  _type_indices: np.ndarray = attr.field(init=False, repr=False)
+  _is_categorical: np.ndarray = attr.field(init=False, repr=False)
+  _is_integer: np.ndarray = attr.field(init=False, repr=False)
+  _perturb_scales: np.ndarray = attr.field(init=False, repr=False)
 
   def __attrs_post_init__(self):
     """Initialize and cache common values and objects."""
@@ -100,8 +124,55 @@ class EagleStrategyUtils:
     self._cache_degrees_of_freedom()
     self._original_metric_name = self.problem_statement.single_objective_metric_name
     self._goal = self.problem_statement.metric_information.item().goal
+    self._cache_parameter_arrays()
     logging.info('EagleStrategyUtils was created.\n%s', str(self))
 
+  @property
+  def n_parameters(self) -> int:
+    return self._n_parameters
+
+  def _cache_parameter_arrays(self) -> None:
+    """Caches the parameter attributes used by the array operations.
+
+    Features are arrays with a column per parameter, in the order of the search
+    space parameters. Numeric parameters are represented by their values and
+    categorical parameters by the index of their values in `feasible_values`.
+    """
+    self._parameter_configs = list(self._search_space.parameters)
+    self._feasible_values = []
+    self._category_indices = []
+    lower_bounds, upper_bounds = [], []
+    for param_config in self._parameter_configs:
+      if param_config.type in (vz.ParameterType.CATEGORICAL,
+                               vz.ParameterType.DISCRETE):
+        feasible_values = list(param_config.feasible_values)
+      else:
+        feasible_values = None
+      self._feasible_values.append(feasible_values)
+      if param_config.type == vz.ParameterType.CATEGORICAL:
+        self._category_indices.append(
+            {value: i for i, value in enumerate(feasible_values)})
+        lower_bounds.append(0.0)
+        upper_bounds.append(float(len(feasible_values) - 1))
+      else:
+        self._category_indices.append(None)
+        lower_bounds.append(float(param_config.bounds[0]))
+        upper_bounds.append(float(param_config.bounds[1]))
+    self._type_indices = np.asarray(
+        [_PARAMETER_TYPES.index(p.type) for p in self._parameter_configs],
+        dtype=int)
+    self._is_categorical = self._type_indices == _PARAMETER_TYPES.index(
+        vz.ParameterType.CATEGORICAL)
+    self._is_integer = self._type_indices == _PARAMETER_TYPES.index(
+        vz.ParameterType.INTEGER)
+    self._lower_bounds = np.asarray(lower_bounds)
+    self._upper_bounds = np.asarray(upper_bounds)
+    ranges = self._upper_bounds - self._lower_bounds
+    # Categorical differences are not scaled, and parameters with a single
+    # feasible value have no differences.
+    self._ranges = np.where(self._is_categorical | (ranges == 0), 1.0, ranges)
+    self._perturb_scales = self._param_perturb_scales
+
   def compute_pull_weight_by_type(
       self,
       other_parameters: vz.ParameterDict,
@@ -265,7 +336,7 @@ class EagleStrategyUtils:
     perturbations = self.rng.laplace(size=(self._n_parameters,))
     perturbation_direction = perturbations / max(abs(perturbations))
     perturbations = perturbation_direction * perturbation
-    return [float(x) for x in perturbations * self._param_perturb_scales]
+    return [float(x) for x in perturbations * self._perturb_scales]
 
   def perturb_parameter(
       self,
@@ -316,10 +387,197 @@ class EagleStrategyUtils:
     else:
       raise Exception('Invalid parameter type: %s' % param_config.type)
 
+  def parameters_to_features(self, parameters: vz.ParameterDict) -> np.ndarray:
+    """Converts parameters to features of shape (n_parameters,)."""
+    features = np.empty(self._n_parameters)
+    for i, param_config in enumerate(self._parameter_configs):
+      value = parameters[param_config.name].value
+      if self._category_indices[i] is not None:
+        features[i] = self._category_indices[i][value]
+      else:
+        features[i] = value
+    return features
+
+  def features_to_parameters(self, features: np.ndarray) -> vz.ParameterDict:
+    """Converts features of shape (n_parameters,) to parameters."""
+    parameters = vz.ParameterDict()
+    for i, param_config in enumerate(self._parameter_configs):
+      if param_config.type == vz.ParameterType.CATEGORICAL:
+        parameters[param_config.name] = self._feasible_values[i][int(
+            features[i])]
+      elif param_config.type == vz.ParameterType.INTEGER:
+        parameters[param_config.name] = int(round(features[i]))
+      else:
+        parameters[param_config.name] = float(features[i])
+    return parameters
+
+  def _compute_squared_distances_by_type(
+      self,
+      features: np.ndarray,
+      other_features: np.ndarray,
+  ) -> np.ndarray:
+    """Array version of `_compute_canonical_distance_squared_by_type`.
+
+    Args:
+      features: (n, n_parameters)
+      other_features: (n_parameters,)
+
+    Returns:
+      Squared distances of shape (n, len(_PARAMETER_TYPES)).
+    """
+    diffs = (features - other_features) / self._ranges
+    squared_distances = np.where(self._is_categorical,
+                                 features == other_features, diffs * diffs)
+    squared_distances_by_type = np.zeros((len(features), len(_PARAMETER_TYPES)))
+    for i in range(len(_PARAMETER_TYPES)):
+      squared_distances_by_type[:, i] = np.sum(
+          squared_distances[:, self._type_indices == i], axis=-1)
+    return squared_distances_by_type
+
+  def compute_canonical_distances(
+      self,
+      features: np.ndarray,
+      other_features: np.ndarray,
+  ) -> np.ndarray:
+    """Array version of `compute_cononical_distance`, of shape (n,)."""
+    return np.sum(
+        self._compute_squared_distances_by_type(features, other_features),
+        axis=-1)
+
+  def compute_pull_weights(
+      self,
+      features: np.ndarray,
+      moving_features: np.ndarray,
+      is_better: np.ndarray,
+  ) -> np.ndarray:
+    """Array version of `compute_pull_weight_by_type`.
+
+    Args:
+      features: The features of the pulling flies of shape (n, n_parameters).
+      moving_features: The features of the moving fly of shape (n_parameters,).
+      is_better: Whether each pulling fly is better than the moving fly, of
+        shape (n,).
+
+    Returns:
+      The pull weight on each feature of shape (n, n_parameters).
+    """
+    squared_distances = self._compute_squared_distances_by_type(
+        features, moving_features)
+    degrees_of_freedom = np.asarray(
+        [self._degrees_of_freedom.get(t, 0) for t in _PARAMETER_TYPES])
+    visibilities = np.asarray([
+        self.config.visibility, self.config.discrete_visibility,
+        self.config.discrete_visibility, self.config.categorical_visibility
+    ])
+    scaled_squared_distances = squared_distances / np.maximum(
+        degrees_of_freedom, 1) * 10
+    pull_weights = np.where(degrees_of_freedom > 0,
+                            np.exp(-visibilities * scaled_squared_distances),
+                            0.0)
+    pull_directions = np.where(is_better, self.config.gravity,
+                               self.config.negative_gravity)
+    pull_weights *= pull_directions[:, np.newaxis]
+    return pull_weights[:, self._type_indices]
+
+  def combine_features(
+      self,
+      features: np.ndarray,
+      moving_features: np.ndarray,
+      pull_weights: np.ndarray,
+  ) -> np.ndarray:
+    """Applies the pulls of all the flies on the moving fly features.
+
+    The pulls are applied in random order, as if `combine_two_parameters` was
+    called with each fly in turn, but the weights are computed beforehand from
+    the position of the moving fly. For numeric features the sequence of linear
+    combinations is computed in closed form, and then rounded and clipped.
+    A categorical feature takes the value of each fly with probability equal to
+    its weight, so it ends up with the value of the last successful fly.
+
+    Args:
+      features: The features of the pulling flies of shape (n, n_parameters).
+      moving_features: The features of the moving fly of shape (n_parameters,).
+      pull_weights: The pull weights of shape (n, n_parameters).
+
+    Returns:
+      The combined features of shape (n_parameters,).
+    """
+    order = self.rng.permutation(len(features))
+    features, pull_weights = features[order], pull_weights[order]
+    # The weight of each value in the final combination is its pull weight times
+    # the product of (1 - pull weight) of the pulls applied after it.
+    remaining_weights = np.flip(
+        np.cumprod(np.flip(1.0 - pull_weights, axis=0), axis=0), axis=0)
+    later_weights = np.concatenate(
+        [remaining_weights[1:], np.ones((1, self._n_parameters))])
+    new_features = moving_features * remaining_weights[0] + np.sum(
+        pull_weights * later_weights * features, axis=0)
+
+    if np.any(self._is_categorical):
+      is_pulled = self.rng.uniform(size=pull_weights.shape) < pull_weights
+      # The index of the last successful pull of each feature.
+      last_pulled = len(features) - 1 - np.argmax(is_pulled[::-1], axis=0)
+      pulled_features = features[last_pulled, np.arange(self._n_parameters)]
+      new_features = np.where(
+          self._is_categorical,
+          np.where(np.any(is_pulled, axis=0), pulled_features, moving_features),
+          new_features)
+    return self._snap_to_feasible(new_features)
+
+  def perturb_features(self, features: np.ndarray,
+                       perturbation: float) -> np.ndarray:
+    """Array version of `perturb_parameter` for all the parameters.
+
+    Args:
+      features: The features of shape (n_parameters,).
+      perturbation: The perturbation of the fly.
+
+    Returns:
+      The perturbed features of shape (n_parameters,).
+    """
+    perturbations = np.asarray(self.create_perturbations(perturbation))
+    new_features = features + perturbations * self._ranges
+    if np.any(self._is_categorical):
+      # A categorical feature is replaced by a uniformly random category with
+      # probability equal to the absolute value of its perturbation.
+      is_resampled = self.rng.uniform(
+          size=self._n_parameters) < np.abs(perturbations)
+      num_categories = np.where(self._is_categorical,
+                                self._upper_bounds + 1, 1).astype(int)
+      new_features = np.where(
+          self._is_categorical,
+          np.where(is_resampled, self.rng.integers(num_categories), features),
+          new_features)
+    return self._snap_to_feasible(new_features)
+
+  def _snap_to_feasible(self, features: np.ndarray) -> np.ndarray:
+    """Clips, rounds and snaps the features to the feasible values."""
+    features = np.clip(features, self._lower_bounds, self._upper_bounds)
+    features = np.where(self._is_integer, np.round(features), features)
+    for i, feasible_values in enumerate(self._feasible_values):
+      if feasible_values is not None and not self._is_categorical[i]:
+        feasible_values = np.asarray(feasible_values)
+        features[i] = feasible_values[np.argmin(
+            np.abs(feasible_values - features[i]))]
+    return features
+
   def get_metric(self, trial: vz.Trial) -> float:
     """Returns the trial metric."""
     return trial.final_measurement.metrics[OBJECTIVE_NAME]
 
+  def get_reward(self, trial: vz.Trial) -> float:
+    """Returns the trial metric value, negated for minimization problems."""
+    value = trial.final_measurement.metrics[OBJECTIVE_NAME].value
+    if self._goal == vz.ObjectiveMetricGoal.MAXIMIZE:
+      return value
+    return -value
+
+  def reward_to_metric(self, reward: float) -> float:
+    """Inverse of `get_reward`."""
+    if self._goal == vz.ObjectiveMetricGoal.MAXIMIZE:
+      return reward
+    return -reward
+
   def is_better_than(
       self,
       trial1: vz.Trial,
@@ -391,15 +649,29 @@ class EagleStrategyUtils:
       return f'Parameters: {parameters}'
 
 
+
+
 @attr.define
 class FireflyPool:
   """The class maintains the Firefly pool and relevent operations.
 
+  The flies are stored in arrays, in the order they were added to the pool, so
+  that the operations on the whole pool are vectorized. The arrays should only
+  be modified through the pool methods.
+
   Attributes:
     utils: Eagle Strategy utils class.
     capacity: The maximum number of flies that the pool could store.
     size: The current number of flies in the pool.
-    _pool: A dictionary of Firefly objects organized by firefly id.
+    ids: Array with dimensions (size,) storing the firefly ids.
+    features: Array with dimensions (size, n_parameters) storing the features
+      of the best trial associated with each firefly. See
+      `EagleStrategyUtils.parameters_to_features`.
+    rewards: Array with dimensions (size,) storing the objective value of the
+      best trial associated with each firefly, negated for minimization.
+    perturbations: Array with dimensions (size,) storing the firefly
+      perturbations.
+    generations: Array with dimensions (size,) storing the firefly generations.
     _last_id: The last firefly id used to generate a suggestion. It's persistent
       across calls to ensure we don't use the same fly repeatedly.
     _max_fly_id: The maximum value of any fly id ever created. It's persistent
@@ -410,23 +682,119 @@ class FireflyPool:
 
   capacity: int = attr.field(validator=attr.validators.instance_of(int))
 
-  _pool: Dict[int, Firefly] = attr.field(init=False, default=attr.Factory(dict))
+  _ids: np.ndarray = attr.field(init=False, repr=False)
+
+  _features: np.ndarray = attr.field(init=False, repr=False)
+
+  _rewards: np.ndarray = attr.field(init=False, repr=False)
+
+  _perturbations: np.ndarray = attr.field(init=False, repr=False)
+
+  _generations: np.ndarray = attr.field(init=False, repr=False)
 
   _last_id: int = attr.field(init=False, default=0)
 
   _max_fly_id: int = attr.field(init=False, default=0)
 
+  def __attrs_post_init__(self):
+    self.set_arrays(
+        ids=np.zeros(0, dtype=int),
+        features=np.zeros((0, self.utils.n_parameters)),
+        rewards=np.zeros(0),
+        perturbations=np.zeros(0),
+        generations=np.zeros(0, dtype=int))
+
+  def set_arrays(self, *, ids: np.ndarray, features: np.ndarray,
+                 rewards: np.ndarray, perturbations: np.ndarray,
+                 generations: np.ndarray) -> None:
+    """Replaces the flies of the pool, e.g. when restoring its state."""
+    if not (len(ids) == len(features) == len(rewards) == len(perturbations) ==
+            len(generations)):
+      raise ValueError('The arrays of the pool must have the same length.')
+    self._ids = np.asarray(ids, dtype=int)
+    self._features = np.asarray(features, dtype=float)
+    self._rewards = np.asarray(rewards, dtype=float)
+    self._perturbations = np.asarray(perturbations, dtype=float)
+    self._generations = np.asarray(generations, dtype=int)
+
   @property
   def size(self) -> int:
-    return len(self._pool)
+    return len(self._ids)
 
-  def remove_fly(self, fly: Firefly):
-    """Removes a fly from the pool."""
-    del self._pool[fly.id_]
+  @property
+  def ids(self) -> np.ndarray:
+    return self._ids
 
-  def get_shuffled_flies(self, rng: np.random.Generator) -> list[Firefly]:
-    """Shuffles the fireflies and returns them as a list."""
-    return random_sample.shuffle_list(rng, list(self._pool.values()))
+  @property
+  def features(self) -> np.ndarray:
+    return self._features
+
+  @property
+  def rewards(self) -> np.ndarray:
+    return self._rewards
+
+  @property
+  def perturbations(self) -> np.ndarray:
+    return self._perturbations
+
+  @property
+  def generations(self) -> np.ndarray:
+    return self._generations
+
+  def find_index(self, fly_id: Optional[int]) -> Optional[int]:
+    """Returns the index of the fly in the arrays or None if it isn't found."""
+    indices = np.flatnonzero(self._ids == fly_id)
+    return int(indices[0]) if indices.size else None
+
+  def get_fly(self, fly_id: int) -> Optional[Firefly]:
+    """Returns a snapshot of the fly, or None if it's not in the pool."""
+    index = self.find_index(fly_id)
+    if index is None:
+      return None
+    trial = vz.Trial(
+        parameters=self.utils.features_to_parameters(self._features[index]))
+    trial.complete(
+        vz.Measurement(
+            metrics={
+                OBJECTIVE_NAME:
+                    self.utils.reward_to_metric(float(self._rewards[index]))
+            }),
+        inplace=True)
+    return Firefly(
+        id_=int(self._ids[index]),
+        perturbation=float(self._perturbations[index]),
+        generation=int(self._generations[index]),
+        trial=trial)
+
+  def add_fly(self, fly: Firefly) -> None:
+    """Adds a fly to the pool."""
+    self._ids = np.append(self._ids, fly.id_)
+    self._features = np.concatenate([
+        self._features,
+        self.utils.parameters_to_features(fly.trial.parameters)[np.newaxis]
+    ])
+    self._rewards = np.append(self._rewards, self.utils.get_reward(fly.trial))
+    self._perturbations = np.append(self._perturbations, fly.perturbation)
+    self._generations = np.append(self._generations, fly.generation)
+
+  def remove_fly(self, fly_id: int) -> None:
+    """Removes a fly from the pool."""
+    is_kept = self._ids != fly_id
+    self._ids = self._ids[is_kept]
+    self._features = self._features[is_kept]
+    self._rewards = self._rewards[is_kept]
+    self._perturbations = self._perturbations[is_kept]
+    self._generations = self._generations[is_kept]
+
+  def update_fly(self, fly_id: int, trial: vz.Trial) -> None:
+    """Replaces the trial of a fly after an improvement."""
+    index = self.find_index(fly_id)
+    self._features[index] = self.utils.parameters_to_features(trial.parameters)
+    self._rewards[index] = self.utils.get_reward(trial)
+    self._generations[index] += 1
+
+  def set_perturbation(self, fly_id: int, perturbation: float) -> None:
+    self._perturbations[self.find_index(fly_id)] = perturbation
 
   def generate_new_fly_id(self) -> int:
     """Generates a unique fly id to identify a fly in the pool."""
@@ -434,71 +802,36 @@ class FireflyPool:
     logging.info('New fly id generated (%s).', self._max_fly_id - 1)
     return self._max_fly_id - 1
 
-  def get_next_moving_fly_copy(self) -> Firefly:
-    """Finds the next fly, returns a copy of it and updates '_last_id'.
+  def get_next_moving_fly_id(self) -> int:
+    """Finds the next fly id and updates '_last_id'.
 
-    To find the next moving fly, we start from index of '_last_id'+1 and
-    incremently check whether the index exists in the pool. When the loop
-    reaches 'max_fly_id' it goes back to index 0. We return a copy of the
-    first fly we find an index for. Before returning we also set '_last_id'
-    to the next moving fly id.
+    The next moving fly is the fly with the smallest id larger than '_last_id'.
+    If there's none, we go back to the first fly in the pool.
 
     Note that we don't assume the existance of '_last_id' in the pool, as the
     fly with `_last_id` might be removed from the pool.
 
     Returns:
-      A copy of the next moving fly.
+      The id of the next moving fly.
     """
-    current_fly_id = self._last_id + 1
-    while current_fly_id != self._last_id:
-      if current_fly_id > self._max_fly_id:
-        # Passed the maximum id. Start from the first one as ids are monotonic.
-        current_fly_id = next(iter(self._pool))
-      if current_fly_id in self._pool:
-        self._last_id = current_fly_id
-        return copy.deepcopy(self._pool[current_fly_id])
-      current_fly_id += 1
-
-    logging.info("Couldn't find another fly in the pool to move.")
-    return copy.deepcopy(self._pool[self._last_id])
-
-  def is_best_fly(self, fly: Firefly) -> bool:
-    """Checks if the 'fly' has the best final measurement in the pool."""
-    for other_fly_id, other_fly in self._pool.items():
-      if other_fly_id != fly.id_ and self.utils.is_better_than(
-          other_fly.trial, fly.trial):
-        return False
-    return True
-
-  def find_parent_fly(self, parent_fly_id: Optional[int]) -> Optional[Firefly]:
-    """Obtains the parent firefly associated with the trial.
-
-    Extract the associated parent id from the trial's metadata and attempt
-    to find the parent firefly in the pool. If it doesn't exist return None.
+    next_ids = self._ids[self._ids > self._last_id]
+    if next_ids.size:
+      self._last_id = int(np.min(next_ids))
+    else:
+      self._last_id = int(self._ids[0])
+    return self._last_id
 
-    Args:
-      parent_fly_id:
+  def is_best_fly(self, fly_id: int) -> bool:
+    """Checks if the fly has the best final measurement in the pool."""
+    return bool(self._rewards[self.find_index(fly_id)] >= np.max(self._rewards))
 
-    Returns:
-      Firefly or None.
-    """
-    parent_fly = self._pool.get(parent_fly_id, None)
-    return parent_fly
-
-  def find_closest_parent(self, trial: vz.Trial) -> Firefly:
-    """Finds the closest fly in the pool to a given trial."""
-    if not self._pool:
+  def find_closest_parent(self, trial: vz.Trial) -> int:
+    """Finds the id of the closest fly in the pool to a given trial."""
+    if not self.size:
       raise Exception('Pool was empty when searching for closest parent.')
-
-    min_dist, closest_parent = float('inf'), next(iter(self._pool.values()))
-    for other_fly in self._pool.values():
-      curr_dist = self.utils.compute_cononical_distance(
-          other_fly.trial.parameters, trial.parameters)
-      if curr_dist < min_dist:
-        min_dist = curr_dist
-        closest_parent = other_fly
-
-    return closest_parent
+    distances = self.utils.compute_canonical_distances(
+        self._features, self.utils.parameters_to_features(trial.parameters))
+    return int(self._ids[np.argmin(distances)])
 
   def create_or_update_fly(self, trial: vz.Trial, parent_fly_id: int) -> None:
     """Creates a new fly in the pool or update an existing one.
@@ -521,17 +854,21 @@ class FireflyPool:
       trial:
       parent_fly_id:
     """
-    if parent_fly_id not in self._pool:
+    index = self.find_index(parent_fly_id)
+    if index is None:
       # Create a new Firefly in pool.
       logging.info('Create a fly in pool. Parent fly ID: %s.', parent_fly_id)
-      new_fly = Firefly(
-          id_=parent_fly_id,
-          generation=1,
-          perturbation=self.utils.config.perturbation,
-          trial=trial)
-      self._pool[parent_fly_id] = new_fly
+      self.add_fly(
+          Firefly(
+              id_=parent_fly_id,
+              generation=1,
+              perturbation=self.utils.config.perturbation,
+              trial=trial))
     else:
       # Parent fly id already in pool. Update trial if there was improvement.
       logging.info('Parent fly ID (%s) is already in the pool.', parent_fly_id)
-      if self.utils.is_better_than(trial, self._pool[parent_fly_id].trial):
-        self._pool[parent_fly_id].trial = trial
+      reward = self.utils.get_reward(trial)
+      if reward > self._rewards[index]:
+        self._features[index] = self.utils.parameters_to_features(
+            trial.parameters)
+        self._rewards[index] = reward
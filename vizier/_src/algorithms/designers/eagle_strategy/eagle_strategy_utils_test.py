@@ -265,6 +265,68 @@ class UtilsTest(parameterized.TestCase):
     self.assertEqual(new_trial.parameters['f1'].value, 0.0)
     self.assertEqual(new_trial.metadata.ns('eagle')['parent_fly_id'], '123')
 
+  def test_features_round_trip(self):
+    features = self.utils.parameters_to_features(self.param_dict1)
+    self.assertEqual(features.shape, (6,))
+    self.assertEqual(self.utils.features_to_parameters(features),
+                     self.param_dict1)
+
+  def test_compute_canonical_distances(self):
+    features = np.stack([
+        self.utils.parameters_to_features(self.param_dict1),
+        self.utils.parameters_to_features(self.param_dict2)
+    ])
+    dists = self.utils.compute_canonical_distances(
+        features, self.utils.parameters_to_features(self.param_dict2))
+    np.testing.assert_allclose(dists, [
+        self.utils.compute_cononical_distance(self.param_dict1,
+                                              self.param_dict2),
+        self.utils.compute_cononical_distance(self.param_dict2,
+                                              self.param_dict2)
+    ])
+
+  def test_compute_pull_weights(self):
+    features = np.stack([
+        self.utils.parameters_to_features(self.param_dict1),
+        self.utils.parameters_to_features(self.param_dict2)
+    ])
+    pull_weights = self.utils.compute_pull_weights(
+        features, self.utils.parameters_to_features(self.param_dict2),
+        np.array([True, False]))
+    for i, (params, is_better) in enumerate([(self.param_dict1, True),
+                                             (self.param_dict2, False)]):
+      expected = self.utils.compute_pull_weight_by_type(
+          params, self.param_dict2, is_better)
+      for j, param_config in enumerate(self.search_space.parameters):
+        self.assertAlmostEqual(pull_weights[i, j], expected[param_config.type])
+
+  def test_combine_features_applies_pulls_in_sequence(self):
+    features = self.rng.uniform(0.0, 10.0, size=(5, 6))
+    moving_features = self.rng.uniform(0.0, 10.0, size=(6,))
+    pull_weights = self.rng.uniform(size=(5, 6))
+    order = copy.deepcopy(self.utils.rng).permutation(5)
+    combined = self.utils.combine_features(features, moving_features,
+                                           pull_weights)
+    # Replay the pulls in the same order, as `combine_two_parameters` does.
+    expected = moving_features.copy()
+    for i in order:
+      expected = expected * (1 - pull_weights[i]) + features[i] * pull_weights[i]
+    for j, param_config in enumerate(self.search_space.parameters):
+      if param_config.type == vz.ParameterType.DOUBLE:
+        self.assertAlmostEqual(combined[j], expected[j])
+
+  def test_combine_and_perturb_features_are_feasible(self):
+    features = np.stack([
+        self.utils.parameters_to_features(self.param_dict1),
+        self.utils.parameters_to_features(self.param_dict2)
+    ])
+    combined = self.utils.combine_features(features, features[0],
+                                           np.full((2, 6), 0.5))
+    for perturbation in [0.01, 0.5, 1.0]:
+      perturbed = self.utils.perturb_features(combined, perturbation)
+      parameters = self.utils.features_to_parameters(perturbed)
+      self.assertTrue(self.search_space.contains(parameters))
+
 
 class FireflyPoolTest(absltest.TestCase):
 
@@ -282,68 +344,58 @@ class FireflyPoolTest(absltest.TestCase):
         parent_fly_id=112, x_value=0, obj_value=0.8)
     firefly_pool.create_or_update_fly(trial, 112)
     self.assertEqual(firefly_pool.size, 1)
-    self.assertLen(firefly_pool._pool, 1)
-    self.assertIs(firefly_pool._pool[112].trial, trial)
+    self.assertEqual(firefly_pool.get_fly(112).trial.parameters,
+                     trial.parameters)
     # Test that another trial with the same parent id updates the fly.
     trial2 = testing.create_fake_trial(
         parent_fly_id=112, x_value=1, obj_value=1.5)
     firefly_pool.create_or_update_fly(trial2, 112)
     self.assertEqual(firefly_pool.size, 1)
-    self.assertLen(firefly_pool._pool, 1)
-    self.assertIs(firefly_pool._pool[112].trial, trial2)
+    self.assertEqual(firefly_pool.get_fly(112).trial.parameters,
+                     trial2.parameters)
 
   def test_find_closest_parent(self):
     firefly_pool = testing.create_fake_populated_firefly_pool(
         x_values=[1, 2, 5], obj_values=[2, 10, -2], capacity=4)
     trial = testing.create_fake_trial(
         parent_fly_id=123, x_value=4.2, obj_value=8)
-    parent_fly = firefly_pool.find_closest_parent(trial)
-    self.assertEqual(parent_fly.id_, 2)
+    self.assertEqual(firefly_pool.find_closest_parent(trial), 2)
 
   def test_is_best_fly(self):
     firefly_pool = testing.create_fake_populated_firefly_pool(
         x_values=[1, 2, 5], obj_values=[2, 10, -2], capacity=4)
-    self.assertTrue(firefly_pool.is_best_fly(firefly_pool._pool[1]))
-    self.assertFalse(firefly_pool.is_best_fly(firefly_pool._pool[0]))
-    self.assertFalse(firefly_pool.is_best_fly(firefly_pool._pool[2]))
+    self.assertTrue(firefly_pool.is_best_fly(1))
+    self.assertFalse(firefly_pool.is_best_fly(0))
+    self.assertFalse(firefly_pool.is_best_fly(2))
 
-  def test_get_next_moving_fly_copy(self):
+  def test_get_next_moving_fly_id(self):
     firefly_pool = testing.create_fake_populated_firefly_pool(
         x_values=[1, 2, 5], obj_values=[2, 10, -2], capacity=5)
     firefly_pool._last_id = 1
-    moving_fly1 = firefly_pool.get_next_moving_fly_copy()
-    self.assertEqual(moving_fly1.id_, 2)
-    moving_fly2 = firefly_pool.get_next_moving_fly_copy()
-    self.assertEqual(moving_fly2.id_, 0)
-    moving_fly3 = firefly_pool.get_next_moving_fly_copy()
-    self.assertEqual(moving_fly3.id_, 1)
-
-  def test_get_next_moving_fly_copy_after_removing_last_id_fly(self):
+    self.assertEqual(firefly_pool.get_next_moving_fly_id(), 2)
+    self.assertEqual(firefly_pool.get_next_moving_fly_id(), 0)
+    self.assertEqual(firefly_pool.get_next_moving_fly_id(), 1)
+
+  def test_get_next_moving_fly_id_after_removing_last_id_fly(self):
     firefly_pool = testing.create_fake_populated_firefly_pool(
         x_values=[1, 2, 5], obj_values=[2, 10, -2], capacity=5)
     firefly_pool._last_id = 1
     # Remove the fly associated with `_last_id` from the pool.
-    del firefly_pool._pool[1]
-    moving_fly1 = firefly_pool.get_next_moving_fly_copy()
-    self.assertEqual(moving_fly1.id_, 2)
-    moving_fly2 = firefly_pool.get_next_moving_fly_copy()
-    self.assertEqual(moving_fly2.id_, 0)
-    moving_fly3 = firefly_pool.get_next_moving_fly_copy()
-    self.assertEqual(moving_fly3.id_, 2)
-
-  def test_get_next_moving_fly_copy_after_removing_multiple_flies(self):
+    firefly_pool.remove_fly(1)
+    self.assertEqual(firefly_pool.get_next_moving_fly_id(), 2)
+    self.assertEqual(firefly_pool.get_next_moving_fly_id(), 0)
+    self.assertEqual(firefly_pool.get_next_moving_fly_id(), 2)
+
+  def test_get_next_moving_fly_id_after_removing_multiple_flies(self):
     firefly_pool = testing.create_fake_populated_firefly_pool(
         x_values=[1, 2, 5, -1], obj_values=[2, 10, -2, 8], capacity=5)
     firefly_pool._last_id = 3
     # Remove the several flies
-    del firefly_pool._pool[0]
-    del firefly_pool._pool[2]
-    moving_fly1 = firefly_pool.get_next_moving_fly_copy()
-    self.assertEqual(moving_fly1.id_, 1)
-    moving_fly2 = firefly_pool.get_next_moving_fly_copy()
-    self.assertEqual(moving_fly2.id_, 3)
-    moving_fly3 = firefly_pool.get_next_moving_fly_copy()
-    self.assertEqual(moving_fly3.id_, 1)
+    firefly_pool.remove_fly(0)
+    firefly_pool.remove_fly(2)
+    self.assertEqual(firefly_pool.get_next_moving_fly_id(), 1)
+    self.assertEqual(firefly_pool.get_next_moving_fly_id(), 3)
+    self.assertEqual(firefly_pool.get_next_moving_fly_id(), 1)
 
 
 if __name__ == '__main__':
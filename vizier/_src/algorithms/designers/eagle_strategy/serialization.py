@@ -15,12 +15,13 @@
 """Eagle strategy designer serialization."""
 
 import json
-from typing import Any
+from typing import Any, Dict
 import attr
 import numpy as np
 from vizier import pyvizier as vz
 from vizier._src.algorithms.designers.eagle_strategy import eagle_strategy_utils
 from vizier.interfaces import serializable
+from vizier.utils import state_codec
 
 FireflyPool = eagle_strategy_utils.FireflyPool
 Firefly = eagle_strategy_utils.Firefly
@@ -28,43 +29,37 @@ EagleStrategyUtils = eagle_strategy_utils.EagleStrategyUtils
 OBJECTIVE_NAME = eagle_strategy_utils.OBJECTIVE_NAME
 
 
-class PartialFireflyPoolEncoder(json.JSONEncoder):
+# Keys of the arrays of the pool. Pools serialized before the pool was stored in
+# arrays have a '_pool' key instead, with a dictionary of fireflies.
+_ARRAY_KEYS = ('ids', 'features', 'rewards', 'perturbations', 'generations')
+
+
+def _encode_firefly_pool(firefly_pool: FireflyPool) -> Dict[str, Any]:
   """Eagle strategy pool partial encoder.
 
-  The encoder stores the '_pool' dictionary, 'capacity', '_last_id' and
-  '_max_fly_id' into a string format.
+  The encoder stores the arrays of the pool, 'capacity', '_last_id' and
+  '_max_fly_id'.
 
   The encoder does not store the EagleStrategyUtils as its state only depends
   on the random generator which is handled separately.
-  """
 
-  def default(self, o: Any) -> Any:
-
-    if isinstance(o, FireflyPool):
-      return {
-          'capacity': o.capacity,
-          # pylint: disable=protected-access
-          '_last_id': o._last_id,
-          '_max_fly_id': o._max_fly_id,
-          '_pool': o._pool,
-      }
-    elif isinstance(o, Firefly):
-      return {
-          'id_': o.id_,
-          'perturbation': o.perturbation,
-          'generation': o.generation,
-          'trial': o.trial,
-      }
-    elif isinstance(o, vz.Trial):
-      return {
-          'parameters':
-              o.parameters.as_dict(),
-          'objective':
-              o.final_measurement.metrics[eagle_strategy_utils.OBJECTIVE_NAME
-                                         ].value
-      }
-    else:
-      return json.JSONEncoder.default(self, o)
+  Args:
+    firefly_pool:
+
+  Returns:
+    The state of the pool, to be encoded with `state_codec`.
+  """
+  return {
+      'capacity': firefly_pool.capacity,
+      # pylint: disable=protected-access
+      '_last_id': firefly_pool._last_id,
+      '_max_fly_id': firefly_pool._max_fly_id,
+      'ids': firefly_pool.ids,
+      'features': firefly_pool.features,
+      'rewards': firefly_pool.rewards,
+      'perturbations': firefly_pool.perturbations,
+      'generations': firefly_pool.generations,
+  }
 
 
 @attr.define
@@ -80,42 +75,54 @@ class FireflyPoolDecoder:
 
   def decode(self, obj: Any) -> FireflyPool:
     """Decodes a string object to partial FireflyPool."""
-    obj_dict = json.loads(obj)
-    restored_pool = {}
+    obj_dict = state_codec.loads(obj)
 
     # Check that all keys appear in restored dictionary.
-    missing_keys = set(['_pool', 'capacity', '_last_id', '_max_fly_id']) - set(
-        obj_dict.keys())
+    pool_keys = ['_pool'] if '_pool' in obj_dict else list(_ARRAY_KEYS)
+    missing_keys = set(['capacity', '_last_id', '_max_fly_id'] +
+                       pool_keys) - set(obj_dict.keys())
     if missing_keys:
       raise serializable.HarmlessDecodeError(
           "Couldn't load FireflyPool from metadata. The following keys are "
           'missing: %s' % str(missing_keys))
 
-    # Restore FireFly objects in the pool.
-    for id_, fly in obj_dict['_pool'].items():
-      trial = vz.Trial(parameters=fly['trial']['parameters'])
-      trial.complete(
-          measurement=vz.Measurement(
-              metrics={'objective': fly['trial'][OBJECTIVE_NAME]}))
-      restored_pool[int(id_)] = Firefly(
-          id_=fly['id_'],
-          perturbation=fly['perturbation'],
-          generation=fly['generation'],
-          trial=trial)
-
     restored_capacity = int(obj_dict['capacity'])
     restored_firefly_pool = FireflyPool(
         capacity=restored_capacity, utils=self._utils)
+    if '_pool' in obj_dict:
+      self._restore_flies(restored_firefly_pool, obj_dict['_pool'])
+    else:
+      features = obj_dict['features']
+      if features.shape[1:] != (self._utils.n_parameters,):
+        raise serializable.HarmlessDecodeError(
+            "Couldn't load FireflyPool from metadata. The features have shape "
+            '%s but there are %s parameters.' %
+            (features.shape, self._utils.n_parameters))
+      restored_firefly_pool.set_arrays(
+          **{key: obj_dict[key] for key in _ARRAY_KEYS})
     # pylint: disable=protected-access
-    restored_firefly_pool._pool = restored_pool
     restored_firefly_pool._last_id = int(obj_dict['_last_id'])
     restored_firefly_pool._max_fly_id = int(obj_dict['_max_fly_id'])
     return restored_firefly_pool
 
+  def _restore_flies(self, firefly_pool: FireflyPool, flies: Any) -> None:
+    """Restores the flies of a pool serialized as a dictionary of flies."""
+    for fly in flies.values():
+      trial = vz.Trial(parameters=fly['trial']['parameters'])
+      trial.complete(
+          measurement=vz.Measurement(
+              metrics={'objective': fly['trial'][OBJECTIVE_NAME]}))
+      firefly_pool.add_fly(
+          Firefly(
+              id_=fly['id_'],
+              perturbation=fly['perturbation'],
+              generation=fly['generation'],
+              trial=trial))
+
 
 def partially_serialize_firefly_pool(firefly_pool: FireflyPool) -> str:
   """Serialize parts of the FireflyPool."""
-  return json.dumps(firefly_pool, cls=PartialFireflyPoolEncoder)
+  return state_codec.dumps(_encode_firefly_pool(firefly_pool))
 
 
 def restore_firefly_pool(utils: EagleStrategyUtils, obj: str) -> FireflyPool:
@@ -14,9 +14,13 @@
 
 """Tests for serialization."""
 
+import json
+
 import numpy as np
 from vizier._src.algorithms.designers.eagle_strategy import serialization
 from vizier._src.algorithms.designers.eagle_strategy import testing
+from vizier.interfaces import serializable
+from vizier.utils import state_codec
 
 from absl.testing import absltest
 
@@ -34,10 +38,10 @@ class SerializationTest(absltest.TestCase):
     self.assertEqual(restored_firefly_pool._last_id, firefly_pool._last_id)
     self.assertEqual(restored_firefly_pool._max_fly_id,
                      firefly_pool._max_fly_id)
-    self.assertEqual(
-        set(firefly_pool._pool.keys()), set(restored_firefly_pool._pool.keys()))
-    for fly_id, firefly in firefly_pool._pool.items():
-      restored_firefly = restored_firefly_pool._pool[fly_id]
+    np.testing.assert_array_equal(restored_firefly_pool.ids, firefly_pool.ids)
+    for fly_id in firefly_pool.ids:
+      firefly = firefly_pool.get_fly(fly_id)
+      restored_firefly = restored_firefly_pool.get_fly(fly_id)
       self.assertEqual(restored_firefly.id_, firefly.id_)
       self.assertEqual(restored_firefly.perturbation, firefly.perturbation)
       self.assertEqual(restored_firefly.generation, firefly.generation)
@@ -47,6 +51,46 @@ class SerializationTest(absltest.TestCase):
           restored_firefly.trial.final_measurement.metrics['objective'].value,
           firefly.trial.final_measurement.metrics['objective'].value)
 
+  def test_restore_pool_serialized_as_flies(self):
+    # Pools used to be serialized as a dictionary of flies.
+    encoded = json.dumps({
+        'capacity': 10,
+        '_last_id': 1,
+        '_max_fly_id': 4,
+        '_pool': {
+            '3': {
+                'id_': 3,
+                'perturbation': 0.5,
+                'generation': 2,
+                'trial': {
+                    'parameters': {
+                        'x': 1.5
+                    },
+                    'objective': 0.2
+                }
+            }
+        }
+    })
+    utils = testing.create_fake_empty_firefly_pool().utils
+    restored_firefly_pool = serialization.restore_firefly_pool(utils, encoded)
+    self.assertEqual(restored_firefly_pool.size, 1)
+    self.assertEqual(restored_firefly_pool._max_fly_id, 4)
+    restored_firefly = restored_firefly_pool.get_fly(3)
+    self.assertEqual(restored_firefly.perturbation, 0.5)
+    self.assertEqual(restored_firefly.generation, 2)
+    self.assertEqual(restored_firefly.trial.parameters['x'].value, 1.5)
+    self.assertEqual(
+        restored_firefly.trial.final_measurement.metrics['objective'].value,
+        0.2)
+
+  def test_restore_pool_with_other_parameters(self):
+    firefly_pool = testing.create_fake_populated_firefly_pool(capacity=20)
+    state = serialization._encode_firefly_pool(firefly_pool)
+    state['features'] = np.zeros((5, 2))
+    with self.assertRaises(serializable.HarmlessDecodeError):
+      serialization.restore_firefly_pool(firefly_pool.utils,
+                                         state_codec.dumps(state))
+
   def test_restore_rng(self):
     rng = np.random.default_rng(0)
     serialized_rng = serialization.serialize_rng(rng)
@@ -91,9 +91,9 @@ def create_fake_populated_firefly_pool(
   if not obj_values:
     obj_values = [float(o) for o in rng.uniform(low=-1.5, high=1.5, size=(5,))]
   for parent_fly_id, (obj_val, x_val) in enumerate(zip(obj_values, x_values)):
-    # pylint: disable=protected-access
-    firefly_pool._pool[parent_fly_id] = create_fake_fly(
-        parent_fly_id=parent_fly_id, x_value=x_val, obj_value=obj_val)
+    firefly_pool.add_fly(
+        create_fake_fly(
+            parent_fly_id=parent_fly_id, x_value=x_val, obj_value=obj_val))
   # pylint: disable=protected-access
   firefly_pool._max_fly_id = capacity
   return firefly_pool
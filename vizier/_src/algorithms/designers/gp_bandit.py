@@ -0,0 +1,598 @@
+# Copyright 2022 Google LLC.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""GP-bandit designer with incremental Cholesky updates.
+
+Unlike EmukitDesigner, which refits a GP from scratch on every `suggest()`, this
+designer keeps its model between calls:
+
+  * The Cholesky factor of the kernel matrix is extended with a block update
+    when new trials arrive, which costs O(n^2 m) for m new trials on top of n
+    observed ones, instead of O(n^3).
+  * The kernel hyperparameters are re-optimized only every
+    `hyperparameter_refit_interval` trials, or when the new trials drift away
+    from the predictions of the current model. Each optimization is
+    warm-started from the current hyperparameters.
+  * The UCB acquisition function is maximized on arrays by a
+    VectorizedOptimizer, so a `suggest()` call costs O(n^2) per evaluation.
+
+The model state is dumped into the metadata, so that the designer wrapped in
+PartiallySerializableDesignerPolicy doesn't refit its model on every call.
+"""
+
+import datetime
+import enum
+import json
+from typing import Optional, Sequence, Tuple
+
+from absl import logging
+import attr
+import numpy as np
+from scipy import linalg
+from scipy import optimize
+from vizier import algorithms as vza
+from vizier import pyvizier as vz
+from vizier._src.algorithms.designers import random
+from vizier._src.algorithms.optimizers import eagle_strategy as es
+from vizier._src.algorithms.optimizers import vectorized_base as vb
+from vizier.interfaces import serializable
+from vizier.pyvizier import converters
+from vizier.utils import state_codec
+
+# Hyperparameters are optimized in log space. The bounds are the ones of the
+# constrained GP in emukit.py, except for the signal variance whose prior is
+# centered on the variance of the standardized labels.
+_SIGNAL_VARIANCE_BOUNDS = (1e-3, 1e1)
+_NOISE_VARIANCE_BOUNDS = (1e-10, 1.0)
+_LENGTHSCALE_BOUNDS = (1e-2, 1e2)
+_PRIOR_MEANS = (0.0, -5.5, 0.0)
+_PRIOR_STDDEV = 4.6
+# Added to the diagonal of the kernel matrix for numerical stability.
+_JITTER = 1e-6
+
+
+def _log_bounds(num_features: int) -> np.ndarray:
+  """Bounds of [log signal variance, log noise variance, log lengthscales]."""
+  return np.log([_SIGNAL_VARIANCE_BOUNDS, _NOISE_VARIANCE_BOUNDS] +
+                [_LENGTHSCALE_BOUNDS] * num_features)
+
+
+def _prior_means(num_features: int) -> np.ndarray:
+  return np.array(_PRIOR_MEANS[:2] + _PRIOR_MEANS[2:] * num_features)
+
+
+def _scaled_squared_distances(x1: np.ndarray, x2: np.ndarray,
+                              lengthscales: np.ndarray) -> np.ndarray:
+  """Squared distances between the rows of x1 and x2 scaled by lengthscales."""
+  x1 = x1 / lengthscales
+  x2 = x2 / lengthscales
+  distances = (
+      np.sum(np.square(x1), axis=-1)[:, np.newaxis] +
+      np.sum(np.square(x2), axis=-1)[np.newaxis, :] - 2 * x1 @ x2.T)
+  return np.maximum(distances, 0.0)
+
+
+def _matern52(squared_distances: np.ndarray,
+              signal_variance: float) -> np.ndarray:
+  sqrt5_r = np.sqrt(5.0 * squared_distances)
+  return signal_variance * (1.0 + sqrt5_r +
+                            5.0 / 3.0 * squared_distances) * np.exp(-sqrt5_r)
+
+
+def _kernel(x1: np.ndarray, x2: np.ndarray,
+            log_params: np.ndarray) -> np.ndarray:
+  """Matern 5/2 kernel with ARD lengthscales, without the noise."""
+  return _matern52(
+      _scaled_squared_distances(x1, x2, np.exp(log_params[2:])),
+      np.exp(log_params[0]))
+
+
+def _neg_log_posterior(log_params: np.ndarray, features: np.ndarray,
+                       labels: np.ndarray) -> Tuple[float, np.ndarray]:
+  """Negative log marginal likelihood plus log prior, and its gradient."""
+  signal_variance, noise_variance = np.exp(log_params[:2])
+  lengthscales = np.exp(log_params[2:])
+  squared_distances = _scaled_squared_distances(features, features,
+                                                lengthscales)
+  kernel = _matern52(squared_distances, signal_variance)
+  try:
+    cholesky = linalg.cholesky(
+        kernel + (noise_variance + _JITTER) * np.eye(len(features)),
+        lower=True)
+  except linalg.LinAlgError:
+    return 1e10, np.zeros_like(log_params)
+  alpha = linalg.cho_solve((cholesky, True), labels)
+  value = (0.5 * labels @ alpha + np.sum(np.log(np.diag(cholesky))) +
+           0.5 * len(labels) * np.log(2 * np.pi))
+
+  # d(value)/d(theta) = 0.5 * sum(w * dK/d(theta)).
+  w = linalg.cho_solve((cholesky, True), np.eye(len(labels))) - np.outer(
+      alpha, alpha)
+  sqrt5_r = np.sqrt(5.0 * squared_distances)
+  # dK/d(log lengthscale_j) = g * (x_j - x'_j)^2 / lengthscale_j^2.
+  wg = w * signal_variance * 5.0 / 3.0 * (1.0 + sqrt5_r) * np.exp(-sqrt5_r)
+  scaled = features / lengthscales
+  lengthscale_grads = (
+      np.sum(np.square(scaled) * np.sum(wg, axis=1, keepdims=True), axis=0) -
+      np.sum(scaled * (wg @ scaled), axis=0))
+  grads = np.concatenate([[
+      0.5 * np.sum(w * kernel), 0.5 * noise_variance * np.trace(w)
+  ], lengthscale_grads])
+
+  prior_diffs = (log_params - _prior_means(features.shape[1])) / _PRIOR_STDDEV
+  value += 0.5 * np.sum(np.square(prior_diffs))
+  grads += prior_diffs / _PRIOR_STDDEV
+  return value, grads
+
+
+def _optimize_log_params(log_params: np.ndarray, features: np.ndarray,
+                         labels: np.ndarray, num_restarts: int,
+                         rng: np.random.Generator) -> np.ndarray:
+  """Maximizes the posterior of the hyperparameters with L-BFGS-B.
+
+  Args:
+    log_params: The initial hyperparameters.
+    features: (n, num_features) array.
+    labels: (n,) array of standardized labels.
+    num_restarts: The number of random initial hyperparameters that are tried
+      in addition to `log_params`.
+    rng: Generates the random initial hyperparameters.
+
+  Returns:
+    The best hyperparameters found.
+  """
+  bounds = _log_bounds(features.shape[1])
+  initial_values = [log_params] + [
+      rng.uniform(bounds[:, 0], bounds[:, 1]) for _ in range(num_restarts)
+  ]
+  best_result = None
+  for initial_value in initial_values:
+    result = optimize.minimize(
+        _neg_log_posterior,
+        initial_value,
+        args=(features, labels),
+        jac=True,
+        method='L-BFGS-B',
+        bounds=bounds)
+    if best_result is None or result.fun < best_result.fun:
+      best_result = result
+  return best_result.x
+
+
+def _standardize(labels: np.ndarray, observed_labels: np.ndarray) -> np.ndarray:
+  """Standardizes labels with the statistics of the observed labels."""
+  if not len(observed_labels):  # pylint: disable=g-explicit-length-test
+    return labels
+  stddev = np.std(observed_labels)
+  return (labels - np.mean(observed_labels)) / (stddev if stddev > 0 else 1.0)
+
+
+@attr.define
+class _IncrementalGP:
+  """Exact GP regression whose Cholesky factor grows with the observations.
+
+  The labels are standardized before regression. The kernel matrix doesn't
+  depend on the labels, so only the O(n^2) triangular solves are repeated when
+  the label statistics change.
+  """
+  # Hyperparameters: [log signal variance, log noise variance, log lengthscales]
+  log_params: np.ndarray
+  features: np.ndarray
+  labels: np.ndarray
+  # Lower Cholesky factor of the kernel matrix, including the noise.
+  cholesky: np.ndarray
+  # L^-1 y for the standardized labels y, computed by `_get_beta`.
+  _beta: Optional[np.ndarray] = attr.field(init=False, default=None)
+
+  @classmethod
+  def create(cls, num_features: int) -> '_IncrementalGP':
+    log_params = _prior_means(num_features)
+    return cls(
+        log_params=log_params,
+        features=np.zeros((0, num_features)),
+        labels=np.zeros(0),
+        cholesky=np.zeros((0, 0)))
+
+  @property
+  def num_observations(self) -> int:
+    return len(self.labels)
+
+  def _standardize(self, labels: np.ndarray) -> np.ndarray:
+    return _standardize(labels, self.labels)
+
+  def _noisy_kernel(self, features: np.ndarray) -> np.ndarray:
+    """Kernel matrix of the features, including the noise."""
+    return _kernel(features, features, self.log_params) + (
+        np.exp(self.log_params[1]) + _JITTER) * np.eye(len(features))
+
+  def _get_beta(self) -> np.ndarray:
+    if self._beta is None:
+      self._beta = linalg.solve_triangular(
+          self.cholesky, self._standardize(self.labels), lower=True)
+    return self._beta
+
+  def add(self, features: np.ndarray, labels: np.ndarray) -> np.ndarray:
+    """Adds observations with a block update of the Cholesky factor.
+
+    Args:
+      features: (m, num_features) array.
+      labels: (m,) array.
+
+    Returns:
+      The z-scores of the labels under the predictive distribution of the model
+      before the update, in standardized units. Empty for the first
+      observations.
+    """
+    # [[L, 0], [C^T, S]] is the Cholesky factor of [[K, K_nm], [K_mn, K_mm]]
+    # if L C = K_nm and S S^T = K_mm - C^T C.
+    if self.num_observations:
+      cross = linalg.solve_triangular(
+          self.cholesky,
+          _kernel(self.features, features, self.log_params),
+          lower=True)
+    else:
+      cross = np.zeros((0, len(features)))
+    schur = self._noisy_kernel(features) - cross.T @ cross
+    if self.num_observations:
+      z_scores = (self._standardize(labels) -
+                  cross.T @ self._get_beta()) / np.sqrt(
+          np.maximum(np.diag(schur), _JITTER))
+    else:
+      z_scores = np.zeros(0)
+
+    n = self.num_observations
+    cholesky = np.zeros((n + len(labels), n + len(labels)))
+    cholesky[:n, :n] = self.cholesky
+    cholesky[n:, :n] = cross.T
+    cholesky[n:, n:] = linalg.cholesky(schur, lower=True)
+    self.cholesky = cholesky
+    self.features = np.concatenate([self.features, features], axis=0)
+    self.labels = np.concatenate([self.labels, labels])
+    self._beta = None
+    return z_scores
+
+  def refit(self, num_restarts: int, rng: np.random.Generator) -> None:
+    """Optimizes the hyperparameters and recomputes the Cholesky factor.
+
+    Args:
+      num_restarts: The number of random initial hyperparameters that are tried
+        in addition to the current ones.
+      rng: Generates the random initial hyperparameters.
+    """
+    self.log_params = _optimize_log_params(self.log_params, self.features,
+                                           self._standardize(self.labels),
+                                           num_restarts, rng)
+    self.cholesky = linalg.cholesky(
+        self._noisy_kernel(self.features), lower=True)
+    self._beta = None
+    logging.info('GP hyperparameters after refit on %s observations: %s',
+                 self.num_observations, np.exp(self.log_params))
+
+  def predict(self, features: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the predictive mean and stddev of the standardized labels."""
+    cross = linalg.solve_triangular(
+        self.cholesky,
+        _kernel(self.features, features, self.log_params),
+        lower=True)
+    variance = np.exp(self.log_params[0]) - np.sum(np.square(cross), axis=0)
+    return cross.T @ self._get_beta(), np.sqrt(np.maximum(variance, 0.0))
+
+
+@attr.define
+class _SparseGP:
+  """GP regression on inducing points selected among the observations.
+
+  Uses the deterministic training conditional (DTC) approximation. The model
+  only needs m x m sums over the observations, where m is the number of
+  inducing points, so adding an observation costs O(m^2) and a prediction
+  O(m^2) instead of O(n^2). A refit selects new inducing points, optimizes the
+  hyperparameters on them in O(m^3) per iteration and recomputes the sums in
+  O(n m^2).
+  """
+  num_inducing_points: int
+  # Hyperparameters: [log signal variance, log noise variance, log lengthscales]
+  log_params: np.ndarray
+  features: np.ndarray
+  labels: np.ndarray
+  # Empty until the first refit.
+  inducing_features: np.ndarray
+  # Sums over the observations x of k(z, x) k(x, z'), k(z, x) y and k(z, x),
+  # for all the inducing points z, z'.
+  cross_gram: np.ndarray
+  cross_labels: np.ndarray
+  cross_sums: np.ndarray
+  # (mean weights, variance matrix) computed from the sums by `predict`.
+  _predictor: Optional[Tuple[np.ndarray, np.ndarray]] = attr.field(
+      init=False, default=None)
+
+  @classmethod
+  def create(cls, num_features: int,
+             num_inducing_points: int) -> '_SparseGP':
+    return cls(
+        num_inducing_points=num_inducing_points,
+        log_params=_prior_means(num_features),
+        features=np.zeros((0, num_features)),
+        labels=np.zeros(0),
+        inducing_features=np.zeros((0, num_features)),
+        cross_gram=np.zeros((0, 0)),
+        cross_labels=np.zeros(0),
+        cross_sums=np.zeros(0))
+
+  @property
+  def num_observations(self) -> int:
+    return len(self.labels)
+
+  def _standardize(self, labels: np.ndarray) -> np.ndarray:
+    return _standardize(labels, self.labels)
+
+  def _accumulate(self, features: np.ndarray, labels: np.ndarray) -> None:
+    cross = _kernel(self.inducing_features, features, self.log_params)
+    self.cross_gram += cross @ cross.T
+    self.cross_labels += cross @ labels
+    self.cross_sums += np.sum(cross, axis=1)
+    self._predictor = None
+
+  def add(self, features: np.ndarray, labels: np.ndarray) -> np.ndarray:
+    """Adds observations to the sums of the inducing points.
+
+    Args:
+      features: (m, num_features) array.
+      labels: (m,) array.
+
+    Returns:
+      The z-scores of the labels under the predictive distribution of the model
+      before the update, in standardized units. Empty before the first refit.
+    """
+    if len(self.inducing_features):  # pylint: disable=g-explicit-length-test
+      mean, stddev = self.predict(features)
+      z_scores = (self._standardize(labels) - mean) / np.sqrt(
+          np.square(stddev) + np.exp(self.log_params[1]) + _JITTER)
+      self._accumulate(features, labels)
+    else:
+      z_scores = np.zeros(0)
+    self.features = np.concatenate([self.features, features], axis=0)
+    self.labels = np.concatenate([self.labels, labels])
+    return z_scores
+
+  def _select_inducing_points(self, rng: np.random.Generator) -> np.ndarray:
+    """Returns the indices of the best observations and random other ones."""
+    if self.num_observations <= self.num_inducing_points:
+      return np.arange(self.num_observations)
+    order = np.argsort(-self.labels, kind='stable')
+    num_best = self.num_inducing_points // 4
+    others = rng.choice(
+        order[num_best:], self.num_inducing_points - num_best, replace=False)
+    return np.concatenate([order[:num_best], others])
+
+  def refit(self, num_restarts: int, rng: np.random.Generator) -> None:
+    """Selects inducing points, optimizes the hyperparameters on them.
+
+    Args:
+      num_restarts: The number of random initial hyperparameters that are tried
+        in addition to the current ones.
+      rng: Selects the inducing points and the random initial hyperparameters.
+    """
+    indices = self._select_inducing_points(rng)
+    self.inducing_features = self.features[indices]
+    self.log_params = _optimize_log_params(self.log_params,
+                                           self.inducing_features,
+                                           self._standardize(
+                                               self.labels[indices]),
+                                           num_restarts, rng)
+    num_inducing_points = len(indices)
+    self.cross_gram = np.zeros((num_inducing_points, num_inducing_points))
+    self.cross_labels = np.zeros(num_inducing_points)
+    self.cross_sums = np.zeros(num_inducing_points)
+    self._accumulate(self.features, self.labels)
+    logging.info(
+        'Sparse GP hyperparameters after refit on %s inducing points and %s '
+        'observations: %s', num_inducing_points, self.num_observations,
+        np.exp(self.log_params))
+
+  def _compute_predictor(self) -> Tuple[np.ndarray, np.ndarray]:
+    """Precomputes the terms of the predictions that don't depend on x."""
+    num_inducing_points = len(self.inducing_features)
+    noise_variance = np.exp(self.log_params[1]) + _JITTER
+    kernel = _kernel(self.inducing_features, self.inducing_features,
+                     self.log_params) + _JITTER * np.eye(num_inducing_points)
+    # The posterior covariance of the inducing values is
+    # noise_variance * precision^-1.
+    precision = noise_variance * kernel + self.cross_gram
+    kernel_cholesky = linalg.cho_factor(kernel, lower=True)
+    precision_cholesky = linalg.cho_factor(precision, lower=True)
+    stddev = np.std(self.labels)
+    standardized_cross_labels = (
+        self.cross_labels - np.mean(self.labels) * self.cross_sums) / (
+            stddev if stddev > 0 else 1.0)
+    weights = linalg.cho_solve(precision_cholesky, standardized_cross_labels)
+    eye = np.eye(num_inducing_points)
+    variance_matrix = linalg.cho_solve(
+        kernel_cholesky, eye) - noise_variance * linalg.cho_solve(
+            precision_cholesky, eye)
+    return weights, variance_matrix
+
+  def predict(self, features: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the predictive mean and stddev of the standardized labels."""
+    if self._predictor is None:
+      self._predictor = self._compute_predictor()
+    weights, variance_matrix = self._predictor
+    cross = _kernel(self.inducing_features, features, self.log_params)
+    variance = np.exp(self.log_params[0]) - np.sum(
+        cross * (variance_matrix @ cross), axis=0)
+    return cross.T @ weights, np.sqrt(np.maximum(variance, 0.0))
+
+
+class Surrogate(enum.Enum):
+  """The GP model of GPBanditDesigner."""
+  # Exact GP, whose suggest() costs O(n^2) per acquisition evaluation.
+  EXACT = 'exact'
+  # Sparse GP on inducing points, for studies with many trials. Its suggest()
+  # costs O(m^2) per acquisition evaluation for m inducing points.
+  SPARSE = 'sparse'
+
+
+class GPBanditDesigner(vza.PartiallySerializableDesigner,
+                       vza.DeadlineAwareDesigner):
+  """GP-UCB designer that updates its model incrementally.
+
+  Suggests random trials until `num_seed_trials` trials are completed.
+  Infeasible trials are ignored. For studies with thousands of trials, use the
+  SPARSE surrogate.
+  """
+
+  def __init__(self,
+               problem_statement: vz.ProblemStatement,
+               *,
+               num_seed_trials: int = 10,
+               hyperparameter_refit_interval: int = 10,
+               drift_threshold: float = 4.0,
+               num_restarts: int = 5,
+               ucb_coefficient: float = 1.8,
+               acquisition_optimizer: Optional[vb.VectorizedOptimizer] = None,
+               surrogate: Surrogate = Surrogate.EXACT,
+               num_inducing_points: int = 256,
+               seed: Optional[int] = None):
+    """Init.
+
+    Args:
+      problem_statement: Must be a flat study with a single metric.
+      num_seed_trials: The number of random trials suggested before the GP is
+        used.
+      hyperparameter_refit_interval: The hyperparameters are re-optimized after
+        this many new trials.
+      drift_threshold: The hyperparameters are also re-optimized when the mean
+        squared z-score of the trials added since the last optimization, under
+        the predictive distribution at the time they were added, exceeds this
+        value. It is 1 on average for a well-calibrated model.
+      num_restarts: The number of random restarts of the first hyperparameter
+        optimization. Later optimizations are warm-started from the current
+        hyperparameters.
+      ucb_coefficient: The UCB acquisition is mean + ucb_coefficient * stddev.
+      acquisition_optimizer: Maximizes the acquisition function. Defaults to a
+        VectorizedOptimizer with the eagle strategy.
+      surrogate: The GP model. See Surrogate.
+      num_inducing_points: The number of inducing points of the SPARSE
+        surrogate. They are selected among the completed trials.
+      seed: Seed of the random generator.
+    """
+    if problem_statement.search_space.is_conditional:
+      raise ValueError(f'{type(self)} does not support conditional search.')
+    if len(problem_statement.metric_information) != 1:
+      raise ValueError(f'{type(self)} works with exactly one metric.')
+    self._problem_statement = problem_statement
+    self._converter = converters.TrialToArrayConverter.from_study_config(
+        problem_statement)
+    self._num_seed_trials = num_seed_trials
+    self._hyperparameter_refit_interval = hyperparameter_refit_interval
+    self._drift_threshold = drift_threshold
+    self._num_restarts = num_restarts
+    self._ucb_coefficient = ucb_coefficient
+    self._acquisition_optimizer = (
+        acquisition_optimizer or
+        vb.VectorizedOptimizer(
+            strategy_factory=es.VectorizedEagleStrategyFactory()))
+    self._rng = np.random.default_rng(seed)
+    self._deadline = None
+
+    self._surrogate = Surrogate(surrogate)
+    num_features = sum(
+        spec.num_dimensions for spec in self._converter.output_specs)
+    if self._surrogate == Surrogate.SPARSE:
+      self._gp = _SparseGP.create(num_features, num_inducing_points)
+    else:
+      self._gp = _IncrementalGP.create(num_features)
+    self._is_fitted = False
+    # Squared z-scores of the observations added since the last refit.
+    self._squared_z_scores = np.zeros(0)
+
+  def set_deadline(self, deadline: Optional[datetime.datetime]) -> None:
+    self._deadline = deadline
+
+  def update(self, trials: vza.CompletedTrials) -> None:
+    """Adds the feasible trials to the GP and refits it if needed."""
+    # The converter flips the signs of minimization metrics.
+    features, labels = self._converter.to_xy(trials.completed)
+    labels = labels[:, 0]
+    feasible = np.isfinite(labels)
+    if not np.any(feasible):
+      return
+    z_scores = self._gp.add(features[feasible], labels[feasible])
+    self._squared_z_scores = np.concatenate(
+        [self._squared_z_scores, np.square(z_scores)])
+
+    if self._gp.num_observations < self._num_seed_trials:
+      return
+    if not self._is_fitted:
+      self._refit(self._num_restarts)
+    elif len(self._squared_z_scores) >= self._hyperparameter_refit_interval:
+      self._refit(0)
+    elif np.mean(self._squared_z_scores) > self._drift_threshold:
+      logging.info('Refitting the GP: mean squared z-score is %s.',
+                   np.mean(self._squared_z_scores))
+      self._refit(0)
+
+  def _refit(self, num_restarts: int) -> None:
+    self._gp.refit(num_restarts, self._rng)
+    self._is_fitted = True
+    self._squared_z_scores = np.zeros(0)
+
+  def _acquisition(self, features: np.ndarray) -> np.ndarray:
+    mean, stddev = self._gp.predict(features)
+    return mean + self._ucb_coefficient * stddev
+
+  def suggest(self,
+              count: Optional[int] = None) -> Sequence[vz.TrialSuggestion]:
+    count = count or 1
+    seed = int(self._rng.integers(np.iinfo(np.int32).max))
+    if self._gp.num_observations < self._num_seed_trials:
+      return random.RandomDesigner(
+          self._problem_statement.search_space, seed=seed).suggest(count)
+
+    best_trials = self._acquisition_optimizer.optimize(
+        self._converter,
+        self._acquisition,
+        count=count,
+        seed=seed,
+        deadline=self._deadline)
+    return [vz.TrialSuggestion(t.parameters) for t in best_trials]
+
+  def dump(self) -> vz.Metadata:
+    state = {
+        'surrogate': self._surrogate.value,
+        'gp': attr.asdict(
+            self._gp, recurse=False, filter=lambda a, _: a.init),
+        'is_fitted': self._is_fitted,
+        'squared_z_scores': self._squared_z_scores,
+    }
+    metadata = vz.Metadata()
+    metadata.ns('gp_bandit')['state'] = state_codec.dumps(state)
+    metadata.ns('gp_bandit')['rng'] = json.dumps(self._rng.bit_generator.state)
+    return metadata
+
+  def load(self, metadata: vz.Metadata) -> None:
+    if 'state' not in metadata.ns('gp_bandit'):
+      # First time the designer is called.
+      return
+    try:
+      state = state_codec.loads(metadata.ns('gp_bandit')['state'])
+      if Surrogate(state['surrogate']) != self._surrogate:
+        raise ValueError(f'The dumped surrogate is {state["surrogate"]}.')
+      self._gp = type(self._gp)(**state['gp'])
+      self._is_fitted = state['is_fitted']
+      self._squared_z_scores = state['squared_z_scores']
+      self._rng.bit_generator.state = json.loads(
+          metadata.ns('gp_bandit')['rng'])
+    except (KeyError, ValueError, TypeError) as e:
+      raise serializable.HarmlessDecodeError(
+          "Couldn't load the GP state from metadata.") from e
@@ -0,0 +1,276 @@
+# Copyright 2022 Google LLC.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for gp_bandit."""
+
+from unittest import mock
+
+import attr
+import numpy as np
+from scipy import optimize
+from vizier import algorithms as vza
+from vizier import pyvizier as vz
+from vizier._src.algorithms.designers import gp_bandit
+from vizier._src.algorithms.optimizers import eagle_strategy as es
+from vizier._src.algorithms.optimizers import eagle_strategy_jax
+from vizier._src.algorithms.optimizers import vectorized_base as vb
+from vizier._src.algorithms.testing import test_runners
+from vizier.interfaces import serializable
+from vizier.testing import test_studies
+
+from absl.testing import absltest
+from absl.testing import parameterized
+
+
+def _small_optimizer() -> vb.VectorizedOptimizer:
+  return vb.VectorizedOptimizer(
+      strategy_factory=es.VectorizedEagleStrategyFactory(),
+      max_evaluations=500)
+
+
+def _problem() -> vz.ProblemStatement:
+  return vz.ProblemStatement(
+      search_space=test_studies.flat_space_with_all_types(),
+      metric_information=[
+          vz.MetricInformation(name='x1', goal=vz.ObjectiveMetricGoal.MAXIMIZE)
+      ])
+
+
+class IncrementalGPTest(absltest.TestCase):
+
+  def test_gradient_matches_finite_differences(self):
+    rng = np.random.default_rng(0)
+    features = rng.uniform(size=(8, 3))
+    labels = rng.normal(size=8)
+    log_params = np.log([0.8, 0.05, 0.3, 1.5, 0.7])
+    error = optimize.check_grad(
+        lambda p: gp_bandit._neg_log_posterior(p, features, labels)[0],
+        lambda p: gp_bandit._neg_log_posterior(p, features, labels)[1],
+        log_params)
+    self.assertLess(error, 1e-4)
+
+  def test_incremental_cholesky_matches_full(self):
+    rng = np.random.default_rng(1)
+    features = rng.uniform(size=(12, 2))
+    labels = np.sin(5 * features[:, 0]) + features[:, 1]
+    gp = gp_bandit._IncrementalGP.create(2)
+    for start, end in [(0, 5), (5, 6), (6, 12)]:
+      gp.add(features[start:end], labels[start:end])
+    expected = gp_bandit._IncrementalGP.create(2)
+    expected.add(features, labels)
+    np.testing.assert_allclose(gp.cholesky, expected.cholesky, atol=1e-10)
+
+    gp.refit(num_restarts=1, rng=rng)
+    mean, stddev = gp.predict(features)
+    # Labels are standardized and almost noiseless.
+    standardized = (labels - np.mean(labels)) / np.std(labels)
+    np.testing.assert_allclose(mean, standardized, atol=1e-2)
+    self.assertTrue(np.all(stddev < 0.1))
+
+  def test_cached_predictions_follow_updates(self):
+    rng = np.random.default_rng(3)
+    features = rng.uniform(size=(12, 2))
+    labels = np.sin(5 * features[:, 0]) + features[:, 1]
+    test_features = rng.uniform(size=(4, 2))
+
+    def assert_matches_uncached(gp):
+      expected = gp_bandit._IncrementalGP.create(2)
+      expected.log_params = gp.log_params
+      expected.add(gp.features, gp.labels)
+      for actual, desired in zip(
+          gp.predict(test_features), expected.predict(test_features)):
+        np.testing.assert_allclose(actual, desired, atol=1e-8)
+
+    gp = gp_bandit._IncrementalGP.create(2)
+    gp.add(features[:6], labels[:6])
+    assert_matches_uncached(gp)
+    gp.add(features[6:], labels[6:])
+    assert_matches_uncached(gp)
+    gp.refit(num_restarts=0, rng=rng)
+    assert_matches_uncached(gp)
+
+  def test_z_scores(self):
+    gp = gp_bandit._IncrementalGP.create(1)
+    self.assertEmpty(gp.add(np.array([[0.1], [0.9]]), np.array([0.0, 1.0])))
+    z_scores = gp.add(np.array([[0.1], [0.5]]), np.array([0.0, 5.0]))
+    self.assertLess(abs(z_scores[0]), 1.0)
+    self.assertGreater(abs(z_scores[1]), 2.0)
+
+
+class SparseGPTest(absltest.TestCase):
+
+  def test_matches_exact_gp_when_all_observations_are_inducing(self):
+    rng = np.random.default_rng(1)
+    features = rng.uniform(size=(20, 2))
+    labels = np.sin(5 * features[:, 0]) + features[:, 1]
+    exact = gp_bandit._IncrementalGP.create(2)
+    exact.add(features, labels)
+    exact.refit(num_restarts=0, rng=rng)
+    sparse = gp_bandit._SparseGP.create(2, num_inducing_points=20)
+    sparse.add(features, labels)
+    sparse.refit(num_restarts=0, rng=rng)
+    np.testing.assert_allclose(sparse.log_params, exact.log_params)
+
+    test_features = rng.uniform(size=(5, 2))
+    exact_mean, exact_stddev = exact.predict(test_features)
+    sparse_mean, sparse_stddev = sparse.predict(test_features)
+    np.testing.assert_allclose(sparse_mean, exact_mean, atol=1e-3)
+    np.testing.assert_allclose(sparse_stddev, exact_stddev, atol=1e-3)
+
+  def test_add_after_refit(self):
+    rng = np.random.default_rng(2)
+    features = rng.uniform(size=(100, 2))
+    labels = np.sum(np.sin(3 * features), axis=-1)
+    sparse = gp_bandit._SparseGP.create(2, num_inducing_points=16)
+    sparse.add(features[:60], labels[:60])
+    sparse.refit(num_restarts=0, rng=rng)
+    self.assertLen(sparse.inducing_features, 16)
+    # The best observation is always an inducing point.
+    self.assertIn(np.argmax(labels[:60]),
+                  [np.flatnonzero(np.all(features == z, axis=1))[0]
+                   for z in sparse.inducing_features])
+    self.assertLen(sparse.add(features[60:], labels[60:]), 40)
+
+    # The sums are the same as if all observations were added at once.
+    expected = gp_bandit._SparseGP.create(2, num_inducing_points=16)
+    expected.inducing_features = sparse.inducing_features
+    expected.log_params = sparse.log_params
+    expected.cross_gram = np.zeros((16, 16))
+    expected.cross_labels = np.zeros(16)
+    expected.cross_sums = np.zeros(16)
+    expected._accumulate(features, labels)
+    np.testing.assert_allclose(sparse.cross_gram, expected.cross_gram)
+    np.testing.assert_allclose(sparse.cross_labels, expected.cross_labels)
+
+
+class GPBanditDesignerTest(parameterized.TestCase):
+
+  def test_on_flat_space(self):
+    designer = gp_bandit.GPBanditDesigner(
+        _problem(), acquisition_optimizer=_small_optimizer(), seed=1)
+    trials = test_runners.run_with_random_metrics(
+        designer,
+        _problem(),
+        iters=15,
+        batch_size=2,
+        validate_parameters=True)
+    self.assertLen(trials, 30)
+
+  def test_with_jax_eagle_optimizer(self):
+    designer = gp_bandit.GPBanditDesigner(
+        _problem(),
+        acquisition_optimizer=eagle_strategy_jax.JaxEagleOptimizerFactory()(
+            5, 200),
+        num_seed_trials=2,
+        seed=1)
+    trials = test_runners.run_with_random_metrics(
+        designer, _problem(), iters=4, batch_size=1, validate_parameters=True)
+    self.assertLen(trials, 4)
+
+  @parameterized.parameters(gp_bandit.Surrogate.EXACT,
+                            gp_bandit.Surrogate.SPARSE)
+  def test_minimizes_sphere(self, surrogate):
+    problem = vz.ProblemStatement(metric_information=[
+        vz.MetricInformation(name='loss', goal=vz.ObjectiveMetricGoal.MINIMIZE)
+    ])
+    for i in range(2):
+      problem.search_space.root.add_float_param(f'x{i}', -2.0, 2.0)
+    designer = gp_bandit.GPBanditDesigner(
+        problem,
+        acquisition_optimizer=_small_optimizer(),
+        surrogate=surrogate,
+        num_inducing_points=12,
+        seed=0)
+    losses = []
+    for i in range(25):
+      trial = designer.suggest(1)[0].to_trial(i + 1)
+      losses.append(
+          sum((trial.parameters[f'x{j}'].value - 0.5)**2 for j in range(2)))
+      trial.complete(vz.Measurement({'loss': losses[-1]}))
+      designer.update(vza.CompletedTrials([trial]))
+    self.assertLess(min(losses[10:]), min(losses[:10]))
+    self.assertLess(min(losses), 0.05)
+
+  def test_refits_every_interval(self):
+    designer = gp_bandit.GPBanditDesigner(
+        _problem(),
+        num_seed_trials=4,
+        hyperparameter_refit_interval=3,
+        drift_threshold=np.inf,
+        acquisition_optimizer=_small_optimizer(),
+        seed=1)
+    with mock.patch.object(
+        gp_bandit._IncrementalGP, 'refit', autospec=True) as refit:
+      test_runners.run_with_random_metrics(
+          designer, _problem(), iters=10, batch_size=1)
+    # The first fit after 4 trials, then after 7 and 10 trials.
+    self.assertEqual(refit.call_count, 3)
+    self.assertEqual(refit.call_args_list[0].args[1], designer._num_restarts)
+    self.assertEqual(refit.call_args_list[1].args[1], 0)
+
+  def test_ignores_infeasible_trials(self):
+    problem = _problem()
+    designer = gp_bandit.GPBanditDesigner(problem, num_seed_trials=1)
+    trials = []
+    for i, suggestion in enumerate(designer.suggest(2)):
+      trial = suggestion.to_trial(i + 1)
+      trial.complete(vz.Measurement(), infeasibility_reason='infeasible')
+      trials.append(trial)
+    designer.update(vza.CompletedTrials(trials))
+    self.assertEqual(designer._gp.num_observations, 0)
+
+  @parameterized.parameters(gp_bandit.Surrogate.EXACT,
+                            gp_bandit.Surrogate.SPARSE)
+  def test_dump_and_load(self, surrogate):
+    problem = _problem()
+    designer = gp_bandit.GPBanditDesigner(
+        problem,
+        acquisition_optimizer=_small_optimizer(),
+        surrogate=surrogate,
+        num_inducing_points=8,
+        seed=1)
+    test_runners.run_with_random_metrics(
+        designer, problem, iters=12, batch_size=1)
+    metadata = designer.dump()
+
+    restored = gp_bandit.GPBanditDesigner(
+        problem,
+        acquisition_optimizer=_small_optimizer(),
+        surrogate=surrogate,
+        num_inducing_points=8)
+    restored.load(metadata)
+    for field in attr.fields(type(designer._gp)):
+      if field.init:
+        np.testing.assert_array_equal(
+            getattr(restored._gp, field.name), getattr(designer._gp, field.name))
+    self.assertEqual(
+        [s.parameters for s in restored.suggest(2)],
+        [s.parameters for s in designer.suggest(2)])
+
+  def test_load_other_surrogate(self):
+    problem = _problem()
+    designer = gp_bandit.GPBanditDesigner(
+        problem, surrogate=gp_bandit.Surrogate.SPARSE)
+    restored = gp_bandit.GPBanditDesigner(problem)
+    with self.assertRaises(serializable.HarmlessDecodeError):
+      restored.load(designer.dump())
+
+  def test_load_empty_metadata(self):
+    designer = gp_bandit.GPBanditDesigner(_problem())
+    designer.load(vz.Metadata())
+    self.assertEqual(designer._gp.num_observations, 0)
+
+
+if __name__ == '__main__':
+  absltest.main()
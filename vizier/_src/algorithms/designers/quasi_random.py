@@ -14,8 +14,6 @@
 
 """Quasi-random designer."""
 
-import collections
-import math
 import random
 import sys
 from typing import List, Optional, Sequence, Iterable
@@ -24,6 +22,7 @@ import attr
 import numpy as np
 from vizier import algorithms as vza
 from vizier import pyvizier as vz
+from vizier._src.algorithms.optimizers import vectorized_base as vb
 from vizier.interfaces import serializable
 from vizier.pyvizier import converters
 
@@ -197,6 +196,50 @@ class _HaltonSequence(serializable.PartiallySerializable):
     self._num_points_generated += 1
     return halton_list
 
+  def get_next_array(self, count: int) -> np.ndarray:
+    """Get the next $count points of the sequence at once.
+
+    Same values as $count calls to `get_next_list`.
+
+    Args:
+      count:
+
+    Returns:
+      Array of shape (count, num_dimensions) with values in [0, 1].
+    """
+    start = self._num_points_generated + self._skip_points
+    # For index 0 we want 1/base returned, not 0.
+    indices = np.arange(start, start + count, dtype=np.int64) + 1
+    values = np.zeros((count, len(self._primes)))
+    for dimension, base in enumerate(self._primes):
+      if not _is_prime(base):
+        raise ValueError('base is not prime: %s' % base)
+      permutation = np.arange(base)
+      if self._scramble:
+        # Use a fixed seed to generate the permutation in a deterministic way.
+        shuffled = list(range(1, base))
+        random.Random(base).shuffle(shuffled)
+        permutation = np.array([0] + shuffled)
+      base_rec = 1.0 / base
+      f = base_rec
+      i = indices
+      while np.any(i > 0):
+        i, mod = np.divmod(i, base)
+        values[:, dimension] += f * permutation[mod]
+        f *= base_rec
+    self._num_points_generated += count
+    return values
+
+
+def _discrete_points(spec: NumpyArraySpec,
+                     halton_values: np.ndarray) -> np.ndarray:
+  """Generate discrete parameter values from Halton values."""
+  # +1 because the bounds are inclusive on both ends.
+  num_discrete_options = spec.bounds[1] - spec.bounds[0] + 1 - spec.num_oovs
+  # Get integers between 0 and num_discrete_options-1 (inclusive).
+  indices = np.floor(halton_values * num_discrete_options).astype(np.int64)
+  return indices + int(spec.bounds[0])
+
 
 class QuasiRandomDesigner(vza.PartiallySerializableDesigner):
   """Sample points using quasi-random search from the scaled search space.
@@ -254,18 +297,6 @@ class QuasiRandomDesigner(vza.PartiallySerializableDesigner):
   def dump(self) -> vz.Metadata:
     return self._halton_generator.dump()
 
-  def _generate_discrete_point(self, spec: NumpyArraySpec,
-                               halton_value: float) -> int:
-    """Generate a discrete parameter value from a Halton value."""
-
-    # +1 because the bounds are inclusive on both ends.
-    num_discrete_options = spec.bounds[1] - spec.bounds[0] + 1 - spec.num_oovs
-    # Get a number in [0,  num_discrete_options].
-    halton_value *= num_discrete_options
-    # Get an integer between 0 and num_discrete_options-1 (inclusive).
-    halton_value = int(math.floor(halton_value))
-    return halton_value + int(spec.bounds[0])
-
   def update(self, _) -> None:
     pass
 
@@ -274,32 +305,95 @@ class QuasiRandomDesigner(vza.PartiallySerializableDesigner):
     """Suggest new suggestions, taking into account `count`."""
     count = count or 1
 
-    sample = collections.defaultdict(list)
-    for _ in range(count):
-      # Dimension of halton_list is [P], where P is number of primes used.
-      halton_list = self._halton_generator.get_next_list()
-      for dimension_index, spec in enumerate(self._output_specs):
-        # Only CONTINUOUS and DISCRETE are supported.
-        halton_value = halton_list[dimension_index]
-        if spec.type == NumpyArraySpecType.CONTINUOUS:
-          # Trial-Numpy converter was configured to scale values to [0, 1].
-          # We sample from that range and rely on it scaled correctly when the
-          # Trials are created.
-          # halton_value is also within [0, 1].
-          sample[spec.name].append(np.float64(halton_value))
-        elif spec.type == NumpyArraySpecType.DISCRETE:
-          # Trial-Numpy converter expects an integer for discrete/categorical
-          # parameters.
-          sample[spec.name].append(
-              np.int64(self._generate_discrete_point(spec, halton_value)))
-        else:
-          raise ValueError(
-              f'Unsupported spec type: {spec.type}. self._converter should be configured to return CONTINUOUS or DISCRETE specs only.'
-          )
+    # Dimensions of halton_values are [count, P], where P is number of primes.
+    halton_values = self._halton_generator.get_next_array(count)
+    sample = {}
+    for dimension_index, spec in enumerate(self._output_specs):
+      # Only CONTINUOUS and DISCRETE are supported.
+      column = halton_values[:, dimension_index]
+      if spec.type == NumpyArraySpecType.CONTINUOUS:
+        # Trial-Numpy converter was configured to scale values to [0, 1].
+        # We sample from that range and rely on it scaled correctly when the
+        # Trials are created.
+        # halton_value is also within [0, 1].
+        sample[spec.name] = column
+      elif spec.type == NumpyArraySpecType.DISCRETE:
+        # Trial-Numpy converter expects an integer for discrete/categorical
+        # parameters.
+        sample[spec.name] = _discrete_points(spec, column)
+      else:
+        raise ValueError(
+            f'Unsupported spec type: {spec.type}. self._converter should be configured to return CONTINUOUS or DISCRETE specs only.'
+        )
     sample = {
-        name: np.expand_dims(np.asarray(elements), axis=-1)
+        name: np.expand_dims(elements, axis=-1)
         for (name, elements) in sample.items()
     }
     return [
         vz.TrialSuggestion(p) for p in self._converter.to_parameters(sample)
     ]
+
+
+class QuasiRandomVectorizedStrategy(vb.VectorizedStrategy):
+  """Quasi-random search on the arrays of a TrialToArrayConverter.
+
+  Array-level counterpart of QuasiRandomDesigner, for use in
+  VectorizedOptimizer and `DesignerAsOptimizer.optimize_arrays`. Each parameter
+  takes one dimension of the Halton sequence. CATEGORICAL parameters are
+  one-hot encoded.
+  """
+
+  def __init__(self,
+               converter: converters.TrialToArrayConverter,
+               suggestion_batch_size: int,
+               seed: Optional[int] = None,
+               *,
+               skip_points: int = 100):
+    """Init.
+
+    Args:
+      converter: Converter of the features.
+      suggestion_batch_size:
+      seed: Unused. The Halton sequence is deterministic.
+      skip_points: See QuasiRandomDesigner.
+    """
+    del seed
+    for spec in converter.output_specs:
+      if spec.type not in (NumpyArraySpecType.CONTINUOUS,
+                           NumpyArraySpecType.ONEHOT_EMBEDDING):
+        raise ValueError(f'Unsupported type: {spec.type} in {spec}')
+    self._output_specs = tuple(converter.output_specs)
+    self._batch_size = suggestion_batch_size
+    self._halton_generator = _HaltonSequence(
+        len(self._output_specs),
+        skip_points=skip_points,
+        num_points_generated=0,
+        scramble=False)
+
+  @property
+  def suggestion_batch_size(self) -> int:
+    return self._batch_size
+
+  def suggest(self) -> np.ndarray:
+    halton_values = self._halton_generator.get_next_array(self._batch_size)
+    columns = []
+    for dimension_index, spec in enumerate(self._output_specs):
+      column = halton_values[:, dimension_index]
+      if spec.type == NumpyArraySpecType.CONTINUOUS:
+        columns.append(column[:, np.newaxis])
+      else:
+        num_categories = spec.num_dimensions - spec.num_oovs
+        indices = np.floor(column * num_categories).astype(np.int64)
+        columns.append(np.eye(spec.num_dimensions)[indices])
+    return np.concatenate(columns, axis=1)
+
+  def update(self, rewards: np.ndarray) -> None:
+    pass
+
+
+def create_vectorized_strategy(
+    converter: converters.TrialToArrayConverter,
+    suggestion_batch_size: int,
+    seed: Optional[int] = None) -> QuasiRandomVectorizedStrategy:
+  """VectorizedStrategyFactory of QuasiRandomVectorizedStrategy."""
+  return QuasiRandomVectorizedStrategy(converter, suggestion_batch_size, seed)
@@ -14,9 +14,11 @@
 
 import random
 
+import numpy as np
 from vizier import pyvizier as vz
 from vizier._src.algorithms.designers import quasi_random
 from vizier._src.algorithms.testing import test_runners
+from vizier.pyvizier import converters
 from vizier.testing import test_studies
 
 from absl.testing import absltest
@@ -67,6 +69,16 @@ class HaltonTest(absltest.TestCase):
 
     self.assertSequenceAlmostEqual(sequence, expected_sequence)
 
+  def test_next_array_matches_next_list(self):
+    generator_1 = quasi_random._HaltonSequence(
+        num_dimensions=4, skip_points=100, scramble=True)
+    generator_2 = quasi_random._HaltonSequence(
+        num_dimensions=4, skip_points=100, scramble=True)
+    np.testing.assert_array_equal(
+        [generator_1.get_next_list() for i in range(100)],
+        generator_2.get_next_array(100))
+    self.assertEqual(generator_1.dump(), generator_2.dump())
+
 
 class QuasiRandomTest(absltest.TestCase):
 
@@ -93,5 +105,27 @@ class QuasiRandomTest(absltest.TestCase):
         designer.suggest(num_suggestions), designer2.suggest(num_suggestions))
 
 
+class QuasiRandomVectorizedStrategyTest(absltest.TestCase):
+
+  def test_matches_designer(self):
+    problem = vz.ProblemStatement()
+    root = problem.search_space.select_root()
+    root.add_float_param('a', 0.0, 1.0)
+    root.add_float_param('b', -1.0, 1.0)
+    root.add_categorical_param('c', ['x', 'y', 'z'])
+    converter = converters.TrialToArrayConverter.from_study_config(problem)
+    strategy = quasi_random.create_vectorized_strategy(converter, 10)
+    designer = quasi_random.QuasiRandomDesigner(problem.search_space)
+
+    features = strategy.suggest()
+    self.assertEqual(features.shape, (10, 6))
+    np.testing.assert_array_equal(np.sum(features[:, 2:], axis=-1), 1.0)
+    for parameters, suggestion in zip(
+        converter.to_parameters(features), designer.suggest(10)):
+      for name in ['a', 'b', 'c']:
+        self.assertAlmostEqual(parameters[name].value,
+                               suggestion.parameters[name].value)
+
+
 if __name__ == '__main__':
   absltest.main()
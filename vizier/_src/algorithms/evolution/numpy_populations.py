@@ -14,7 +14,6 @@
 
 """Core population utilities."""
 import collections
-import json
 from typing import Any, Collection, Callable, List, Optional, Tuple, Type, Sequence
 
 import attr
@@ -23,10 +22,7 @@ from vizier import pyvizier as vz
 from vizier._src.algorithms.evolution import templates
 from vizier.interfaces import serializable
 from vizier.pyvizier import converters
-from vizier.utils import json_utils
-
-
-# TODO: Use a byte encoding instead of JSON.
+from vizier.utils import state_codec
 
 
 def _filter_and_split(
@@ -138,13 +134,13 @@ class Offspring(serializable.Serializable):
   def load(cls: Type['Offspring'], metadata: vz.Metadata) -> 'Offspring':
     encoded = metadata.get('values', cls=str)
     try:
-      decoded = json.loads(encoded, object_hook=json_utils.numpy_hook)
+      decoded = state_codec.loads(encoded)
     except Exception as e:
       raise serializable.DecodeError('Failed to decode') from e
     return cls(**decoded)
 
   def dump(self) -> vz.Metadata:
-    encoded = json.dumps(attr.asdict(self), cls=json_utils.NumpyEncoder)
+    encoded = state_codec.dumps(attr.asdict(self))
     return vz.Metadata({'values': encoded})
 
 
@@ -217,13 +213,13 @@ class Population(templates.Population):
   def recover(cls, metadata: vz.Metadata) -> 'Population':
     encoded = metadata.get('values', default='', cls=str)
     try:
-      decoded = json.loads(encoded, object_hook=json_utils.numpy_hook)
-    except json.JSONDecodeError as e:
+      decoded = state_codec.loads(encoded)
+    except ValueError as e:
       raise serializable.DecodeError('Failed to recover state.') from e
     return cls(**decoded)
 
   def dump(self) -> vz.Metadata:
-    encoded = json.dumps(attr.asdict(self), cls=json_utils.NumpyEncoder)
+    encoded = state_codec.dumps(attr.asdict(self))
     return vz.Metadata({'values': encoded})
 
   def empty_like(self) -> 'Population':
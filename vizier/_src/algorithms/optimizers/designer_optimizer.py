@@ -12,15 +12,23 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-"""Wraps Designer as a gradient-free optimizer."""
+"""Wraps Designer as a gradient-free optimizer.
 
-from typing import Callable, List, TypeVar, Sequence
+`optimize()` runs the designer on Trials. Designers with an array-level
+counterpart (a VectorizedStrategy, e.g. quasi-random, random or eagle) can also
+be run with `optimize_arrays()`, which exchanges NumPy arrays directly with an
+array score function and avoids creating Trials for every evaluation.
+"""
+
+from typing import Callable, List, Optional, TypeVar, Sequence
 
 from absl import logging
 from vizier import pythia
 from vizier import pyvizier as vz
 from vizier._src.algorithms.core import abstractions
 from vizier._src.algorithms.optimizers import base
+from vizier._src.algorithms.optimizers import vectorized_base as vb
+from vizier.pyvizier import converters
 
 _Features = TypeVar('_Features')
 
@@ -33,7 +41,8 @@ class DesignerAsOptimizer(base.GradientFreeOptimizer):
                                           abstractions.Designer],
                *,
                batch_size: int = 100,
-               num_evaluations: int = 15000):
+               num_evaluations: int = 15000,
+               strategy_factory: Optional[vb.VectorizedStrategyFactory] = None):
     """Init.
 
     Args:
@@ -41,10 +50,13 @@ class DesignerAsOptimizer(base.GradientFreeOptimizer):
       batch_size: In each iteration, ask the designer to generate this many
         candidate trials.
       num_evaluations: Total number of trials to be evaluated on `score_fn`.
+      strategy_factory: Array-level counterpart of the designer, used by
+        `optimize_arrays()`.
     """
     self._designer_factory = designer_factory
     self._batch_size = batch_size
     self._num_evaluations = num_evaluations
+    self._strategy_factory = strategy_factory
 
   def optimize(
       self,
@@ -80,3 +92,36 @@ class DesignerAsOptimizer(base.GradientFreeOptimizer):
         'Finished running the optimization study. Extracting the best trials...'
     )
     return study.GetBestTrials(count=count)
+
+  def optimize_arrays(
+      self,
+      score_fn: vb.BatchArrayScoreFunction,
+      converter: converters.TrialToArrayConverter,
+      *,
+      count: int = 1,
+      budget_factor: float = 1.0,
+      seed: Optional[int] = None,
+  ) -> List[vz.Trial]:
+    """Optimizes an array score function with the array-level designer.
+
+    Args:
+      score_fn: Scores (batch_size, n_features) arrays of `converter`.
+      converter:
+      count: Optimizer tries to return this many trials.
+      budget_factor: Use this much fraction of `num_evaluations`.
+      seed:
+
+    Returns:
+      The best trials, COMPLETED with their score as 'acquisition' metric.
+
+    Raises:
+      ValueError: If there is no array-level counterpart of the designer.
+    """
+    if self._strategy_factory is None:
+      raise ValueError('optimize_arrays() requires a strategy_factory.')
+    optimizer = vb.VectorizedOptimizer(
+        strategy_factory=self._strategy_factory,
+        suggestion_batch_size=self._batch_size,
+        max_evaluations=max(
+            int(self._num_evaluations * budget_factor), self._batch_size))
+    return optimizer.optimize(converter, score_fn, count=count, seed=seed)
@@ -14,10 +14,12 @@
 
 """Tests for designer_optimizer."""
 
+import numpy as np
 from vizier import pyvizier as vz
 from vizier._src.algorithms.designers import quasi_random
 from vizier._src.algorithms.optimizers import designer_optimizer
 from vizier._src.algorithms.testing import optimizer_test_utils
+from vizier.pyvizier import converters
 
 from absl.testing import absltest
 
@@ -35,6 +37,33 @@ class DesignerOptimizerTest(absltest.TestCase):
         designer_optimizer.DesignerAsOptimizer(designer_factory),
         np_random_seed=1)
 
+  def test_optimize_arrays(self):
+    problem = vz.ProblemStatement()
+    problem.search_space.root.add_float_param('a', 0, 1)
+    problem.search_space.root.add_float_param('b', 0, 1)
+    converter = converters.TrialToArrayConverter.from_study_config(problem)
+    optimizer = designer_optimizer.DesignerAsOptimizer(
+        quasi_random.QuasiRandomDesigner.from_problem,
+        num_evaluations=1000,
+        strategy_factory=quasi_random.create_vectorized_strategy)
+
+    trials = optimizer.optimize_arrays(
+        lambda x: -np.sum(np.square(x - 0.3), axis=-1), converter, count=2)
+    self.assertLen(trials, 2)
+    self.assertGreater(
+        trials[0].final_measurement.metrics['acquisition'].value, -1e-3)
+    self.assertAlmostEqual(trials[0].parameters['a'].value, 0.3, delta=0.05)
+
+  def test_optimize_arrays_requires_strategy(self):
+    problem = vz.ProblemStatement()
+    problem.search_space.root.add_float_param('a', 0, 1)
+    optimizer = designer_optimizer.DesignerAsOptimizer(
+        quasi_random.QuasiRandomDesigner.from_problem)
+    with self.assertRaises(ValueError):
+      optimizer.optimize_arrays(
+          lambda x: np.sum(x, axis=-1),
+          converters.TrialToArrayConverter.from_study_config(problem))
+
 
 if __name__ == '__main__':
   absltest.main()
@@ -209,6 +209,26 @@ class EagleParamHandler:
     else:
       return self.rng.uniform(0.0, 1.0, size=size)
 
+  @property
+  def categorical_params_mask(self) -> np.ndarray:
+    """(n_categorical, n_features) mask. Only set if has_categorical."""
+    return self._categorical_params_mask
+
+  @property
+  def categorical_mask(self) -> np.ndarray:
+    """(n_features,) mask of the categorical indices."""
+    return self._categorical_mask
+
+  @property
+  def tiebreak_array(self) -> np.ndarray:
+    """(n_features,) tie breaking values used in categorical sampling."""
+    return self._tiebreak_array
+
+  @property
+  def oov_mask(self) -> Optional[np.ndarray]:
+    """(n_features,) mask of the non-oov indices, or None if there are none."""
+    return self._oov_mask
+
   @property
   def perturbation_factors(self) -> np.ndarray:
     """Create the perturbations factors.
@@ -87,6 +87,11 @@ class EagleStrategyConfig:
     perturbation: The default amount of noise for perturbation.
     perturbation_lower_bound: The threshold below flies are removed from pool.
     penalize_factor: The perturbation decrease for unsuccessful flies.
+    pool_size: The total number of flies in the pool.
+    pull_memory_budget: The maximum number of bytes of the intermediate arrays
+      used to compute the pulls. If set, the pool is split into chunks whose
+      pulls are accumulated one after the other. If None, the pulls of the
+      whole pool are computed at once.
   """
   # Visibility
   visibility: float = 3.0
@@ -101,6 +106,8 @@ class EagleStrategyConfig:
   perturbation_lower_bound: float = 0.001
   penalize_factor: float = 0.9
   pool_size: int = 50
+  # Memory
+  pull_memory_budget: Optional[int] = None
 
 
 @attr.define(frozen=True)
@@ -139,7 +146,7 @@ class VectorizedEagleStrategyFactory(vb.VectorizedStrategyFactory):
     )
 
 
-# TODO: Create jit-compatible JAX version.
+# See eagle_strategy_jax for a jit-compiled JAX version.
 @attr.define
 class VectorizedEagleStrategy(vb.VectorizedStrategy):
   """Eagle strategy implementation for maximization problem based on Numpy.
@@ -245,38 +252,72 @@ class VectorizedEagleStrategy(vb.VectorizedStrategy):
     end_batch = (self._batch_id + 1) * self.batch_size
     self._batch_slice = np.s_[start_batch:end_batch]
 
+  def _pool_chunk_size(self) -> int:
+    """The number of flies whose pulls are computed together."""
+    if self.config.pull_memory_budget is None:
+      return self.pool_size
+    # The feature differences and the scaled differences are the largest
+    # intermediate arrays, with dimensions (batch_size, chunk, n_features).
+    bytes_per_fly = 2 * self.batch_size * self._n_features * np.dtype(
+        np.float64).itemsize
+    return int(
+        np.clip(self.config.pull_memory_budget // bytes_per_fly, 1,
+                self.pool_size))
+
   def _create_features(self) -> np.ndarray:
     """Create new batch of mutated and perturbed features.
 
+    The pulls of the pool are computed in chunks of flies to bound the memory
+    of the intermediate arrays. See `EagleStrategyConfig.pull_memory_budget`.
+
     Returns:
       batch features: (batch_size, n_features)
     """
-    features_diffs, dists = self._compute_features_diffs_and_dists()
-    scaled_directions = self._compute_scaled_directions()
-    features_changes = self._compute_features_changes(features_diffs, dists,
-                                                      scaled_directions)
+    if np.all(np.isinf(self._rewards)):
+      logging.warning(
+          ("All firefly were recently removed. This Shouldn't happen."
+           "Pool Features:\n%sPool rewards:\n%s"), self._features,
+          self._rewards)
+      return self._features[self._batch_slice].copy()
+
+    chunk_size = self._pool_chunk_size()
+    features_changes = np.zeros((self.batch_size, self._n_features))
+    for start in range(0, self.pool_size, chunk_size):
+      pool_slice = np.s_[start:start + chunk_size]
+      features_diffs, dists = self._compute_features_diffs_and_dists(
+          pool_slice)
+      scaled_directions = self._compute_scaled_directions(pool_slice)
+      features_changes += self._compute_features_changes(
+          features_diffs, dists, scaled_directions, pool_slice)
     return self._features[self._batch_slice] + features_changes
 
-  def _compute_features_diffs_and_dists(self) -> Tuple[np.ndarray, np.ndarray]:
+  def _compute_features_diffs_and_dists(
+      self,
+      pool_slice: slice = np.s_[:]) -> Tuple[np.ndarray, np.ndarray]:
     """Compute the features difference and distances.
 
-    The computation is done between the 'batch_size' fireflies and all
-    other fireflies in the pool.
+    The computation is done between the 'batch_size' fireflies and the
+    fireflies of the pool in 'pool_slice'.
 
     features_diff[i, j, :] := features[j, :] - features[i, :]
     features_dist[i, j, :] := distance between fly 'j' and fly 'i'
 
+    Arguments:
+      pool_slice: The slice of the pool. Defaults to the whole pool.
+
     Returns:
-      feature differences: (batch_size, pool_size, n_features)
-      features distances: (batch_size, pool_size)
+      feature differences: (batch_size, chunk_size, n_features)
+      features distances: (batch_size, chunk_size)
     """
-    shape = (self.batch_size,) + self._features.shape
-    features_diffs = np.broadcast_to(self._features, shape) - np.expand_dims(
+    pool_features = self._features[pool_slice]
+    shape = (self.batch_size,) + pool_features.shape
+    features_diffs = np.broadcast_to(pool_features, shape) - np.expand_dims(
         self._features[self._batch_slice], 1)
     dists = np.sum(np.square(features_diffs), axis=-1)
     return features_diffs, dists
 
-  def _compute_scaled_directions(self) -> np.ndarray:
+  def _compute_scaled_directions(self,
+                                 pool_slice: slice = np.s_[:]) -> np.ndarray:
     """Compute the scaled direction for applying pull between two flies.
 
     scaled_directions[i,j] := direction of force applied by fly 'j' on fly 'i'.
@@ -287,11 +328,15 @@ class VectorizedEagleStrategy(vb.VectorizedStrategy):
     in np.nan. We handle all of those cases when we compute the actual feautre
     changes by masking the contribution of those cases.
 
+    Arguments:
+      pool_slice: The slice of the pool. Defaults to the whole pool.
+
     Returns:
-      scaled directions: (batch_size, pool_size)
+      scaled directions: (batch_size, chunk_size)
     """
-    shape = (self.batch_size,) + self._rewards.shape
-    directions = np.broadcast_to(self._rewards, shape) - np.expand_dims(
+    pool_rewards = self._rewards[pool_slice]
+    shape = (self.batch_size,) + pool_rewards.shape
+    directions = np.broadcast_to(pool_rewards, shape) - np.expand_dims(
         self._rewards[self._batch_slice], -1)
     scaled_directions = np.where(directions >= 0, self.config.gravity,
                                  -self.config.negative_gravity)
@@ -302,13 +347,15 @@ class VectorizedEagleStrategy(vb.VectorizedStrategy):
       features_diffs: np.ndarray,
       dists: np.ndarray,
       scaled_directions: np.ndarray,
+      pool_slice: slice = np.s_[:],
   ) -> np.ndarray:
     """Compute the firefly features changes due to mutation.
 
     Arguments:
-      features_diffs: (batch_size, pool_size, n_features)
-      dists: (batch_size, pool_size)
-      scaled_directions: (batch_size, pool_size)
+      features_diffs: (batch_size, chunk_size, n_features)
+      dists: (batch_size, chunk_size)
+      scaled_directions: (batch_size, chunk_size)
+      pool_slice: The slice of the pool the arrays are computed from.
 
     Returns:
       feature changes: (batch_size, feature_n)
@@ -317,14 +364,7 @@ class VectorizedEagleStrategy(vb.VectorizedStrategy):
     pulls = np.exp(-self.config.visibility * dists / self._n_features * 10)
     scaled_pulls = np.expand_dims(scaled_directions * pulls, -1)
     # Handle removed fireflies without updated rewards.
-    inf_indx = np.isinf(self._rewards)
-    if np.sum(inf_indx) == self.pool_size:
-      logging.warning(
-          ("All firefly were recently removed. This Shouldn't happen."
-           "Pool Features:\n%sPool rewards:\n%s"), self._features,
-          self._rewards)
-
-      return np.zeros((self.batch_size, self._n_features))
+    inf_indx = np.isinf(self._rewards[pool_slice])
     # Sums contributions of all non-outdated fireflies with invalid directions.
     return np.sum(
         features_diffs[:, ~inf_indx] * scaled_pulls[:, ~inf_indx], axis=1)
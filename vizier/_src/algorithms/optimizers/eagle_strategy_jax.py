@@ -0,0 +1,421 @@
+# Copyright 2022 Google LLC.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""JIT-compiled Eagle Strategy optimizer on JAX.
+
+VectorizedOptimizer drives the NumPy VectorizedEagleStrategy from a Python
+loop which calls `suggest`, the score function and `update` for every batch.
+JaxEagleOptimizer runs the same algorithm with the whole ask-score-tell loop,
+including the tracking of the best results, compiled into a single
+`jax.lax.while_loop`.
+
+The score function is traced into the loop if it's written in JAX
+(`jit_score_fn=True`). Otherwise it's called from the loop on the host with
+`jax.pure_callback`, and the loop is compiled only once per problem shape.
+
+The computation is done in float64 like in the NumPy strategy. Given the same
+random values, both implementations compute the same suggestions and pool
+updates. The random values themselves are drawn with `jax.random`, so the two
+implementations return different results for the same seed.
+
+JaxEagleOptimizerFactory falls back to the NumPy implementation when JAX is
+not installed, or when a time limit is set as it can't be checked inside the
+compiled loop. Likewise, JaxEagleOptimizer.optimize runs the NumPy optimizer
+when it's given a deadline.
+
+Example
+=======
+optimizer = JaxEagleOptimizerFactory()(
+    suggestion_batch_size=5, max_evaluations=15_000)
+best_trials = optimizer.optimize(converter, score_fn, count=3)
+"""
+
+import datetime
+import itertools
+import logging
+from typing import Any, Dict, NamedTuple, Optional, Union
+
+import attr
+import numpy as np
+from vizier import pyvizier as vz
+from vizier._src.algorithms.optimizers import eagle_param_handler
+from vizier._src.algorithms.optimizers import eagle_strategy
+from vizier._src.algorithms.optimizers import vectorized_base as vb
+from vizier.pyvizier import converters
+
+try:
+  import jax  # pylint: disable=g-import-not-at-top
+  from jax import numpy as jnp  # pylint: disable=g-import-not-at-top
+  from jax.experimental import enable_x64  # pylint: disable=g-import-not-at-top
+except ImportError:
+  jax = None
+  jnp = None
+  enable_x64 = None
+
+
+class _EagleState(NamedTuple):
+  """Loop state of the optimizer. See VectorizedEagleStrategy."""
+  features: Any  # (pool_size, n_features)
+  rewards: Any  # (pool_size,)
+  perturbations: Any  # (pool_size,)
+  best_reward: Any  # ()
+  iteration: Any  # ()
+  key: Any
+  # The best results seen thus far, in decreasing order of reward.
+  top_features: Any  # (count, n_features)
+  top_rewards: Any  # (count,)
+  num_evaluated: Any  # ()
+
+
+def _create_features(features, rewards, batch_features, batch_rewards,
+                     config: Dict[str, Any]):
+  """Returns the changes of $batch_features due to the pulls of the pool.
+
+  Same as `VectorizedEagleStrategy._create_features`, minus the batch features.
+
+  Args:
+    features: (pool_size, n_features)
+    rewards: (pool_size,)
+    batch_features: (batch_size, n_features)
+    batch_rewards: (batch_size,)
+    config: Eagle strategy configuration.
+
+  Returns:
+    feature changes: (batch_size, n_features)
+  """
+  n_features = features.shape[-1]
+  features_diffs = features[jnp.newaxis] - batch_features[:, jnp.newaxis]
+  dists = jnp.sum(jnp.square(features_diffs), axis=-1)
+  directions = rewards[jnp.newaxis] - batch_rewards[:, jnp.newaxis]
+  scaled_directions = jnp.where(directions >= 0, config['gravity'],
+                                -config['negative_gravity'])
+  pulls = jnp.exp(-config['visibility'] * dists / n_features * 10)
+  # Removed fireflies don't pull.
+  scaled_pulls = jnp.where(
+      jnp.isinf(rewards)[jnp.newaxis], 0.0, scaled_directions * pulls)
+  return jnp.sum(features_diffs * scaled_pulls[..., jnp.newaxis], axis=1)
+
+
+def _create_perturbations(noise, batch_perturbations, perturbation_factors):
+  """Scales Laplace $noise (batch_size, n_features) into perturbations."""
+  noise = noise / jnp.max(jnp.abs(noise), axis=1, keepdims=True)
+  return (noise * batch_perturbations[:, jnp.newaxis] *
+          perturbation_factors[jnp.newaxis])
+
+
+def _sample_categorical(features, unifs, masks: Dict[str, Any]):
+  """Same as `EagleParamHandler.sample_categorical` with uniforms $unifs.
+
+  Args:
+    features: (batch_size, n_features)
+    unifs: (batch_size, n_categorical)
+    masks: Categorical masks of the EagleParamHandler.
+
+  Returns:
+    The features with sampled categorical parameters. (batch_size, n_features)
+  """
+  params_mask = masks['categorical_params_mask']
+  param_features = features[:, jnp.newaxis] * params_mask
+  probs = param_features / jnp.sum(param_features, axis=-1, keepdims=True)
+  locs = jnp.cumsum(probs, axis=-1) >= unifs[..., jnp.newaxis]
+  masked_locs = locs * params_mask + masks['tiebreak_array']
+  sampled_params = jnp.trunc(
+      masked_locs / jnp.max(masked_locs, axis=-1, keepdims=True))
+  return (jnp.sum(sampled_params, axis=1) + features *
+          (1 - masks['categorical_mask']))
+
+
+def _update_pool(batch_features, batch_rewards, batch_perturbations,
+                 suggested_features, suggested_rewards, random_features,
+                 best_reward, config: Dict[str, Any]):
+  """Updates the batch of the pool with the rewards of its suggestions.
+
+  Same as `VectorizedEagleStrategy._update_pool_features_and_rewards` followed
+  by `_trim_pool`, with the replacements of removed flies taken from
+  $random_features.
+
+  Args:
+    batch_features: (batch_size, n_features)
+    batch_rewards: (batch_size,)
+    batch_perturbations: (batch_size,)
+    suggested_features: (batch_size, n_features)
+    suggested_rewards: (batch_size,)
+    random_features: (batch_size, n_features)
+    best_reward: Best reward seen thus far, including $suggested_rewards.
+    config: Eagle strategy configuration.
+
+  Returns:
+    The updated features, rewards and perturbations of the batch.
+  """
+  improve = suggested_rewards > batch_rewards
+  features = jnp.where(improve[:, jnp.newaxis], suggested_features,
+                       batch_features)
+  rewards = jnp.where(improve, suggested_rewards, batch_rewards)
+  perturbations = jnp.where(improve, batch_perturbations,
+                            batch_perturbations * config['penalize_factor'])
+  # The best firefly is never removed.
+  remove = ((perturbations < config['perturbation_lower_bound']) &
+            (rewards != best_reward))
+  features = jnp.where(remove[:, jnp.newaxis], random_features, features)
+  rewards = jnp.where(remove, -jnp.inf, rewards)
+  perturbations = jnp.where(remove, config['perturbation'], perturbations)
+  return features, rewards, perturbations
+
+
+# Score functions called back from the compiled loop, keyed by a token that is
+# passed to the loop as an argument so it doesn't need to be recompiled.
+_score_fns: Dict[int, vb.BatchArrayScoreFunction] = {}
+_score_fn_tokens = itertools.count()
+
+
+def _call_score_fn(token, features) -> np.ndarray:
+  rewards = _score_fns[int(token)](np.asarray(features))
+  return np.asarray(rewards, dtype=np.float64).reshape(features.shape[0])
+
+
+def _optimize_loop(key, score_token, config: Dict[str, Any],
+                   arrays: Dict[str, Any], *, score_fn, batch_size: int,
+                   pool_size: int, count: int, max_evaluations: int,
+                   has_categorical: bool) -> _EagleState:
+  """Runs the ask-score-tell loop of the Eagle strategy."""
+  n_features = arrays['perturbation_factors'].shape[0]
+  num_batches = pool_size // batch_size
+  oov_mask = arrays['oov_mask']
+
+  def random_features(key, n):
+    return jax.random.uniform(
+        key, (n, n_features), dtype=jnp.float64) * oov_mask
+
+  def score(features):
+    if score_fn is not None:
+      rewards = score_fn(features)
+    else:
+      rewards = jax.pure_callback(
+          _call_score_fn, jax.ShapeDtypeStruct((batch_size,), jnp.float64),
+          score_token, features)
+    return jnp.asarray(rewards, dtype=jnp.float64).reshape(batch_size)
+
+  def body(state: _EagleState) -> _EagleState:
+    key, noise_key, unif_key, random_key = jax.random.split(state.key, 4)
+    start = (state.iteration % num_batches) * batch_size
+    batch = lambda x: jax.lax.dynamic_slice_in_dim(x, start, batch_size)
+    batch_features = batch(state.features)
+    batch_rewards = batch(state.rewards)
+    batch_perturbations = batch(state.perturbations)
+    # The strategy is initializing while the pool doesn't have rewards.
+    initializing = state.iteration < num_batches
+
+    # Suggest.
+    noise = jax.random.laplace(
+        noise_key, (batch_size, n_features), dtype=jnp.float64)
+    mutated_features = (
+        batch_features + _create_features(state.features, state.rewards,
+                                          batch_features, batch_rewards, config)
+        + _create_perturbations(noise, batch_perturbations,
+                                arrays['perturbation_factors']))
+    new_features = jnp.where(initializing, batch_features, mutated_features)
+    if has_categorical:
+      unifs = jax.random.uniform(
+          unif_key, (batch_size, arrays['categorical_params_mask'].shape[0]),
+          dtype=jnp.float64)
+      new_features = _sample_categorical(new_features, unifs, arrays)
+    suggested_features = jnp.clip(new_features, 0, 1)
+
+    # Score and update.
+    suggested_rewards = score(suggested_features)
+    best_reward = jnp.max(
+        jnp.append(suggested_rewards, state.best_reward))
+    updated = _update_pool(batch_features, batch_rewards, batch_perturbations,
+                           suggested_features, suggested_rewards,
+                           random_features(random_key, batch_size),
+                           best_reward, config)
+    initialized = (suggested_features, suggested_rewards, batch_perturbations)
+    features, rewards, perturbations = [
+        jnp.where(initializing, i, u) for i, u in zip(initialized, updated)
+    ]
+    update = lambda x, y: jax.lax.dynamic_update_slice_in_dim(x, y, start, 0)
+
+    # Track the best results.
+    candidate_rewards = jnp.concatenate([
+        state.top_rewards,
+        jnp.where(jnp.isnan(suggested_rewards), -jnp.inf, suggested_rewards)
+    ])
+    candidate_features = jnp.concatenate(
+        [state.top_features, suggested_features])
+    top_rewards, top_indices = jax.lax.top_k(candidate_rewards, count)
+
+    return _EagleState(
+        features=update(state.features, features),
+        rewards=update(state.rewards, rewards),
+        perturbations=update(state.perturbations, perturbations),
+        best_reward=best_reward,
+        iteration=state.iteration + 1,
+        key=key,
+        top_features=candidate_features[top_indices],
+        top_rewards=top_rewards,
+        num_evaluated=state.num_evaluated + batch_size)
+
+  key, init_key = jax.random.split(key)
+  initial_state = _EagleState(
+      features=random_features(init_key, pool_size),
+      rewards=jnp.full((pool_size,), -jnp.inf, dtype=jnp.float64),
+      perturbations=jnp.full((pool_size,),
+                             config['perturbation'],
+                             dtype=jnp.float64),
+      best_reward=jnp.array(-jnp.inf, dtype=jnp.float64),
+      iteration=jnp.array(0),
+      key=key,
+      top_features=jnp.zeros((count, n_features), dtype=jnp.float64),
+      top_rewards=jnp.full((count,), -jnp.inf, dtype=jnp.float64),
+      num_evaluated=jnp.array(0))
+  return jax.lax.while_loop(lambda s: s.num_evaluated < max_evaluations, body,
+                            initial_state)
+
+
+if jax is not None:
+  _jit_optimize_loop = jax.jit(
+      _optimize_loop,
+      static_argnames=('score_fn', 'batch_size', 'pool_size', 'count',
+                       'max_evaluations', 'has_categorical'))
+
+
+@attr.define(kw_only=True)
+class JaxEagleOptimizer:
+  """Eagle strategy optimizer whose optimization loop is compiled with JAX.
+
+  Attributes:
+    eagle_config: The Eagle strategy configuration.
+    suggestion_batch_size: The number of suggestions scored together.
+    max_evaluations: The maximum number of score function evaluations.
+    jit_score_fn: If True, the score function is traced with JAX. Otherwise
+      it's called on the host with NumPy arrays.
+  """
+  eagle_config: eagle_strategy.EagleStrategyConfig = attr.field(
+      factory=eagle_strategy.EagleStrategyConfig)
+  suggestion_batch_size: int = 5
+  max_evaluations: int = 15_000
+  jit_score_fn: bool = False
+
+  def optimize(
+      self,
+      converter: converters.TrialToArrayConverter,
+      score_fn: vb.BatchArrayScoreFunction,
+      count: int = 1,
+      seed: Optional[int] = None,
+      deadline: Optional[datetime.datetime] = None,
+  ) -> list[vz.Trial]:
+    """Optimizes the score function. See `VectorizedOptimizer.optimize`.
+
+    The deadline can't be checked inside the compiled loop, so the NumPy
+    optimizer is used when it's set.
+    """
+    if deadline is not None:
+      logging.info('Using the NumPy eagle strategy to meet the deadline.')
+      return vb.VectorizedOptimizer(
+          strategy_factory=eagle_strategy.VectorizedEagleStrategyFactory(
+              eagle_config=self.eagle_config),
+          suggestion_batch_size=self.suggestion_batch_size,
+          max_evaluations=self.max_evaluations).optimize(
+              converter, score_fn, count=count, seed=seed, deadline=deadline)
+    if seed is None:
+      seed = np.random.default_rng().integers(np.iinfo(np.int32).max)
+    param_handler = eagle_param_handler.EagleParamHandler(
+        converter=converter,
+        rng=np.random.default_rng(seed),
+        categorical_perturbation_factor=self.eagle_config
+        .categorical_perturbation_factor,
+        pure_categorical_perturbation_factor=self.eagle_config
+        .pure_categorical_perturbation_factor)
+    n_features = param_handler.n_features
+    config = {
+        name: float(getattr(self.eagle_config, name)) for name in [
+            'visibility', 'gravity', 'negative_gravity', 'perturbation',
+            'perturbation_lower_bound', 'penalize_factor'
+        ]
+    }
+    arrays = {
+        'perturbation_factors': param_handler.perturbation_factors,
+        'oov_mask': (param_handler.oov_mask if param_handler.oov_mask
+                     is not None else np.ones(n_features)),
+    }
+    if param_handler.has_categorical:
+      arrays['categorical_params_mask'] = param_handler.categorical_params_mask
+      arrays['categorical_mask'] = param_handler.categorical_mask
+      arrays['tiebreak_array'] = param_handler.tiebreak_array
+
+    token = next(_score_fn_tokens)
+    _score_fns[token] = score_fn
+    start_time = datetime.datetime.now()
+    try:
+      with enable_x64():
+        state = _jit_optimize_loop(
+            jax.random.PRNGKey(seed),
+            token,
+            config,
+            arrays,
+            score_fn=score_fn if self.jit_score_fn else None,
+            batch_size=self.suggestion_batch_size,
+            pool_size=self.eagle_config.pool_size,
+            count=count,
+            max_evaluations=self.max_evaluations,
+            has_categorical=param_handler.has_categorical)
+        top_features = np.asarray(state.top_features)
+        top_rewards = np.asarray(state.top_rewards)
+        num_evaluated = int(state.num_evaluated)
+    finally:
+      del _score_fns[token]
+    logging.info(
+        'Optimization completed. Duration: %s. Evaluations: %s. Best Rewards: %s',
+        datetime.datetime.now() - start_time, num_evaluated, top_rewards)
+
+    num_results = min(count, num_evaluated)
+    trials = []
+    parameters = converter.to_parameters(top_features[:num_results])
+    for params, reward in zip(parameters, top_rewards[:num_results]):
+      trial = vz.Trial(parameters=params)
+      trial.complete(vz.Measurement({'acquisition': float(reward)}))
+      trials.append(trial)
+    return trials
+
+
+@attr.define
+class JaxEagleOptimizerFactory:
+  """Creates JaxEagleOptimizer, or the NumPy optimizer as a fallback.
+
+  Has the same signature as VectorizedOptimizerFactory.
+  """
+  eagle_config: eagle_strategy.EagleStrategyConfig = attr.field(
+      factory=eagle_strategy.EagleStrategyConfig)
+  jit_score_fn: bool = attr.field(default=False, kw_only=True)
+
+  def __call__(
+      self,
+      suggestion_batch_size: int,
+      max_evaluations: int,
+      max_duration: Optional[datetime.timedelta] = None,
+  ) -> Union[JaxEagleOptimizer, vb.VectorizedOptimizer]:
+    if jax is None or max_duration is not None:
+      logging.info('Using the NumPy eagle strategy. JAX installed: %s.',
+                   jax is not None)
+      return vb.VectorizedOptimizer(
+          strategy_factory=eagle_strategy.VectorizedEagleStrategyFactory(
+              eagle_config=self.eagle_config),
+          suggestion_batch_size=suggestion_batch_size,
+          max_evaluations=max_evaluations,
+          max_duration=max_duration)
+    return JaxEagleOptimizer(
+        eagle_config=self.eagle_config,
+        suggestion_batch_size=suggestion_batch_size,
+        max_evaluations=max_evaluations,
+        jit_score_fn=self.jit_score_fn)
@@ -0,0 +1,191 @@
+# Copyright 2022 Google LLC.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for eagle_strategy_jax."""
+
+import datetime
+
+from jax import numpy as jnp
+from jax.experimental import enable_x64
+import numpy as np
+from vizier import pyvizier as vz
+from vizier._src.algorithms.optimizers import eagle_param_handler
+from vizier._src.algorithms.optimizers import eagle_strategy
+from vizier._src.algorithms.optimizers import eagle_strategy_jax
+from vizier._src.algorithms.optimizers import vectorized_base as vb
+from vizier.pyvizier import converters
+
+from absl.testing import absltest
+from absl.testing import parameterized
+
+
+def _create_converter(
+    n_continuous: int = 2,
+    n_categorical: int = 0) -> converters.TrialToArrayConverter:
+  problem = vz.ProblemStatement()
+  root = problem.search_space.select_root()
+  for i in range(n_continuous):
+    root.add_float_param(f'x{i}', 0.0, 1.0)
+  for i in range(n_categorical):
+    root.add_categorical_param(f'c{i}', ['a', 'b', 'c'])
+  return converters.TrialToArrayConverter.from_study_config(problem)
+
+
+def _config_dict(config: eagle_strategy.EagleStrategyConfig):
+  return {
+      'visibility': config.visibility,
+      'gravity': config.gravity,
+      'negative_gravity': config.negative_gravity,
+      'perturbation': config.perturbation,
+      'perturbation_lower_bound': config.perturbation_lower_bound,
+      'penalize_factor': config.penalize_factor,
+  }
+
+
+class JaxEagleStepsTest(absltest.TestCase):
+  """Tests that the steps of the loop match the NumPy strategy."""
+
+  def setUp(self):
+    super().setUp()
+    self.config = eagle_strategy.EagleStrategyConfig(pool_size=6)
+    self.eagle = eagle_strategy.VectorizedEagleStrategy(
+        converter=_create_converter(3),
+        config=self.config,
+        batch_size=2,
+        seed=1)
+    rng = np.random.default_rng(0)
+    self.eagle._features = rng.uniform(size=(6, 3))
+    self.eagle._rewards = np.array([1.0, -np.inf, 3.0, 0.5, -np.inf, 2.0])
+    self.eagle._perturbations = np.array([0.01, 0.001, 0.0011, 0.01, 0.1, 0.1])
+    self.eagle._iterations = 3
+    self.eagle._increment_batch()
+
+  def test_create_features(self):
+    batch = self.eagle._batch_slice
+    with enable_x64():
+      changes = eagle_strategy_jax._create_features(
+          jnp.asarray(self.eagle._features), jnp.asarray(self.eagle._rewards),
+          jnp.asarray(self.eagle._features[batch]),
+          jnp.asarray(self.eagle._rewards[batch]), _config_dict(self.config))
+      np.testing.assert_allclose(
+          self.eagle._features[batch] + changes,
+          self.eagle._create_features(),
+          rtol=1e-12)
+
+  def test_update_pool(self):
+    batch = self.eagle._batch_slice
+    suggested_features = np.full((2, 3), 0.5)
+    suggested_rewards = np.array([0.0, 4.0])
+    features = self.eagle._features[batch].copy()
+    rewards = self.eagle._rewards[batch].copy()
+    perturbations = self.eagle._perturbations[batch].copy()
+    self.eagle._last_suggested_features = suggested_features
+    self.eagle.update(suggested_rewards)
+
+    with enable_x64():
+      new_features, new_rewards, new_perturbations = (
+          eagle_strategy_jax._update_pool(
+              jnp.asarray(features), jnp.asarray(rewards),
+              jnp.asarray(perturbations), jnp.asarray(suggested_features),
+              jnp.asarray(suggested_rewards), jnp.zeros((2, 3)),
+              jnp.asarray(4.0), _config_dict(self.config)))
+    # The first fly didn't improve and was removed.
+    np.testing.assert_array_equal(new_rewards, self.eagle._rewards[batch])
+    np.testing.assert_array_equal(new_rewards, [-np.inf, 4.0])
+    np.testing.assert_allclose(new_perturbations,
+                               self.eagle._perturbations[batch])
+    np.testing.assert_array_equal(new_features[1],
+                                  self.eagle._features[batch][1])
+
+  def test_sample_categorical(self):
+    converter = _create_converter(1, 2)
+    handler = eagle_param_handler.EagleParamHandler(
+        converter=converter,
+        rng=np.random.default_rng(5),
+        categorical_perturbation_factor=25,
+        pure_categorical_perturbation_factor=30)
+    features = np.random.default_rng(1).uniform(size=(4, handler.n_features))
+    unifs = np.random.default_rng(5).uniform(0.0, 1.0, size=(4, 2))
+    masks = {
+        'categorical_params_mask': handler.categorical_params_mask,
+        'categorical_mask': handler.categorical_mask,
+        'tiebreak_array': handler.tiebreak_array,
+    }
+    with enable_x64():
+      np.testing.assert_array_equal(
+          eagle_strategy_jax._sample_categorical(
+              jnp.asarray(features), jnp.asarray(unifs), masks),
+          handler.sample_categorical(features))
+
+
+class JaxEagleOptimizerTest(parameterized.TestCase):
+
+  @parameterized.parameters(True, False)
+  def test_optimize(self, jit_score_fn):
+    converter = _create_converter(3, 1)
+    optimum = np.array([0.2, 0.5, 0.7, 0.0, 1.0, 0.0, 0.0])
+    if jit_score_fn:
+      score_fn = lambda x: -jnp.sum(jnp.square(x - optimum), axis=-1)
+    else:
+      score_fn = lambda x: -np.sum(np.square(x - optimum), axis=-1)
+    optimizer = eagle_strategy_jax.JaxEagleOptimizer(
+        max_evaluations=2000, jit_score_fn=jit_score_fn)
+    trials = optimizer.optimize(converter, score_fn, count=3, seed=1)
+
+    self.assertLen(trials, 3)
+    rewards = [t.final_measurement.metrics['acquisition'].value for t in trials]
+    self.assertEqual(rewards, sorted(rewards, reverse=True))
+    self.assertGreater(rewards[0], -1e-2)
+    self.assertEqual(trials[0].parameters['c0'].value, 'b')
+
+  def test_same_seed_same_results(self):
+    converter = _create_converter(2)
+    score_fn = lambda x: -np.sum(np.square(x - 0.3), axis=-1)
+    optimizer = eagle_strategy_jax.JaxEagleOptimizer(max_evaluations=100)
+    trials1 = optimizer.optimize(converter, score_fn, seed=2)
+    trials2 = optimizer.optimize(converter, score_fn, seed=2)
+    self.assertEqual(trials1[0].parameters, trials2[0].parameters)
+
+  def test_count_larger_than_evaluations(self):
+    optimizer = eagle_strategy_jax.JaxEagleOptimizer(
+        suggestion_batch_size=5, max_evaluations=5)
+    trials = optimizer.optimize(
+        _create_converter(2), lambda x: np.sum(x, axis=-1), count=10)
+    self.assertLen(trials, 5)
+
+  def test_optimize_with_deadline(self):
+    optimizer = eagle_strategy_jax.JaxEagleOptimizer(max_evaluations=100)
+    trials = optimizer.optimize(
+        _create_converter(2),
+        lambda x: -np.sum(np.square(x - 0.3), axis=-1),
+        count=2,
+        deadline=datetime.datetime.now() + datetime.timedelta(minutes=1))
+    self.assertLen(trials, 2)
+
+  def test_factory(self):
+    factory = eagle_strategy_jax.JaxEagleOptimizerFactory()
+    self.assertIsInstance(
+        factory(suggestion_batch_size=5, max_evaluations=100),
+        eagle_strategy_jax.JaxEagleOptimizer)
+    # Time limits can't be checked in the compiled loop.
+    self.assertIsInstance(
+        factory(
+            suggestion_batch_size=5,
+            max_evaluations=100,
+            max_duration=datetime.timedelta(seconds=1)),
+        vb.VectorizedOptimizer)
+
+
+if __name__ == '__main__':
+  absltest.main()
@@ -102,6 +102,23 @@ class VectorizedEagleStrategyContinuousTest(absltest.TestCase):
   def test_create_features(self):
     self.assertEqual(self.eagle._create_features().shape, (2, 2))
 
+  def test_create_features_with_pull_memory_budget(self):
+    problem = vz.ProblemStatement()
+    for i in range(10):
+      problem.search_space.select_root().add_float_param(f'x{i}', 0.0, 1.0)
+    converter = converters.TrialToArrayConverter.from_study_config(problem)
+    features_list = []
+    for pull_memory_budget in [None, 2 * 5 * 10 * 8 * 7]:
+      config = eagle_strategy.EagleStrategyConfig(
+          pool_size=100, pull_memory_budget=pull_memory_budget)
+      eagle = eagle_strategy.VectorizedEagleStrategy(
+          converter=converter, config=config, batch_size=5, seed=1)
+      eagle._rewards = np.random.default_rng(0).normal(size=100)
+      eagle._rewards[::3] = -np.inf
+      features_list.append(eagle._create_features())
+    self.assertEqual(eagle._pool_chunk_size(), 7)
+    np.testing.assert_allclose(features_list[0], features_list[1], rtol=1e-12)
+
   def test_create_perturbations(self):
     perturbations = self.eagle._create_perturbations()
     self.assertEqual(perturbations.shape, (2, 2))
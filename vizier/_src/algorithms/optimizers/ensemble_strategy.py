@@ -0,0 +1,147 @@
+# Copyright 2022 Google LLC.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Ensemble of independent vectorized strategies (multi-swarm).
+
+A single strategy tends to converge to one basin of a multimodal acquisition
+function. The EnsembleStrategy runs several independent strategies ("swarms")
+with different seeds, which may be of different kinds (e.g. eagle and random).
+Their suggestions are stacked into a single batch, so the score function is
+called once per step for all the swarms, and the best results of all swarms
+are merged by the VectorizedOptimizer.
+
+Swarms whose best reward hasn't improved for `restart_patience` steps are
+replaced by new swarms with new seeds.
+
+Example
+=======
+optimizer = VectorizedOptimizer(
+    strategy_factory=EnsembleStrategyFactory(
+        [VectorizedEagleStrategyFactory()] * 4, restart_patience=200),
+    suggestion_batch_size=5)
+# Every call to score_fn is on 4 * 5 suggestions.
+optimizer.optimize(converter, score_fn, count=3)
+"""
+
+from typing import List, Optional, Sequence
+
+import attr
+import numpy as np
+from vizier._src.algorithms.optimizers import vectorized_base as vb
+from vizier.pyvizier import converters
+
+
+@attr.define
+class _Swarm:
+  """A strategy of the ensemble and its progress."""
+  strategy: vb.VectorizedStrategy
+  factory: vb.VectorizedStrategyFactory
+  best_reward: float = -np.inf
+  steps_without_improvement: int = 0
+
+
+class EnsembleStrategy(vb.VectorizedStrategy):
+  """Runs independent strategies and stacks their suggestions."""
+
+  def __init__(
+      self,
+      converter: converters.TrialToArrayConverter,
+      strategy_factories: Sequence[vb.VectorizedStrategyFactory],
+      suggestion_batch_size: int,
+      seed: Optional[int] = None,
+      restart_patience: Optional[int] = None,
+  ):
+    """Init.
+
+    Args:
+      converter: The converter passed to the strategy factories.
+      strategy_factories: The factory of each swarm.
+      suggestion_batch_size: The batch size of each swarm.
+      seed: The seed from which the seeds of the swarms are drawn.
+      restart_patience: The number of steps without improvement after which a
+        swarm is restarted. If None, swarms are never restarted.
+    """
+    if not strategy_factories:
+      raise ValueError('At least one strategy factory is required.')
+    self._converter = converter
+    self._batch_size = suggestion_batch_size
+    self._restart_patience = restart_patience
+    self._rng = np.random.default_rng(seed)
+    self._swarms = [self._create_swarm(f) for f in strategy_factories]
+    self._batch_sizes: List[int] = []
+    self.num_restarts = 0
+
+  def _create_swarm(self, factory: vb.VectorizedStrategyFactory) -> _Swarm:
+    seed = int(self._rng.integers(np.iinfo(np.int32).max))
+    return _Swarm(
+        strategy=factory(self._converter, self._batch_size, seed),
+        factory=factory)
+
+  @property
+  def num_swarms(self) -> int:
+    return len(self._swarms)
+
+  @property
+  def suggestion_batch_size(self) -> int:
+    """The number of suggestions of all swarms returned by `suggest`."""
+    return self.num_swarms * self._batch_size
+
+  def suggest(self) -> vb.Array:
+    """Returns the suggestions of all swarms, stacked in swarm order."""
+    suggestions = [np.asarray(s.strategy.suggest()) for s in self._swarms]
+    self._batch_sizes = [len(s) for s in suggestions]
+    return np.concatenate(suggestions, axis=0)
+
+  def update(self, rewards: vb.Array) -> None:
+    """Updates every swarm with the rewards of its suggestions."""
+    rewards = np.asarray(rewards)
+    splits = np.split(rewards, np.cumsum(self._batch_sizes)[:-1])
+    for i, (swarm, swarm_rewards) in enumerate(zip(self._swarms, splits)):
+      swarm.strategy.update(swarm_rewards)
+      best_reward = np.max(swarm_rewards, initial=-np.inf)
+      if best_reward > swarm.best_reward:
+        swarm.best_reward = best_reward
+        swarm.steps_without_improvement = 0
+      else:
+        swarm.steps_without_improvement += 1
+      if (self._restart_patience is not None and
+          swarm.steps_without_improvement >= self._restart_patience):
+        self._swarms[i] = self._create_swarm(swarm.factory)
+        self.num_restarts += 1
+
+
+@attr.define(frozen=True)
+class EnsembleStrategyFactory(vb.VectorizedStrategyFactory):
+  """Creates EnsembleStrategy.
+
+  The `suggestion_batch_size` of the factory is the batch size of each swarm,
+  so the ensemble suggests `len(strategy_factories) * suggestion_batch_size`
+  features at every step.
+  """
+  strategy_factories: Sequence[vb.VectorizedStrategyFactory] = attr.field(
+      converter=tuple)
+  restart_patience: Optional[int] = attr.field(default=None, kw_only=True)
+
+  def __call__(
+      self,
+      converter: converters.TrialToArrayConverter,
+      suggestion_batch_size: int = 5,
+      seed: Optional[int] = None,
+  ) -> EnsembleStrategy:
+    return EnsembleStrategy(
+        converter=converter,
+        strategy_factories=self.strategy_factories,
+        suggestion_batch_size=suggestion_batch_size,
+        seed=seed,
+        restart_patience=self.restart_patience)
@@ -0,0 +1,93 @@
+# Copyright 2022 Google LLC.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for ensemble_strategy."""
+
+import numpy as np
+from vizier import pyvizier as vz
+from vizier._src.algorithms.optimizers import eagle_strategy
+from vizier._src.algorithms.optimizers import ensemble_strategy
+from vizier._src.algorithms.optimizers import random_vectorized_optimizer as rvo
+from vizier._src.algorithms.optimizers import vectorized_base as vb
+from vizier.pyvizier import converters
+
+from absl.testing import absltest
+
+
+def _create_converter(n_features: int) -> converters.TrialToArrayConverter:
+  problem = vz.ProblemStatement()
+  root = problem.search_space.select_root()
+  for i in range(n_features):
+    root.add_float_param(f'x{i}', 0.0, 1.0)
+  return converters.TrialToArrayConverter.from_study_config(problem)
+
+
+class EnsembleStrategyTest(absltest.TestCase):
+
+  def test_suggest_and_update_mixed_swarms(self):
+    factory = ensemble_strategy.EnsembleStrategyFactory([
+        eagle_strategy.VectorizedEagleStrategyFactory(),
+        rvo._random_strategy_factory,
+        eagle_strategy.VectorizedEagleStrategyFactory(),
+    ])
+    strategy = factory(_create_converter(3), suggestion_batch_size=2, seed=1)
+    self.assertEqual(strategy.num_swarms, 3)
+    self.assertEqual(strategy.suggestion_batch_size, 6)
+    for _ in range(30):
+      suggestions = strategy.suggest()
+      self.assertEqual(suggestions.shape, (6, 3))
+      strategy.update(-np.sum(np.square(suggestions - 0.5), axis=-1))
+
+  def test_same_seed_same_suggestions(self):
+    factory = ensemble_strategy.EnsembleStrategyFactory(
+        [eagle_strategy.VectorizedEagleStrategyFactory()] * 2)
+    suggestions = [
+        factory(_create_converter(2), 5, seed=3).suggest() for _ in range(2)
+    ]
+    np.testing.assert_array_equal(suggestions[0], suggestions[1])
+    self.assertFalse(np.array_equal(suggestions[0][:5], suggestions[0][5:]))
+
+  def test_restarts_stagnating_swarms(self):
+    factory = ensemble_strategy.EnsembleStrategyFactory(
+        [rvo._random_strategy_factory] * 3, restart_patience=2)
+    strategy = factory(_create_converter(2), 4, seed=1)
+    for _ in range(3):
+      strategy.suggest()
+      strategy.update(np.zeros(12))
+    # The first step improves from -inf, the two next ones don't.
+    self.assertEqual(strategy.num_restarts, 3)
+
+  def test_optimize(self):
+    num_calls = 0
+
+    def score_fn(x):
+      nonlocal num_calls
+      num_calls += 1
+      return np.sum(np.cos(8 * np.pi * x), axis=-1) - np.sum(x, axis=-1)
+
+    optimizer = vb.VectorizedOptimizer(
+        strategy_factory=ensemble_strategy.EnsembleStrategyFactory(
+            [eagle_strategy.VectorizedEagleStrategyFactory()] * 4,
+            restart_patience=50),
+        suggestion_batch_size=5,
+        max_evaluations=2000)
+    trials = optimizer.optimize(_create_converter(2), score_fn, count=3, seed=1)
+    self.assertLen(trials, 3)
+    self.assertEqual(num_calls, 2000 // 20)
+    best_reward = trials[0].final_measurement.metrics['acquisition'].value
+    self.assertGreater(best_reward, 1.9)
+
+
+if __name__ == '__main__':
+  absltest.main()
@@ -43,6 +43,7 @@ class RandomVectorizedStrategy(vb.VectorizedStrategy):
             self._n_features,
         ))
 
+  @property
   def suggestion_batch_size(self) -> int:
     return self._suggestion_batch_size
 
@@ -134,6 +134,7 @@ class VectorizedOptimizer:
       score_fn: BatchArrayScoreFunction,
       count: int = 1,
       seed: Optional[int] = None,
+      deadline: Optional[datetime.datetime] = None,
   ) -> list[vz.Trial]:
     """Optimize the objective function.
 
@@ -150,8 +151,9 @@ class VectorizedOptimizer:
     of the type associated with each array index, and which indices are part of
     the same CATEGORICAL parameter one-hot encoding.
 
-    The optimization stops when either of 'max_evaluations' or 'max_duration' is
-    reached.
+    The optimization stops when either of 'max_evaluations', 'max_duration' or
+    'deadline' is reached, and returns the best results found so far. At least
+    one batch is evaluated even if the deadline has passed.
 
     Arguments:
       converter: The converter used to convert Trials to arrays.
@@ -159,6 +161,8 @@ class VectorizedOptimizer:
         features_count) and returns a 1D Array (batch_size,).
       count: The number of suggestions to generate.
       seed: The seed to use in the random generator.
+      deadline: The time by which the optimization stops, e.g. derived from
+        `PolicySupporter.TimeRemaining()`. If None, there's no deadline.
 
     Returns:
       The best trials found in the optimization.
@@ -169,7 +173,7 @@ class VectorizedOptimizer:
     evaluated_count = 0
     best_results = []
 
-    while not self._should_stop(start_time, evaluated_count):
+    while not self._should_stop(start_time, evaluated_count, deadline):
       new_features = strategy.suggest()
       new_rewards = score_fn(new_features)
       strategy.update(new_rewards)
@@ -236,11 +240,20 @@ class VectorizedOptimizer:
       trials.append(trial)
     return trials
 
-  def _should_stop(self, start_time: datetime.datetime,
-                   evaluated_count: int) -> bool:
+  def _should_stop(self,
+                   start_time: datetime.datetime,
+                   evaluated_count: int,
+                   deadline: Optional[datetime.datetime] = None) -> bool:
     """Determines if the optimizer has reached its optimization budget."""
-    duration = datetime.datetime.now() - start_time
-    if self.max_duration and duration >= self.max_duration:
+    now = datetime.datetime.now()
+    duration = now - start_time
+    # Evaluates at least one batch before the deadline so there are results.
+    if deadline is not None and now >= deadline and evaluated_count > 0:
+      logging.info(
+          'Optimization completed. Reached deadline. Duration: %s. Evaluations: %s',
+          duration, evaluated_count)
+      return True
+    elif self.max_duration and duration >= self.max_duration:
       logging.info(
           'Optimization completed. Reached time limit. Duration: %s. Evaluations: %s',
           duration, evaluated_count)
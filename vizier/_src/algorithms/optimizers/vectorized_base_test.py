@@ -139,6 +139,23 @@ class VectorizedBaseTest(parameterized.TestCase):
     # Test the optimization stopped after ~3 seconds based on function calls.
     self.assertLess(score_fn.call_count, 4)
 
+  def test_should_stop_deadline(self):
+    problem = vz.ProblemStatement()
+    problem.search_space.root.add_float_param('f1', 0.0, 10.0)
+    converter = converters.TrialToArrayConverter.from_study_config(problem)
+    score_fn = mock.Mock()
+    score_fn.side_effect = lambda x: np.sum(x, axis=-1)
+    strategy_factory = lambda converter, batch, seed: FakeVectorizedStrategy()
+    optimizer = vb.VectorizedOptimizer(
+        strategy_factory=strategy_factory, max_evaluations=100)
+    # A passed deadline still evaluates one batch to return results.
+    res = optimizer.optimize(
+        converter=converter,
+        score_fn=score_fn,
+        deadline=datetime.datetime.now() - datetime.timedelta(seconds=1))
+    self.assertEqual(score_fn.call_count, 1)
+    self.assertLen(res, 1)
+
   def test_vectorized_optimizer_factory(self):
     strategy_factory = lambda converter, batch, seed: FakeVectorizedStrategy()
     optimizer_factory = vb.VectorizedOptimizerFactory(
@@ -14,8 +14,9 @@
 
 """Wrappers for Designer into Policy."""
 import abc
+import datetime
 import json
-from typing import Callable, Generic, Sequence, Type, TypeVar, Protocol
+from typing import Callable, Generic, Optional, Sequence, Type, TypeVar, Protocol
 
 from absl import logging
 from vizier import algorithms as vza
@@ -33,6 +34,18 @@ class DesignerFactory(Protocol[_T]):
     pass
 
 
+def _set_deadline(designer: vza.Designer,
+                  supporter: pythia.PolicySupporter) -> None:
+  """Passes the deadline of the computation to deadline-aware designers."""
+  if not isinstance(designer, vza.DeadlineAwareDesigner):
+    return
+  time_remaining = supporter.TimeRemaining()
+  if time_remaining == datetime.timedelta.max:
+    designer.set_deadline(None)
+  else:
+    designer.set_deadline(datetime.datetime.now() + time_remaining)
+
+
 class DesignerPolicy(pythia.Policy):
   """Wraps a Designer into a pythia Policy.
 
@@ -46,25 +59,44 @@ class DesignerPolicy(pythia.Policy):
   future `suggest()` calls.
   """
 
-  def __init__(self, supporter: pythia.PolicySupporter,
-               designer_factory: DesignerFactory[vza.Designer]):
+  def __init__(self,
+               supporter: pythia.PolicySupporter,
+               designer_factory: DesignerFactory[vza.Designer],
+               *,
+               profiler: Optional[pythia.Profiler] = None):
     """Init.
 
     Args:
       supporter:
       designer_factory:
+      profiler: Profiles the phases of `suggest()`. Defaults to no profiling.
     """
     self._supporter = supporter
     self._designer_factory = designer_factory
+    self._profiler = profiler or pythia.NoOpProfiler()
 
   def suggest(self, request: pythia.SuggestRequest) -> pythia.SuggestDecision:
-    designer = self._designer_factory(request.study_config)
-    new_trials = self._supporter.GetTrials(
-        status_matches=vz.TrialStatus.COMPLETED)
-    designer.update(vza.CompletedTrials(new_trials))
+    try:
+      return self._suggest(request)
+    except Exception:
+      self._profiler.discard()
+      raise
+
+  def _suggest(self, request: pythia.SuggestRequest) -> pythia.SuggestDecision:
+    with self._profiler.span('create_designer'):
+      designer = self._designer_factory(request.study_config)
+    with self._profiler.span('get_trials'):
+      new_trials = self._supporter.GetTrials(
+          status_matches=vz.TrialStatus.COMPLETED)
+    with self._profiler.span('update'):
+      designer.update(vza.CompletedTrials(new_trials))
     self._designer = designer  # saved for debugging purposes only.
-    return pythia.SuggestDecision(
-        designer.suggest(request.count), metadata=vz.MetadataDelta())
+    _set_deadline(designer, self._supporter)
+    with self._profiler.span('suggest'):
+      suggestions = designer.suggest(request.count)
+    metadata_delta = vz.MetadataDelta()
+    self._profiler.report(metadata_delta)
+    return pythia.SuggestDecision(suggestions, metadata=metadata_delta)
 
   def early_stop(self,
                  request: pythia.EarlyStopRequest) -> pythia.EarlyStopDecisions:
@@ -105,7 +137,8 @@ class _SerializableDesignerPolicyBase(pythia.Policy,
                designer_factory: Callable[[vz.ProblemStatement], _T],
                *,
                ns_root: str = 'designer_policy_v0',
-               verbose: int = 0):
+               verbose: int = 0,
+               profiler: Optional[pythia.Profiler] = None):
     """Init.
 
     Args:
@@ -114,6 +147,7 @@ class _SerializableDesignerPolicyBase(pythia.Policy,
       designer_factory:
       ns_root: Root of the namespace where policy state is stored.
       verbose: Logging verbosity.
+      profiler: Profiles the phases of `suggest()`. Defaults to no profiling.
     """
     self._supporter = supporter
     self._designer_factory = designer_factory
@@ -122,25 +156,40 @@ class _SerializableDesignerPolicyBase(pythia.Policy,
     self._problem_statement = problem_statement
     self._verbose = verbose
     self._designer = None
+    self._profiler = profiler or pythia.NoOpProfiler()
 
   def suggest(self, request: pythia.SuggestRequest) -> pythia.SuggestDecision:
+    try:
+      return self._suggest(request)
+    except Exception:
+      self._profiler.discard()
+      raise
+
+  def _suggest(self, request: pythia.SuggestRequest) -> pythia.SuggestDecision:
     # Note that we can avoid O(Num trials) dependency in the standard scenario,
     # by storing only the last element in a consecutive sequence, e.g.,
     # instead of storing [1,2,3,4,11,12,13,21], store: [4,13,21], but
     # we keep things simple in this pseudocode.
-    self._initialize_designer(request.study_config)
-    new_trials = self._get_new_trials(request.max_trial_id)
-    self.designer.update(vza.CompletedTrials(new_trials))
+    with self._profiler.span('restore'):
+      self._initialize_designer(request.study_config)
+    with self._profiler.span('get_trials'):
+      new_trials = self._get_new_trials(request.max_trial_id)
+    with self._profiler.span('update'):
+      self.designer.update(vza.CompletedTrials(new_trials))
     self._incorporated_trial_ids |= set(t.id for t in new_trials)
 
     logging.info(
         'Updated with %s trials. Designer has seen a total of %s trials.',
         len(new_trials), len(self._incorporated_trial_ids))
     metadata_delta = vz.MetadataDelta()
-    metadata_delta.on_study.ns(self._ns_root).attach(self.dump())
+    with self._profiler.span('dump'):
+      metadata_delta.on_study.ns(self._ns_root).attach(self.dump())
 
-    return pythia.SuggestDecision(
-        self.designer.suggest(request.count), metadata=metadata_delta)
+    _set_deadline(self.designer, self._supporter)
+    with self._profiler.span('suggest'):
+      suggestions = self.designer.suggest(request.count)
+    self._profiler.report(metadata_delta)
+    return pythia.SuggestDecision(suggestions, metadata=metadata_delta)
 
   def early_stop(self,
                  request: pythia.EarlyStopRequest) -> pythia.EarlyStopDecisions:
@@ -280,7 +329,8 @@ class SerializableDesignerPolicy(
                designer_cls: Type[vza.SerializableDesigner],
                *,
                ns_root: str = 'designer_policy_v0',
-               verbose: int = 0):
+               verbose: int = 0,
+               profiler: Optional[pythia.Profiler] = None):
     """Init.
 
     Args:
@@ -291,13 +341,15 @@ class SerializableDesignerPolicy(
         to restore the designer state.
       ns_root: Root of the namespace where policy state is stored.
       verbose: Logging verbosity.
+      profiler: Profiles the phases of `suggest()`. Defaults to no profiling.
     """
     super().__init__(
         problem_statement,
         supporter,
         designer_factory,
         ns_root=ns_root,
-        verbose=verbose)
+        verbose=verbose,
+        profiler=profiler)
     self._designer_cls = designer_cls
 
   def _restore_designer(
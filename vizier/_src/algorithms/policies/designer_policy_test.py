@@ -15,6 +15,9 @@
 """Tests for designer_policy."""
 
 import copy
+import datetime
+import json
+from unittest import mock
 
 from typing import Optional, Sequence
 from vizier import algorithms as vza
@@ -76,6 +79,22 @@ class _FakeSerializableDesigner(vza.PartiallySerializableDesigner,
 _NUM_INITIAL_COMPLETED_TRIALS = 10
 
 
+class _FakeDeadlineAwareDesigner(vza.DeadlineAwareDesigner):
+
+  def __init__(self):
+    self.deadline = None
+
+  def set_deadline(self, deadline: Optional[datetime.datetime]) -> None:
+    self.deadline = deadline
+
+  def suggest(self,
+              count: Optional[int] = None) -> Sequence[vz.TrialSuggestion]:
+    return [vz.TrialSuggestion(vz.ParameterDict())] * count
+
+  def update(self, delta: vza.CompletedTrials):
+    pass
+
+
 class DesignerPolicyNormalOperationTest(absltest.TestCase):
   """Tests Designer policies under error-free conditions."""
 
@@ -168,6 +187,50 @@ class DesignerPolicyNormalOperationTest(absltest.TestCase):
     self.assertLen(designer._last_delta.completed,
                    _NUM_INITIAL_COMPLETED_TRIALS + len(trials[::2]))
 
+  def test_deadline_aware_designer(self):
+    designer = _FakeDeadlineAwareDesigner()
+    policy = dp.DesignerPolicy(self.runner, lambda _: designer)
+    start = datetime.datetime.now()
+    self.runner.SuggestTrials(policy, 1)
+    # InRamPolicySupporter has 100 seconds remaining.
+    self.assertBetween(designer.deadline,
+                       start + datetime.timedelta(seconds=100),
+                       datetime.datetime.now() +
+                       datetime.timedelta(seconds=100))
+
+  def test_profiler_attaches_phases(self):
+    profiler = pythia.RecordingProfiler(attach_to_metadata=True)
+    policy = dp.PartiallySerializableDesignerPolicy(
+        self.problem_statement,
+        self.runner,
+        lambda _: self.designer,
+        ns_root='test',
+        profiler=profiler)
+    self.runner.SuggestTrials(policy, 1)
+    spans = json.loads(self.runner.study_descriptor().config.metadata.ns(
+        'profiler')['spans'])
+    self.assertEqual([s['name'] for s in spans],
+                     ['restore', 'get_trials', 'update', 'dump', 'suggest'])
+
+  def test_profiler_discards_failed_suggest(self):
+    profiler = pythia.RecordingProfiler(attach_to_metadata=True)
+    policy = dp.PartiallySerializableDesignerPolicy(
+        self.problem_statement,
+        self.runner,
+        lambda _: self.designer,
+        ns_root='test',
+        profiler=profiler)
+    with mock.patch.object(self.designer, 'suggest', side_effect=ValueError):
+      with self.assertRaises(ValueError):
+        self.runner.SuggestTrials(policy, 1)
+    self.assertEmpty(profiler.spans())
+
+    self.runner.SuggestTrials(policy, 1)
+    spans = json.loads(self.runner.study_descriptor().config.metadata.ns(
+        'profiler')['spans'])
+    self.assertEqual([s['name'] for s in spans],
+                     ['restore', 'get_trials', 'update', 'dump', 'suggest'])
+
 
 if __name__ == '__main__':
   absltest.main()
@@ -19,7 +19,9 @@ at a particular future step of ACTIVE trials. We notably support LightGBM
 models and necessary datastructures.
 """
 
-from typing import (Any, Callable, Dict, List, Optional, Tuple, Union)
+import itertools
+from typing import (Any, Callable, Dict, List, Optional, Sequence, Tuple,
+                    Union)
 
 from absl import logging
 import attr
@@ -145,7 +147,16 @@ def _sort_dedupe_measurements(
 
 
 class GBMAutoRegressor(object):
-  """Train and predict trial measurements using auto-regressive GBM model."""
+  """Train and predict trial measurements using auto-regressive GBM model.
+
+  The training data is cached by trial id: every call to `train` only converts
+  the trials that it hasn't seen yet, and the grid search over `gbdt_param_grid`
+  is only repeated when the current model fails to predict the new trials as
+  well as its cross-validation error, i.e. when the data distribution shifts.
+  Otherwise, the model is refit with the best parameters found. By default the
+  model is trained on the trials of the last `train` call only; pass
+  `accumulate=True` to also keep the trials of the previous calls.
+  """
 
   def __init__(self,
                target_step: Union[int, float],
@@ -155,7 +166,9 @@ class GBMAutoRegressor(object):
                converter: converters.TimedLabelsExtractor,
                gbdt_param_grid: Optional[Dict[str, Any]] = None,
                cv: int = 2,
-               random_state: Optional[int] = None):
+               random_state: Optional[int] = None,
+               n_jobs: Optional[int] = None,
+               shift_tolerance: float = 2.0):
     """Initialize model params.
 
     Args:
@@ -168,6 +181,11 @@ class GBMAutoRegressor(object):
       gbdt_param_grid: parameter grid for CV grid search for lightGBM model
       cv: k in k-fold cross validation
       random_state: random state for GBDT model
+      n_jobs: number of jobs to run the grid search in parallel. None means 1
+        and -1 means all processors.
+      shift_tolerance: the grid search is repeated when the mean squared error
+        of the model on new trials exceeds `shift_tolerance` times the
+        cross-validation error of the best parameters.
     """
     self._target_step = target_step
     self._min_points = min_points
@@ -180,62 +198,125 @@ class GBMAutoRegressor(object):
     }
     self._cv = cv
     self._random_state = random_state
+    self._n_jobs = n_jobs
+    self._shift_tolerance = shift_tolerance
     self._model: lightgbm.LGBMRegressor = None  # place holder for trained model
     self._best_params: Dict[str, Any] = None  # place holder for best parameters
+    # Cross-validation mean squared error of the best parameters.
+    self._cv_error: Optional[float] = None
+    # Features and targets of the trials of the model, by trial id. Trials
+    # without unique ids get negative keys from `_anonymous_keys`.
+    self._training_data: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+    self._anonymous_keys = itertools.count(-1, -1)
 
   @property
   def is_trained(self) -> bool:
     return self._model is not None
 
-  def train(self, trials: vza.CompletedTrials) -> None:
+  def train(self,
+            trials: vza.CompletedTrials,
+            *,
+            accumulate: bool = False) -> None:
     """Trains a GBDT combined models for auto-regression given completed trials.
 
+    The features of the trials are cached by trial id, so that the trials
+    passed to a previous call are not converted again. When the trials don't
+    have unique ids (e.g. they were not assigned and are all 0), nothing is
+    read from the cache.
+
     Args:
       trials: Sequence of completed trials.
+      accumulate: If True, the model is trained on these trials and the trials
+        of the previous calls. Trials without unique ids can't be matched with
+        the previous ones, and are added every time. Otherwise, the model is
+        only trained on these trials.
 
     Returns:
       Nothing. Updated `_model` and `_best_params` members of the class.
     """
-    completed_trials = []
-    for trial in trials.completed:
-      completed_trials.append(
-          TrialData.from_trial(
-              trial,
-              learning_rate_param_name=self._learning_rate_param_name,
-              metric_name=self._metric_name,
-              converter=self._converter))
-    if len(completed_trials) < self._min_points + 1:
+    completed = list(trials.completed)
+    ids = [trial.id for trial in completed]
+    has_unique_ids = all(ids) and len(set(ids)) == len(ids)
+    training_data = dict(self._training_data) if accumulate else {}
+    new_features = []
+    new_targets = []
+    for trial in completed:
+      key = trial.id if has_unique_ids else next(self._anonymous_keys)
+      if key in self._training_data:
+        training_data[key] = self._training_data[key]
+        continue
+      trial_data = TrialData.from_trial(
+          trial,
+          learning_rate_param_name=self._learning_rate_param_name,
+          metric_name=self._metric_name,
+          converter=self._converter)
+      training_data[key] = self._create_training_data(trial_data)
+      new_features.append(training_data[key][0])
+      new_targets.append(training_data[key][1])
+    is_unchanged = training_data.keys() == self._training_data.keys()
+    self._training_data = training_data
+    if len(self._training_data) < self._min_points + 1:
       logging.info("Not enough completed trials (only %d) to train GBDT model.",
-                   len(completed_trials))
+                   len(self._training_data))
       return
-    feature_matrix = []
-    targets = []
-    for trialc in completed_trials:
-      # only consider trials with at least min_points + 1 steps as otherwise
-      # the features constructed are mostly interpolated
-      if len(trialc.steps) < self._min_points + 1:
-        continue
-      tc_steps, tc_values = _sort_dedupe_measurements(trialc.steps,
-                                                      trialc.objective_values)
-      trial_inter_func = _generate_interpolation_fn_from_trial(
-          tc_steps, tc_values)
-      for i, step in enumerate(trialc.steps):
-        if i < self._min_points - 1 or step >= self._target_step:
-          continue
-        features = self._create_features_from_trial(trialc, i)
-        feature_matrix.append(features)
-        targets.append(trial_inter_func(self._target_step))
-    feature_matrix = np.array(feature_matrix)
-    targets = np.array(targets)
+    new_features = np.concatenate(new_features or [np.zeros((0, 0))])
+    new_targets = np.concatenate(new_targets or [np.zeros(0)])
+    if self.is_trained and is_unchanged:
+      return
+    feature_matrix = np.concatenate(
+        [features for features, _ in self._training_data.values()])
+    targets = np.concatenate(
+        [targets for _, targets in self._training_data.values()])
+
+    if self._best_params is None:
+      self._search_params(feature_matrix, targets)
+    elif new_targets.size:
+      error = np.mean(
+          np.square(self._model.predict(new_features) - new_targets))
+      if error > self._shift_tolerance * self._cv_error:
+        logging.info(
+            "GBDT error on %d new points is %f, vs %f in cross-validation. "
+            "Searching for new parameters.", len(new_targets), error,
+            self._cv_error)
+        self._search_params(feature_matrix, targets)
+    gbm = lightgbm.LGBMRegressor(
+        **self._best_params, random_state=self._random_state)
+    self._model = gbm.fit(feature_matrix, targets)
+
+  def _search_params(self, feature_matrix: np.ndarray,
+                     targets: np.ndarray) -> None:
+    """Updates `_best_params` with a cross-validated grid search."""
     gbdt_cv = GridSearchCV(
         lightgbm.LGBMRegressor(random_state=self._random_state),
         self._gbdt_param_grid,
-        cv=self._cv)
+        scoring={
+            "r2": "r2",
+            "mse": "neg_mean_squared_error"
+        },
+        refit="r2",
+        cv=self._cv,
+        n_jobs=self._n_jobs)
     gbdt_cv = gbdt_cv.fit(feature_matrix, targets)
     self._best_params = gbdt_cv.best_params_
-    gbm = lightgbm.LGBMRegressor(
-        **self._best_params, random_state=self._random_state)
-    self._model = gbm.fit(feature_matrix, targets)
+    self._cv_error = -gbdt_cv.cv_results_["mean_test_mse"][gbdt_cv.best_index_]
+
+  def _create_training_data(
+      self, trial: TrialData) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the features and targets of all steps of a trial."""
+    # only consider trials with at least min_points + 1 steps as otherwise
+    # the features constructed are mostly interpolated
+    num_features = 2 * self._min_points + 1
+    if len(trial.steps) < self._min_points + 1:
+      return np.zeros((0, num_features)), np.zeros(0)
+    end_indices = np.flatnonzero(
+        (np.arange(len(trial.steps)) >= self._min_points - 1)
+        & (np.asarray(trial.steps) < self._target_step))
+    tc_steps, tc_values = _sort_dedupe_measurements(trial.steps,
+                                                    trial.objective_values)
+    target = _generate_interpolation_fn_from_trial(tc_steps,
+                                                   tc_values)(self._target_step)
+    return (self._create_feature_matrix(trial, end_indices),
+            np.full(len(end_indices), target))
 
   def predict(self, trial: pyvizier.Trial) -> Union[float, None]:
     """Estimate objective values at target_steps using autoregression algorithm.
@@ -247,20 +328,63 @@ class GBMAutoRegressor(object):
       prediction: the predicted objective value at target_steps.
       It returns None when the trial has less than min_points steps.
     """
-    trial_data = TrialData.from_trial(
-        trial,
-        learning_rate_param_name=self._learning_rate_param_name,
-        metric_name=self._metric_name,
-        converter=self._converter)
+    return self.predict_batch([trial])[0]
+
+  def predict_batch(
+      self, trials: Sequence[pyvizier.Trial]) -> List[Union[float, None]]:
+    """Estimate objective values at target_steps of several trials at once.
+
+    Args:
+      trials: current pyvizier trials.
+
+    Returns:
+      The predicted objective value at target_steps of each trial, or None for
+      the trials that have less than min_points steps.
+    """
     if not self.is_trained:
       raise ValueError("Prediction cannot be performed before model training.")
-    # Not enough features for prediction
-    if len(trial_data.steps) < self._min_points:
-      return None
-    features = self._create_features_from_trial(trial_data,
-                                                len(trial_data.steps) - 1)
-    features = np.asarray(features).reshape(1, -1)
-    return self._model.predict(features)[0]
+    features = []
+    indices = []
+    for i, trial in enumerate(trials):
+      trial_data = TrialData.from_trial(
+          trial,
+          learning_rate_param_name=self._learning_rate_param_name,
+          metric_name=self._metric_name,
+          converter=self._converter)
+      # Not enough features for prediction
+      if len(trial_data.steps) < self._min_points:
+        continue
+      features.append(
+          self._create_feature_matrix(trial_data,
+                                      np.array([len(trial_data.steps) - 1])))
+      indices.append(i)
+    predictions = [None] * len(trials)
+    if features:
+      for i, prediction in zip(indices,
+                               self._model.predict(np.concatenate(features))):
+        predictions[i] = prediction
+    return predictions
+
+  def _create_feature_matrix(self, trial: TrialData,
+                             end_indices: np.ndarray) -> np.ndarray:
+    """Create feature vectors for auto-regressive model from a trial.
+
+    Args:
+      trial: sequence of measurements as a trial
+      end_indices: last indices in steps to be included in each feature vector
+
+    Returns:
+      Array of shape (len(end_indices), 2 * min_points + 1).
+    """
+    # (len(end_indices), min_points) indices of the lag points.
+    lag_indices = end_indices[:, np.newaxis] - np.arange(self._min_points)
+    step_diffs = self._target_step - np.asarray(trial.steps)[lag_indices]
+    values = np.asarray(trial.objective_values, dtype=float)[lag_indices]
+    return np.concatenate([
+        np.full((len(end_indices), 1), trial.learning_rate),
+        np.stack([step_diffs, values], axis=-1).reshape(len(end_indices), -1)
+    ],
+                          axis=1)
 
   def _create_features_from_trial(
       self,
@@ -280,9 +404,4 @@ class GBMAutoRegressor(object):
       raise ValueError("Not enough data before end_index for creating features")
     if end_index >= len(trial.steps):
       raise ValueError("Not enough indices in trials.steps")
-    features = [trial.learning_rate]
-    for j in range(self._min_points):
-      # Difference from target_step and value at the step into `features`.
-      features.append(self._target_step - trial.steps[end_index - j])
-      features.append(trial.objective_values[end_index - j])
-    return features
+    return self._create_feature_matrix(trial, np.array([end_index]))[0].tolist()
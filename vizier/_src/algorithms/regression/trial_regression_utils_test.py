@@ -16,6 +16,7 @@
 
 import copy
 from typing import Union
+from unittest import mock
 
 import lightgbm.sklearn as lightgbm
 import numpy as np
@@ -292,5 +293,124 @@ class GBMAutoRegressorTest(absltest.TestCase):
       self.assertAlmostEqual(pred, pred_expected)
 
 
+def _create_learning_curves(num_trials: int,
+                            scale: float = 1.0,
+                            first_id: int = 1) -> list[pyvizier.Trial]:
+  rng = np.random.default_rng(first_id)
+  steps = list(range(10, 110, 10))
+  trials = []
+  for i in range(num_trials):
+    learning_rate = rng.uniform(0.01, 0.5)
+    values = scale * (1 - np.exp(-learning_rate * np.array(steps) / 10))
+    trials.append(
+        _create_trial_for_testing(
+            learning_rate=learning_rate,
+            steps=steps,
+            seconds=steps,
+            values=values.tolist(),
+            stop_reason=None,
+            trial_id=first_id + i))
+  return trials
+
+
+class GBMAutoRegressorCachingTest(absltest.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    metric = pyvizier.MetricInformation(
+        name=_METRIC_NAME, goal=pyvizier.ObjectiveMetricGoal.MAXIMIZE)
+    self.gbm = trial_regression_utils.GBMAutoRegressor(
+        target_step=100,
+        min_points=3,
+        learning_rate_param_name='learning_rate',
+        metric_name=_METRIC_NAME,
+        converter=converters.TimedLabelsExtractor(
+            [converters.DefaultModelOutputConverter(metric)],
+            timestamp='steps',
+            value_extraction='raw'),
+        gbdt_param_grid={'max_depth': [2, 3], 'min_child_samples': [2, 5]},
+        random_state=1,
+        n_jobs=2)
+
+  def test_feature_matrix_matches_features(self):
+    trial = trial_regression_utils.TrialData(
+        id=1,
+        learning_rate=0.1,
+        final_objective=0.5,
+        steps=[10, 20, 30, 40, 50],
+        objective_values=[0.1, 0.3, 0.5, 0.6, 0.7])
+    np.testing.assert_array_equal(
+        self.gbm._create_feature_matrix(trial, np.array([2, 4])), [
+            self.gbm._create_features_from_trial(trial, 2),
+            self.gbm._create_features_from_trial(trial, 4)
+        ])
+
+  def test_reuses_params_until_shift(self):
+    with mock.patch.object(
+        self.gbm, '_search_params',
+        wraps=self.gbm._search_params) as search_params:
+      trials = _create_learning_curves(30)
+      self.gbm.train(vza.CompletedTrials(trials))
+      self.assertEqual(search_params.call_count, 1)
+      self.assertLen(self.gbm._training_data, 30)
+
+      # Same trials and new trials from the same distribution.
+      trials += _create_learning_curves(5, first_id=31)
+      self.gbm.train(vza.CompletedTrials(trials))
+      self.assertEqual(search_params.call_count, 1)
+      self.assertLen(self.gbm._training_data, 35)
+
+      # New trials from a different distribution.
+      self.gbm.train(
+          vza.CompletedTrials(
+              _create_learning_curves(5, scale=10.0, first_id=36)),
+          accumulate=True)
+      self.assertEqual(search_params.call_count, 2)
+      self.assertLen(self.gbm._training_data, 40)
+
+  def test_trains_on_last_trials_only(self):
+    self.gbm.train(vza.CompletedTrials(_create_learning_curves(30)))
+    trials = _create_learning_curves(10, first_id=31)
+    self.gbm.train(vza.CompletedTrials(trials))
+    self.assertCountEqual(self.gbm._training_data, range(31, 41))
+
+  def test_accumulates_trials(self):
+    self.gbm.train(vza.CompletedTrials(_create_learning_curves(30)))
+    self.gbm.train(
+        vza.CompletedTrials(_create_learning_curves(10, first_id=31)),
+        accumulate=True)
+    self.assertCountEqual(self.gbm._training_data, range(1, 41))
+
+  def test_trials_without_ids(self):
+    trials = _create_learning_curves(30)
+    for trial in trials:
+      trial.id = 0
+    self.gbm.train(vza.CompletedTrials(trials))
+    self.assertTrue(self.gbm.is_trained)
+    self.assertLen(self.gbm._training_data, 30)
+
+    self.gbm.train(vza.CompletedTrials(trials))
+    self.assertLen(self.gbm._training_data, 30)
+    self.gbm.train(vza.CompletedTrials(trials[:5]), accumulate=True)
+    self.assertLen(self.gbm._training_data, 35)
+
+  def test_predict_batch(self):
+    self.gbm.train(vza.CompletedTrials(_create_learning_curves(30)))
+    short_trial = _create_trial_for_testing(
+        learning_rate=0.1,
+        steps=[10, 20],
+        seconds=[10, 20],
+        values=[0.1, 0.2],
+        stop_reason=None,
+        trial_id=100)
+    trials = _create_learning_curves(3, first_id=101)
+    predictions = self.gbm.predict_batch(trials[:2] + [short_trial] +
+                                         trials[2:])
+    self.assertLen(predictions, 4)
+    self.assertIsNone(predictions[2])
+    for prediction, trial in zip(predictions[:2] + predictions[3:], trials):
+      self.assertAlmostEqual(prediction, self.gbm.predict(trial))
+
+
 if __name__ == '__main__':
   absltest.main()
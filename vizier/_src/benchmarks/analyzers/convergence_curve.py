@@ -22,6 +22,69 @@ import numpy as np
 from vizier import pyvizier
 
 
+def _first_occurrences(ys: np.ndarray) -> np.ndarray:
+  """Marks the first occurrence of every value within each row of $ys.
+
+  Equivalent to `np.unique(row, return_index=True)` applied to every row, with
+  all NaNs considered equal.
+
+  Args:
+    ys: [N x T] array.
+
+  Returns:
+    [N x T] boolean array.
+  """
+  # Stable sort keeps the first occurrence first among equal values.
+  order = np.argsort(ys, axis=1, kind='stable')
+  sorted_ys = np.take_along_axis(ys, order, axis=1)
+  is_new = np.ones(ys.shape, dtype=bool)
+  is_new[:, 1:] = ~((sorted_ys[:, 1:] == sorted_ys[:, :-1]) |
+                    (np.isnan(sorted_ys[:, 1:]) & np.isnan(sorted_ys[:, :-1])))
+  keep = np.empty(ys.shape, dtype=bool)
+  np.put_along_axis(keep, order, is_new, axis=1)
+  return keep
+
+
+def _interp_rows(x: np.ndarray, xp: np.ndarray, fp: np.ndarray,
+                 keep: np.ndarray) -> np.ndarray:
+  """Batched `np.interp(x, xp[keep[i]], fp[i, keep[i]], right=np.nan)`.
+
+  Args:
+    x: [R] array of x coordinates to evaluate at.
+    xp: [T] increasing array of x coordinates shared by all rows.
+    fp: [N x T] array of y coordinates.
+    keep: [N x T] boolean array of the data points used by each row. The first
+      and the last point of every row must be kept.
+
+  Returns:
+    [N x R] array.
+  """
+  num_points = xp.shape[0]
+  indices = np.arange(num_points)
+  # Last kept index <= t and first kept index >= t.
+  prev_kept = np.maximum.accumulate(np.where(keep, indices, 0), axis=1)
+  next_kept = np.minimum.accumulate(
+      np.where(keep, indices, num_points - 1)[:, ::-1], axis=1)[:, ::-1]
+
+  # Largest j such that xp[j] <= x.
+  j = np.clip(np.searchsorted(xp, x, side='right') - 1, 0, num_points - 1)
+  lo = prev_kept[:, j]
+  hi = next_kept[:, np.minimum(j + 1, num_points - 1)]
+  x_lo, x_hi = xp[lo], xp[hi]
+  y_lo = np.take_along_axis(fp, lo, axis=1)
+  y_hi = np.take_along_axis(fp, hi, axis=1)
+
+  with np.errstate(divide='ignore', invalid='ignore'):
+    slope = (y_hi - y_lo) / (x_hi - x_lo)
+    result = slope * (x - x_lo) + y_lo
+    # Same fallbacks as np.interp for non-finite values.
+    result = np.where(np.isnan(result), slope * (x - x_hi) + y_hi, result)
+    result = np.where(np.isnan(result) & (y_lo == y_hi), y_lo, result)
+  result = np.where(x == x_lo, y_lo, result)
+  result = np.where(x < xp[0], fp[:, :1], result)
+  return np.where(x > xp[-1], np.nan, result)
+
+
 @dataclasses.dataclass
 class ConvergenceCurve:
   """Represents a batch of convergence curves on the same task."""
@@ -76,23 +139,14 @@ class ConvergenceCurve:
 
     all_ys = []
     for curve in curves:
-      for ys in curve.ys:
-        if interpolate_repeats:
-          _, indices = np.unique(ys, return_index=True)
-          # Sorting indices from increasing order due to sign differences.
-          indices = sorted(indices)
-          if len(ys) - 1 not in indices:
-            indices.append(len(ys) - 1)
-        else:
-          # Use the whole curve.
-          indices = range(len(ys))
-
-        all_ys.append(
-            np.interp(
-                xs,
-                np.array([curve.xs[i] for i in indices]),
-                np.array([ys[i] for i in indices]),
-                right=np.nan))
+      ys = np.asarray(curve.ys, dtype=float)
+      if interpolate_repeats:
+        keep = _first_occurrences(ys)
+        keep[:, -1] = True
+      else:
+        # Use the whole curve.
+        keep = np.ones(ys.shape, dtype=bool)
+      all_ys.append(_interp_rows(xs, np.asarray(curve.xs), ys, keep))
 
     # Take all non-empty ylabels.
     ylabels = list(set([c.ylabel for c in curves if c.ylabel]))
@@ -104,7 +158,11 @@ class ConvergenceCurve:
     else:
       ylabel = ylabels[0]
 
-    return cls(xs=xs, ys=np.stack(all_ys), ylabel=ylabel, trend=curves[0].trend)
+    return cls(
+        xs=xs,
+        ys=np.concatenate(all_ys),
+        ylabel=ylabel,
+        trend=curves[0].trend)
 
   @classmethod
   def extrapolate_ys(cls,
@@ -123,23 +181,15 @@ class ConvergenceCurve:
     if curve.trend not in (cls.YTrend.INCREASING, cls.YTrend.DECREASING):
       raise ValueError('Curve must be increasing or decreasing.')
 
-    all_extra_ys = []
-    for ys in curve.ys:
-      # Use average slope in the last half of the curve as slope extrapolate.
-      ys_later_half = ys[int(len(ys) / 2):]
-      slope = np.mean([
-          ys_later_half[idx] - ys_later_half[idx - 1]
-          for idx in range(1, len(ys_later_half))
-      ])
-
-      extra_ys = np.append(
-          ys, [ys[-1] + slope * (1 + step) for step in range(steps)])
-      all_extra_ys.append(extra_ys)
+    ys = np.asarray(curve.ys)
+    # Use average slope in the last half of the curve as slope extrapolate.
+    slopes = np.mean(np.diff(ys[:, ys.shape[1] // 2:], axis=1), axis=1)
+    steps_range = np.arange(1, steps + 1)
+    extra_ys = ys[:, -1:] + slopes[:, np.newaxis] * steps_range
 
     return cls(
-        xs=np.append(curve.xs,
-                     [curve.xs[-1] + 1 + step for step in range(steps)]),
-        ys=np.stack(all_extra_ys),
+        xs=np.append(curve.xs, curve.xs[-1] + steps_range),
+        ys=np.concatenate([ys, extra_ys], axis=1),
         ylabel=curve.ylabel,
         trend=curve.trend)
 
@@ -168,36 +218,32 @@ class ConvergenceCurveConverter:
     self.cost_fn = cost_fn
     self.measurements_type = measurements_type
 
+  def _trial_value(self, trial: pyvizier.Trial) -> float:
+    """Returns the best metric value of $trial, or NaN if there is none."""
+    name = self.metric_information.name
+    candidates = []
+    if self.measurements_type in ('final', 'all'):
+      if trial.final_measurement and name in trial.final_measurement.metrics:
+        candidates.append(trial.final_measurement.metrics[name].value)
+    if self.measurements_type in ('intermediate', 'all'):
+      candidates.extend(m.metrics[name].value
+                        for m in trial.measurements
+                        if name in m.metrics)
+    return self._ufunc.reduce(candidates, initial=np.nan)
+
   def convert(self, trials: Sequence[pyvizier.Trial]) -> ConvergenceCurve:
     """Returns ConvergenceCurve of batch size 1."""
-    yvals = [np.nan]
-    xvals = [0]
-    comparator = self.comparator
-    for trial in trials:
-      candidates = [np.nan]
-      if self.measurements_type in ('final', 'all'):
-        if trial.final_measurement and (self.metric_information.name
-                                        in trial.final_measurement.metrics):
-          candidates.append(trial.final_measurement.metrics[
-              self.metric_information.name].value)
-      if self.measurements_type in ('intermediate', 'all'):
-        for measurement in trial.measurements:
-          if self.metric_information.name in measurement.metrics:
-            candidates.append(
-                measurement.metrics[self.metric_information.name].value)
-
-      yvalue = comparator(candidates)
-      xvals.append(xvals[-1] + self.cost_fn(trial))
-      yvals.append(comparator([yvalue, yvals[-1]]))
-
-    yvals = np.asarray(yvals[1:])
+    values = np.array([self._trial_value(t) for t in trials], dtype=float)
+    # Cumulative best, ignoring NaNs.
+    yvals = self._ufunc.accumulate(values) if len(values) else values
+    xvals = np.cumsum([self.cost_fn(t) for t in trials])
     trend = ConvergenceCurve.YTrend.DECREASING
     if (self.metric_information.goal == pyvizier.ObjectiveMetricGoal.MAXIMIZE
        ) or (self.metric_information.goal
              == pyvizier.ObjectiveMetricGoal.MINIMIZE and self.flip_signs):
       trend = ConvergenceCurve.YTrend.INCREASING
     return ConvergenceCurve(
-        xs=np.asarray(xvals[1:]),
+        xs=np.asarray(xvals),
         ys=np.asarray(yvals).reshape([1, -1]) * (-1 if self.flip_signs else 1),
         trend=trend,
         ylabel=self.metric_information.name)
@@ -209,6 +255,12 @@ class ConvergenceCurveConverter:
         self.metric_information.goal
         == pyvizier.ObjectiveMetricGoal.MAXIMIZE) else np.nanmin
 
+  @property
+  def _ufunc(self) -> np.ufunc:
+    """Elementwise version of the comparator that ignores NaNs."""
+    return np.fmax if (self.metric_information.goal
+                       == pyvizier.ObjectiveMetricGoal.MAXIMIZE) else np.fmin
+
 
 class ConvergenceCurveComparator:
   """Comparator methods for ConvergenceCurves.
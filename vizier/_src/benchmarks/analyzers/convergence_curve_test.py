@@ -77,6 +77,23 @@ class ConvergenceCurveTest(absltest.TestCase):
     np.testing.assert_array_equal(
         aligned.ys, np.array([[2, 1.5, 1.0, 0.5, 0.5], [1, 1, 1, 1, 1]]))
 
+  def test_align_xs_matches_interp_per_row(self):
+    rng = np.random.default_rng(0)
+    xs = np.sort(rng.choice(100, size=20, replace=False)).astype(float)
+    ys = np.maximum.accumulate(rng.integers(0, 5, size=(8, 20)), axis=1)
+    curve = convergence.ConvergenceCurve(
+        xs=xs, ys=ys, trend=convergence.ConvergenceCurve.YTrend.INCREASING)
+    aligned = convergence.ConvergenceCurve.align_xs([curve],
+                                                    interpolate_repeats=True,
+                                                    resolution=50)
+
+    for row, aligned_row in zip(ys, aligned.ys):
+      _, indices = np.unique(row, return_index=True)
+      indices = sorted(set(indices) | {len(row) - 1})
+      np.testing.assert_allclose(
+          aligned_row,
+          np.interp(aligned.xs, xs[indices], row[indices], right=np.nan))
+
   def test_extrapolate_ys_with_steps(self):
     c1 = convergence.ConvergenceCurve(
         xs=np.array([1, 2, 3, 4]),
@@ -0,0 +1,185 @@
+# Copyright 2022 Google LLC.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Experimenter that memoizes the evaluations of a deterministic Experimenter.
+
+Benchmarks on discrete spaces suggest the same parameters many times, within
+and across runs. CachingExperimenter evaluates every unique set of parameters
+once and completes repeated suggestions from an in-memory LRU cache and an
+optional on-disk store shared by processes and runs.
+
+Noise must be applied on top of the cache, e.g.
+  NoisyExperimenter(CachingExperimenter(exptr), noise_type=...)
+"""
+
+import collections
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Dict, List, Optional, Sequence
+
+from vizier import pyvizier
+from vizier._src.benchmarks.experimenters import experimenter
+from vizier._src.benchmarks.experimenters import noisy_experimenter
+
+# Cached outcome of an evaluation: {'metrics': {name: value},
+# 'infeasibility_reason': Optional[str]}.
+_Outcome = Dict[str, Any]
+
+
+def canonical_key(parameters: pyvizier.ParameterDict) -> str:
+  """Returns a key that is equal for equal parameter values.
+
+  Numbers are compared as floats, so 1 and 1.0 have the same key. The order of
+  the parameters does not matter.
+
+  Args:
+    parameters:
+
+  Returns:
+    Hex digest.
+  """
+  values = {}
+  for name, value in parameters.items():
+    value = value.value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+      value = float(value)
+    values[name] = value
+  encoded = json.dumps(values, sort_keys=True).encode('utf-8')
+  return hashlib.sha256(encoded).hexdigest()
+
+
+def _to_outcome(trial: pyvizier.Trial) -> _Outcome:
+  return {
+      'metrics': {
+          name: metric.value
+          for name, metric in trial.final_measurement.metrics.items()
+      },
+      'infeasibility_reason': trial.infeasibility_reason,
+  }
+
+
+def _complete(trial: pyvizier.Trial, outcome: _Outcome) -> None:
+  trial.complete(
+      pyvizier.Measurement(metrics=outcome['metrics']),
+      infeasibility_reason=outcome['infeasibility_reason'])
+
+
+class CachingExperimenter(experimenter.Experimenter):
+  """Evaluates each unique set of parameters once.
+
+  Suggestions that miss the cache are evaluated by the wrapped experimenter in
+  a single batch; duplicates within a batch are evaluated once. Only trials
+  completed by the wrapped experimenter are cached, with their final metric
+  values and infeasibility reason.
+
+  The on-disk store has one JSON file per key, written atomically, so it can be
+  shared by concurrent processes. Use a dedicated directory per objective,
+  since keys only depend on the parameters.
+  """
+
+  def __init__(self,
+               exptr: experimenter.Experimenter,
+               *,
+               max_size: Optional[int] = 100_000,
+               cache_dir: Optional[str] = None):
+    """Init.
+
+    Args:
+      exptr: Deterministic experimenter to be wrapped.
+      max_size: Maximum number of outcomes kept in memory. None for unbounded.
+      cache_dir: If set, outcomes are also persisted in and loaded from this
+        directory.
+
+    Raises:
+      ValueError: If $exptr is a NoisyExperimenter.
+    """
+    if isinstance(exptr, noisy_experimenter.NoisyExperimenter):
+      raise ValueError(
+          'Noisy evaluations cannot be cached. Wrap the NoisyExperimenter '
+          'around the CachingExperimenter instead.')
+    self._exptr = exptr
+    self._max_size = max_size
+    self._cache_dir = cache_dir
+    if cache_dir is not None:
+      os.makedirs(cache_dir, exist_ok=True)
+    self._cache: collections.OrderedDict[str, _Outcome] = (
+        collections.OrderedDict())
+    self.num_hits = 0
+    self.num_misses = 0
+
+  def problem_statement(self) -> pyvizier.ProblemStatement:
+    return self._exptr.problem_statement()
+
+  def _path(self, key: str) -> str:
+    return os.path.join(self._cache_dir, f'{key}.json')
+
+  def _put_in_memory(self, key: str, outcome: _Outcome) -> None:
+    self._cache[key] = outcome
+    self._cache.move_to_end(key)
+    if self._max_size is not None and len(self._cache) > self._max_size:
+      self._cache.popitem(last=False)
+
+  def _lookup(self, key: str) -> Optional[_Outcome]:
+    if key in self._cache:
+      self._cache.move_to_end(key)
+      return self._cache[key]
+    if self._cache_dir is None or not os.path.exists(self._path(key)):
+      return None
+    with open(self._path(key), 'rt') as f:
+      outcome = json.load(f)
+    self._put_in_memory(key, outcome)
+    return outcome
+
+  def _store(self, key: str, outcome: _Outcome) -> None:
+    self._put_in_memory(key, outcome)
+    if self._cache_dir is None:
+      return
+    # Write to a temporary file and rename, so readers never see partial files.
+    fd, tmp_path = tempfile.mkstemp(dir=self._cache_dir, suffix='.tmp')
+    with os.fdopen(fd, 'wt') as f:
+      json.dump(outcome, f)
+    os.replace(tmp_path, self._path(key))
+
+  def evaluate(self, suggestions: Sequence[pyvizier.Trial]):
+    # Trials that miss the cache, grouped by key.
+    misses: Dict[str, List[pyvizier.Trial]] = {}
+    for trial in suggestions:
+      key = canonical_key(trial.parameters)
+      if key in misses:
+        self.num_hits += 1
+        misses[key].append(trial)
+        continue
+      outcome = self._lookup(key)
+      if outcome is None:
+        misses[key] = [trial]
+      else:
+        self.num_hits += 1
+        _complete(trial, outcome)
+    if not misses:
+      return
+
+    self.num_misses += len(misses)
+    self._exptr.evaluate([trials[0] for trials in misses.values()])
+    for key, (trial, *duplicates) in misses.items():
+      if trial.final_measurement is None:
+        continue
+      outcome = _to_outcome(trial)
+      self._store(key, outcome)
+      for duplicate in duplicates:
+        _complete(duplicate, outcome)
+
+  def __repr__(self):
+    return f'CachingExperimenter on {self._exptr}'
@@ -0,0 +1,106 @@
+# Copyright 2022 Google LLC.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for caching_experimenter."""
+
+import shutil
+import tempfile
+from typing import Sequence
+
+from vizier import pyvizier
+from vizier._src.benchmarks.experimenters import caching_experimenter
+from vizier._src.benchmarks.experimenters import experimenter
+from vizier._src.benchmarks.experimenters import noisy_experimenter
+
+from absl.testing import absltest
+
+
+class _CountingExperimenter(experimenter.Experimenter):
+  """Returns 'x' squared and counts the evaluations."""
+
+  def __init__(self):
+    self.num_evaluations = 0
+
+  def problem_statement(self) -> pyvizier.ProblemStatement:
+    problem = pyvizier.ProblemStatement()
+    problem.search_space.root.add_discrete_param('x', [-1, 0, 1, 2, 3])
+    problem.search_space.root.add_categorical_param('c', ['a', 'b'])
+    problem.metric_information.append(
+        pyvizier.MetricInformation(
+            'obj', goal=pyvizier.ObjectiveMetricGoal.MINIMIZE))
+    return problem
+
+  def evaluate(self, suggestions: Sequence[pyvizier.Trial]):
+    for trial in suggestions:
+      self.num_evaluations += 1
+      x = trial.parameters['x'].value
+      trial.complete(
+          pyvizier.Measurement({'obj': x**2}),
+          infeasibility_reason='Negative x' if x < 0 else None)
+
+
+def _trial(x: float, c: str = 'a') -> pyvizier.Trial:
+  return pyvizier.Trial(parameters={'x': x, 'c': c})
+
+
+class CachingExperimenterTest(absltest.TestCase):
+
+  def test_evaluates_unique_parameters_once(self):
+    exptr = _CountingExperimenter()
+    cached = caching_experimenter.CachingExperimenter(exptr)
+    trials = [_trial(2), _trial(2.0), _trial(2, 'b'), _trial(-1)]
+    cached.evaluate(trials)
+    self.assertEqual(exptr.num_evaluations, 3)
+
+    repeated = [_trial(2), _trial(-1)]
+    cached.evaluate(repeated)
+    self.assertEqual(exptr.num_evaluations, 3)
+    self.assertEqual(cached.num_hits, 3)
+    self.assertEqual(cached.num_misses, 3)
+    for trial in trials[:3] + repeated[:1]:
+      self.assertEqual(trial.final_measurement.metrics['obj'].value, 4)
+      self.assertFalse(trial.infeasible)
+    self.assertEqual(repeated[1].infeasibility_reason, 'Negative x')
+
+  def test_lru_eviction(self):
+    exptr = _CountingExperimenter()
+    cached = caching_experimenter.CachingExperimenter(exptr, max_size=2)
+    for x in (0, 1, 0, 2, 1):
+      cached.evaluate([_trial(x)])
+    # 1 was evicted by 2, while 0 was used more recently.
+    self.assertEqual(exptr.num_evaluations, 4)
+
+  def test_persistent_store(self):
+    cache_dir = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, cache_dir)
+    exptr = _CountingExperimenter()
+    caching_experimenter.CachingExperimenter(
+        exptr, cache_dir=cache_dir).evaluate([_trial(1), _trial(3)])
+
+    other_exptr = _CountingExperimenter()
+    trial = _trial(3)
+    caching_experimenter.CachingExperimenter(
+        other_exptr, cache_dir=cache_dir).evaluate([trial])
+    self.assertEqual(other_exptr.num_evaluations, 0)
+    self.assertEqual(trial.final_measurement.metrics['obj'].value, 9)
+
+  def test_noisy_experimenter_fails(self):
+    noisy = noisy_experimenter.NoisyExperimenter(
+        _CountingExperimenter(), noise_fn=lambda v: v)
+    with self.assertRaises(ValueError):
+      caching_experimenter.CachingExperimenter(noisy)
+
+
+if __name__ == '__main__':
+  absltest.main()
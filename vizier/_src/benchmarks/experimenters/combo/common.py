@@ -14,6 +14,7 @@
 
 """Common utility functions for COMBO benchmarks."""
 # pylint:disable = missing-function-docstring
+import functools
 import itertools
 from typing import Tuple
 import numpy as np
@@ -112,3 +113,78 @@ def ising_dense(ising_grid_h: int, interaction_original: Tuple[np.ndarray,
         kld += diff_vertical[min(i_h, j_h), i_v] * covariance[i, j]
 
   return kld * 2 + log_partition_new - log_partition_original
+
+
+@functools.lru_cache(maxsize=4)
+def spin_configurations(grid_shape: Tuple[int, int]) -> np.ndarray:
+  """Returns all spin configurations of the grid, with shape [S, h, w]."""
+  n_vars = grid_shape[0] * grid_shape[1]
+  spin_cfgs = np.array(list(itertools.product(*([[-1, 1]] * n_vars))))
+  spin_cfgs = spin_cfgs.reshape((-1,) + tuple(grid_shape))
+  spin_cfgs.setflags(write=False)
+  return spin_cfgs
+
+
+def log_partition_batch(horizontal_interactions: np.ndarray,
+                        vertical_interactions: np.ndarray,
+                        grid_shape: Tuple[int, int],
+                        chunk_size: int = 32) -> np.ndarray:
+  """Batched `log_partition` of interactions with shapes [n, h, w-1], [n, h-1, w].
+
+  Args:
+    horizontal_interactions:
+    vertical_interactions:
+    grid_shape:
+    chunk_size: Number of interactions whose energies over all spin
+      configurations are held in memory at once.
+
+  Returns:
+    Array of shape [n].
+  """
+  spin_cfgs = spin_configurations(tuple(grid_shape))
+  n_cfgs = spin_cfgs.shape[0]
+  h_pairs = (spin_cfgs[:, :, :-1] * spin_cfgs[:, :, 1:]).reshape(n_cfgs, -1)
+  v_pairs = (spin_cfgs[:, :-1] * spin_cfgs[:, 1:]).reshape(n_cfgs, -1)
+  n = horizontal_interactions.shape[0]
+  result = np.zeros(n)
+  for start in range(0, n, chunk_size):
+    h = horizontal_interactions[start:start + chunk_size].reshape(
+        -1, h_pairs.shape[1])
+    v = vertical_interactions[start:start + chunk_size].reshape(
+        -1, v_pairs.shape[1])
+    # [S, chunk] energies.
+    energies = (h_pairs @ h.T + v_pairs @ v.T) * 2
+    max_energies = np.max(energies, axis=0)
+    result[start:start + chunk_size] = np.log(
+        np.sum(np.exp(energies - max_energies), axis=0)) + max_energies
+  return result
+
+
+def ising_kld_weights(ising_grid_h: int, covariance: np.ndarray,
+                      horizontal_shape: Tuple[int, int],
+                      vertical_shape: Tuple[int, int]) -> Tuple[np.ndarray,
+                                                                np.ndarray]:
+  """Returns the weights (w_h, w_v) of the interaction differences in the KLD.
+
+  `ising_dense` equals
+    2 * (sum(diff_horizontal * w_h) + sum(diff_vertical * w_v))
+    + log_partition_new - log_partition_original.
+
+  Args:
+    ising_grid_h:
+    covariance:
+    horizontal_shape: Shape of the horizontal interactions.
+    vertical_shape: Shape of the vertical interactions.
+  """
+  w_h = np.zeros(horizontal_shape)
+  w_v = np.zeros(vertical_shape)
+  n_spin = covariance.shape[0]
+  for i in range(n_spin):
+    i_h, i_v = int(i / ising_grid_h), int(i % ising_grid_h)
+    for j in range(i, n_spin):
+      j_h, j_v = int(j / ising_grid_h), int(j % ising_grid_h)
+      if i_h == j_h and abs(i_v - j_v) == 1:
+        w_h[i_h, min(i_v, j_v)] += covariance[i, j]
+      elif abs(i_h - j_h) == 1 and i_v == j_v:
+        w_v[min(i_h, j_h), i_v] += covariance[i, j]
+  return w_h, w_v
@@ -16,8 +16,11 @@
 
 Lines with 'ATTENTION' mean that code was modified from original Github, in
 order to fix bugs with the original code.
+
+All experimenters evaluate a batch of suggestions at once. `evaluate_array`
+evaluates the rows of an (n, d) array of parameter values directly.
 """
-from typing import List, Optional, Sequence, Tuple
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
 import numpy as np
 
 from vizier import pyvizier
@@ -27,6 +30,42 @@ from vizier._src.benchmarks.experimenters.combo import common
 fileOpen = open
 
 
+def _parameter_matrix(
+    suggestions: Sequence[pyvizier.Trial], n_params: int,
+    value_fn: Callable[[pyvizier.ParameterValue], int]) -> np.ndarray:
+  """Returns the [len(suggestions), n_params] matrix of parameters 'x_{i}'."""
+  return np.array(
+      [[value_fn(suggestion.parameters[f'x_{i}'])
+        for i in range(n_params)]
+       for suggestion in suggestions],
+      dtype=int).reshape(len(suggestions), n_params)
+
+
+def _bool_matrix(suggestions: Sequence[pyvizier.Trial],
+                 n_params: int) -> np.ndarray:
+  return _parameter_matrix(suggestions, n_params, lambda v: v.value == 'True')
+
+
+def _int_matrix(suggestions: Sequence[pyvizier.Trial],
+                n_params: int) -> np.ndarray:
+  return _parameter_matrix(suggestions, n_params, lambda v: int(v.value))
+
+
+def _check_shape(x: np.ndarray, n_params: int) -> np.ndarray:
+  x = np.asarray(x)
+  if x.ndim != 2 or x.shape[1] != n_params:
+    raise ValueError(
+        f'Expected an array of shape (n, {n_params}). Got {x.shape}.')
+  return x
+
+
+def _complete(suggestions: Sequence[pyvizier.Trial], evaluations: np.ndarray,
+              metric_name: str) -> None:
+  for suggestion, evaluation in zip(suggestions, evaluations):
+    suggestion.complete(
+        pyvizier.Measurement(metrics={metric_name: float(evaluation)}))
+
+
 class IsingExperimenter(experimenter.Experimenter):
   """Ising Sparisification Problem."""
 
@@ -44,34 +83,34 @@ class IsingExperimenter(experimenter.Experimenter):
         self._ising_grid_h, self._ising_grid_w, random_seed)
     self._covariance, self._partition_original = common.spin_covariance(
         self._interaction, (self._ising_grid_h, self._ising_grid_w))
+    self._kld_weights = common.ising_kld_weights(self._ising_grid_h,
+                                                 self._covariance,
+                                                 self._interaction[0].shape,
+                                                 self._interaction[1].shape)
 
     self._problem_statement = self.problem_statement()
 
   def evaluate(self, suggestions: Sequence[pyvizier.Trial]):
-    for suggestion in suggestions:
-      # TODO: Switch to using StudyConfig.
-      x = np.array([
-          int(suggestion.parameters[f'x_{i}'].value == 'True')
-          for i in range(self._ising_n_edges)
-      ])
-      x_h, x_v = self._bocs_consistency_mapping(x)
-      interaction_sparsified = x_h * self._interaction[
-          0], x_v * self._interaction[1]
-      log_partition_sparsified = common.log_partition(
-          interaction_sparsified, (self._ising_grid_h, self._ising_grid_w))
-      evaluation = common.ising_dense(
-          ising_grid_h=self._ising_grid_h,
-          interaction_original=self._interaction,
-          interaction_sparsified=interaction_sparsified,
-          covariance=self._covariance,
-          log_partition_original=np.log(self._partition_original),
-          log_partition_new=log_partition_sparsified)
-      evaluation += self._lamda * float(np.sum(x))
-
-      suggestion.complete(
-          pyvizier.Measurement(metrics={
-              self._problem_statement.single_objective_metric_name: evaluation
-          }))
+    # TODO: Switch to using StudyConfig.
+    evaluations = self.evaluate_array(
+        _bool_matrix(suggestions, self._ising_n_edges))
+    _complete(suggestions, evaluations,
+              self._problem_statement.single_objective_metric_name)
+
+  def evaluate_array(self, x: np.ndarray) -> np.ndarray:
+    """Returns the objective of each row of a [n, ising_n_edges] 0/1 array."""
+    x = _check_shape(x, self._ising_n_edges)
+    x_h, x_v = self._bocs_consistency_mapping(x)
+    sparsified_h = x_h * self._interaction[0]
+    sparsified_v = x_v * self._interaction[1]
+    log_partition_sparsified = common.log_partition_batch(
+        sparsified_h, sparsified_v, (self._ising_grid_h, self._ising_grid_w))
+    w_h, w_v = self._kld_weights
+    kld = np.sum((self._interaction[0] - sparsified_h) * w_h, axis=(1, 2))
+    kld += np.sum((self._interaction[1] - sparsified_v) * w_v, axis=(1, 2))
+    evaluations = kld * 2 + log_partition_sparsified - np.log(
+        self._partition_original)
+    return evaluations + self._lamda * np.sum(x, axis=1)
 
   def problem_statement(self) -> pyvizier.ProblemStatement:
     problem_statement = pyvizier.ProblemStatement()
@@ -88,9 +127,9 @@ class IsingExperimenter(experimenter.Experimenter):
     horizontal_ind = [0, 2, 4, 7, 9, 11, 14, 16, 18, 21, 22, 23]
     vertical_ind = sorted(
         [elm for elm in range(24) if elm not in horizontal_ind])
-    return x[horizontal_ind].reshape(
-        (self._ising_grid_h, self._ising_grid_w - 1)), x[vertical_ind].reshape(
-            (self._ising_grid_h - 1, self._ising_grid_w))
+    grid_h, grid_w = self._ising_grid_h, self._ising_grid_w
+    return (x[:, horizontal_ind].reshape((-1, grid_h, grid_w - 1)),
+            x[:, vertical_ind].reshape((-1, grid_h - 1, grid_w)))
 
 
 class ContaminationExperimenter(experimenter.Experimenter):
@@ -107,25 +146,24 @@ class ContaminationExperimenter(experimenter.Experimenter):
     self._problem_statement = self.problem_statement()
 
   def evaluate(self, suggestions: Sequence[pyvizier.Trial]):
-    for suggestion in suggestions:
-      # TODO: Switch to using StudyConfig.
-      x = np.array([
-          int(suggestion.parameters[f'x_{i}'].value == 'True')
-          for i in range(self._contamination_n_stages)
-      ])
-      evaluation = self._contamination(
-          x=x,
-          cost=np.ones(x.size),
-          init_z=self._init_z,
-          lambdas=self._lambdas,
-          gammas=self._gammas,
-          u=0.1,
-          epsilon=0.05)
-      evaluation += self._lamda * float(np.sum(x))
-      suggestion.complete(
-          pyvizier.Measurement(metrics={
-              self._problem_statement.single_objective_metric_name: evaluation
-          }))
+    # TODO: Switch to using StudyConfig.
+    evaluations = self.evaluate_array(
+        _bool_matrix(suggestions, self._contamination_n_stages))
+    _complete(suggestions, evaluations,
+              self._problem_statement.single_objective_metric_name)
+
+  def evaluate_array(self, x: np.ndarray) -> np.ndarray:
+    """Returns the objective of each row of a [n, n_stages] 0/1 array."""
+    x = _check_shape(x, self._contamination_n_stages)
+    evaluations = self._contamination(
+        x=x,
+        cost=np.ones(x.shape[1]),
+        init_z=self._init_z,
+        lambdas=self._lambdas,
+        gammas=self._gammas,
+        u=0.1,
+        epsilon=0.05)
+    return evaluations + self._lamda * np.sum(x, axis=1)
 
   def problem_statement(self) -> pyvizier.ProblemStatement:
     problem_statement = pyvizier.ProblemStatement()
@@ -139,23 +177,26 @@ class ContaminationExperimenter(experimenter.Experimenter):
 
   def _contamination(self, x: np.ndarray, cost: np.ndarray, init_z: np.ndarray,
                      lambdas: np.ndarray, gammas: np.ndarray, u: float,
-                     epsilon: float) -> float:
-    assert x.size == self._contamination_n_stages
+                     epsilon: float) -> np.ndarray:
+    """Simulates the rows of $x [n, n_stages] at once and returns [n] costs."""
+    assert x.shape[1] == self._contamination_n_stages
 
     rho = 1.0
     n_simulations = 100
 
-    z = np.zeros((x.size, n_simulations))
-    z[0] = lambdas[0] * (1.0 - x[0]) * (1.0 - init_z) + (
-        1.0 - gammas[0] * x[0]) * init_z
+    # Stages are simulated in sequence. Rows and simulations are vectorized.
+    x_stages = x.T[:, :, np.newaxis].astype(float)
+    z = np.zeros((x.shape[1], x.shape[0], n_simulations))
+    z[0] = lambdas[0] * (1.0 - x_stages[0]) * (1.0 - init_z) + (
+        1.0 - gammas[0] * x_stages[0]) * init_z
     for i in range(1, self._contamination_n_stages):
-      z[i] = lambdas[i] * (1.0 - x[i]) * (1.0 - z[i - 1]) + (
-          1.0 - gammas[i] * x[i]) * z[i - 1]
+      z[i] = lambdas[i] * (1.0 - x_stages[i]) * (1.0 - z[i - 1]) + (
+          1.0 - gammas[i] * x_stages[i]) * z[i - 1]
 
     below_threshold = z < u
-    constraints = np.mean(below_threshold, axis=1) - (1.0 - epsilon)
+    constraints = np.mean(below_threshold, axis=2).T - (1.0 - epsilon)
 
-    return np.sum(x * cost - rho * constraints)
+    return np.sum(x * cost - rho * constraints, axis=1)
 
   def _generate_contamination_dynamics(
       self, random_seed=None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
@@ -195,6 +236,7 @@ class CentroidExperimenter(experimenter.Experimenter):
     self._interaction_list = []
     self._covariance_list = []
     self._partition_original_list = []
+    self._kld_weights_list = []
     self._n_ising_models = 3
     ising_seeds = np.random.RandomState(random_seed).randint(
         0, 10000, (self._n_ising_models,))
@@ -207,37 +249,38 @@ class CentroidExperimenter(experimenter.Experimenter):
       self._interaction_list.append(interaction)
       self._covariance_list.append(covariance)
       self._partition_original_list.append(partition_original)
+      self._kld_weights_list.append(
+          common.ising_kld_weights(
+              self._centroid_grid[0],  # ATTENTION
+              covariance,
+              interaction[0].shape,
+              interaction[1].shape))
 
     self._problem_statement = self.problem_statement()
 
   def evaluate(self, suggestions: Sequence[pyvizier.Trial]):
-    for suggestion in suggestions:
-      # TODO: Switch to using StudyConfig.
-      x = np.array([
-          int(suggestion.parameters[f'x_{i}'].value)
-          for i in range(self._centroid_n_edges)
-      ])
-      interaction_mixed = self._edge_choice(x, self._interaction_list)
-      log_partition_mixed = common.log_partition(
-          interaction_mixed, self._centroid_grid)  # ATTENTION
-      kld_sum = 0
-
-      for i in range(self._n_ising_models):
-        kld = common.ising_dense(
-            ising_grid_h=self._centroid_grid[0],  # ATTENTION
-            interaction_original=self._interaction_list[i],
-            interaction_sparsified=interaction_mixed,
-            covariance=self._covariance_list[i],
-            log_partition_original=np.log(
-                self._partition_original_list[i]),  # ATTENTION
-            log_partition_new=log_partition_mixed)  # ATTENTION
-        kld_sum += kld
-      evaluation = float(kld_sum / float(self._n_ising_models))
-
-      suggestion.complete(
-          pyvizier.Measurement(metrics={
-              self._problem_statement.single_objective_metric_name: evaluation
-          }))
+    # TODO: Switch to using StudyConfig.
+    evaluations = self.evaluate_array(
+        _int_matrix(suggestions, self._centroid_n_edges))
+    _complete(suggestions, evaluations,
+              self._problem_statement.single_objective_metric_name)
+
+  def evaluate_array(self, x: np.ndarray) -> np.ndarray:
+    """Returns the objective of each row of a [n, n_edges] array of choices."""
+    x = _check_shape(x, self._centroid_n_edges)
+    mixed_h, mixed_v = self._edge_choice(x, self._interaction_list)
+    log_partition_mixed = common.log_partition_batch(
+        mixed_h, mixed_v, self._centroid_grid)  # ATTENTION
+    kld_sum = np.zeros(x.shape[0])
+
+    for i in range(self._n_ising_models):
+      interaction_h, interaction_v = self._interaction_list[i]
+      w_h, w_v = self._kld_weights_list[i]
+      kld = np.sum((interaction_h - mixed_h) * w_h, axis=(1, 2))
+      kld += np.sum((interaction_v - mixed_v) * w_v, axis=(1, 2))
+      kld_sum += kld * 2 + log_partition_mixed - np.log(
+          self._partition_original_list[i])  # ATTENTION
+    return kld_sum / float(self._n_ising_models)
 
   def problem_statement(self) -> pyvizier.ProblemStatement:
     problem_statement = pyvizier.ProblemStatement()
@@ -256,14 +299,16 @@ class CentroidExperimenter(experimenter.Experimenter):
   ) -> Tuple[np.ndarray, np.ndarray]:
     edge_weight = np.zeros(x.shape)
     for i in range(len(interaction_list)):
-      edge_weight[x == i] = np.hstack([
-          interaction_list[i][0].reshape(-1), interaction_list[i][1].reshape(-1)
-      ])[x == i]
+      edge_weight = np.where(
+          x == i,
+          np.hstack([
+              interaction_list[i][0].reshape(-1),
+              interaction_list[i][1].reshape(-1)
+          ]), edge_weight)
     grid_h, grid_w = self._centroid_grid
     split_ind = grid_h * (grid_w - 1)
-    return edge_weight[:split_ind].reshape(
-        (grid_h, grid_w - 1)), edge_weight[split_ind:].reshape(
-            (grid_h - 1, grid_w))
+    return (edge_weight[:, :split_ind].reshape((-1, grid_h, grid_w - 1)),
+            edge_weight[:, split_ind:].reshape((-1, grid_h - 1, grid_w)))
 
 
 class PestControlExperimenter(experimenter.Experimenter):
@@ -279,17 +324,16 @@ class PestControlExperimenter(experimenter.Experimenter):
     self._problem_statement = self.problem_statement()
 
   def evaluate(self, suggestions: Sequence[pyvizier.Trial]):
-    for suggestion in suggestions:
-      # TODO: Switch to using StudyConfig.
-      x = np.array([
-          int(suggestion.parameters[f'x_{i}'].value)
-          for i in range(self._pest_control_n_stages)
-      ])
-      evaluation = self._pest_control_score(x)
-      suggestion.complete(
-          pyvizier.Measurement(metrics={
-              self._problem_statement.single_objective_metric_name: evaluation
-          }))
+    # TODO: Switch to using StudyConfig.
+    evaluations = self.evaluate_array(
+        _int_matrix(suggestions, self._pest_control_n_stages))
+    _complete(suggestions, evaluations,
+              self._problem_statement.single_objective_metric_name)
+
+  def evaluate_array(self, x: np.ndarray) -> np.ndarray:
+    """Returns the objective of each row of a [n, n_stages] array of choices."""
+    return self._pest_control_score(
+        _check_shape(x, self._pest_control_n_stages))
 
   def problem_statement(self) -> pyvizier.ProblemStatement:
     problem_statement = pyvizier.ProblemStatement()
@@ -303,17 +347,25 @@ class PestControlExperimenter(experimenter.Experimenter):
             name='main_objective', goal=pyvizier.ObjectiveMetricGoal.MINIMIZE))
     return problem_statement
 
-  def _pest_spread(self, curr_pest_frac: float, spread_rate: float,
-                   control_rate: float, apply_control: bool):
+  def _pest_spread(self, curr_pest_frac: np.ndarray, spread_rate: np.ndarray,
+                   control_rate: np.ndarray, apply_control: bool):
     if apply_control:
       next_pest_frac = (1.0 - control_rate) * curr_pest_frac
     else:
       next_pest_frac = spread_rate * (1 - curr_pest_frac) + curr_pest_frac
     return next_pest_frac
 
-  def _pest_control_score(self, x: np.ndarray) -> float:
+  def _pest_control_score(self, x: np.ndarray) -> np.ndarray:
+    """Simulates the rows of $x [n, n_stages] at once and returns [n] scores.
+
+    With a fixed random seed, every row gets the same score as if it was
+    simulated on its own. Otherwise, the rows of a batch share random draws.
+
+    Args:
+      x:
+    """
     u = 0.1
-    n_stages = x.size
+    n_rows, n_stages = x.shape
     n_simulations = 100
 
     init_pest_frac_alpha = 1.0
@@ -333,33 +385,49 @@ class PestControlExperimenter(experimenter.Experimenter):
     # below two changes over stages according to x
     control_beta = {1: 2.0 / 7.0, 2: 3.0 / 7.0, 3: 3.0 / 7.0, 4: 5.0 / 7.0}
 
-    payed_price_sum = 0
-    above_threshold = 0
+    # The control rate only depends on the pesticide and the number of times
+    # it was applied before, through the tolerance developed against it.
+    control_rates: Dict[Tuple[int, int], np.ndarray] = {}
+
+    def control_rate(pesticide: int, n_applied: int) -> np.ndarray:
+      if (pesticide, n_applied) not in control_rates:
+        beta = control_beta[pesticide]
+        for _ in range(n_applied):
+          # Tolerance has been developed for pesticide type 1.
+          beta += tolerance_develop_rate[pesticide] / float(n_stages)
+        control_rates[(pesticide, n_applied)] = np.random.RandomState(
+            self._random_seed).beta(
+                control_alpha, beta, size=(n_simulations,))
+      return control_rates[(pesticide, n_applied)]
+
+    payed_price_sum = np.zeros(n_rows)
+    above_threshold = np.zeros(n_rows)
+    n_applied = np.zeros((n_rows, max(control_price) + 1), dtype=int)
 
     init_pest_frac = np.random.RandomState(self._random_seed).beta(
         init_pest_frac_alpha, init_pest_frac_beta, size=(n_simulations,))
-    curr_pest_frac = init_pest_frac
+    curr_pest_frac = np.tile(init_pest_frac, (n_rows, 1))
     for i in range(n_stages):
       spread_rate = np.random.RandomState(self._random_seed).beta(
           spread_alpha, spread_beta, size=(n_simulations,))
-      do_control = x[i] > 0
-      if do_control:
-        control_rate = np.random.RandomState(self._random_seed).beta(
-            control_alpha, control_beta[x[i]], size=(n_simulations,))
-        next_pest_frac = self._pest_spread(curr_pest_frac, spread_rate,
-                                           control_rate, True)
-        # Tolerance has been developed for pesticide type 1.
-        control_beta[x[i]] += tolerance_develop_rate[x[i]] / float(n_stages)
+      next_pest_frac = self._pest_spread(curr_pest_frac, spread_rate, 0, False)
+      payed_price = np.zeros(n_rows)
+      for pesticide in control_price:
+        rows = np.nonzero(x[:, i] == pesticide)[0]
+        if not rows.size:
+          continue
+        for count in np.unique(n_applied[rows, pesticide]):
+          count_rows = rows[n_applied[rows, pesticide] == count]
+          next_pest_frac[count_rows] = self._pest_spread(
+              curr_pest_frac[count_rows], spread_rate,
+              control_rate(pesticide, count), True)
+        n_applied[rows, pesticide] += 1
         # You will get a discount.
-        payed_price = control_price[x[i]] * (
-            1.0 - control_price_max_discount[x[i]] / float(n_stages) *
-            float(np.sum(x == x[i])))
-      else:
-        next_pest_frac = self._pest_spread(curr_pest_frac, spread_rate, 0,
-                                           False)
-        payed_price = 0
+        payed_price[rows] = control_price[pesticide] * (
+            1.0 - control_price_max_discount[pesticide] / float(n_stages) *
+            np.sum(x[rows] == pesticide, axis=1).astype(float))
       payed_price_sum += payed_price
-      above_threshold += np.mean(curr_pest_frac > u)
+      above_threshold += np.mean(curr_pest_frac > u, axis=1)
       curr_pest_frac = next_pest_frac
 
     return payed_price_sum + above_threshold
@@ -399,24 +467,33 @@ class MAXSATExperimenter(experimenter.Experimenter):
               [int(elm) > 0 for elm in clause])
       self._clauses.append(pair)
 
+    # Literals of all clauses, concatenated, and the offset of every clause.
+    lengths = np.array([len(variables) for variables, _ in self._clauses])
+    self._literal_variables = np.array(
+        [v for variables, _ in self._clauses for v in variables], dtype=int)
+    self._literal_signs = np.array(
+        [s for _, signs in self._clauses for s in signs], dtype=bool)
+    self._nonempty_clauses = lengths > 0
+    self._clause_starts = (np.cumsum(lengths) - lengths)[self._nonempty_clauses]
+
     self._problem_statement = self.problem_statement()
 
   def evaluate(self, suggestions: Sequence[pyvizier.Trial]):
-    for suggestion in suggestions:
-      # TODO: Switch to using StudyConfig.
-      bools = [
-          int(suggestion.parameters[f'x_{i}'].value == 'True')
-          for i in range(self._n_variables)
-      ]
-      x = np.array(bools, dtype=np.bool)
-      satisfied = np.array([
-          (x[clause[0]] == clause[1]).any() for clause in self._clauses
-      ])
-      evaluation = -np.sum(self._weights * satisfied)
-      suggestion.complete(
-          pyvizier.Measurement(metrics={
-              self._problem_statement.single_objective_metric_name: evaluation
-          }))
+    # TODO: Switch to using StudyConfig.
+    evaluations = self.evaluate_array(
+        _bool_matrix(suggestions, self._n_variables))
+    _complete(suggestions, evaluations,
+              self._problem_statement.single_objective_metric_name)
+
+  def evaluate_array(self, x: np.ndarray) -> np.ndarray:
+    """Returns the objective of each row of a [n, n_variables] 0/1 array."""
+    x = _check_shape(x, self._n_variables).astype(bool)
+    literals = x[:, self._literal_variables] == self._literal_signs
+    satisfied = np.zeros((x.shape[0], len(self._clauses)), dtype=bool)
+    if literals.size:
+      satisfied[:, self._nonempty_clauses] = np.logical_or.reduceat(
+          literals, self._clause_starts, axis=1)
+    return -np.sum(self._weights * satisfied, axis=1)
 
   def problem_statement(self) -> pyvizier.ProblemStatement:
     problem_statement = pyvizier.ProblemStatement()
@@ -15,8 +15,12 @@
 """Tests for combo_experimenter."""
 # pylint:disable=g-long-lambda
 import functools
-from absl import logging
+import os
+import shutil
+import tempfile
 
+from absl import logging
+import numpy as np
 from vizier import pyvizier
 from vizier._src.algorithms.designers import random
 from vizier._src.benchmarks.experimenters import combo_experimenter
@@ -60,6 +64,76 @@ class ComboExperimenterTest(parameterized.TestCase):
       self.assertLessEqual(eval_objective, objective_max)
       self.assertGreaterEqual(eval_objective, objective_min)
 
+  @parameterized.named_parameters(
+      ('contamination',
+       functools.partial(
+           combo_experimenter.ContaminationExperimenter,
+           lamda=0.01,
+           random_seed=1)),
+      ('ising',
+       functools.partial(
+           combo_experimenter.IsingExperimenter, lamda=0.01, random_seed=1)),
+      ('centroid',
+       functools.partial(
+           combo_experimenter.CentroidExperimenter, random_seed=1)),
+      ('pest_control',
+       functools.partial(
+           combo_experimenter.PestControlExperimenter, random_seed=1)),
+  )
+  def test_batch_matches_single(self, experimenter_class):
+    experimenter = experimenter_class()
+    problem_statement = experimenter.problem_statement()
+    designer = random.RandomDesigner(
+        search_space=problem_statement.search_space, seed=1)
+    batch = [suggestion.to_trial() for suggestion in designer.suggest(8)]
+    singles = [pyvizier.Trial(parameters=t.parameters) for t in batch]
+
+    experimenter.evaluate(batch)
+    for trial in singles:
+      experimenter.evaluate([trial])
+    metric_name = problem_statement.metric_information.item().name
+    np.testing.assert_allclose(
+        [t.final_measurement.metrics[metric_name].value for t in batch],
+        [t.final_measurement.metrics[metric_name].value for t in singles],
+        rtol=1e-12,
+        atol=1e-12)
+
+  def test_maxsat(self):
+    tempdir = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, tempdir)
+    path = os.path.join(tempdir, 'test.wcnf')
+    with open(path, 'wt') as f:
+      f.write('c comment\n'
+              'p wcnf 3 3 10\n'
+              '1 1 -2 0\n'
+              '2 2 3 0\n'
+              '3 -1 0\n')
+    experimenter = combo_experimenter.MAXSATExperimenter(path)
+    # Normalized weights of the three clauses.
+    weights = (np.array([1., 2., 3.]) - 2.) / np.std([1., 2., 3.])
+
+    evaluations = experimenter.evaluate_array(
+        np.array([[0, 0, 0], [1, 1, 0], [0, 1, 1]]))
+    np.testing.assert_allclose(evaluations, [
+        -(weights[0] + weights[2]),
+        -(weights[0] + weights[1]),
+        -(weights[1] + weights[2]),
+    ],
+                               rtol=1e-6)
+
+    trial = pyvizier.Trial(parameters={
+        'x_0': 'True',
+        'x_1': 'True',
+        'x_2': 'False'
+    })
+    experimenter.evaluate([trial])
+    self.assertAlmostEqual(
+        trial.final_measurement.metrics['main_objective'].value,
+        evaluations[1],
+        places=6)
+    with self.assertRaises(ValueError):
+      experimenter.evaluate_array(np.zeros((2, 4)))
+
 
 if __name__ == '__main__':
   absltest.main()
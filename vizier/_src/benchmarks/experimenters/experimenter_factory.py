@@ -48,7 +48,9 @@ class BBOBExperimenterFactory(ExperimenterFactory):
     if bbob_function is None:
       raise ValueError(f'{self.name} is not a valid BBOB function in bbob.py')
     return numpy_experimenter.NumpyExperimenter(
-        bbob_function, bbob.DefaultBBOBProblemStatement(self.dim))
+        bbob_function,
+        bbob.DefaultBBOBProblemStatement(self.dim),
+        batched=True)
 
 
 @attr.define
@@ -0,0 +1,126 @@
+# Copyright 2022 Google LLC.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Columnar, memory-mapped cache of the HPO-B meta-datasets.
+
+HPO-B distributes its meta-datasets as JSON files of several gigabytes, which
+take minutes to parse. This module converts a meta-dataset once into numpy
+files that are memory-mapped on subsequent loads, so only the datasets that are
+actually used are read from disk.
+
+A converted meta-dataset is a directory with:
+  index.json: {search_space_id: {dataset_id: [start, stop]}}.
+  {search_space_id}.X.npy: Rows of X of all datasets in the search space.
+  {search_space_id}.y.npy: Rows of y of all datasets in the search space.
+
+Rows [start, stop) of the arrays belong to the dataset.
+"""
+# pylint:disable=invalid-name
+
+import json
+import os
+from typing import Dict, Optional
+
+import numpy as np
+
+Open = open
+Exists = os.path.exists
+MakeDirs = os.makedirs
+
+# Nested dict {search_space_id: {dataset_id: {'X': array, 'y': array}}}, i.e.
+# the structure of the HPO-B JSON files.
+MetaDataset = Dict[str, Dict[str, Dict[str, np.ndarray]]]
+
+_INDEX_FILE = 'index.json'
+
+
+def _array_path(directory: str, search_space_id: str, key: str) -> str:
+  return os.path.join(directory, f'{search_space_id}.{key}.npy')
+
+
+def write_meta_dataset(data: MetaDataset, directory: str) -> None:
+  """Writes $data in the columnar format into $directory.
+
+  The index is written last, so a directory without an index is incomplete.
+
+  Args:
+    data: Meta-dataset, e.g. the content of a HPO-B JSON file.
+    directory: Output directory.
+  """
+  MakeDirs(directory, exist_ok=True)
+  index = {}
+  for search_space_id, datasets in data.items():
+    index[search_space_id] = {}
+    start = 0
+    for dataset_id, datadict in datasets.items():
+      stop = start + len(datadict['y'])
+      index[search_space_id][dataset_id] = [start, stop]
+      start = stop
+    for key in ('X', 'y'):
+      arrays = [
+          np.asarray(datadict[key], dtype=np.float64)
+          for datadict in datasets.values()
+      ]
+      with Open(_array_path(directory, search_space_id, key), 'wb') as f:
+        np.save(f, np.concatenate(arrays) if arrays else np.zeros([0]))
+  with Open(os.path.join(directory, _INDEX_FILE), 'wt') as f:
+    json.dump(index, f)
+
+
+def read_meta_dataset(directory: str) -> MetaDataset:
+  """Reads a meta-dataset written by `write_meta_dataset`.
+
+  Args:
+    directory:
+
+  Returns:
+    Meta-dataset whose arrays are read-only views into memory-mapped files.
+  """
+  with Open(os.path.join(directory, _INDEX_FILE), 'rt') as f:
+    index = json.load(f)
+  data = {}
+  for search_space_id, datasets in index.items():
+    columns = {
+        key: np.load(
+            _array_path(directory, search_space_id, key), mmap_mode='r')
+        for key in ('X', 'y')
+    }
+    data[search_space_id] = {
+        dataset_id: {key: column[start:stop] for key, column in columns.items()
+                    } for dataset_id, (start, stop) in datasets.items()
+    }
+  return data
+
+
+def load_meta_dataset(json_path: str,
+                      cache_dir: Optional[str] = None) -> MetaDataset:
+  """Loads a HPO-B meta-dataset JSON file, using the columnar cache if given.
+
+  Args:
+    json_path: Path to the HPO-B JSON file.
+    cache_dir: If set, the JSON file is converted into a subdirectory of
+      $cache_dir on first use, and memory-mapped afterwards.
+
+  Returns:
+    Meta-dataset.
+  """
+  if cache_dir is None:
+    with Open(json_path, 'rb') as f:
+      return json.load(f)
+  name = os.path.splitext(os.path.basename(json_path))[0]
+  directory = os.path.join(cache_dir, name)
+  if not Exists(os.path.join(directory, _INDEX_FILE)):
+    with Open(json_path, 'rb') as f:
+      write_meta_dataset(json.load(f), directory)
+  return read_meta_dataset(directory)
@@ -0,0 +1,79 @@
+# Copyright 2022 Google LLC.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for columnar."""
+
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from vizier._src.benchmarks.experimenters.hpob import columnar
+
+from absl.testing import absltest
+
+_DATA = {
+    '4796': {
+        '3549': {
+            'X': [[0.1, 0.2], [0.3, 0.4], [0.5, 0.6]],
+            'y': [[0.7], [0.8], [0.9]]
+        },
+        '3918': {
+            'X': [[1.0, 2.0]],
+            'y': [[3.0]]
+        },
+    },
+    '5527': {
+        '146064': {
+            'X': [[1.0], [2.0]],
+            'y': [[0.5], [0.25]]
+        }
+    },
+}
+
+
+class ColumnarTest(absltest.TestCase):
+
+  def assertMetaDatasetEqual(self, actual, expected):
+    self.assertEqual(
+        {k: set(v) for k, v in actual.items()},
+        {k: set(v) for k, v in expected.items()})
+    for search_space_id, datasets in expected.items():
+      for dataset_id, datadict in datasets.items():
+        for key in ('X', 'y'):
+          np.testing.assert_array_equal(
+              actual[search_space_id][dataset_id][key], datadict[key])
+
+  def test_load_converts_once(self):
+    tempdir = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, tempdir)
+    json_path = os.path.join(tempdir, 'meta-test-dataset.json')
+    with open(json_path, 'wt') as f:
+      json.dump(_DATA, f)
+    cache_dir = os.path.join(tempdir, 'cache')
+
+    self.assertMetaDatasetEqual(
+        columnar.load_meta_dataset(json_path), _DATA)
+    self.assertMetaDatasetEqual(
+        columnar.load_meta_dataset(json_path, cache_dir), _DATA)
+    # The second load reads the converted files only.
+    os.remove(json_path)
+    loaded = columnar.load_meta_dataset(json_path, cache_dir)
+    self.assertMetaDatasetEqual(loaded, _DATA)
+    self.assertIsInstance(loaded['4796']['3549']['X'].base, np.memmap)
+
+
+if __name__ == '__main__':
+  absltest.main()
@@ -23,19 +23,45 @@ import os
 
 import functools
 import numpy as np
+from vizier._src.benchmarks.experimenters.hpob import columnar
 import xgboost as xgb
 
 Open = open
 Exists = os.path.exists
 IsDir = os.path.isdir
 
+# Maximum number of surrogate boosters kept in memory by `load_surrogate`.
+SURROGATE_CACHE_SIZE = 64
+
+
+@functools.lru_cache(maxsize=SURROGATE_CACHE_SIZE)
+def load_surrogate(surrogates_dir: str, search_space_id: str,
+                   dataset_id: str) -> xgb.Booster:
+  """Loads the surrogate booster of a dataset. Results are cached.
+
+  Boosters are only used for prediction, which is thread-safe, so they can be
+  shared.
+
+  Inputs:
+      * surrogates_dir: path to directory with surrogates models.
+      * search_space_id: Identifier of the search space.
+      * dataset_id: Identifier of the dataset.
+  Output:
+      * the loaded XGBoost booster.
+  """
+  bst_surrogate = xgb.Booster()
+  surrogate_name = "surrogate-" + search_space_id + "-" + dataset_id
+  bst_surrogate.load_model(surrogates_dir + surrogate_name + ".json")
+  return bst_surrogate
+
 
 class HPOBHandler:
 
   def __init__(self,
                root_dir="hpob-data/",
                mode="v3-test",
-               surrogates_dir="saved-surrogates/"):
+               surrogates_dir="saved-surrogates/",
+               cache_dir=None):
     """Constructor for the HPOBHandler.
 
     Inputs:
@@ -49,6 +75,8 @@ class HPOBHandler:
             augmenting the meta-train data with the less frequent
             search-spaces.
         * surrogates_dir: path to directory with surrogates models.
+        * cache_dir: if set, the meta-datasets are converted once into
+        memory-mapped columnar files in this directory. See columnar.py.
     """
 
     print("Loading HPO-B handler")
@@ -57,11 +85,13 @@ class HPOBHandler:
     self.seeds = ["test0", "test1", "test2", "test3", "test4"]
 
     if self.mode == "v3-test":
-      self.load_data(root_dir, only_test=True)
+      self.load_data(root_dir, only_test=True, cache_dir=cache_dir)
     elif self.mode == "v3-train-augmented":
-      self.load_data(root_dir, only_test=False, augmented_train=True)
+      self.load_data(
+          root_dir, only_test=False, augmented_train=True, cache_dir=cache_dir)
     elif self.mode in ["v1", "v2", "v3"]:
-      self.load_data(root_dir, version=self.mode, only_test=False)
+      self.load_data(
+          root_dir, version=self.mode, only_test=False, cache_dir=cache_dir)
     else:
       raise ValueError("Provide a valid mode")
 
@@ -73,7 +103,8 @@ class HPOBHandler:
                         rootdir="",
                         version="v3",
                         only_test=True,
-                        augmented_train=False):
+                        augmented_train=False,
+                        cache_dir=None):
 
     meta_train_data = None
     meta_validation_data = None
@@ -87,21 +118,20 @@ class HPOBHandler:
     meta_validation_path = os.path.join(rootdir, "meta-validation-dataset.json")
     bo_initializations_path = os.path.join(rootdir, "bo-initializations.json")
 
-    with Open(meta_test_path, "rb") as f:
-      meta_test_data = json.load(f)
+    meta_test_data = columnar.load_meta_dataset(meta_test_path, cache_dir)
 
     with Open(bo_initializations_path, "rb") as f:
       bo_initializations = json.load(f)
 
     if not only_test:
       if augmented_train or version == "v1":
-        with Open(meta_train_augmented_path, "rb") as f:
-          meta_train_data = json.load(f)
+        meta_train_data = columnar.load_meta_dataset(meta_train_augmented_path,
+                                                     cache_dir)
       else:
-        with Open(meta_train_path, "rb") as f:
-          meta_train_data = json.load(f)
-      with Open(meta_validation_path, "rb") as f:
-        meta_validation_data = json.load(f)
+        meta_train_data = columnar.load_meta_dataset(meta_train_path,
+                                                     cache_dir)
+      meta_validation_data = columnar.load_meta_dataset(meta_validation_path,
+                                                        cache_dir)
 
     if version != "v3":
       temp_data = {}
@@ -139,7 +169,8 @@ class HPOBHandler:
                 rootdir="",
                 version="v3",
                 only_test=True,
-                augmented_train=False):
+                augmented_train=False,
+                cache_dir=None):
     """
         Loads data with some specifications.
         Inputs:
@@ -150,13 +181,15 @@ class HPOBHandler:
             version v3).  Options: True/False
             * augmented_train: Whether to load the augmented train data (valid
             only for version v3). Options: True/False
+            * cache_dir: if set, directory of the columnar cache.
     """
 
     self.meta_train_data, self.meta_validation_data, self.meta_test_data, self.bo_initializations = HPOBHandler._cached_load_data(
         rootdir=rootdir,
         version=version,
         only_test=only_test,
-        augmented_train=augmented_train)
+        augmented_train=augmented_train,
+        cache_dir=cache_dir)
 
   def normalize(self, y, y_min=None, y_max=None):
 
@@ -261,8 +294,8 @@ class HPOBHandler:
                           "test0, test1, test2, test3, test4.")
 
     surrogate_name = "surrogate-" + search_space_id + "-" + dataset_id
-    bst_surrogate = xgb.Booster()
-    bst_surrogate.load_model(self.surrogates_dir + surrogate_name + ".json")
+    bst_surrogate = load_surrogate(self.surrogates_dir, search_space_id,
+                                   dataset_id)
 
     n_initial_evaluations = 5
     X = np.array(self.meta_test_data[search_space_id][dataset_id]["X"])
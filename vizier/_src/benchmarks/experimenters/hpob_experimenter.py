@@ -408,11 +408,8 @@ class HPOBExperimenter(experimenter.Experimenter):
 
   def _load_surrogate(self, search_space_id: str,
                       dataset_id: str) -> xgb.Booster:
-    bst_surrogate = xgb.Booster()
-    surrogate_name = 'surrogate-' + search_space_id + '-' + dataset_id
-    bst_surrogate.load_model(self._handler.surrogates_dir + surrogate_name +
-                             '.json')
-    return bst_surrogate
+    return handler_lib.load_surrogate(self._handler.surrogates_dir,
+                                      search_space_id, dataset_id)
 
   def array_dim(self) -> int:
     return self._converter.array_dim()
@@ -429,9 +426,11 @@ class HPOBExperimenter(experimenter.Experimenter):
     new_y = np.clip(new_y, self._y_min, self._y_max)
     return new_y
 
+  def _PredictArray(self, x_array: np.ndarray) -> np.ndarray:
+    return self._surrogate.predict(xgb.DMatrix(x_array))
+
   def _EvaluateArray(self, x_array: np.ndarray, normalize: bool) -> np.ndarray:
-    x_q = xgb.DMatrix(x_array)
-    new_y = self._surrogate.predict(x_q)
+    new_y = self._PredictArray(x_array)
     if normalize:
       return self.normalize_ys(new_y)
     else:
@@ -460,10 +459,22 @@ class HPOBExperimenter(experimenter.Experimenter):
     return self._EvaluateContinuous(trial, normalize=self._normalize_y)
 
   def evaluate(self, suggestions: Sequence[vz.Trial]):
-    """Populates three metrics."""
-    for suggestion in suggestions:
-      unnormalized = self._EvaluateContinuous(suggestion, normalize=False)
-      normalized = self._EvaluateContinuous(suggestion, normalize=True)
+    """Populates three metrics.
+
+    All suggestions are predicted by the surrogate in a single batch.
+
+    Args:
+      suggestions:
+    """
+    if not suggestions:
+      return
+    raw_y = self._PredictArray(self._converter.to_array(suggestions))
+    all_unnormalized = np.clip(raw_y, self._y_min, self._y_max)
+    all_normalized = self.normalize_ys(raw_y)
+    for suggestion, unnormalized, normalized in zip(suggestions,
+                                                    all_unnormalized,
+                                                    all_normalized):
+      unnormalized, normalized = float(unnormalized), float(normalized)
       y = normalized if self._normalize_y else unnormalized
 
       final_measurement = vz.Measurement(
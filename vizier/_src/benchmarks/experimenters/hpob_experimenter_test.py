@@ -14,11 +14,17 @@
 
 """Tests for hpob."""
 
+import shutil
+import tempfile
+import types
+
 from absl import app
 from absl import logging
-
+import numpy as np
+from vizier import pyvizier as vz
 from vizier._src.benchmarks.experimenters import hpob_experimenter
 from vizier._src.benchmarks.experimenters.hpob import handler as handler_lib
+import xgboost as xgb
 
 from absl.testing import absltest
 from absl.testing import parameterized
@@ -78,6 +84,55 @@ def generate_test_class():
   class_to_test = HpobTest
 
 
+class BatchEvaluateTest(absltest.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    rng = np.random.default_rng(0)
+    x = rng.uniform(size=(50, 2))
+    booster = xgb.train({}, xgb.DMatrix(x, label=x.sum(axis=1)), 5)
+    surrogates_dir = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, surrogates_dir)
+    surrogates_dir += '/'
+    booster.save_model(surrogates_dir + 'surrogate-ss-ds.json')
+    # Only the surrogate files and stats of the handler are used.
+    self.handler = types.SimpleNamespace(
+        surrogates_dir=surrogates_dir,
+        surrogates_stats={'surrogate-ss-ds': {
+            'y_min': 0.5,
+            'y_max': 1.5
+        }})
+    variables = {
+        name: hpob_experimenter._VariableDescriptor(
+            name, min_value=0., max_value=1., min_value_before_tf=0.,
+            max_value_before_tf=1., apply_log=False) for name in ('a', 'b')
+    }
+    self.converter = hpob_experimenter._HPOBVizierConverter(
+        hpob_experimenter._SearchspaceDescriptor(variables, ['a', 'b']))
+
+  def test_evaluate_matches_single_trials(self):
+    experimenter = hpob_experimenter.HPOBExperimenter(
+        self.converter, self.handler, 'ss', 'ds', [], normalize_y=False)
+    trials = [
+        vz.Trial(parameters={'a': a, 'b': b})
+        for a, b in np.random.default_rng(1).uniform(size=(10, 2))
+    ]
+    experimenter.evaluate(trials)
+    for trial in trials:
+      metrics = trial.final_measurement.metrics
+      self.assertAlmostEqual(metrics[hpob_experimenter.METRIC_NAME].value,
+                             experimenter.EvaluateContinuous(trial), places=5)
+      self.assertBetween(
+          metrics[f'{hpob_experimenter.METRIC_NAME}_normalized'].value, 0., 1.)
+
+  def test_surrogate_is_cached(self):
+    experimenter1 = hpob_experimenter.HPOBExperimenter(
+        self.converter, self.handler, 'ss', 'ds', [], normalize_y=False)
+    experimenter2 = hpob_experimenter.HPOBExperimenter(
+        self.converter, self.handler, 'ss', 'ds', [], normalize_y=True)
+    self.assertIs(experimenter1._surrogate, experimenter2._surrogate)
+
+
 if __name__ == '__main__':
   app.call_after_init(generate_test_class)
   absltest.main()
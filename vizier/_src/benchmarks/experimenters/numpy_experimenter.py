@@ -17,7 +17,7 @@
 import copy
 import logging
 import math
-from typing import Callable, Sequence
+from typing import Callable, Sequence, Union
 
 import numpy as np
 from vizier import pyvizier
@@ -38,16 +38,23 @@ def _get_name(f):
 class NumpyExperimenter(experimenter.Experimenter):
   """NumpyExperimenters take a deterministic function on ndarrays."""
 
-  def __init__(self, impl: Callable[[np.ndarray], float],
-               problem_statement: pyvizier.ProblemStatement):
+  def __init__(self,
+               impl: Callable[[np.ndarray], Union[float, np.ndarray]],
+               problem_statement: pyvizier.ProblemStatement,
+               *,
+               batched: bool = False):
     """NumpyExperimenter with analytic function impl for one metric.
 
     NumpyExperimenter only supports single objectives, and flat numeric search
     spaces.
 
     Args:
-      impl: Function that scalarizes np.ndarray of shape (dimension,).
+      impl: Function that scalarizes np.ndarray of shape (dimension,). If
+        `batched` is True, function that maps np.ndarray of shape (num_trials,
+        dimension) to np.ndarray of shape (num_trials,).
       problem_statement: Problem statement.
+      batched: If True, `impl` is called once per `evaluate()` call on all
+        suggestions at once.
 
     Raises:
       ValueError: Non-positive dimension or invalid problem statement.
@@ -59,6 +66,7 @@ class NumpyExperimenter(experimenter.Experimenter):
       raise ValueError(f'Invalid dimension: {dimension}')
     self._dimension = dimension
     self.impl = impl
+    self._batched = batched
 
     if not problem_statement.metric_information.is_single_objective:
       raise ValueError(
@@ -81,13 +89,22 @@ class NumpyExperimenter(experimenter.Experimenter):
     return copy.deepcopy(self._problem_statement)
 
   def evaluate(self, suggestions: Sequence[pyvizier.Trial]):
+    if not suggestions:
+      return
     # Features has shape (num_trials, num_features).
     features = self._converter.to_features(suggestions)
-    for idx, suggestion in enumerate(suggestions):
-      if len(features[idx]) != self._dimension:
-        raise ValueError(
-            f'Features {features[idx]} should have length {self._dimension}')
-      val = self.impl(features[idx])
+    if features.shape[1] != self._dimension:
+      raise ValueError(
+          f'Features {features} should have length {self._dimension}')
+    if self._batched:
+      values = np.asarray(self.impl(features), dtype=float)
+      if values.shape != (len(suggestions),):
+        raise ValueError(f'Batched impl returned shape {values.shape} for '
+                         f'{len(suggestions)} suggestions.')
+    else:
+      values = [self.impl(f) for f in features]
+    for suggestion, val in zip(suggestions, values):
+      val = float(val)
       if math.isfinite(val):
         suggestion.complete(
             pyvizier.Measurement(metrics={self._metric_name: val}))
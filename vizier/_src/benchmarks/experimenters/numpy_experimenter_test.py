@@ -58,6 +58,41 @@ class NumpyExperimenterTest(parameterized.TestCase):
         t.final_measurement.metrics[metric_name].value)
     self.assertEqual(t.status, pyvizier.TrialStatus.COMPLETED)
 
+  def testBatched(self):
+    dim = 3
+    problem = bbob.DefaultBBOBProblemStatement(dim)
+    batched = numpy_experimenter.NumpyExperimenter(
+        bbob.Rastrigin, problem, batched=True)
+    unbatched = numpy_experimenter.NumpyExperimenter(bbob.Rastrigin, problem)
+
+    rng = np.random.default_rng(0)
+    parameters = problem.search_space.parameters
+    trials = [
+        pyvizier.Trial(parameters={
+            param.name: rng.uniform(-5, 5) for param in parameters
+        }) for _ in range(10)
+    ]
+    batched_trials = [pyvizier.Trial(parameters=t.parameters) for t in trials]
+    unbatched.evaluate(trials)
+    batched.evaluate(batched_trials)
+
+    metric_name = problem.metric_information.item().name
+    for t, batched_t in zip(trials, batched_trials):
+      self.assertAlmostEqual(
+          t.final_measurement.metrics[metric_name].value,
+          batched_t.final_measurement.metrics[metric_name].value)
+
+  def testBatchedWrongShape(self):
+    exptr = numpy_experimenter.NumpyExperimenter(
+        lambda x: np.zeros(1),
+        bbob.DefaultBBOBProblemStatement(2),
+        batched=True)
+    with self.assertRaises(ValueError):
+      exptr.evaluate([
+          pyvizier.Trial(parameters={'x0': 0.0, 'x1': 0.0}),
+          pyvizier.Trial(parameters={'x0': 1.0, 'x1': 1.0})
+      ])
+
   def testNonFinite(self):
     dim = 2
     exptr = numpy_experimenter.NumpyExperimenter(
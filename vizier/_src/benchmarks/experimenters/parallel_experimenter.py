@@ -0,0 +1,230 @@
+# Copyright 2022 Google LLC.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Experimenter that evaluates a batch of trials in parallel.
+
+Ex: Evaluate batches of 32 suggestions on all local cores.
+
+  exptr = ParallelExperimenter(SlowExperimenter(), use_processes=True)
+  runner = benchmark_runner.BenchmarkRunner(
+      benchmark_subroutines=[benchmark_runner.GenerateAndEvaluate(32)],
+      num_repeats=10)
+"""
+
+import copy
+from concurrent import futures
+import itertools
+import multiprocessing
+from multiprocessing import managers
+import time
+from typing import Dict, MutableMapping, Optional, Sequence
+
+from absl import logging
+import attr
+from vizier import pyvizier
+from vizier._src.benchmarks.experimenters import experimenter
+
+# Interval for checking whether trials started running, when timeouts are set.
+_POLL_INTERVAL_SECS = 0.05
+
+# Experimenter of the worker process, set by `_init_worker`.
+_worker_exptr: Optional[experimenter.Experimenter] = None
+
+
+def _init_worker(exptr: experimenter.Experimenter) -> None:
+  global _worker_exptr
+  _worker_exptr = exptr
+
+
+def _evaluate_in_worker(
+    trial: pyvizier.Trial, key: int,
+    start_times: Optional[MutableMapping[int, float]]) -> pyvizier.Trial:
+  return _evaluate(_worker_exptr, trial, key, start_times)
+
+
+def _evaluate(
+    exptr: experimenter.Experimenter, trial: pyvizier.Trial, key: int,
+    start_times: Optional[MutableMapping[int, float]]) -> pyvizier.Trial:
+  """Evaluates the trial and records when its evaluation starts.
+
+  Args:
+    exptr: Experimenter evaluating the trial.
+    trial: Trial to be evaluated in place.
+    key: Key of the evaluation in `start_times`.
+    start_times: Wall time at which the evaluations started. Shared with the
+      parent process when the workers are processes. None if not needed.
+
+  Returns:
+    The evaluated trial.
+  """
+  if start_times is not None:
+    start_times[key] = time.time()
+  exptr.evaluate([trial])
+  return trial
+
+
+def _copy_into(source: pyvizier.Trial, target: pyvizier.Trial) -> None:
+  """Copies all attributes of $source into $target."""
+  for field in attr.fields(type(target)):
+    setattr(target, field.name, getattr(source, field.name))
+
+
+def _complete_as_infeasible(trial: pyvizier.Trial, reason: str) -> None:
+  logging.warning('Trial %d is infeasible: %s', trial.id, reason)
+  trial.complete(pyvizier.Measurement(), infeasibility_reason=reason)
+
+
+class ParallelExperimenter(experimenter.Experimenter):
+  """Evaluates the trials of a batch concurrently with a wrapped Experimenter.
+
+  Each trial is evaluated on its own by `exptr.evaluate([trial])` in a thread or
+  process pool, and the result is written back into the original Trial. Trials
+  whose evaluation raises, or takes longer than `timeout_secs`, are completed
+  as infeasible.
+
+  Python cannot interrupt a running evaluation, so a timed out evaluation keeps
+  its worker busy until it returns; its result is discarded. Call `shutdown()`
+  to release the workers.
+
+  With processes, workers are forked where the platform supports it so that
+  they inherit `exptr` without pickling it. Otherwise `exptr` must be picklable.
+  In both cases the trials are sent to the workers and back, and stateful
+  experimenters (e.g. noise generators) advance their state in the workers
+  only.
+  """
+
+  def __init__(self,
+               exptr: experimenter.Experimenter,
+               *,
+               max_workers: Optional[int] = None,
+               use_processes: bool = False,
+               timeout_secs: Optional[float] = None):
+    """Init.
+
+    Args:
+      exptr: Experimenter to be wrapped. With threads, its `evaluate` must be
+        thread-safe.
+      max_workers: Number of workers. Defaults to the executor's default.
+      use_processes: If True, uses a process pool instead of a thread pool.
+        Use processes for evaluations that hold the GIL.
+      timeout_secs: Maximum evaluation time per trial, measured from when a
+        worker starts evaluating it. The time spent queued is not counted.
+    """
+    self._exptr = exptr
+    self._max_workers = max_workers
+    self._use_processes = use_processes
+    self._timeout_secs = timeout_secs
+    self._executor: Optional[futures.Executor] = None
+    # Start times written by the workers, only used with a timeout. Futures
+    # can't tell when an evaluation starts: a process pool marks the queued
+    # futures that were already sent to its workers as running.
+    self._manager: Optional[managers.SyncManager] = None
+    self._start_times: Optional[MutableMapping[int, float]] = None
+    self._keys = itertools.count()
+
+  def problem_statement(self) -> pyvizier.ProblemStatement:
+    return self._exptr.problem_statement()
+
+  def _get_mp_context(self) -> multiprocessing.context.BaseContext:
+    if 'fork' in multiprocessing.get_all_start_methods():
+      return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()
+
+  def _get_executor(self) -> futures.Executor:
+    if self._executor is None:
+      if self._use_processes:
+        self._executor = futures.ProcessPoolExecutor(
+            max_workers=self._max_workers,
+            mp_context=self._get_mp_context(),
+            initializer=_init_worker,
+            initargs=(self._exptr,))
+      else:
+        self._executor = futures.ThreadPoolExecutor(
+            max_workers=self._max_workers)
+    return self._executor
+
+  def _get_start_times(self) -> Optional[MutableMapping[int, float]]:
+    if self._timeout_secs is None:
+      return None
+    if self._start_times is None:
+      if self._use_processes:
+        self._manager = self._get_mp_context().Manager()
+        self._start_times = self._manager.dict()
+      else:
+        self._start_times = {}
+    return self._start_times
+
+  def _submit(self, trial: pyvizier.Trial, key: int) -> futures.Future:
+    if self._use_processes:
+      # The trial is pickled, so it is copied anyway.
+      return self._get_executor().submit(_evaluate_in_worker, trial, key,
+                                         self._get_start_times())
+    # Evaluate a copy, so that timed out evaluations cannot modify the trial.
+    return self._get_executor().submit(_evaluate, self._exptr,
+                                       copy.deepcopy(trial), key,
+                                       self._get_start_times())
+
+  def evaluate(self, suggestions: Sequence[pyvizier.Trial]):
+    trials: Dict[futures.Future, pyvizier.Trial] = {}
+    keys: Dict[futures.Future, int] = {}
+    for trial in suggestions:
+      key = next(self._keys)
+      future = self._submit(trial, key)
+      trials[future] = trial
+      keys[future] = key
+    start_times = self._get_start_times()
+    pending = set(trials)
+    while pending:
+      wait_secs = None
+      if start_times is not None:
+        # A single round trip when the start times live in a manager process.
+        started = start_times.copy()
+        now = time.time()
+        for future in [f for f in pending if keys[f] in started]:
+          if now - started[keys[future]] >= self._timeout_secs:
+            future.cancel()
+            pending.remove(future)
+            start_times.pop(keys[future], None)
+            _complete_as_infeasible(
+                trials[future],
+                f'Evaluation timed out after {self._timeout_secs} seconds.')
+        remaining = [
+            started[keys[f]] + self._timeout_secs - now
+            for f in pending
+            if keys[f] in started
+        ]
+        wait_secs = min(remaining + [_POLL_INTERVAL_SECS])
+      done, pending = futures.wait(
+          pending, timeout=wait_secs, return_when=futures.FIRST_COMPLETED)
+      for future in done:
+        if start_times is not None:
+          start_times.pop(keys[future], None)
+        if future.exception() is not None:
+          _complete_as_infeasible(
+              trials[future], f'Evaluation failed: {future.exception()!r}')
+        else:
+          _copy_into(future.result(), trials[future])
+
+  def shutdown(self) -> None:
+    """Shuts down the workers without waiting for running evaluations."""
+    if self._executor is not None:
+      self._executor.shutdown(wait=False, cancel_futures=True)
+      self._executor = None
+    if self._manager is not None:
+      self._manager.shutdown()
+      self._manager = None
+      self._start_times = None
+
+  def __repr__(self):
+    return f'ParallelExperimenter on {self._exptr}'
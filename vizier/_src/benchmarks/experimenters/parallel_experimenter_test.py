@@ -0,0 +1,122 @@
+# Copyright 2022 Google LLC.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for parallel_experimenter."""
+
+import time
+from typing import Sequence
+
+from vizier import pyvizier
+from vizier._src.benchmarks.experimenters import experimenter
+from vizier._src.benchmarks.experimenters import numpy_experimenter
+from vizier._src.benchmarks.experimenters import parallel_experimenter
+from vizier._src.benchmarks.experimenters.synthetic import bbob
+
+from absl.testing import absltest
+from absl.testing import parameterized
+
+
+class _SleepExperimenter(experimenter.Experimenter):
+  """Sleeps for 'x' seconds and fails for negative 'x'."""
+
+  def problem_statement(self) -> pyvizier.ProblemStatement:
+    problem = pyvizier.ProblemStatement()
+    problem.search_space.root.add_float_param('x', -1.0, 10.0)
+    problem.metric_information.append(
+        pyvizier.MetricInformation(
+            'obj', goal=pyvizier.ObjectiveMetricGoal.MINIMIZE))
+    return problem
+
+  def evaluate(self, suggestions: Sequence[pyvizier.Trial]):
+    for trial in suggestions:
+      x = trial.parameters['x'].value
+      if x < 0:
+        raise ValueError('Negative x')
+      time.sleep(x)
+      trial.complete(pyvizier.Measurement({'obj': x}))
+
+
+class ParallelExperimenterTest(parameterized.TestCase):
+
+  @parameterized.parameters(True, False)
+  def test_matches_sequential(self, use_processes):
+    dim = 3
+    exptr = numpy_experimenter.NumpyExperimenter(
+        bbob.Rastrigin, bbob.DefaultBBOBProblemStatement(dim))
+    parallel_exptr = parallel_experimenter.ParallelExperimenter(
+        exptr, max_workers=4, use_processes=use_processes)
+    self.addCleanup(parallel_exptr.shutdown)
+
+    trials = [
+        pyvizier.Trial(
+            id=i + 1, parameters={f'x{j}': 0.1 * i + j for j in range(dim)})
+        for i in range(10)
+    ]
+    expected = [pyvizier.Trial(id=t.id, parameters=t.parameters) for t in trials]
+    parallel_exptr.evaluate(trials)
+    exptr.evaluate(expected)
+
+    for trial, expected_trial in zip(trials, expected):
+      self.assertEqual(trial.id, expected_trial.id)
+      self.assertEqual(trial.status, pyvizier.TrialStatus.COMPLETED)
+      self.assertEqual(trial.final_measurement.metrics,
+                       expected_trial.final_measurement.metrics)
+
+  def test_evaluates_concurrently(self):
+    exptr = parallel_experimenter.ParallelExperimenter(
+        _SleepExperimenter(), max_workers=8)
+    self.addCleanup(exptr.shutdown)
+    trials = [pyvizier.Trial(parameters={'x': 0.2}) for _ in range(8)]
+    start = time.monotonic()
+    exptr.evaluate(trials)
+    self.assertLess(time.monotonic() - start, 1.0)
+    for trial in trials:
+      self.assertEqual(trial.final_measurement.metrics['obj'].value, 0.2)
+
+  def test_failures_and_timeouts_are_infeasible(self):
+    exptr = parallel_experimenter.ParallelExperimenter(
+        _SleepExperimenter(), max_workers=3, timeout_secs=0.5)
+    self.addCleanup(exptr.shutdown)
+    ok, failed, timed_out = [
+        pyvizier.Trial(parameters={'x': x}) for x in (0.0, -1.0, 3.0)
+    ]
+    start = time.monotonic()
+    exptr.evaluate([ok, failed, timed_out])
+    self.assertLess(time.monotonic() - start, 2.0)
+
+    self.assertFalse(ok.infeasible)
+    self.assertEqual(ok.final_measurement.metrics['obj'].value, 0.0)
+    self.assertTrue(failed.infeasible)
+    self.assertIn('Negative x', failed.infeasibility_reason)
+    self.assertTrue(timed_out.infeasible)
+    self.assertIn('timed out', timed_out.infeasibility_reason)
+
+
+  @parameterized.parameters(True, False)
+  def test_queued_trials_do_not_time_out(self, use_processes):
+    exptr = parallel_experimenter.ParallelExperimenter(
+        _SleepExperimenter(),
+        max_workers=1,
+        use_processes=use_processes,
+        timeout_secs=0.5)
+    self.addCleanup(exptr.shutdown)
+    trials = [pyvizier.Trial(parameters={'x': 0.3}) for _ in range(3)]
+    exptr.evaluate(trials)
+    for trial in trials:
+      self.assertFalse(trial.infeasible)
+      self.assertEqual(trial.final_measurement.metrics['obj'].value, 0.3)
+
+
+if __name__ == '__main__':
+  absltest.main()
@@ -17,11 +17,14 @@
 import functools
 import hashlib
 import math
-from typing import Any, Callable
+from typing import Any, Callable, Union
 
 import numpy as np
 from vizier import pyvizier
 
+# BBOB functions take a (dim,) point or a (n, dim) batch of points and a seed.
+BBOBFunction = Callable[..., Union[float, np.ndarray]]
+
 
 def DefaultBBOBProblemStatement(
     dimension: int,
@@ -42,6 +45,9 @@ def DefaultBBOBProblemStatement(
 
 
 ## Utility Functions for BBOB.
+#
+# Single point versions of the batched utilities below, which are used by the
+# BBOB functions.
 def LambdaAlpha(alpha: float, dim: int) -> np.ndarray:
   """The BBOB LambdaAlpha matrix creation function.
 
@@ -52,11 +58,7 @@ def LambdaAlpha(alpha: float, dim: int) -> np.ndarray:
   Returns:
     Diagonal matrix of dimension dim with values determined by alpha.
   """
-  lambda_alpha = np.zeros([dim, dim])
-  for i in range(dim):
-    exp = (0.5 * (float(i) / (dim - 1))) if dim > 1 else 0.5
-    lambda_alpha[i, i] = alpha**exp
-  return lambda_alpha
+  return np.diag(_LambdaAlphaDiagonal(alpha, dim))
 
 
 def ArrayMap(vector: np.ndarray, fn: Callable[[float], float]) -> np.ndarray:
@@ -69,10 +71,7 @@ def ArrayMap(vector: np.ndarray, fn: Callable[[float], float]) -> np.ndarray:
   Returns:
     New ndarray be values mapped by fn.
   """
-  results = np.zeros(vector.shape)
-  for i, v in enumerate(vector.flat):
-    results.flat[i] = fn(v)
-  return results
+  return np.vectorize(fn, otypes=[float])(vector)
 
 
 def Tosz(element: float) -> float:
@@ -84,11 +83,7 @@ def Tosz(element: float) -> float:
   Returns:
     Tosz(input).
   """
-  x_carat = 0.0 if element == 0 else math.log(abs(element))
-  c1 = 10.0 if element > 0 else 5.5
-  c2 = 7.9 if element > 0 else 3.1
-  return np.sign(element) * math.exp(
-      x_carat + 0.049 * (math.sin(c1 * x_carat) + math.sin(c2 * x_carat)))
+  return float(_ToszBatch(np.asarray(element, dtype=float)))
 
 
 def Tasy(vector: np.ndarray, beta: float) -> np.ndarray:
@@ -101,16 +96,8 @@ def Tasy(vector: np.ndarray, beta: float) -> np.ndarray:
   Returns:
     ndarray with values determined by beta.
   """
-  dim = len(vector)
-  result = np.zeros([dim, 1])
-  for i, val in enumerate(vector.flat):
-    if val > 0:
-      t = i / (dim - 1.0) if dim > 1 else 1
-      exp = 1 + beta * t * (val**0.5)
-    else:
-      exp = 1
-    result[i] = val**exp
-  return result
+  x = np.asarray(vector, dtype=float).reshape(-1)
+  return _TasyBatch(x, beta).reshape(-1, 1)
 
 
 def SIndex(dim: int, to_sz) -> float:
@@ -125,17 +112,7 @@ def SIndex(dim: int, to_sz) -> float:
   Returns:
     float representing SIndex(i, d, to_sz).
   """
-  s = np.zeros([
-      dim,
-  ])
-  for i in range(dim):
-    if dim > 1:
-      s[i] = 10**(0.5 * (i / (dim - 1.0)))
-    else:
-      s[i] = 10**0.5
-    if i % 2 == 0 and to_sz[i] > 0:
-      s[i] *= 10
-  return s
+  return _SIndexBatch(np.asarray(to_sz, dtype=float).reshape(-1)[:dim])
 
 
 def Fpen(vector: np.ndarray) -> float:
@@ -147,7 +124,7 @@ def Fpen(vector: np.ndarray) -> float:
   Returns:
     float representing Fpen(vector).
   """
-  return sum([max(0.0, (abs(x) - 5.0))**2 for x in vector.flat])
+  return float(_FpenBatch(np.asarray(vector, dtype=float).reshape(-1)))
 
 
 def _Hash(*seeds: Any) -> int:
@@ -192,388 +169,378 @@ def _R(dim: int, seed: int, *moreseeds: bytes) -> np.ndarray:
   return np.linalg.qr(b.reshape(dim, dim))[0]
 
 
+## Batched utility functions. Points are the rows of (n, dim) arrays.
+def _Batched(fn: Callable[[np.ndarray, int], np.ndarray]) -> BBOBFunction:
+  """Allows a function on (n, dim) batches to also take a single point.
+
+  Args:
+    fn: Function that maps a (n, dim) array and a seed to a (n,) array.
+
+  Returns:
+    Function that returns a (n,) array for a (n, dim) array and a float for a
+    (dim,) array.
+  """
+
+  @functools.wraps(fn)
+  def Wrapper(arr: np.ndarray, seed: int = 0) -> Union[float, np.ndarray]:
+    x = np.asarray(arr, dtype=float)
+    if x.ndim == 1:
+      return float(fn(x[np.newaxis, :], seed)[0])
+    if x.ndim != 2:
+      raise ValueError(f"Expected a (dim,) or (n, dim) array. Got {x.shape}.")
+    return fn(x, seed)
+
+  return Wrapper
+
+
+def _LambdaAlphaDiagonal(alpha: float, dim: int) -> np.ndarray:
+  """Returns the diagonal of LambdaAlpha(alpha, dim)."""
+  if dim == 1:
+    return np.array([alpha**0.5])
+  return alpha**(0.5 * np.arange(dim) / (dim - 1))
+
+
+def _ToszBatch(x: np.ndarray) -> np.ndarray:
+  """Elementwise Tosz."""
+  x_carat = np.log(np.abs(x), out=np.zeros_like(x), where=(x != 0))
+  c1 = np.where(x > 0, 10.0, 5.5)
+  c2 = np.where(x > 0, 7.9, 3.1)
+  return np.sign(x) * np.exp(x_carat + 0.049 *
+                             (np.sin(c1 * x_carat) + np.sin(c2 * x_carat)))
+
+
+def _TasyBatch(x: np.ndarray, beta: float) -> np.ndarray:
+  """Tasy applied to every row of $x."""
+  dim = x.shape[-1]
+  t = np.arange(dim) / (dim - 1.0) if dim > 1 else np.ones(1)
+  positive = np.maximum(x, 0.0)
+  return np.where(x > 0, positive**(1 + beta * t * positive**0.5), x)
+
+
+def _SIndexBatch(x: np.ndarray) -> np.ndarray:
+  """SIndex computed for every row of $x."""
+  dim = x.shape[-1]
+  if dim > 1:
+    s = 10**(0.5 * np.arange(dim) / (dim - 1.0))
+  else:
+    s = np.array([10**0.5])
+  even = (np.arange(dim) % 2 == 0)
+  return np.where(even & (x > 0), 10 * s, s)
+
+
+def _FpenBatch(x: np.ndarray) -> np.ndarray:
+  """Fpen of every row of $x."""
+  return np.sum(np.maximum(0.0, np.abs(x) - 5.0)**2, axis=-1)
+
+
+def _Rotate(x: np.ndarray, seed: int, key: bytes) -> np.ndarray:
+  """Applies the rotation _R(dim, seed, key) to every row of $x."""
+  return x @ _R(x.shape[-1], seed, key).T
+
+
 ## BBOB Functions.
-def Sphere(arr: np.ndarray, seed: int = 0) -> float:
+#
+# Every function takes either a single point of shape (dim,) and returns a
+# float, or a batch of points of shape (n, dim) and returns an array of shape
+# (n,).
+@_Batched
+def Sphere(x: np.ndarray, seed: int = 0) -> np.ndarray:
   """Implementation for BBOB Sphere function."""
   del seed
-  return float(np.sum(arr * arr))
+  return np.sum(x * x, axis=1)
 
 
-def Rastrigin(arr: np.ndarray, seed: int = 0) -> float:
+@_Batched
+def Rastrigin(x: np.ndarray, seed: int = 0) -> np.ndarray:
   """Implementation for BBOB Rastrigin function."""
-  dim = len(arr)
-  arr.shape = (dim, 1)
-  z = np.matmul(_R(dim, seed, b"R"), arr)
-  z = Tasy(ArrayMap(z, Tosz), 0.2)
-  z = np.matmul(_R(dim, seed, b"Q"), z)
-  z = np.matmul(LambdaAlpha(10.0, dim), z)
-  z = np.matmul(_R(dim, seed, b"R"), z)
-  return float(10 * (dim - np.sum(np.cos(2 * math.pi * z))) +
-               np.sum(z * z, axis=0))
-
-
-def BuecheRastrigin(arr: np.ndarray, seed: int = 0) -> float:
+  dim = x.shape[1]
+  z = _Rotate(x, seed, b"R")
+  z = _TasyBatch(_ToszBatch(z), 0.2)
+  z = _Rotate(z, seed, b"Q")
+  z = z * _LambdaAlphaDiagonal(10.0, dim)
+  z = _Rotate(z, seed, b"R")
+  return (10 * (dim - np.sum(np.cos(2 * math.pi * z), axis=1)) +
+          np.sum(z * z, axis=1))
+
+
+@_Batched
+def BuecheRastrigin(x: np.ndarray, seed: int = 0) -> np.ndarray:
   """Implementation for BBOB BuecheRastrigin function."""
   del seed
-  dim = len(arr)
-  arr.shape = (dim, 1)
-  t = ArrayMap(arr, Tosz)
-  l = SIndex(dim, arr) * t.flat
+  dim = x.shape[1]
+  l = _SIndexBatch(x) * _ToszBatch(x)
 
-  term1 = 10 * (dim - np.sum(np.cos(2 * math.pi * l), axis=0))
-  term2 = np.sum(l * l, axis=0)
-  term3 = 100 * Fpen(arr)
-  return float(term1 + term2 + term3)
+  term1 = 10 * (dim - np.sum(np.cos(2 * math.pi * l), axis=1))
+  term2 = np.sum(l * l, axis=1)
+  term3 = 100 * _FpenBatch(x)
+  return term1 + term2 + term3
 
 
-def LinearSlope(arr: np.ndarray, seed: int = 0) -> float:
+@_Batched
+def LinearSlope(x: np.ndarray, seed: int = 0) -> np.ndarray:
   """Implementation for BBOB LinearSlope function."""
-  dim = len(arr)
-  arr.shape = (dim, 1)
+  dim = x.shape[1]
   r = _R(dim, seed, b"R")
-  z = np.matmul(r, arr)
-  result = 0.0
-  for i in range(dim):
-    s = 10**(i / float(dim - 1) if dim > 1 else 1)
-    z_opt = 5 * np.sum(np.abs(r[i, :]))
-    result += float(s * (z_opt - z[i]))
-  return result
+  z = x @ r.T
+  s = 10**(np.arange(dim) / float(dim - 1)) if dim > 1 else np.array([10.0])
+  z_opt = 5 * np.sum(np.abs(r), axis=1)
+  return (z_opt - z) @ s
 
 
-def AttractiveSector(arr: np.ndarray, seed: int = 0) -> float:
+@_Batched
+def AttractiveSector(x: np.ndarray, seed: int = 0) -> np.ndarray:
   """Implementation for BBOB Attractive Sector function."""
-  dim = len(arr)
-  arr.shape = (dim, 1)
-  x_opt = np.array([1 if i % 2 == 0 else -1 for i in range(dim)])
-  x_opt.shape = (dim, 1)
-  z_vec = np.matmul(_R(dim, seed, b"R"), arr - x_opt)
-  z_vec = np.matmul(LambdaAlpha(10.0, dim), z_vec)
-  z_vec = np.matmul(_R(dim, seed, b"Q"), z_vec)
-
-  result = 0.0
-  for i in range(dim):
-    z = z_vec[i, 0]
-    s = 100 if z * x_opt[i] > 0 else 1
-    result += (s * z)**2
+  dim = x.shape[1]
+  x_opt = np.where(np.arange(dim) % 2 == 0, 1.0, -1.0)
+  z = _Rotate(x - x_opt, seed, b"R")
+  z = z * _LambdaAlphaDiagonal(10.0, dim)
+  z = _Rotate(z, seed, b"Q")
 
-  return math.pow(Tosz(result), 0.9)
+  s = np.where(z * x_opt > 0, 100.0, 1.0)
+  return _ToszBatch(np.sum((s * z)**2, axis=1))**0.9
 
 
-def StepEllipsoidal(arr: np.ndarray, seed: int = 0) -> float:
+@_Batched
+def StepEllipsoidal(x: np.ndarray, seed: int = 0) -> np.ndarray:
   """Implementation for BBOB StepEllipsoidal function."""
-  dim = len(arr)
-  arr.shape = (dim, 1)
-  z_hat = np.matmul(_R(dim, seed, b"R"), arr)
-  z_hat = np.matmul(LambdaAlpha(10.0, dim), z_hat)
-  z_tilde = np.array([
-      math.floor(0.5 + z) if (z > 0.5) else (math.floor(0.5 + 10 * z) / 10)
-      for z in z_hat.flat
-  ])
-  z_tilde = np.matmul(_R(dim, seed, b"Q"), z_tilde)
-  s = 0.0
-  for i, val in enumerate(z_tilde):
-    exponent = 2.0 * float(i) / (dim - 1.0) if dim > 1.0 else 2.0
-    s += 10.0**exponent * val**2
-  value = max(abs(z_hat[0, 0]) / 1000, s)
-  return 0.1 * value + Fpen(arr)
-
-
-def RosenbrockRotated(arr: np.ndarray, seed: int = 0) -> float:
+  dim = x.shape[1]
+  z_hat = _Rotate(x, seed, b"R") * _LambdaAlphaDiagonal(10.0, dim)
+  z_tilde = np.where(z_hat > 0.5, np.floor(0.5 + z_hat),
+                     np.floor(0.5 + 10 * z_hat) / 10)
+  z_tilde = _Rotate(z_tilde, seed, b"Q")
+  if dim > 1:
+    exponents = 2.0 * np.arange(dim) / (dim - 1.0)
+  else:
+    exponents = np.array([2.0])
+  s = np.sum(10.0**exponents * z_tilde**2, axis=1)
+  value = np.maximum(np.abs(z_hat[:, 0]) / 1000, s)
+  return 0.1 * value + _FpenBatch(x)
+
+
+@_Batched
+def RosenbrockRotated(x: np.ndarray, seed: int = 0) -> np.ndarray:
   """Implementation for BBOB RosenbrockRotated function."""
-  dim = len(arr)
-  r_x = np.matmul(_R(dim, seed, b"R"), arr)
-  z = max(1.0, (dim**0.5) / 8.0) * r_x + 0.5 * np.ones((dim,))
-  return float(
-      sum([
-          100.0 * (z[i]**2 - z[i + 1])**2 + (z[i] - 1)**2
-          for i in range(dim - 1)
-      ]))
+  dim = x.shape[1]
+  z = max(1.0, (dim**0.5) / 8.0) * _Rotate(x, seed, b"R") + 0.5
+  return np.sum(
+      100.0 * (z[:, :-1]**2 - z[:, 1:])**2 + (z[:, :-1] - 1)**2, axis=1)
 
 
-def Ellipsoidal(arr: np.ndarray, seed: int = 0) -> float:
+@_Batched
+def Ellipsoidal(x: np.ndarray, seed: int = 0) -> np.ndarray:
   """Implementation for BBOB Ellipsoidal function."""
   del seed
-  dim = len(arr)
-  arr.shape = (dim, 1)
-  z_vec = ArrayMap(arr, Tosz)
-  s = 0.0
-  for i in range(dim):
-    exp = 6.0 * i / (dim - 1) if dim > 1 else 6.0
-    s += float(10**exp * z_vec[i] * z_vec[i])
-  return s
+  dim = x.shape[1]
+  z = _ToszBatch(x)
+  exponents = 6.0 * np.arange(dim) / (dim - 1) if dim > 1 else np.array([6.0])
+  return np.sum(10**exponents * z * z, axis=1)
 
 
-def Discus(arr: np.ndarray, seed: int = 0) -> float:
+@_Batched
+def Discus(x: np.ndarray, seed: int = 0) -> np.ndarray:
   """Implementation for BBOB Discus function."""
-  dim = len(arr)
-  arr.shape = (dim, 1)
-  r_x = np.matmul(_R(dim, seed, b"R"), arr)
-  z_vec = ArrayMap(r_x, Tosz)
-  return float(10**6 * z_vec[0] * z_vec[0]) + sum(
-      [z * z for z in z_vec[1:].flat])
+  z = _ToszBatch(_Rotate(x, seed, b"R"))
+  return 10**6 * z[:, 0]**2 + np.sum(z[:, 1:]**2, axis=1)
 
 
-def BentCigar(arr: np.ndarray, seed: int = 0) -> float:
+@_Batched
+def BentCigar(x: np.ndarray, seed: int = 0) -> np.ndarray:
   """Implementation for BBOB BentCigar function."""
-  dim = len(arr)
-  arr.shape = (dim, 1)
-  z_vec = np.matmul(_R(dim, seed, b"R"), arr)
-  z_vec = Tasy(z_vec, 0.5)
-  z_vec = np.matmul(_R(dim, seed, b"R"), z_vec)
-  return float(z_vec[0]**2) + 10**6 * np.sum(z_vec[1:]**2)
+  z = _TasyBatch(_Rotate(x, seed, b"R"), 0.5)
+  z = _Rotate(z, seed, b"R")
+  return z[:, 0]**2 + 10**6 * np.sum(z[:, 1:]**2, axis=1)
 
 
-def SharpRidge(arr: np.ndarray, seed: int = 0) -> float:
+@_Batched
+def SharpRidge(x: np.ndarray, seed: int = 0) -> np.ndarray:
   """Implementation for BBOB SharpRidge function."""
-  dim = len(arr)
-  arr.shape = (dim, 1)
-  z_vec = np.matmul(_R(dim, seed, b"R"), arr)
-  z_vec = np.matmul(LambdaAlpha(10, dim), z_vec)
-  z_vec = np.matmul(_R(dim, seed, b"Q"), z_vec)
-  return z_vec[0, 0]**2 + 100 * np.sum(z_vec[1:]**2)**0.5
+  dim = x.shape[1]
+  z = _Rotate(x, seed, b"R") * _LambdaAlphaDiagonal(10, dim)
+  z = _Rotate(z, seed, b"Q")
+  return z[:, 0]**2 + 100 * np.sum(z[:, 1:]**2, axis=1)**0.5
 
 
-def DifferentPowers(arr: np.ndarray, seed: int = 0) -> float:
+@_Batched
+def DifferentPowers(x: np.ndarray, seed: int = 0) -> np.ndarray:
   """Implementation for BBOB DifferentPowers function."""
-  dim = len(arr)
-  z = np.matmul(_R(dim, seed, b"R"), arr)
-  s = 0.0
-  for i in range(dim):
-    exp = 2 + 4 * i / (dim - 1) if dim > 1 else 6
-    s += abs(z[i])**exp
-  return s**0.5
+  dim = x.shape[1]
+  z = _Rotate(x, seed, b"R")
+  exponents = 2 + 4 * np.arange(dim) / (dim - 1) if dim > 1 else np.array([6])
+  return np.sum(np.abs(z)**exponents, axis=1)**0.5
 
 
-def Weierstrass(arr: np.ndarray, seed: int = 0) -> float:
+@_Batched
+def Weierstrass(x: np.ndarray, seed: int = 0) -> np.ndarray:
   """Implementation for BBOB Weierstrass function."""
   k_order = 12
-  dim = len(arr)
-  arr.shape = (dim, 1)
-  z = np.matmul(_R(dim, seed, b"R"), arr)
-  z = ArrayMap(z, Tosz)
-  z = np.matmul(_R(dim, seed, b"Q"), z)
-  z = np.matmul(LambdaAlpha(1.0 / 100.0, dim), z)
-  f0 = sum([0.5**k * math.cos(math.pi * 3**k) for k in range(k_order)])
-
-  s = 0.0
-  for i in range(dim):
-    for k in range(k_order):
-      s += 0.5**k * math.cos(2 * math.pi * (3**k) * (z[i] + 0.5))
+  dim = x.shape[1]
+  z = _ToszBatch(_Rotate(x, seed, b"R"))
+  z = _Rotate(z, seed, b"Q")
+  z = z * _LambdaAlphaDiagonal(1.0 / 100.0, dim)
+  k = np.arange(k_order)
+  f0 = np.sum(0.5**k * np.cos(math.pi * 3**k))
+
+  # Shape (n, dim, k_order).
+  terms = 0.5**k * np.cos(2 * math.pi * 3**k * (z[:, :, np.newaxis] + 0.5))
+  s = np.sum(terms, axis=(1, 2))
+  return 10 * (s / dim - f0)**3 + 10 * _FpenBatch(x) / dim
+
+
+def _SchaffersF7Batch(x: np.ndarray, seed: int, alpha: float) -> np.ndarray:
+  """Shared implementation of the SchaffersF7 functions."""
+  dim = x.shape[1]
+  if dim == 1:
+    return np.zeros(x.shape[0])
+  z = _TasyBatch(_Rotate(x, seed, b"R"), 0.5)
+  z = _Rotate(z, seed, b"Q")
+  z = z * _LambdaAlphaDiagonal(alpha, dim)
 
-  return float(10 * (s / dim - f0)**3) + 10 * Fpen(arr) / dim
+  s_arr = (z[:, :-1]**2 + z[:, 1:]**2)**0.5
+  s = np.sum(
+      s_arr**0.5 + (s_arr**0.5) * np.sin(50 * s_arr**0.2)**2, axis=1)
+  return (s / (dim - 1.0))**2 + 10 * _FpenBatch(x)
 
 
-def SchaffersF7(arr: np.ndarray, seed: int = 0) -> float:
+@_Batched
+def SchaffersF7(x: np.ndarray, seed: int = 0) -> np.ndarray:
   """Implementation for BBOB Weierstrass function."""
-  dim = len(arr)
-  arr.shape = (dim, 1)
-  if dim == 1:
-    return 0.0
-  z = np.matmul(_R(dim, seed, b"R"), arr)
-  z = Tasy(z, 0.5)
-  z = np.matmul(_R(dim, seed, b"Q"), z)
-  z = np.matmul(LambdaAlpha(10.0, dim), z)
-
-  s_arr = np.zeros(dim - 1)
-  for i in range(dim - 1):
-    s_arr[i] = float((z[i]**2 + z[i + 1]**2)**0.5)
-  s = 0.0
-  for i in range(dim - 1):
-    s += s_arr[i]**0.5 + (s_arr[i]**0.5) * math.sin(50 * s_arr[i]**0.2)**2
-
-  return (s / (dim - 1.0))**2 + 10 * Fpen(arr)
+  return _SchaffersF7Batch(x, seed, 10.0)
 
 
-def SchaffersF7IllConditioned(arr: np.ndarray, seed: int = 0) -> float:
+@_Batched
+def SchaffersF7IllConditioned(x: np.ndarray, seed: int = 0) -> np.ndarray:
   """Implementation for BBOB SchaffersF7 Ill Conditioned."""
-  dim = len(arr)
-  arr.shape = (dim, 1)
-  if dim == 1:
-    return 0.0
-  z = np.matmul(_R(dim, seed, b"R"), arr)
-  z = Tasy(z, 0.5)
-  z = np.matmul(_R(dim, seed, b"Q"), z)
-  z = np.matmul(LambdaAlpha(1000.0, dim), z)
-
-  s_arr = np.zeros(dim - 1)
-  for i in range(dim - 1):
-    s_arr[i] = float((z[i]**2 + z[i + 1]**2)**0.5)
-  s = 0.0
-  for i in range(dim - 1):
-    s += s_arr[i]**0.5 + (s_arr[i]**0.5) * math.sin(50 * s_arr[i]**0.2)**2
-
-  return (s / (dim - 1.0))**2 + 10 * Fpen(arr)
+  return _SchaffersF7Batch(x, seed, 1000.0)
 
 
-def GriewankRosenbrock(arr: np.ndarray, seed: int = 0) -> float:
+@_Batched
+def GriewankRosenbrock(x: np.ndarray, seed: int = 0) -> np.ndarray:
   """Implementation for BBOB GriewankRosenbrock function."""
-  dim = len(arr)
-  r_x = np.matmul(_R(dim, seed, b"R"), arr)
+  dim = x.shape[1]
+  r_x = _Rotate(x, seed, b"R")
   # Slightly off BBOB documentation in order to center optima at origin.
   # Should be: max(1.0, (dim**0.5) / 8.0) * r_x + 0.5 * np.ones((dim,)).
-  z_arr = max(1.0, (dim**0.5) / 8.0) * r_x + np.ones((dim,))
-  s_arr = np.zeros(dim)
-  for i in range(dim - 1):
-    s_arr[i] = 100.0 * (z_arr[i]**2 - z_arr[i + 1])**2 + (z_arr[i] - 1)**2
-
-  total = 0.0
-  for i in range(dim - 1):
-    total += (s_arr[i] / 4000.0 - math.cos(s_arr[i]))
-
+  z = max(1.0, (dim**0.5) / 8.0) * r_x + 1.0
+  s_arr = 100.0 * (z[:, :-1]**2 - z[:, 1:])**2 + (z[:, :-1] - 1)**2
+  total = np.sum(s_arr / 4000.0 - np.cos(s_arr), axis=1)
   return (10.0 * total) / (dim - 1) + 10
 
 
-def Schwefel(arr: np.ndarray, seed: int = 0) -> float:
+@_Batched
+def Schwefel(x: np.ndarray, seed: int = 0) -> np.ndarray:
   """Implementation for BBOB Schwefel function."""
   del seed
-  dim = len(arr)
-  bernoulli_arr = np.array([pow(-1, i + 1) for i in range(dim)])
+  dim = x.shape[1]
+  bernoulli_arr = np.where(np.arange(dim) % 2 == 0, -1.0, 1.0)
   x_opt = 4.2096874633 / 2.0 * bernoulli_arr
-  x_hat = 2.0 * (bernoulli_arr * arr)  # Element-wise multiplication
+  x_hat = 2.0 * (bernoulli_arr * x)  # Element-wise multiplication
 
-  z_hat = np.zeros([dim, 1])
-  z_hat[0, 0] = x_hat[0]
-  for i in range(1, dim):
-    z_hat[i, 0] = x_hat[i] + 0.25 * (x_hat[i - 1] - 2 * abs(x_opt[i - 1]))
+  z_hat = x_hat.copy()
+  z_hat[:, 1:] += 0.25 * (x_hat[:, :-1] - 2 * np.abs(x_opt[:-1]))
 
-  x_opt.shape = (dim, 1)
-  z_vec = 100 * (
-      np.matmul(LambdaAlpha(10, dim), z_hat - 2 * abs(x_opt)) + 2 * abs(x_opt))
+  z = 100 * ((z_hat - 2 * np.abs(x_opt)) * _LambdaAlphaDiagonal(10, dim) +
+             2 * np.abs(x_opt))
 
-  total = sum([z * math.sin(abs(z)**0.5) for z in z_vec.flat])
+  total = np.sum(z * np.sin(np.abs(z)**0.5), axis=1)
+  return (-(total / (100.0 * dim)) + 4.189828872724339 +
+          100 * _FpenBatch(z / 100))
 
-  return -(total / (100.0 * dim)) + 4.189828872724339 + 100 * Fpen(z_vec / 100)
 
-
-def Katsuura(arr: np.ndarray, seed: int = 0) -> float:
+@_Batched
+def Katsuura(x: np.ndarray, seed: int = 0) -> np.ndarray:
   """Implementation for BBOB Katsuura function."""
-  dim = len(arr)
-  arr.shape = (dim, 1)
-  r_x = np.matmul(_R(dim, seed, b"R"), arr)
-  z_vec = np.matmul(LambdaAlpha(100.0, dim), r_x)
-  z_vec = np.matmul(_R(dim, seed, b"Q"), z_vec)
-
-  prod = 1.0
-  for i in range(dim):
-    s = 0.0
-    for j in range(1, 33):
-      s += abs(2**j * z_vec[i, 0] - round(2**j * z_vec[i, 0])) / 2**j
-    prod *= (1 + (i + 1) * s)**(10.0 / dim**1.2)
+  dim = x.shape[1]
+  z = _Rotate(x, seed, b"R") * _LambdaAlphaDiagonal(100.0, dim)
+  z = _Rotate(z, seed, b"Q")
 
-  return (10.0 / dim**2) * prod - 10.0 / dim**2 + Fpen(arr)
+  # Shape (n, dim, 32).
+  scaled = 2.0**np.arange(1, 33) * z[:, :, np.newaxis]
+  s = np.sum(np.abs(scaled - np.round(scaled)) / 2.0**np.arange(1, 33), axis=2)
+  prod = np.prod((1 + np.arange(1, dim + 1) * s)**(10.0 / dim**1.2), axis=1)
+  return (10.0 / dim**2) * prod - 10.0 / dim**2 + _FpenBatch(x)
 
 
-def Lunacek(arr: np.ndarray, seed: int = 0) -> float:
+@_Batched
+def Lunacek(x: np.ndarray, seed: int = 0) -> np.ndarray:
   """Implementation for BBOB Lunacek function."""
-  dim = len(arr)
-  arr.shape = (dim, 1)
+  dim = x.shape[1]
   mu0 = 2.5
   s = 1.0 - 1.0 / (2.0 * (dim + 20.0)**0.5 - 8.2)
   mu1 = -((mu0**2 - 1) / s)**0.5
 
-  x_opt = np.array([mu0 / 2] * dim)
-  x_hat = np.array([2 * arr[i, 0] * np.sign(x_opt[i]) for i in range(dim)])
-  x_vec = x_hat - mu0
-  x_vec.shape = (dim, 1)
-  x_vec = np.matmul(_R(dim, seed, b"R"), x_vec)
-  z_vec = np.matmul(LambdaAlpha(100, dim), x_vec)
-  z_vec = np.matmul(_R(dim, seed, b"Q"), z_vec)
-
-  s1 = sum([(val - mu0)**2 for val in x_hat])
-  s2 = sum([(val - mu1)**2 for val in x_hat])
-  s3 = sum([math.cos(2 * math.pi * z) for z in z_vec.flat])
-  return min(s1, dim + s * s2) + 10.0 * (dim - s3) + 10**4 * Fpen(arr)
+  # x_opt = mu0 / 2 is positive, so sign(x_opt) = 1.
+  x_hat = 2 * x
+  z = _Rotate(x_hat - mu0, seed, b"R") * _LambdaAlphaDiagonal(100, dim)
+  z = _Rotate(z, seed, b"Q")
+
+  s1 = np.sum((x_hat - mu0)**2, axis=1)
+  s2 = np.sum((x_hat - mu1)**2, axis=1)
+  s3 = np.sum(np.cos(2 * math.pi * z), axis=1)
+  return (np.minimum(s1, dim + s * s2) + 10.0 * (dim - s3) +
+          10**4 * _FpenBatch(x))
+
+
+def _GallagherBatch(x: np.ndarray, seed: int, num_optima: int) -> np.ndarray:
+  """Shared implementation of the Gallagher functions."""
+  dim = x.shape[1]
+  i = np.arange(num_optima - 1)[:, np.newaxis]
+  alpha = (i * dim + np.arange(dim) + 1.0) / (dim * num_optima + 2.0)
+  optima = np.concatenate([np.zeros([1, dim]), -5 + 10 * alpha])
+
+  alphas = 1000.0**(2.0 * np.arange(num_optima - 1) / (num_optima - 2))
+  c_diagonals = [_LambdaAlphaDiagonal(1000, dim)] + [
+      _LambdaAlphaDiagonal(a, dim) / (a**0.25) for a in alphas
+  ]
+  weights = np.concatenate(
+      [[10.0], 1.1 + 8.0 * np.arange(num_optima - 1) / (num_optima - 2.0)])
+
+  # Rotations are linear, so R(x - y) = Rx - Ry.
+  rotated_x = _Rotate(x, seed, b"R")
+  rotated_optima = _Rotate(optima, seed, b"R")
+  max_value = np.full(x.shape[0], -1.0)
+  for optimum, c_diagonal, w in zip(rotated_optima, c_diagonals, weights):
+    diff = rotated_x - optimum
+    e = np.sum(diff * diff * c_diagonal, axis=1)
+    max_value = np.maximum(max_value, w * np.exp(-e / (2.0 * dim)))
+
+  return _ToszBatch(10.0 - max_value)**2 + _FpenBatch(x)
+
+
+@_Batched
+def Gallagher101Me(x: np.ndarray, seed: int = 0) -> np.ndarray:
+  """Implementation for BBOB Gallagher101 function."""
+  return _GallagherBatch(x, seed, 101)
 
 
-def Gallagher101Me(arr: np.ndarray, seed: int = 0) -> float:
-  """Implementation for BBOB Gallagher101 function."""
-  dim = len(arr)
-  arr.shape = (dim, 1)
-
-  num_optima = 101
-  optima_list = [np.zeros([dim, 1])]
-  for i in range(num_optima - 1):
-    vec = np.zeros([dim, 1])
-    for j in range(dim):
-      alpha = (i * dim + j + 1.0) / (dim * num_optima + 2.0)
-      assert alpha > 0
-      assert alpha < 1
-      vec[j, 0] = -5 + 10 * alpha
-    optima_list.append(vec)
-
-  c_list = [LambdaAlpha(1000, dim)]
-  for i in range(num_optima - 1):
-    alpha = 1000.0**(2.0 * (i) / (num_optima - 2))
-    c_mat = LambdaAlpha(alpha, dim) / (alpha**0.25)
-    c_list.append(c_mat)
-
-  rotation = _R(dim, seed, b"R")
-  max_value = -1.0
-  for i in range(num_optima):
-    w = 10 if i == 0 else (1.1 + 8.0 * (i - 1.0) / (num_optima - 2.0))
-    diff = np.matmul(rotation, arr - optima_list[i])
-    e = np.matmul(diff.transpose(), np.matmul(c_list[i], diff))
-    max_value = max(max_value, w * math.exp(-float(e) / (2.0 * dim)))
-
-  return Tosz(10.0 - max_value)**2 + Fpen(arr)
-
-
-def Gallagher21Me(arr: np.ndarray, seed: int = 0) -> float:
+@_Batched
+def Gallagher21Me(x: np.ndarray, seed: int = 0) -> np.ndarray:
   """Implementation for BBOB Gallagher21 function."""
-  dim = len(arr)
-  arr.shape = (dim, 1)
-
-  num_optima = 21
-  optima_list = [np.zeros([dim, 1])]
-  for i in range(num_optima - 1):
-    vec = np.zeros([dim, 1])
-    for j in range(dim):
-      alpha = (i * dim + j + 1.0) / (dim * num_optima + 2.0)
-      assert alpha > 0
-      assert alpha < 1
-      vec[j, 0] = -5 + 10 * alpha
-    optima_list.append(vec)
-
-  c_list = [LambdaAlpha(1000, dim)]
-  for i in range(num_optima - 1):
-    alpha = 1000.0**(2.0 * (i) / (num_optima - 2))
-    c_mat = LambdaAlpha(alpha, dim) / (alpha**0.25)
-    c_list.append(c_mat)
-
-  rotation = _R(dim, seed, b"R")
-  max_value = -1.0
-  for i in range(num_optima):
-    w = 10 if i == 0 else (1.1 + 8.0 * (i - 1.0) / (num_optima - 2.0))
-    diff = np.matmul(rotation, arr - optima_list[i])
-    e = np.matmul(diff.transpose(), np.matmul(c_list[i], diff))
-    max_value = max(max_value, w * math.exp(-float(e) / (2.0 * dim)))
-
-  return Tosz(10.0 - max_value)**2 + Fpen(arr)
+  return _GallagherBatch(x, seed, 21)
 
 
 ## Additional BBOB-like functions to test exploration.
 
 
-def NegativeSphere(arr: np.ndarray, seed: int = 0) -> float:
+@_Batched
+def NegativeSphere(x: np.ndarray, seed: int = 0) -> np.ndarray:
   """Implementation for BBOB Sphere function."""
-  dim = len(arr)
-  arr.shape = (dim, 1)
-  z = np.matmul(_R(dim, seed, b"R"), arr)
-  return float(100 + np.sum(z * z) - 2 * (z[0]**2))
+  z = _Rotate(x, seed, b"R")
+  return 100 + np.sum(z * z, axis=1) - 2 * (z[:, 0]**2)
 
 
-def NegativeMinDifference(arr: np.ndarray, seed: int = 0) -> float:
+@_Batched
+def NegativeMinDifference(x: np.ndarray, seed: int = 0) -> np.ndarray:
   """Implementation for NegativeMinDifference function."""
-  dim = len(arr)
-  arr.shape = (dim, 1)
-  z = np.matmul(_R(dim, seed, b"R"), arr)
-  min_difference = 10000
-  for i in range(len(z) - 1):
-    min_difference = min(min_difference, z[i + 1] - z[i])
-  return 10.0 - float(min_difference) + 1e-8 * float(sum(arr))
+  z = _Rotate(x, seed, b"R")
+  min_difference = np.min(
+      np.concatenate([np.full((x.shape[0], 1), 10000.0),
+                      np.diff(z, axis=1)], axis=1),
+      axis=1)
+  return 10.0 - min_difference + 1e-8 * np.sum(x, axis=1)
 
 
-def FonsecaFleming(arr: np.ndarray, seed: int = 0) -> float:
+@_Batched
+def FonsecaFleming(x: np.ndarray, seed: int = 0) -> np.ndarray:
   """Implementation for FonsecaFleming function."""
   del seed
-  return 1.0 - float(np.exp(-np.sum(arr * arr)))
+  return 1.0 - np.exp(-np.sum(x * x, axis=1))
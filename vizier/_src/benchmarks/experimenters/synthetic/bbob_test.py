@@ -0,0 +1,89 @@
+# Copyright 2022 Google LLC.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for bbob."""
+
+import numpy as np
+from vizier._src.benchmarks.experimenters.synthetic import bbob
+
+from absl.testing import absltest
+from absl.testing import parameterized
+
+# Values at [1.0, -2.0, 0.5] with seed=1.
+_EXPECTED_VALUES = (
+    ('AttractiveSector', 213.69027683578886),
+    ('BentCigar', 6405223.915037474),
+    ('BuecheRastrigin', 385.9150842029964),
+    ('DifferentPowers', 4.142522204626898),
+    ('Discus', 161067.13125335268),
+    ('Ellipsoidal', 257009.6620984271),
+    ('FonsecaFleming', 0.9947524816008186),
+    ('Gallagher101Me', 75.31643701878917),
+    ('Gallagher21Me', 74.29050663950568),
+    ('GriewankRosenbrock', 12.404395494955114),
+    ('Katsuura', 31.11087765371934),
+    ('LinearSlope', 93.26103287338205),
+    ('Lunacek', 74.86748960934084),
+    ('NegativeMinDifference', 10.422854749590993),
+    ('NegativeSphere', 104.94848216440867),
+    ('Rastrigin', 46.47862931491478),
+    ('RosenbrockRotated', 1673.4311116374256),
+    ('SchaffersF7', 8.058469420034196),
+    ('SchaffersF7IllConditioned', 16.015604942168128),
+    ('Schwefel', 25559.29946648061),
+    ('SharpRidge', 381.7265198743968),
+    ('Sphere', 5.25),
+    ('StepEllipsoidal', 16.10196908036465),
+    ('Weierstrass', 62.29622506207881),
+)
+
+
+class BBOBTest(parameterized.TestCase):
+
+  @parameterized.parameters(*_EXPECTED_VALUES)
+  def test_single_point(self, name, expected):
+    func = getattr(bbob, name)
+    value = func(np.array([1.0, -2.0, 0.5]), seed=1)
+    self.assertIsInstance(value, float)
+    self.assertAlmostEqual(value, expected, delta=1e-9 * abs(expected))
+
+  @parameterized.parameters(name for name, _ in _EXPECTED_VALUES)
+  def test_batch_matches_single_points(self, name):
+    func = getattr(bbob, name)
+    xs = np.random.default_rng(0).uniform(-6, 6, size=(50, 4))
+    values = func(xs, seed=2)
+    self.assertEqual(values.shape, (50,))
+    np.testing.assert_allclose(
+        values, [func(x, seed=2) for x in xs], rtol=1e-9, atol=1e-9)
+
+  def test_utilities(self):
+    x = np.array([1.5, -2.0, 0.0, 6.0])
+    np.testing.assert_allclose(
+        bbob.LambdaAlpha(100.0, 3), np.diag([1.0, 10**0.5, 10.0]))
+    np.testing.assert_allclose(bbob.ArrayMap(x, abs), np.abs(x))
+    self.assertEqual(bbob.Tosz(0.0), 0.0)
+    np.testing.assert_allclose([bbob.Tosz(v) for v in x], bbob._ToszBatch(x))
+    np.testing.assert_allclose(
+        bbob.Tasy(x, 0.5), bbob._TasyBatch(x, 0.5).reshape(-1, 1))
+    np.testing.assert_allclose(
+        bbob.SIndex(4, x), [10.0, 10**(1 / 6), 10**(1 / 3), 10**0.5])
+    self.assertEqual(bbob.Fpen(x), 1.0)
+
+  def test_invalid_shape(self):
+    with self.assertRaises(ValueError):
+      bbob.Sphere(np.zeros((2, 2, 2)))
+
+
+if __name__ == '__main__':
+  absltest.main()
@@ -0,0 +1,210 @@
+# Copyright 2022 Google LLC.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Discrete-event simulation of asynchronous parallel workers.
+
+Other subroutines treat evaluations as instantaneous and synchronous. The
+AsyncWorkerSimulator simulates `num_workers` workers that evaluate trials for
+a sampled duration and ask the algorithm for a new suggestion as soon as they
+are free. Completions are reported to the algorithm in order of simulated
+time, so designers see the same interleaving of suggestions and completions as
+in an asynchronous study.
+
+The wall time of every `suggest()` call is measured and, by default, added to
+the simulated time of the worker that waits for it, so slow designers are
+penalized like they would be in production.
+
+Ex: Convergence of a designer with 64 workers, against simulated time.
+
+  simulator = async_simulator.AsyncWorkerSimulator(
+      num_workers=64,
+      num_trials=1000,
+      duration_sampler=async_simulator.exponential_durations(60.0),
+      seed=1)
+  result = simulator.simulate(state)
+  curve = result.convergence_curve(
+      state.algorithm.supporter.GetTrials(), metric_information)
+"""
+
+import collections
+import heapq
+import itertools
+import time
+from typing import Callable, Collection, Deque, Dict, List, Optional
+
+import attr
+import numpy as np
+from vizier import algorithms as vza
+from vizier import pyvizier as vz
+from vizier._src.benchmarks.analyzers import convergence_curve as cc
+from vizier._src.benchmarks.runners import benchmark_runner
+
+# Samples the simulated number of seconds that the evaluation of a trial takes.
+DurationSampler = Callable[[np.random.Generator, vz.Trial], float]
+
+
+def constant_durations(seconds: float) -> DurationSampler:
+  return lambda rng, trial: seconds
+
+
+def exponential_durations(mean_seconds: float) -> DurationSampler:
+  return lambda rng, trial: rng.exponential(mean_seconds)
+
+
+def lognormal_durations(median_seconds: float, sigma: float) -> DurationSampler:
+  return lambda rng, trial: rng.lognormal(np.log(median_seconds), sigma)
+
+
+@attr.define(frozen=True)
+class AsyncSimulationResult:
+  """Timeline of a simulation.
+
+  Attributes:
+    num_workers: Number of simulated workers.
+    start_times: Simulated time at which the evaluation of each trial started,
+      keyed by trial id.
+    completion_times: Simulated time at which each trial completed, keyed by
+      trial id. Trials are completed in this order.
+    suggestion_latencies: Wall time of every `suggest()` call, in seconds.
+  """
+  num_workers: int
+  start_times: Dict[int, float]
+  completion_times: Dict[int, float]
+  suggestion_latencies: List[float]
+
+  @property
+  def makespan(self) -> float:
+    """Simulated time at which the last trial completed."""
+    return max(self.completion_times.values(), default=0.0)
+
+  @property
+  def suggestion_overhead(self) -> float:
+    """Fraction of worker time spent in `suggest()`.
+
+    Computed from the measured latencies, even if they are not included in the
+    simulated time.
+    """
+    evaluation_time = sum(self.completion_times[i] - self.start_times[i]
+                          for i in self.completion_times)
+    latency = sum(self.suggestion_latencies)
+    if latency + evaluation_time == 0.0:
+      return 0.0
+    return latency / (latency + evaluation_time)
+
+  def convergence_curve(self,
+                        trials: Collection[vz.Trial],
+                        metric_information: vz.MetricInformation,
+                        flip_signs: bool = False) -> cc.ConvergenceCurve:
+    """Returns the convergence curve against simulated wall time.
+
+    Args:
+      trials: Trials of the simulation, e.g. from the supporter of the state.
+        Trials that did not complete in the simulation are ignored.
+      metric_information:
+      flip_signs: See ConvergenceCurveConverter.
+
+    Returns:
+      ConvergenceCurve whose xs are the completion times.
+    """
+    trials = sorted((t for t in trials if t.id in self.completion_times),
+                    key=lambda t: self.completion_times[t.id])
+    # ConvergenceCurveConverter accumulates costs into xs.
+    increments = {}
+    previous = 0.0
+    for trial in trials:
+      increments[trial.id] = self.completion_times[trial.id] - previous
+      previous = self.completion_times[trial.id]
+    converter = cc.ConvergenceCurveConverter(
+        metric_information,
+        flip_signs=flip_signs,
+        cost_fn=lambda t: increments[t.id])
+    curve = converter.convert(trials)
+    curve.xlabel = 'simulated time'
+    return curve
+
+
+@attr.define
+class AsyncWorkerSimulator(benchmark_runner.BenchmarkSubroutine):
+  """Simulates asynchronous workers that evaluate one trial at a time."""
+
+  # Number of concurrent workers.
+  num_workers: int = attr.field(validator=attr.validators.gt(0))
+  # Number of trials to suggest and evaluate.
+  num_trials: int = attr.field(validator=attr.validators.gt(0))
+  # Samples the evaluation time of a suggested trial.
+  duration_sampler: DurationSampler = attr.field(
+      default=constant_durations(1.0), kw_only=True)
+  # If True, workers are busy while waiting for their suggestions.
+  include_suggestion_latency: bool = attr.field(default=True, kw_only=True)
+  # Seed of the duration sampler.
+  seed: Optional[int] = attr.field(default=None, kw_only=True)
+  # Result of the latest call to `run()`.
+  last_result: Optional[AsyncSimulationResult] = attr.field(
+      default=None, init=False)
+
+  def simulate(
+      self, state: benchmark_runner.BenchmarkState) -> AsyncSimulationResult:
+    """Runs the simulation on $state and returns its timeline."""
+    rng = np.random.default_rng(self.seed)
+    # Pending evaluations as (completion time, tie breaker, trial).
+    events = []
+    tie_breaker = itertools.count()
+    # Suggestions beyond the first one of a `suggest()` call, which are
+    # assigned to the next free workers.
+    backlog: Deque[vz.Trial] = collections.deque()
+    start_times: Dict[int, float] = {}
+    completion_times: Dict[int, float] = {}
+    latencies: List[float] = []
+    num_assigned = 0
+
+    def assign(now: float) -> None:
+      """Starts the evaluation of a new trial on a free worker at $now."""
+      nonlocal num_assigned
+      if num_assigned >= self.num_trials:
+        return
+      if not backlog:
+        start = time.perf_counter()
+        suggestions = state.algorithm.suggest(1)
+        latency = time.perf_counter() - start
+        latencies.append(latency)
+        if self.include_suggestion_latency:
+          now += latency
+        backlog.extend(suggestions)
+        if not backlog:
+          return
+      trial = backlog.popleft()
+      num_assigned += 1
+      start_times[trial.id] = now
+      heapq.heappush(
+          events,
+          (now + self.duration_sampler(rng, trial), next(tie_breaker), trial))
+
+    for _ in range(self.num_workers):
+      assign(0.0)
+    while events:
+      now, _, trial = heapq.heappop(events)
+      state.experimenter.evaluate([trial])
+      completion_times[trial.id] = now
+      if trial.status == vz.TrialStatus.COMPLETED:
+        state.algorithm.post_completion_callback(vza.CompletedTrials([trial]))
+      assign(now)
+
+    return AsyncSimulationResult(
+        num_workers=self.num_workers,
+        start_times=start_times,
+        completion_times=completion_times,
+        suggestion_latencies=latencies)
+
+  def run(self, state: benchmark_runner.BenchmarkState) -> None:
+    self.last_result = self.simulate(state)
@@ -0,0 +1,95 @@
+# Copyright 2022 Google LLC.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for async_simulator."""
+
+import numpy as np
+from vizier import pyvizier as vz
+from vizier._src.algorithms.designers import random
+from vizier._src.benchmarks.experimenters import experimenter_factory
+from vizier._src.benchmarks.runners import async_simulator
+from vizier._src.benchmarks.runners import benchmark_runner
+
+from absl.testing import absltest
+
+
+def _create_state(seed: int = 1) -> benchmark_runner.BenchmarkState:
+  experimenter = experimenter_factory.BBOBExperimenterFactory('Sphere', 3)()
+
+  def _designer_factory(problem: vz.ProblemStatement, seed: int):
+    return random.RandomDesigner(problem.search_space, seed=seed)
+
+  return benchmark_runner.DesignerBenchmarkStateFactory(
+      designer_factory=_designer_factory, experimenter=experimenter)(seed=seed)
+
+
+class AsyncWorkerSimulatorTest(absltest.TestCase):
+
+  def test_constant_durations(self):
+    state = _create_state()
+    simulator = async_simulator.AsyncWorkerSimulator(
+        num_workers=4,
+        num_trials=20,
+        duration_sampler=async_simulator.constant_durations(1.0),
+        include_suggestion_latency=False)
+    result = simulator.simulate(state)
+
+    self.assertLen(result.completion_times, 20)
+    self.assertEqual(result.makespan, 5.0)
+    self.assertLen(result.suggestion_latencies, 20)
+    self.assertLess(result.suggestion_overhead, 0.1)
+    self.assertLen(
+        state.algorithm.supporter.GetTrials(
+            status_matches=vz.TrialStatus.COMPLETED), 20)
+
+  def test_convergence_against_simulated_time(self):
+    state = _create_state()
+    simulator = async_simulator.AsyncWorkerSimulator(
+        num_workers=8,
+        num_trials=30,
+        duration_sampler=async_simulator.exponential_durations(10.0),
+        seed=2)
+    runner = benchmark_runner.BenchmarkRunner(
+        benchmark_subroutines=[simulator])
+    runner.run(state)
+    result = simulator.last_result
+
+    trials = state.algorithm.supporter.GetTrials()
+    for trial in trials:
+      self.assertGreater(result.completion_times[trial.id],
+                         result.start_times[trial.id])
+    self.assertGreater(result.suggestion_overhead, 0.0)
+    self.assertLess(result.suggestion_overhead, 1.0)
+
+    metric = state.experimenter.problem_statement().metric_information.item()
+    curve = result.convergence_curve(trials, metric)
+    np.testing.assert_allclose(
+        curve.xs, sorted(result.completion_times.values()))
+    self.assertTrue(np.all(np.diff(curve.ys[0]) <= 0))
+
+  def test_same_seed_same_timeline(self):
+    timelines = []
+    for _ in range(2):
+      simulator = async_simulator.AsyncWorkerSimulator(
+          num_workers=3,
+          num_trials=10,
+          duration_sampler=async_simulator.lognormal_durations(5.0, 1.0),
+          include_suggestion_latency=False,
+          seed=3)
+      timelines.append(simulator.simulate(_create_state()).completion_times)
+    self.assertEqual(timelines[0], timelines[1])
+
+
+if __name__ == '__main__':
+  absltest.main()
@@ -81,6 +81,8 @@ class BenchmarkState:
 
   experimenter: Experimenter
   algorithm: AlgorithmSuggester
+  # Set by subroutines to stop the run early, e.g. ConvergenceTracker.
+  terminated: bool = attr.field(default=False, kw_only=True)
 
 
 @attr.define(frozen=True)
@@ -213,4 +215,6 @@ class BenchmarkRunner(BenchmarkSubroutine):
     """Run algorithm with benchmark subroutines with repetitions."""
     for _ in range(self.num_repeats):
       for subroutine in self.benchmark_subroutines:
+        if state.terminated:
+          return
         subroutine.run(state)
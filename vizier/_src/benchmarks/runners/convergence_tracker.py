@@ -0,0 +1,264 @@
+# Copyright 2022 Google LLC.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Streaming convergence statistics for benchmark runs.
+
+ConvergenceTracker is a BenchmarkSubroutine that updates the best-so-far value,
+the simple regret and the log-efficiency against a baseline as soon as trials
+are completed, instead of computing convergence curves from the full trial
+list after the run. It can also terminate runs that are statistically worse
+than the baseline.
+
+Ex: Stop runs that are worse than a baseline with 99% confidence.
+
+  baseline = ConvergenceCurve.align_xs([
+      ConvergenceCurveConverter(metric).convert(trials)
+      for trials in baseline_runs
+  ])
+  tracker = convergence_tracker.ConvergenceTracker(
+      baseline=baseline, significance=0.01)
+  runner = benchmark_runner.BenchmarkRunner(
+      benchmark_subroutines=[benchmark_runner.GenerateAndEvaluate(), tracker],
+      num_repeats=100)
+  runner.run(state)
+  state.terminated  # True if the run was stopped early.
+"""
+
+from typing import Dict, Optional, Set
+
+from absl import logging
+import attr
+import numpy as np
+from vizier import pyvizier as vz
+from vizier._src.benchmarks.analyzers import convergence_curve as cc
+from vizier._src.benchmarks.analyzers import simple_regret_score
+from vizier._src.benchmarks.runners import benchmark_runner
+
+
+@attr.define
+class RunningConvergence:
+  """Convergence statistics of a single metric, updated one trial at a time.
+
+  Attributes:
+    metric_information: Tracked metric.
+    optimal_value: Optimal value of the metric, if known.
+    num_trials: Number of completed trials seen so far, including the ones
+      without a value for the metric.
+    best_value: Best value of the metric so far. NaN until the first value.
+  """
+  metric_information: vz.MetricInformation = attr.field()
+  optimal_value: Optional[float] = attr.field(default=None)
+  num_trials: int = attr.field(default=0, init=False)
+  best_value: float = attr.field(default=np.nan, init=False)
+
+  @property
+  def _is_maximize(self) -> bool:
+    return self.metric_information.goal == vz.ObjectiveMetricGoal.MAXIMIZE
+
+  def update(self, trial: vz.Trial) -> None:
+    """Updates the statistics with a completed trial."""
+    self.num_trials += 1
+    measurement = trial.final_measurement
+    if measurement is None or trial.infeasible:
+      return
+    metric = measurement.metrics.get(self.metric_information.name)
+    if metric is None:
+      return
+    comparator = np.fmax if self._is_maximize else np.fmin
+    self.best_value = float(comparator(self.best_value, metric.value))
+
+  @property
+  def simple_regret(self) -> float:
+    """Distance between the best value so far and the optimal value.
+
+    NaN if the optimal value is unknown or no value has been seen yet.
+    """
+    if self.optimal_value is None:
+      return np.nan
+    if self._is_maximize:
+      return self.optimal_value - self.best_value
+    return self.best_value - self.optimal_value
+
+
+def _baseline_values(baseline: cc.ConvergenceCurve,
+                     goal: vz.ObjectiveMetricGoal) -> np.ndarray:
+  """Returns the ys of $baseline in the units of a metric with $goal."""
+  if baseline.trend not in (cc.ConvergenceCurve.YTrend.INCREASING,
+                            cc.ConvergenceCurve.YTrend.DECREASING):
+    raise ValueError(f'Baseline trend {baseline.trend} must be either '
+                     'increasing or decreasing.')
+  increasing = baseline.trend == cc.ConvergenceCurve.YTrend.INCREASING
+  # Undo flip_signs of ConvergenceCurveConverter.
+  if increasing != (goal == vz.ObjectiveMetricGoal.MAXIMIZE):
+    return -np.asarray(baseline.ys, dtype=float)
+  return np.asarray(baseline.ys, dtype=float)
+
+
+@attr.define
+class ConvergenceTracker(benchmark_runner.BenchmarkSubroutine):
+  """Tracks convergence of the objective metrics while a benchmark runs.
+
+  Add the tracker after the subroutines that complete trials, e.g.
+  GenerateAndEvaluate or EvaluateActiveTrials. Every call consumes the trials
+  completed since the previous call, so memory is constant per metric.
+
+  If a baseline is given, the tracker compares the best value of the run after
+  `num_trials` trials to the best values of the baseline runs after the same
+  number of trials, using a one-sample t-test. The run is terminated once it is
+  worse than the baseline with p-value below `significance` (or better, if
+  `terminate_if_better` is set).
+
+  A tracker holds the statistics of the run it was last applied to; applying it
+  to a new BenchmarkState resets them. Do not share a tracker between runs that
+  execute concurrently in the same process.
+  """
+
+  # Batch of baseline convergence curves of the `baseline_metric`, whose xs are
+  # numbers of trials. Signs may be flipped, as determined by the trend.
+  baseline: Optional[cc.ConvergenceCurve] = attr.field(default=None)
+  # Metric compared against the baseline. Defaults to the single objective.
+  baseline_metric: Optional[str] = attr.field(default=None, kw_only=True)
+  # Optimal values of the metrics, used for simple regret.
+  optimal_values: Dict[str, float] = attr.field(factory=dict, kw_only=True)
+  # p-value threshold of the t-test.
+  significance: float = attr.field(default=0.01, kw_only=True)
+  # Number of trials to complete before testing against the baseline.
+  min_trials: int = attr.field(default=10, kw_only=True)
+  # If True, also terminates runs that are better than the baseline.
+  terminate_if_better: bool = attr.field(default=False, kw_only=True)
+
+  _state: Optional[benchmark_runner.BenchmarkState] = attr.field(
+      default=None, init=False)
+  _statistics: Dict[str, RunningConvergence] = attr.field(
+      factory=dict, init=False)
+  # Smallest trial id that has not been consumed, and the ids above it that
+  # have been consumed. Trials usually complete in order, so the set is small.
+  _next_trial_id: int = attr.field(default=1, init=False)
+  _consumed_trial_ids: Set[int] = attr.field(factory=set, init=False)
+  _p_value: float = attr.field(default=np.nan, init=False)
+
+  def _reset(self, state: benchmark_runner.BenchmarkState) -> None:
+    self._state = state
+    problem = state.experimenter.problem_statement()
+    self._statistics = {
+        m.name: RunningConvergence(m, self.optimal_values.get(m.name))
+        for m in problem.metric_information.of_type(vz.MetricType.OBJECTIVE)
+    }
+    self._next_trial_id = 1
+    self._consumed_trial_ids = set()
+    self._p_value = np.nan
+
+  @property
+  def statistics(self) -> Dict[str, RunningConvergence]:
+    """Statistics of the tracked run, keyed by metric name."""
+    return self._statistics
+
+  @property
+  def p_value(self) -> float:
+    """p-value of the latest test against the baseline."""
+    return self._p_value
+
+  def _baseline_statistics(self) -> RunningConvergence:
+    if self.baseline_metric is None:
+      if len(self._statistics) != 1:
+        raise ValueError('baseline_metric must be set for problems with '
+                         f'{len(self._statistics)} objectives.')
+      return next(iter(self._statistics.values()))
+    return self._statistics[self.baseline_metric]
+
+  def _baseline_column(self, num_trials: int,
+                       goal: vz.ObjectiveMetricGoal) -> np.ndarray:
+    """Best values of the baseline runs after $num_trials trials."""
+    xs = np.asarray(self.baseline.xs)
+    index = max(np.searchsorted(xs, num_trials, side='right') - 1, 0)
+    column = _baseline_values(self.baseline, goal)[:, index]
+    return column[~np.isnan(column)]
+
+  def log_efficiency(self) -> float:
+    """Log sample efficiency of the run relative to the baseline median.
+
+    log(1 + number of trials the baseline median needs to reach the best value
+    of the run) - log(1 + number of trials of the run). Positive values mean
+    that the run is ahead of the baseline, +inf that the baseline never reaches
+    the run. NaN without baseline or values.
+    """
+    if self.baseline is None:
+      return np.nan
+    stats = self._baseline_statistics()
+    if np.isnan(stats.best_value):
+      return np.nan
+    values = _baseline_values(self.baseline, stats.metric_information.goal)
+    median = np.nanmedian(values, axis=0)
+    if stats.metric_information.goal == vz.ObjectiveMetricGoal.MINIMIZE:
+      median, best = -median, -stats.best_value
+    else:
+      best = stats.best_value
+    # The median of cumulative bests is non-decreasing.
+    index = np.searchsorted(np.nan_to_num(median, nan=-np.inf), best)
+    if index >= len(median):
+      return np.inf
+    baseline_trials = self.baseline.xs[index]
+    return float(np.log1p(baseline_trials) - np.log1p(stats.num_trials))
+
+  def _test_against_baseline(self) -> bool:
+    """Returns True if the run is decided against the baseline."""
+    stats = self._baseline_statistics()
+    if stats.num_trials < self.min_trials or np.isnan(stats.best_value):
+      return False
+    goal = stats.metric_information.goal
+    baseline = self._baseline_column(stats.num_trials, goal)
+    if len(baseline) < 2:
+      return False
+    # t_test_mean_score is low if the run is better than the baseline. Testing
+    # the opposite goal gives a low score if the run is worse.
+    opposite = (
+        vz.ObjectiveMetricGoal.MINIMIZE
+        if goal == vz.ObjectiveMetricGoal.MAXIMIZE else
+        vz.ObjectiveMetricGoal.MAXIMIZE)
+    with np.errstate(all='ignore'):
+      worse = simple_regret_score.t_test_mean_score(baseline,
+                                                    [stats.best_value],
+                                                    opposite)
+      better = simple_regret_score.t_test_mean_score(baseline,
+                                                     [stats.best_value], goal)
+    self._p_value = float(worse)
+    if worse < self.significance:
+      logging.info('Run is worse than the baseline after %d trials '
+                   '(p-value=%s).', stats.num_trials, worse)
+      return True
+    if self.terminate_if_better and better < self.significance:
+      self._p_value = float(better)
+      logging.info('Run is better than the baseline after %d trials '
+                   '(p-value=%s).', stats.num_trials, better)
+      return True
+    return False
+
+  def run(self, state: benchmark_runner.BenchmarkState) -> None:
+    if state is not self._state:
+      self._reset(state)
+    trials = state.algorithm.supporter.GetTrials(
+        min_trial_id=self._next_trial_id,
+        status_matches=vz.TrialStatus.COMPLETED)
+    for trial in trials:
+      if trial.id in self._consumed_trial_ids:
+        continue
+      for stats in self._statistics.values():
+        stats.update(trial)
+      self._consumed_trial_ids.add(trial.id)
+    while self._next_trial_id in self._consumed_trial_ids:
+      self._consumed_trial_ids.remove(self._next_trial_id)
+      self._next_trial_id += 1
+
+    if self.baseline is not None and self._test_against_baseline():
+      state.terminated = True
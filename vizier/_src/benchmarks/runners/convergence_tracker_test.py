@@ -0,0 +1,120 @@
+# Copyright 2022 Google LLC.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for convergence_tracker."""
+
+import numpy as np
+from vizier import pyvizier as vz
+from vizier._src.algorithms.designers import random
+from vizier._src.benchmarks.analyzers import convergence_curve as cc
+from vizier._src.benchmarks.experimenters import experimenter_factory
+from vizier._src.benchmarks.runners import benchmark_runner
+from vizier._src.benchmarks.runners import convergence_tracker
+
+from absl.testing import absltest
+
+
+def _state_factory() -> benchmark_runner.BenchmarkStateFactory:
+  experimenter = experimenter_factory.BBOBExperimenterFactory('Sphere', 4)()
+
+  def _designer_factory(problem: vz.ProblemStatement, seed: int):
+    return random.RandomDesigner(problem.search_space, seed=seed)
+
+  return benchmark_runner.DesignerBenchmarkStateFactory(
+      designer_factory=_designer_factory, experimenter=experimenter)
+
+
+def _objective_values(state: benchmark_runner.BenchmarkState) -> np.ndarray:
+  return np.array([
+      t.final_measurement.metrics['bbob_eval'].value
+      for t in state.algorithm.supporter.GetTrials(
+          status_matches=vz.TrialStatus.COMPLETED)
+  ])
+
+
+class ConvergenceTrackerTest(absltest.TestCase):
+
+  def test_tracks_best_value(self):
+    tracker = convergence_tracker.ConvergenceTracker(
+        optimal_values={'bbob_eval': 0.0})
+    runner = benchmark_runner.BenchmarkRunner(
+        benchmark_subroutines=[
+            benchmark_runner.GenerateSuggestions(3),
+            benchmark_runner.EvaluateActiveTrials(2), tracker
+        ],
+        num_repeats=10)
+    state = _state_factory()(seed=1)
+    runner.run(state)
+
+    stats = tracker.statistics['bbob_eval']
+    values = _objective_values(state)
+    self.assertEqual(stats.num_trials, len(values))
+    self.assertEqual(stats.best_value, np.min(values))
+    self.assertEqual(stats.simple_regret, np.min(values))
+    self.assertTrue(np.isnan(tracker.log_efficiency()))
+    self.assertFalse(state.terminated)
+
+  def test_resets_on_new_state(self):
+    tracker = convergence_tracker.ConvergenceTracker()
+    runner = benchmark_runner.BenchmarkRunner(
+        benchmark_subroutines=[benchmark_runner.GenerateAndEvaluate(), tracker],
+        num_repeats=5)
+    runner.run(_state_factory()(seed=1))
+    state = _state_factory()(seed=2)
+    runner.run(state)
+    stats = tracker.statistics['bbob_eval']
+    self.assertEqual(stats.num_trials, 5)
+    self.assertEqual(stats.best_value, np.min(_objective_values(state)))
+
+  def test_terminates_against_better_baseline(self):
+    rng = np.random.default_rng(0)
+    baseline = cc.ConvergenceCurve(
+        xs=np.arange(1, 101),
+        ys=np.abs(rng.normal(scale=1e-3, size=(5, 100))),
+        trend=cc.ConvergenceCurve.YTrend.DECREASING)
+    tracker = convergence_tracker.ConvergenceTracker(
+        baseline=baseline, min_trials=5)
+    runner = benchmark_runner.BenchmarkRunner(
+        benchmark_subroutines=[benchmark_runner.GenerateAndEvaluate(), tracker],
+        num_repeats=100)
+    state = _state_factory()(seed=1)
+    runner.run(state)
+
+    self.assertTrue(state.terminated)
+    self.assertLen(state.algorithm.supporter.GetTrials(), 5)
+    self.assertLess(tracker.p_value, 0.01)
+    self.assertLess(tracker.log_efficiency(), 0.0)
+
+  def test_continues_against_worse_baseline(self):
+    rng = np.random.default_rng(0)
+    # Flipped signs, as produced by ConvergenceCurveConverter(flip_signs=True).
+    baseline = cc.ConvergenceCurve(
+        xs=np.arange(1, 21),
+        ys=-1e6 - rng.uniform(size=(5, 20)),
+        trend=cc.ConvergenceCurve.YTrend.INCREASING)
+    tracker = convergence_tracker.ConvergenceTracker(
+        baseline=baseline, min_trials=5)
+    runner = benchmark_runner.BenchmarkRunner(
+        benchmark_subroutines=[benchmark_runner.GenerateAndEvaluate(), tracker],
+        num_repeats=20)
+    state = _state_factory()(seed=1)
+    runner.run(state)
+
+    self.assertFalse(state.terminated)
+    self.assertLen(state.algorithm.supporter.GetTrials(), 20)
+    self.assertEqual(tracker.log_efficiency(), np.inf)
+
+
+if __name__ == '__main__':
+  absltest.main()
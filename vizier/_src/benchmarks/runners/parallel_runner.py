@@ -0,0 +1,202 @@
+# Copyright 2022 Google LLC.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Runs a grid of benchmarks (state factory x seed) in parallel.
+
+Ex: Compare two algorithms over 20 seeds using all cores.
+
+  runner = parallel_runner.ParallelBenchmarkRunner(
+      benchmark_runner.BenchmarkRunner(
+          benchmark_subroutines=[benchmark_runner.GenerateAndEvaluate()],
+          num_repeats=100))
+  tasks = parallel_runner.make_tasks(
+      {'random': random_state_factory, 'eagle': eagle_state_factory},
+      seeds=range(20))
+  curves = runner.run_convergence_curves(tasks)  # One curve per algorithm.
+
+Worker processes are forked where the platform supports it, so that they
+inherit the runner and the tasks without pickling them. Otherwise, the runner
+and the state factories must be picklable. Only the resulting trials are sent
+back to the parent process.
+"""
+
+from concurrent import futures
+import multiprocessing
+import random
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+import attr
+import numpy as np
+from vizier import pyvizier as vz
+from vizier._src.benchmarks.analyzers import convergence_curve as cc
+from vizier._src.benchmarks.runners import benchmark_runner
+
+
+@attr.define(frozen=True)
+class BenchmarkTask:
+  """A single benchmark run.
+
+  Attributes:
+    name: Identifies the group of runs that `state_factory` belongs to. Runs
+      with the same name are aggregated into the same ConvergenceCurve.
+    state_factory: Creates the BenchmarkState of the run.
+    seed: Seed passed to `state_factory` and used to seed the global random
+      number generators of the worker.
+  """
+  name: str
+  state_factory: benchmark_runner.BenchmarkStateFactory
+  seed: int
+
+
+@attr.define(frozen=True)
+class BenchmarkTaskResult:
+  """Trials produced by a single benchmark run."""
+  name: str
+  seed: int
+  trials: List[vz.Trial]
+
+
+def make_tasks(state_factories: Mapping[str,
+                                        benchmark_runner.BenchmarkStateFactory],
+               seeds: Iterable[int]) -> List[BenchmarkTask]:
+  """Returns the grid of tasks over all state factories and seeds."""
+  seeds = list(seeds)
+  return [
+      BenchmarkTask(name, factory, seed)
+      for name, factory in state_factories.items()
+      for seed in seeds
+  ]
+
+
+# Runner and tasks of the worker process, set by `_init_worker`.
+_worker_args: Optional[Tuple[benchmark_runner.BenchmarkRunner,
+                             Sequence[BenchmarkTask]]] = None
+
+
+def _init_worker(runner: benchmark_runner.BenchmarkRunner,
+                 tasks: Sequence[BenchmarkTask]) -> None:
+  global _worker_args
+  _worker_args = (runner, tasks)
+
+
+def _run_worker_task(index: int) -> BenchmarkTaskResult:
+  runner, tasks = _worker_args
+  return _run_task(runner, tasks[index])
+
+
+def _run_task(runner: benchmark_runner.BenchmarkRunner,
+              task: BenchmarkTask) -> BenchmarkTaskResult:
+  """Runs $task. Executed inside the workers."""
+  # Seed the global generators too, for algorithms that do not take a seed.
+  random.seed(task.seed)
+  np.random.seed(task.seed)
+  state = task.state_factory(seed=task.seed)
+  runner.run(state)
+  return BenchmarkTaskResult(
+      name=task.name,
+      seed=task.seed,
+      trials=list(state.algorithm.supporter.GetTrials()))
+
+
+def _default_converter(
+    task: BenchmarkTask) -> cc.ConvergenceCurveConverter:
+  problem = task.state_factory.experimenter.problem_statement()
+  metric = problem.metric_information.item()
+  return cc.ConvergenceCurveConverter(
+      metric, flip_signs=metric.goal == vz.ObjectiveMetricGoal.MINIMIZE)
+
+
+@attr.define
+class ParallelBenchmarkRunner:
+  """Runs BenchmarkTasks in a process pool.
+
+  Each task is run independently with `runner`, so results only depend on the
+  task and not on the scheduling or the number of workers.
+  """
+
+  # Protocol applied to the state of every task.
+  runner: benchmark_runner.BenchmarkRunner = attr.field()
+  # Number of workers. Defaults to the number of processors.
+  max_workers: Optional[int] = attr.field(default=None, kw_only=True)
+  # If False, uses threads instead of processes. Useful for debugging and for
+  # factories that cannot be pickled.
+  use_processes: bool = attr.field(default=True, kw_only=True)
+
+  def _submit_all(self, executor: futures.Executor,
+                  tasks: Sequence[BenchmarkTask]) -> List[futures.Future]:
+    if self.use_processes:
+      return [executor.submit(_run_worker_task, i) for i in range(len(tasks))]
+    return [executor.submit(_run_task, self.runner, t) for t in tasks]
+
+  def _executor(self, tasks: Sequence[BenchmarkTask]) -> futures.Executor:
+    if not self.use_processes:
+      return futures.ThreadPoolExecutor(max_workers=self.max_workers)
+    mp_context = None
+    if 'fork' in multiprocessing.get_all_start_methods():
+      mp_context = multiprocessing.get_context('fork')
+    return futures.ProcessPoolExecutor(
+        max_workers=self.max_workers,
+        mp_context=mp_context,
+        initializer=_init_worker,
+        initargs=(self.runner, tasks))
+
+  def run_iter(self,
+               tasks: Iterable[BenchmarkTask]) -> Iterator[BenchmarkTaskResult]:
+    """Runs $tasks and yields their results in order of completion."""
+    tasks = list(tasks)
+    with self._executor(tasks) as executor:
+      pending = self._submit_all(executor, tasks)
+      try:
+        for future in futures.as_completed(pending):
+          yield future.result()
+      finally:
+        for future in pending:
+          future.cancel()
+
+  def run(self, tasks: Iterable[BenchmarkTask]) -> List[BenchmarkTaskResult]:
+    """Runs $tasks and returns their results sorted by (name, seed)."""
+    return sorted(self.run_iter(tasks), key=lambda r: (r.name, r.seed))
+
+  def run_convergence_curves(
+      self,
+      tasks: Iterable[BenchmarkTask],
+      converter_factory: Callable[[BenchmarkTask], cc.ConvergenceCurveConverter]
+      = _default_converter,
+  ) -> Dict[str, cc.ConvergenceCurve]:
+    """Runs $tasks and aggregates them into one ConvergenceCurve per name.
+
+    Each run is converted as soon as it completes, so only its curve is kept
+    in memory.
+
+    Args:
+      tasks:
+      converter_factory: Returns the converter for the trials of a task.
+        Defaults to the single objective metric, with the signs of minimized
+        metrics flipped so that all curves are increasing.
+
+    Returns:
+      Map from task name to a ConvergenceCurve whose batch contains one row per
+      seed, in increasing order of seeds.
+    """
+    tasks = list(tasks)
+    converters = {(t.name, t.seed): converter_factory(t) for t in tasks}
+    curves: Dict[str, Dict[int, cc.ConvergenceCurve]] = {}
+    for result in self.run_iter(tasks):
+      curves.setdefault(result.name, {})[result.seed] = converters[(
+          result.name, result.seed)].convert(result.trials)
+    return {
+        name: cc.ConvergenceCurve.align_xs(
+            [seed_to_curve[seed] for seed in sorted(seed_to_curve)])
+        for name, seed_to_curve in curves.items()
+    }
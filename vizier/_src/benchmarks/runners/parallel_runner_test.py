@@ -0,0 +1,115 @@
+# Copyright 2022 Google LLC.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for parallel_runner."""
+
+import numpy as np
+from vizier import pyvizier as vz
+from vizier._src.algorithms.designers import random
+from vizier._src.benchmarks.experimenters import experimenter_factory
+from vizier._src.benchmarks.experimenters import numpy_experimenter
+from vizier._src.benchmarks.runners import benchmark_runner
+from vizier._src.benchmarks.runners import parallel_runner
+
+from absl.testing import absltest
+from absl.testing import parameterized
+
+
+def _designer_factory(problem: vz.ProblemStatement, seed: int):
+  return random.RandomDesigner(problem.search_space, seed=seed)
+
+
+def _negative_sphere(x: np.ndarray) -> float:
+  return -float(np.sum(np.square(x)))
+
+
+def _maximization_experimenter() -> numpy_experimenter.NumpyExperimenter:
+  problem = vz.ProblemStatement(metric_information=[
+      vz.MetricInformation(name='value', goal=vz.ObjectiveMetricGoal.MAXIMIZE)
+  ])
+  for i in range(3):
+    problem.search_space.root.add_float_param(f'x{i}', -5.0, 5.0)
+  return numpy_experimenter.NumpyExperimenter(_negative_sphere, problem)
+
+
+def _make_tasks():
+  factories = {
+      name: benchmark_runner.DesignerBenchmarkStateFactory(
+          designer_factory=_designer_factory,
+          experimenter=experimenter_factory.BBOBExperimenterFactory(name, 3)())
+      for name in ('Sphere', 'Rastrigin')
+  }
+  return parallel_runner.make_tasks(factories, seeds=range(3))
+
+
+class ParallelBenchmarkRunnerTest(parameterized.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.runner = benchmark_runner.BenchmarkRunner(
+        benchmark_subroutines=[benchmark_runner.GenerateAndEvaluate(2)],
+        num_repeats=5)
+
+  @parameterized.parameters(True, False)
+  def test_run(self, use_processes):
+    results = parallel_runner.ParallelBenchmarkRunner(
+        self.runner, max_workers=2, use_processes=use_processes).run(
+            _make_tasks())
+    self.assertEqual([(r.name, r.seed) for r in results],
+                     [(name, seed) for name in ('Rastrigin', 'Sphere')
+                      for seed in range(3)])
+    for result in results:
+      self.assertLen(result.trials, 10)
+      for trial in result.trials:
+        self.assertEqual(trial.status, vz.TrialStatus.COMPLETED)
+
+  def test_results_match_serial_runs(self):
+    task = _make_tasks()[1]
+    result, = parallel_runner.ParallelBenchmarkRunner(self.runner).run([task])
+
+    state = task.state_factory(seed=task.seed)
+    self.runner.run(state)
+    self.assertEqual(
+        [t.parameters for t in result.trials],
+        [t.parameters for t in state.algorithm.supporter.GetTrials()])
+
+  def test_run_convergence_curves(self):
+    curves = parallel_runner.ParallelBenchmarkRunner(
+        self.runner, max_workers=2).run_convergence_curves(_make_tasks())
+    self.assertCountEqual(curves, ['Sphere', 'Rastrigin'])
+    for curve in curves.values():
+      self.assertEqual(curve.ys.shape, (3, 10))
+      # Signs are flipped, so that the curves are increasing.
+      self.assertTrue(np.all(np.diff(curve.ys, axis=1) >= 0))
+
+  def test_run_convergence_curves_maximization(self):
+    tasks = parallel_runner.make_tasks(
+        {
+            'NegativeSphere':
+                benchmark_runner.DesignerBenchmarkStateFactory(
+                    designer_factory=_designer_factory,
+                    experimenter=_maximization_experimenter())
+        },
+        seeds=range(2))
+    curve = parallel_runner.ParallelBenchmarkRunner(
+        self.runner, max_workers=2).run_convergence_curves(
+            tasks)['NegativeSphere']
+    self.assertEqual(curve.ys.shape, (2, 10))
+    # Maximized metrics keep their signs.
+    self.assertTrue(np.all(curve.ys <= 0))
+    self.assertTrue(np.all(np.diff(curve.ys, axis=1) >= 0))
+
+
+if __name__ == '__main__':
+  absltest.main()
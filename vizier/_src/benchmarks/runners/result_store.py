@@ -0,0 +1,335 @@
+# Copyright 2022 Google LLC.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""On-disk store of benchmark results, with checkpointing and resume.
+
+Every run (name, seed) is a directory with:
+  metadata.json: Progress of the run, e.g. the number of completed repeats,
+    and the names of its trial chunks.
+  trials_{i}.npz: Columnar arrays of the trials completed between two
+    checkpoints, appended as the run progresses. Chunks that are not listed in
+    the metadata were left by a crash; they are ignored and overwritten.
+Baseline convergence curves are cached next to the runs of a name.
+
+Ex: Resume a sweep after a crash, then compare against a stored baseline.
+
+  store = result_store.BenchmarkResultStore('/tmp/sweep')
+  runner = result_store.CheckpointingBenchmarkRunner(
+      benchmark_runner.BenchmarkRunner(
+          benchmark_subroutines=[benchmark_runner.GenerateAndEvaluate()],
+          num_repeats=100), store)
+  for task in parallel_runner.make_tasks(state_factories, seeds=range(20)):
+    runner.run(task)  # Skips complete runs and resumes partial ones.
+
+  comparator = ConvergenceCurveComparator(
+      store.convergence_curve('random', metric_information))
+"""
+
+import glob
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Dict, List, Optional, Sequence
+
+import attr
+import numpy as np
+from vizier import algorithms as vza
+from vizier import pyvizier as vz
+from vizier._src.benchmarks.analyzers import convergence_curve as cc
+from vizier._src.benchmarks.runners import benchmark_runner
+from vizier._src.benchmarks.runners import parallel_runner
+
+_METADATA_FILE = 'metadata.json'
+_PARAMETER_PREFIX = 'parameter:'
+_PRESENT_PREFIX = 'present:'
+_METRIC_PREFIX = 'metric:'
+_INFEASIBILITY_REASON = 'infeasibility_reason'
+
+
+def _write_atomically(path: str, write_fn) -> None:
+  """Writes a file with $write_fn(file) and renames it to $path."""
+  fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+  try:
+    with os.fdopen(fd, 'wb') as f:
+      write_fn(f)
+    os.replace(tmp_path, path)
+  except BaseException:
+    os.remove(tmp_path)
+    raise
+
+
+def _to_columns(trials: Sequence[vz.Trial]) -> Dict[str, np.ndarray]:
+  """Encodes the parameters and final metrics of $trials as columns."""
+  columns = {
+      _INFEASIBILITY_REASON:
+          np.array([t.infeasibility_reason or '' for t in trials], dtype=str)
+  }
+  parameter_names = sorted({n for t in trials for n in t.parameters})
+  for name in parameter_names:
+    present = np.array([name in t.parameters for t in trials])
+    values = [t.parameters[name].value for t in trials if name in t.parameters]
+    column = np.array(values)
+    full = np.zeros(len(trials), dtype=column.dtype)
+    full[present] = column
+    columns[_PRESENT_PREFIX + name] = present
+    columns[_PARAMETER_PREFIX + name] = full
+  metric_names = sorted({
+      n for t in trials if t.final_measurement
+      for n in t.final_measurement.metrics
+  })
+  for name in metric_names:
+    columns[_METRIC_PREFIX + name] = np.array([
+        t.final_measurement.metrics[name].value if
+        (t.final_measurement and name in t.final_measurement.metrics) else
+        np.nan for t in trials
+    ],
+                                              dtype=float)
+  return columns
+
+
+def _from_columns(columns: Dict[str, np.ndarray]) -> List[vz.Trial]:
+  """Decodes trials encoded by `_to_columns`."""
+  reasons = columns[_INFEASIBILITY_REASON]
+  trials = []
+  for i in range(len(reasons)):
+    parameters = {}
+    metrics = {}
+    for key, column in columns.items():
+      if key.startswith(_PARAMETER_PREFIX):
+        name = key[len(_PARAMETER_PREFIX):]
+        if columns[_PRESENT_PREFIX + name][i]:
+          parameters[name] = column[i].item()
+      elif key.startswith(_METRIC_PREFIX) and not np.isnan(column[i]):
+        metrics[key[len(_METRIC_PREFIX):]] = float(column[i])
+    trial = vz.Trial(parameters=parameters)
+    trial.complete(
+        vz.Measurement(metrics=metrics),
+        infeasibility_reason=str(reasons[i]) or None)
+    trials.append(trial)
+  return trials
+
+
+class BenchmarkResultStore:
+  """Stores the completed trials and progress of benchmark runs on disk.
+
+  Only parameters, final metric values and infeasibility reasons are kept.
+  Appends and metadata updates are atomic: a chunk of trials only becomes part
+  of the run when the metadata that lists it is written, together with the
+  progress of the run. A crashed run therefore loses at most the trials
+  completed since its last checkpoint, and never duplicates them. A run must
+  not be written by more than one process at a time.
+  """
+
+  def __init__(self, root: str):
+    """Init.
+
+    Args:
+      root: Directory of the store. Run names are used as subdirectory names.
+    """
+    self._root = root
+
+  def _run_dir(self, name: str, seed: int) -> str:
+    return os.path.join(self._root, name, f'seed_{seed}')
+
+  def names(self) -> List[str]:
+    """Returns the names of all stored runs."""
+    if not os.path.isdir(self._root):
+      return []
+    return sorted(
+        n for n in os.listdir(self._root)
+        if os.path.isdir(os.path.join(self._root, n)))
+
+  def seeds(self, name: str, complete_only: bool = True) -> List[int]:
+    """Returns the seeds of the stored runs of $name."""
+    seeds = []
+    for path in glob.glob(os.path.join(self._root, name, 'seed_*')):
+      seed = int(os.path.basename(path)[len('seed_'):])
+      if not complete_only or self.is_complete(name, seed):
+        seeds.append(seed)
+    return sorted(seeds)
+
+  def load_metadata(self, name: str, seed: int) -> Dict[str, Any]:
+    """Returns the metadata of the run, or an empty dict if there is none."""
+    path = os.path.join(self._run_dir(name, seed), _METADATA_FILE)
+    if not os.path.exists(path):
+      return {}
+    with open(path, 'rt') as f:
+      return json.load(f)
+
+  def update_metadata(self, name: str, seed: int, **updates: Any) -> None:
+    """Updates the metadata of the run with $updates."""
+    metadata = self.load_metadata(name, seed)
+    metadata.update(updates)
+    os.makedirs(self._run_dir(name, seed), exist_ok=True)
+    _write_atomically(
+        os.path.join(self._run_dir(name, seed), _METADATA_FILE),
+        lambda f: f.write(json.dumps(metadata, sort_keys=True).encode()))
+
+  def is_complete(self, name: str, seed: int) -> bool:
+    return bool(self.load_metadata(name, seed).get('complete', False))
+
+  def append_trials(self, name: str, seed: int, trials: Sequence[vz.Trial],
+                    **updates: Any) -> None:
+    """Appends completed $trials to the run and updates its metadata.
+
+    The trials and the metadata $updates are committed together by a single
+    metadata update.
+
+    Args:
+      name:
+      seed:
+      trials: Completed trials. May be empty.
+      **updates: Metadata updates, e.g. the progress of the run.
+    """
+    metadata = self.load_metadata(name, seed)
+    chunks = metadata.get('chunks', [])
+    if trials:
+      os.makedirs(self._run_dir(name, seed), exist_ok=True)
+      # Overwrites the chunk of a crashed append, if any.
+      chunk = f'trials_{len(chunks):06d}.npz'
+      columns = _to_columns(trials)
+      _write_atomically(
+          os.path.join(self._run_dir(name, seed), chunk),
+          lambda f: np.savez_compressed(f, **columns))
+      chunks = chunks + [chunk]
+    self.update_metadata(
+        name,
+        seed,
+        chunks=chunks,
+        num_trials=metadata.get('num_trials', 0) + len(trials),
+        **updates)
+
+  def load_trials(self, name: str, seed: int) -> List[vz.Trial]:
+    """Returns the trials of the run, with ids in order of appending."""
+    trials = []
+    for chunk in self.load_metadata(name, seed).get('chunks', []):
+      with np.load(
+          os.path.join(self._run_dir(name, seed), chunk),
+          allow_pickle=False) as data:
+        trials.extend(_from_columns(dict(data)))
+    for i, trial in enumerate(trials):
+      trial.id = i + 1
+    return trials
+
+  def convergence_curve(self,
+                        name: str,
+                        metric_information: vz.MetricInformation,
+                        *,
+                        flip_signs: bool = False,
+                        seeds: Optional[Sequence[int]] = None
+                       ) -> cc.ConvergenceCurve:
+    """Returns the convergence curve of the runs of $name, one row per seed.
+
+    The curve is cached on disk. The cache is invalidated when the seeds or
+    their numbers of trials change.
+
+    Args:
+      name:
+      metric_information: Metric of the curve.
+      flip_signs: See ConvergenceCurveConverter.
+      seeds: Seeds of the runs. Defaults to all complete runs.
+
+    Returns:
+      ConvergenceCurve whose xs are trial counts.
+    """
+    seeds = sorted(self.seeds(name) if seeds is None else seeds)
+    if not seeds:
+      raise ValueError(f'No complete runs of {name}.')
+    fingerprint = hashlib.sha256(
+        json.dumps({
+            'metric': metric_information.name,
+            'goal': metric_information.goal.name,
+            'flip_signs': flip_signs,
+            'seeds': seeds,
+            'num_trials': [
+                self.load_metadata(name, s).get('num_trials', 0) for s in seeds
+            ],
+        }).encode()).hexdigest()[:16]
+    path = os.path.join(self._root, name, f'curve_{fingerprint}.npz')
+    if os.path.exists(path):
+      with np.load(path, allow_pickle=False) as data:
+        return cc.ConvergenceCurve(
+            xs=data['xs'],
+            ys=data['ys'],
+            ylabel=str(data['ylabel']),
+            trend=cc.ConvergenceCurve.YTrend(str(data['trend'])))
+
+    converter = cc.ConvergenceCurveConverter(
+        metric_information, flip_signs=flip_signs)
+    curve = cc.ConvergenceCurve.align_xs(
+        [converter.convert(self.load_trials(name, s)) for s in seeds])
+    _write_atomically(
+        path, lambda f: np.savez(
+            f,
+            xs=curve.xs,
+            ys=curve.ys,
+            ylabel=curve.ylabel,
+            trend=curve.trend.value))
+    return curve
+
+
+@attr.define
+class CheckpointingBenchmarkRunner:
+  """Runs benchmark tasks and checkpoints them into a BenchmarkResultStore.
+
+  Trials are appended to the store after every repeat of `runner`. Complete
+  runs are not rerun. Partial runs are resumed from their last checkpoint: the
+  stored trials are added to a fresh state and reported to its algorithm, and
+  the remaining repeats are run. Resumed runs therefore match uninterrupted
+  runs only for algorithms that are fully determined by their completed
+  trials.
+  """
+
+  # Protocol applied to the state of every task.
+  runner: benchmark_runner.BenchmarkRunner = attr.field()
+  store: BenchmarkResultStore = attr.field()
+
+  def _restore(self, state: benchmark_runner.BenchmarkState,
+               trials: List[vz.Trial]) -> None:
+    state.algorithm.supporter.AddTrials(trials)
+    state.algorithm.post_completion_callback(vza.CompletedTrials(trials))
+
+  def run(self, task: parallel_runner.BenchmarkTask) -> List[vz.Trial]:
+    """Runs or resumes $task and returns all of its completed trials."""
+    name, seed = task.name, task.seed
+    if self.store.is_complete(name, seed):
+      return self.store.load_trials(name, seed)
+
+    state = task.state_factory(seed=seed)
+    trials = self.store.load_trials(name, seed)
+    if trials:
+      self._restore(state, trials)
+    supporter = state.algorithm.supporter
+    saved_ids = {t.id for t in trials}
+
+    start = self.store.load_metadata(name, seed).get('num_repeats_done', 0)
+    for repeat in range(start, self.runner.num_repeats):
+      for subroutine in self.runner.benchmark_subroutines:
+        if state.terminated:
+          break
+        subroutine.run(state)
+      completed = [
+          t for t in supporter.GetTrials(status_matches=vz.TrialStatus.COMPLETED)
+          if t.id not in saved_ids
+      ]
+      self.store.append_trials(
+          name, seed, completed, num_repeats_done=repeat + 1)
+      saved_ids.update(t.id for t in completed)
+      if state.terminated:
+        break
+
+    self.store.update_metadata(
+        name, seed, complete=True, terminated=state.terminated)
+    return supporter.GetTrials(status_matches=vz.TrialStatus.COMPLETED)
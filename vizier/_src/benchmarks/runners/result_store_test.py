@@ -0,0 +1,168 @@
+# Copyright 2022 Google LLC.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for result_store."""
+
+import glob
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+import attr
+import numpy as np
+from vizier import pyvizier as vz
+from vizier._src.algorithms.designers import random
+from vizier._src.benchmarks.experimenters import experimenter_factory
+from vizier._src.benchmarks.runners import benchmark_runner
+from vizier._src.benchmarks.runners import parallel_runner
+from vizier._src.benchmarks.runners import result_store
+
+from absl.testing import absltest
+
+
+def _random_state_factory() -> benchmark_runner.BenchmarkStateFactory:
+  experimenter = experimenter_factory.BBOBExperimenterFactory('Sphere', 3)()
+
+  def _designer_factory(problem: vz.ProblemStatement, seed: int):
+    return random.RandomDesigner(problem.search_space, seed=seed)
+
+  return benchmark_runner.DesignerBenchmarkStateFactory(
+      designer_factory=_designer_factory, experimenter=experimenter)
+
+
+@attr.define
+class _CrashAfter(benchmark_runner.BenchmarkSubroutine):
+  """Raises after $num_calls calls."""
+  num_calls: int
+  calls: int = 0
+
+  def run(self, state: benchmark_runner.BenchmarkState) -> None:
+    self.calls += 1
+    if self.calls > self.num_calls:
+      raise RuntimeError('crash')
+
+
+class BenchmarkResultStoreTest(absltest.TestCase):
+
+  def _tempdir(self) -> str:
+    path = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, path)
+    return path
+
+  def test_append_and_load_round_trip(self):
+    store = result_store.BenchmarkResultStore(self._tempdir())
+    trials = [
+        vz.Trial(parameters={'x': 1.5, 'c': 'a'}).complete(
+            vz.Measurement(metrics={'obj': 2.0})),
+        vz.Trial(parameters={'x': -1.0}).complete(
+            vz.Measurement(), infeasibility_reason='bad'),
+    ]
+    store.append_trials('run', 0, trials[:1])
+    store.append_trials('run', 0, trials[1:])
+
+    loaded = store.load_trials('run', 0)
+    self.assertLen(loaded, 2)
+    self.assertEqual([t.id for t in loaded], [1, 2])
+    self.assertEqual(loaded[0].parameters['x'].value, 1.5)
+    self.assertEqual(loaded[0].parameters['c'].value, 'a')
+    self.assertEqual(loaded[0].final_measurement.metrics['obj'].value, 2.0)
+    self.assertNotIn('c', loaded[1].parameters)
+    self.assertEqual(loaded[1].infeasibility_reason, 'bad')
+    self.assertEmpty(loaded[1].final_measurement.metrics)
+    self.assertEqual(store.load_metadata('run', 0)['num_trials'], 2)
+    self.assertEqual(store.names(), ['run'])
+    self.assertEqual(store.seeds('run', complete_only=False), [0])
+    self.assertEmpty(store.seeds('run'))
+
+  def test_crash_before_metadata_update(self):
+    store = result_store.BenchmarkResultStore(self._tempdir())
+    trials = [
+        vz.Trial(parameters={'x': float(i)}).complete(vz.Measurement())
+        for i in range(3)
+    ]
+    store.append_trials('run', 0, trials[:1], num_repeats_done=1)
+    with mock.patch.object(
+        store, 'update_metadata', side_effect=RuntimeError('crash')):
+      with self.assertRaises(RuntimeError):
+        store.append_trials('run', 0, trials[1:2], num_repeats_done=2)
+    # The chunk of the crashed append isn't part of the run.
+    self.assertEqual(
+        [t.parameters['x'].value for t in store.load_trials('run', 0)], [0.0])
+    self.assertEqual(store.load_metadata('run', 0)['num_repeats_done'], 1)
+
+    store.append_trials('run', 0, trials[2:], num_repeats_done=2)
+    self.assertEqual(
+        [t.parameters['x'].value for t in store.load_trials('run', 0)],
+        [0.0, 2.0])
+    self.assertEqual(store.load_metadata('run', 0)['num_trials'], 2)
+
+  def test_resume_after_crash(self):
+    root = self._tempdir()
+    store = result_store.BenchmarkResultStore(root)
+    task = parallel_runner.BenchmarkTask('random', _random_state_factory(), 1)
+
+    crashing = result_store.CheckpointingBenchmarkRunner(
+        benchmark_runner.BenchmarkRunner(
+            benchmark_subroutines=[
+                benchmark_runner.GenerateAndEvaluate(2),
+                _CrashAfter(3)
+            ],
+            num_repeats=5), store)
+    with self.assertRaises(RuntimeError):
+      crashing.run(task)
+    self.assertEqual(store.load_metadata('random', 1)['num_repeats_done'], 3)
+    self.assertLen(store.load_trials('random', 1), 6)
+    self.assertFalse(store.is_complete('random', 1))
+
+    runner = result_store.CheckpointingBenchmarkRunner(
+        benchmark_runner.BenchmarkRunner(
+            benchmark_subroutines=[benchmark_runner.GenerateAndEvaluate(2)],
+            num_repeats=5), store)
+    trials = runner.run(task)
+    self.assertLen(trials, 10)
+    self.assertTrue(store.is_complete('random', 1))
+    self.assertLen(store.load_trials('random', 1), 10)
+
+    # Complete runs are loaded instead of rerun.
+    self.assertLen(runner.run(task), 10)
+    self.assertLen(store.load_trials('random', 1), 10)
+
+  def test_cached_convergence_curve(self):
+    root = self._tempdir()
+    store = result_store.BenchmarkResultStore(root)
+    runner = result_store.CheckpointingBenchmarkRunner(
+        benchmark_runner.BenchmarkRunner(
+            benchmark_subroutines=[benchmark_runner.GenerateAndEvaluate(3)],
+            num_repeats=4), store)
+    factory = _random_state_factory()
+    for task in parallel_runner.make_tasks({'random': factory}, range(3)):
+      runner.run(task)
+    metric = factory.experimenter.problem_statement().metric_information.item()
+
+    curve = store.convergence_curve('random', metric)
+    self.assertEqual(curve.ys.shape, (3, 12))
+    self.assertLen(glob.glob(os.path.join(root, 'random', 'curve_*.npz')), 1)
+
+    cached = store.convergence_curve('random', metric)
+    np.testing.assert_array_equal(cached.xs, curve.xs)
+    np.testing.assert_array_equal(cached.ys, curve.ys)
+    self.assertEqual(cached.trend, curve.trend)
+
+    store.convergence_curve('random', metric, seeds=[0, 1])
+    self.assertLen(glob.glob(os.path.join(root, 'random', 'curve_*.npz')), 2)
+
+
+if __name__ == '__main__':
+  absltest.main()
@@ -0,0 +1,240 @@
+# Copyright 2022 Google LLC.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Profiling hooks for the phases of a Policy computation.
+
+A Profiler opens named spans around the phases of a `suggest()` call, e.g.
+restoring the designer state, fetching trials, `update()` and `suggest()`.
+The spans recorded since the last `report()` are attached to the decision's
+metadata and/or logged when `report()` is called.
+
+Example:
+  profiler = RecordingProfiler(attach_to_metadata=True)
+  policy = PartiallySerializableDesignerPolicy(..., profiler=profiler)
+  decision = policy.suggest(request)
+  decision.metadata.on_study.ns('profiler')['spans']  # JSON encoded list.
+"""
+
+import abc
+import contextlib
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+import tracemalloc
+from typing import Any, ContextManager, Dict, Iterator, List, Optional
+
+from absl import logging
+import attr
+from vizier import pyvizier as vz
+
+
+@attr.define(frozen=True)
+class Span:
+  """Measurement of a single profiled phase.
+
+  Attributes:
+    name: Name of the phase. Nested spans are joined by '/'.
+    duration_secs: Wall time spent inside the span.
+    peak_memory_bytes: Peak traced memory inside the span. Only set if memory
+      capture is enabled.
+    cpu_profile: Top entries of the cProfile statistics, sorted by cumulative
+      time. Only set if cpu capture is enabled.
+  """
+  name: str
+  duration_secs: float
+  peak_memory_bytes: Optional[int] = None
+  cpu_profile: Optional[str] = None
+
+  def to_dict(self) -> Dict[str, Any]:
+    return {k: v for k, v in attr.asdict(self).items() if v is not None}
+
+
+class Profiler(abc.ABC):
+  """Interface for profiling the phases of a Policy computation."""
+
+  @abc.abstractmethod
+  def span(self, name: str) -> ContextManager[None]:
+    """Returns a context manager that profiles the enclosed phase."""
+
+  @abc.abstractmethod
+  def report(self, metadata: vz.MetadataDelta) -> None:
+    """Reports the spans recorded since the last call to `report()`.
+
+    Args:
+      metadata: Metadata of the decision being returned. Implementations may
+        attach the profile to it.
+    """
+
+  @abc.abstractmethod
+  def discard(self) -> None:
+    """Drops the spans recorded since the last call to `report()`.
+
+    Called instead of `report()` when the computation fails, so that its spans
+    are not reported with the next decision.
+    """
+
+
+class NoOpProfiler(Profiler):
+  """Profiler that records nothing."""
+
+  def span(self, name: str) -> ContextManager[None]:
+    return contextlib.nullcontext()
+
+  def report(self, metadata: vz.MetadataDelta) -> None:
+    pass
+
+  def discard(self) -> None:
+    pass
+
+
+class RecordingProfiler(Profiler):
+  """Records the wall time of spans, and optionally cpu and memory profiles.
+
+  Spans are recorded per thread, so a single profiler can be shared by
+  concurrent `suggest()` calls.
+
+  cProfile and tracemalloc are process-wide tools. cpu profiles are therefore
+  only captured for outermost spans and skipped if another profiler is active.
+  Memory capture starts tracemalloc if needed, which slows down allocations
+  substantially; use it for debugging only.
+  """
+
+  def __init__(self,
+               *,
+               capture_cpu: bool = False,
+               capture_memory: bool = False,
+               attach_to_metadata: bool = False,
+               log_spans: bool = True,
+               namespace: str = 'profiler',
+               num_cpu_profile_entries: int = 20):
+    """Init.
+
+    Args:
+      capture_cpu: If True, captures a cProfile profile of outermost spans.
+      capture_memory: If True, records the peak traced memory of each span.
+      attach_to_metadata: If True, `report()` attaches the spans to the study
+        metadata under `namespace`.
+      log_spans: If True, `report()` logs the spans.
+      namespace: Study metadata namespace that receives the spans.
+      num_cpu_profile_entries: Number of cProfile entries to keep per span.
+    """
+    self._capture_cpu = capture_cpu
+    self._capture_memory = capture_memory
+    self._attach_to_metadata = attach_to_metadata
+    self._log_spans = log_spans
+    self._namespace = namespace
+    self._num_cpu_profile_entries = num_cpu_profile_entries
+    self._local = threading.local()
+
+  @property
+  def _stack(self) -> List[str]:
+    if not hasattr(self._local, 'stack'):
+      self._local.stack = []
+    return self._local.stack
+
+  @property
+  def _memory_peaks(self) -> List[int]:
+    """Peak traced memory of the open spans, before their last peak reset."""
+    if not hasattr(self._local, 'memory_peaks'):
+      self._local.memory_peaks = []
+    return self._local.memory_peaks
+
+  @property
+  def _pending(self) -> List[Span]:
+    if not hasattr(self._local, 'pending'):
+      self._local.pending = []
+    return self._local.pending
+
+  def _start_cpu_profile(self) -> Optional[cProfile.Profile]:
+    if not self._capture_cpu or self._stack:
+      return None
+    profile = cProfile.Profile()
+    try:
+      profile.enable()
+    except ValueError as e:
+      logging.warning('Skipped cpu profiling: %s', e)
+      return None
+    return profile
+
+  def _format_cpu_profile(self, profile: cProfile.Profile) -> str:
+    stream = io.StringIO()
+    stats = pstats.Stats(profile, stream=stream)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(
+        self._num_cpu_profile_entries)
+    return stream.getvalue()
+
+  @contextlib.contextmanager
+  def span(self, name: str) -> Iterator[None]:
+    full_name = '/'.join(self._stack + [name])
+    cpu_profile = self._start_cpu_profile()
+    started_tracemalloc = False
+    if self._capture_memory:
+      if not tracemalloc.is_tracing():
+        tracemalloc.start()
+        started_tracemalloc = True
+      # Resetting the peak discards the peak of the enclosing span so far, so
+      # it's saved and merged back when this span exits.
+      if self._memory_peaks:
+        self._memory_peaks[-1] = max(self._memory_peaks[-1],
+                                     tracemalloc.get_traced_memory()[1])
+      self._memory_peaks.append(0)
+      tracemalloc.reset_peak()
+    self._stack.append(name)
+    start = time.perf_counter()
+    try:
+      yield
+    finally:
+      duration = time.perf_counter() - start
+      self._stack.pop()
+      peak_memory = None
+      if self._capture_memory:
+        peak_memory = max(self._memory_peaks.pop(),
+                          tracemalloc.get_traced_memory()[1])
+        if self._memory_peaks:
+          self._memory_peaks[-1] = max(self._memory_peaks[-1], peak_memory)
+        if started_tracemalloc:
+          tracemalloc.stop()
+      cpu_profile_text = None
+      if cpu_profile is not None:
+        cpu_profile.disable()
+        cpu_profile_text = self._format_cpu_profile(cpu_profile)
+      self._pending.append(
+          Span(
+              name=full_name,
+              duration_secs=duration,
+              peak_memory_bytes=peak_memory,
+              cpu_profile=cpu_profile_text))
+
+  def spans(self) -> List[Span]:
+    """Returns the spans recorded by this thread since the last report."""
+    return list(self._pending)
+
+  def report(self, metadata: vz.MetadataDelta) -> None:
+    spans = self.spans()
+    if not spans:
+      return
+    self._pending.clear()
+    if self._log_spans:
+      logging.info(
+          'Profiled phases: %s', ', '.join(
+              f'{s.name}={s.duration_secs:.4f}s' for s in spans))
+    if self._attach_to_metadata:
+      metadata.on_study.ns(self._namespace)['spans'] = json.dumps(
+          [s.to_dict() for s in spans])
+
+  def discard(self) -> None:
+    self._pending.clear()
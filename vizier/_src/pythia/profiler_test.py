@@ -0,0 +1,90 @@
+# Copyright 2022 Google LLC.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for vizier._src.pythia.profiler."""
+import json
+
+from vizier import pyvizier as vz
+from vizier._src.pythia import profiler
+
+from absl.testing import absltest
+
+
+class RecordingProfilerTest(absltest.TestCase):
+
+  def test_nested_spans(self):
+    p = profiler.RecordingProfiler()
+    with p.span('outer'):
+      with p.span('inner'):
+        pass
+    self.assertEqual([s.name for s in p.spans()], ['outer/inner', 'outer'])
+    self.assertGreaterEqual(p.spans()[1].duration_secs,
+                            p.spans()[0].duration_secs)
+
+  def test_span_recorded_on_error(self):
+    p = profiler.RecordingProfiler()
+    with self.assertRaises(ValueError):
+      with p.span('failing'):
+        raise ValueError()
+    self.assertEqual([s.name for s in p.spans()], ['failing'])
+
+  def test_nested_memory_peaks(self):
+    p = profiler.RecordingProfiler(capture_memory=True)
+    with p.span('outer'):
+      large = [0] * 1000000
+      del large
+      with p.span('inner'):
+        small = [0] * 1000
+        del small
+    inner, outer = p.spans()
+    self.assertLess(inner.peak_memory_bytes, 1000000)
+    # The peak before the inner span is kept.
+    self.assertGreater(outer.peak_memory_bytes, 8000000)
+
+  def test_discard(self):
+    p = profiler.RecordingProfiler(attach_to_metadata=True)
+    with p.span('phase'):
+      pass
+    p.discard()
+    self.assertEmpty(p.spans())
+    metadata = vz.MetadataDelta()
+    p.report(metadata)
+    self.assertEmpty(metadata.on_study.ns('profiler'))
+
+  def test_report_attaches_to_metadata(self):
+    p = profiler.RecordingProfiler(
+        capture_cpu=True, capture_memory=True, attach_to_metadata=True)
+    with p.span('allocate'):
+      _ = [0] * 100000
+    metadata = vz.MetadataDelta()
+    p.report(metadata)
+
+    span, = json.loads(metadata.on_study.ns('profiler')['spans'])
+    self.assertEqual(span['name'], 'allocate')
+    self.assertGreater(span['peak_memory_bytes'], 100000)
+    self.assertIn('cumulative', span['cpu_profile'])
+    # Spans are cleared after being reported.
+    self.assertEmpty(p.spans())
+
+  def test_report_without_attaching(self):
+    p = profiler.RecordingProfiler()
+    with p.span('phase'):
+      pass
+    metadata = vz.MetadataDelta()
+    p.report(metadata)
+    self.assertEmpty(metadata.on_study.ns('profiler'))
+
+
+if __name__ == '__main__':
+  absltest.main()
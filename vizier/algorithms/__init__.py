@@ -15,6 +15,7 @@
 """Algorithm core modules."""
 
 from vizier._src.algorithms.core.abstractions import CompletedTrials
+from vizier._src.algorithms.core.abstractions import DeadlineAwareDesigner
 from vizier._src.algorithms.core.abstractions import Designer
 from vizier._src.algorithms.core.abstractions import PartiallySerializableDesigner
 from vizier._src.algorithms.core.abstractions import SerializableDesigner
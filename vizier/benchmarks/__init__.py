@@ -17,6 +17,7 @@
 from vizier._src.benchmarks.analyzers.convergence_curve import ConvergenceCurve
 from vizier._src.benchmarks.analyzers.convergence_curve import ConvergenceCurveComparator
 from vizier._src.benchmarks.analyzers.convergence_curve import ConvergenceCurveConverter
+from vizier._src.benchmarks.experimenters.caching_experimenter import CachingExperimenter
 from vizier._src.benchmarks.experimenters.combo_experimenter import CentroidExperimenter
 from vizier._src.benchmarks.experimenters.combo_experimenter import ContaminationExperimenter
 from vizier._src.benchmarks.experimenters.combo_experimenter import IsingExperimenter
@@ -24,13 +25,17 @@ from vizier._src.benchmarks.experimenters.combo_experimenter import MAXSATExperi
 from vizier._src.benchmarks.experimenters.combo_experimenter import PestControlExperimenter
 from vizier._src.benchmarks.experimenters.experimenter import Experimenter
 from vizier._src.benchmarks.experimenters.experimenter_factory import BBOBExperimenterFactory
+from vizier._src.benchmarks.experimenters.experimenter_factory import ExperimenterFactory
 from vizier._src.benchmarks.experimenters.experimenter_factory import SingleObjectiveExperimenterFactory
 from vizier._src.benchmarks.experimenters.l1_categorical_experimenter import L1CategorialExperimenter
 from vizier._src.benchmarks.experimenters.numpy_experimenter import NumpyExperimenter
+from vizier._src.benchmarks.experimenters.parallel_experimenter import ParallelExperimenter
 from vizier._src.benchmarks.experimenters.synthetic import bbob
 from vizier._src.benchmarks.runners.algorithm_suggester import AlgorithmSuggester
 from vizier._src.benchmarks.runners.algorithm_suggester import DesignerSuggester
 from vizier._src.benchmarks.runners.algorithm_suggester import PolicySuggester
+from vizier._src.benchmarks.runners.async_simulator import AsyncSimulationResult
+from vizier._src.benchmarks.runners.async_simulator import AsyncWorkerSimulator
 from vizier._src.benchmarks.runners.benchmark_runner import BenchmarkRunner
 from vizier._src.benchmarks.runners.benchmark_runner import BenchmarkState
 from vizier._src.benchmarks.runners.benchmark_runner import BenchmarkStateFactory
@@ -42,3 +47,8 @@ from vizier._src.benchmarks.runners.benchmark_runner import GenerateSuggestions
 from vizier._src.benchmarks.runners.benchmark_runner import PolicyBenchmarkStateFactory
 from vizier._src.benchmarks.runners.benchmark_runner import SeedDesignerFactory
 from vizier._src.benchmarks.runners.benchmark_runner import SeedPolicyFactory
+from vizier._src.benchmarks.runners.convergence_tracker import ConvergenceTracker
+from vizier._src.benchmarks.runners.parallel_runner import BenchmarkTask
+from vizier._src.benchmarks.runners.parallel_runner import ParallelBenchmarkRunner
+from vizier._src.benchmarks.runners.result_store import BenchmarkResultStore
+from vizier._src.benchmarks.runners.result_store import CheckpointingBenchmarkRunner
@@ -24,6 +24,9 @@ from vizier._src.pythia.policy import Policy
 from vizier._src.pythia.policy import SuggestDecision
 from vizier._src.pythia.policy import SuggestRequest
 from vizier._src.pythia.policy_supporter import PolicySupporter
+from vizier._src.pythia.profiler import NoOpProfiler
+from vizier._src.pythia.profiler import Profiler
+from vizier._src.pythia.profiler import RecordingProfiler
 from vizier._src.pythia.pythia_errors import CachedPolicyIsStaleError
 from vizier._src.pythia.pythia_errors import CancelComputeError
 from vizier._src.pythia.pythia_errors import CancelledByVizierError
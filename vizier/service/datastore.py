@@ -107,6 +107,42 @@ class DataStore(abc.ABC):
   def delete_trial(self, trial_name: str) -> None:
     """Deletes trial from database. If nonexistent, raises NotFoundError."""
 
+  @abc.abstractmethod
+  def add_trial_measurement(
+      self, trial_name: str,
+      measurement: study_pb2.Measurement) -> study_pb2.Trial:
+    """Appends a measurement to a trial without rewriting the trial.
+
+    Args:
+      trial_name: Name of the trial.
+      measurement: Intermediate measurement to be appended.
+
+    Returns:
+      The trial with only the appended measurement, so that the cost doesn't
+      grow with the number of measurements of the trial.
+
+    Raises:
+      NotFoundError: If the trial does not exist.
+    """
+
+  @abc.abstractmethod
+  def list_trial_measurements(
+      self,
+      trial_name: str,
+      last_k: Optional[int] = None) -> List[study_pb2.Measurement]:
+    """Lists the intermediate measurements of a trial in insertion order.
+
+    Args:
+      trial_name: Name of the trial.
+      last_k: If set, only the last `last_k` measurements are returned.
+
+    Returns:
+      List of measurements.
+
+    Raises:
+      NotFoundError: If the trial does not exist.
+    """
+
   @abc.abstractmethod
   def max_trial_id(self, study_name: str) -> int:
     """Maximal trial ID in study (defaults to 0 if no trials exist).
@@ -266,10 +302,15 @@ class StudyNode:
   """Contains original study and currently stored trials."""
   study_proto: study_pb2.Study
 
-  # Keys are `trial_id`.
+  # Keys are `trial_id`. Stored trials have their `measurements` cleared; those
+  # live in `trial_measurements` so they can be appended to cheaply.
   trial_protos: Dict[int,
                      study_pb2.Trial] = dataclasses.field(default_factory=dict)
 
+  # Keys are `trial_id`. Append-only lists of intermediate measurements.
+  trial_measurements: Dict[int, List[study_pb2.Measurement]] = (
+      dataclasses.field(default_factory=dict))
+
   # Keys are `operation_id`.
   early_stopping_operations: Dict[
       str, vizier_oss_pb2.EarlyStoppingOperation] = dataclasses.field(
@@ -326,6 +367,16 @@ def merge_trial_metadata(trial_proto: study_pb2.Trial,
       sorted(metadata_dict.values(), key=lambda kv: (kv.ns, kv.key)))
 
 
+def split_trial_measurements(
+    trial: study_pb2.Trial
+) -> Tuple[study_pb2.Trial, List[study_pb2.Measurement]]:
+  """Returns a copy of $trial without measurements, and its measurements."""
+  measurements = [copy.deepcopy(m) for m in trial.measurements]
+  trial_without_measurements = copy.deepcopy(trial)
+  trial_without_measurements.ClearField('measurements')
+  return trial_without_measurements, measurements
+
+
 class NestedDictRAMDataStore(DataStore):
   """Basic Datastore class using nested dictionaries."""
 
@@ -384,20 +435,30 @@ class NestedDictRAMDataStore(DataStore):
   def create_trial(self, trial: study_pb2.Trial) -> resources.TrialResource:
     resource = resources.TrialResource.from_name(trial.name)
     with self._lock:
-      trial_protos = self._owners[resource.owner_id].studies[
-          resource.study_id].trial_protos
+      study_node = self._owners[resource.owner_id].studies[resource.study_id]
+      trial_protos = study_node.trial_protos
       if resource.trial_id in trial_protos:
         raise AlreadyExistsError('Trial %s already exists' % trial.name)
       else:
-        trial_protos[resource.trial_id] = copy.deepcopy(trial)
+        trial_protos[resource.trial_id], measurements = (
+            split_trial_measurements(trial))
+        study_node.trial_measurements[resource.trial_id] = measurements
     return resource
 
+  def _assemble_trial(self, study_node: StudyNode,
+                      trial_id: int) -> study_pb2.Trial:
+    """Returns a copy of the stored trial, including its measurements."""
+    trial = copy.deepcopy(study_node.trial_protos[trial_id])
+    trial.measurements.extend(study_node.trial_measurements.get(trial_id, []))
+    return trial
+
   def get_trial(self, trial_name: str) -> study_pb2.Trial:
     resource = resources.TrialResource.from_name(trial_name)
     try:
       with self._lock:
-        return copy.deepcopy(self._owners[resource.owner_id].studies[
-            resource.study_id].trial_protos[resource.trial_id])
+        return self._assemble_trial(
+            self._owners[resource.owner_id].studies[resource.study_id],
+            resource.trial_id)
     except KeyError as err:
       raise NotFoundError('Could not get Trial with name:',
                           resource.name) from err
@@ -406,11 +467,14 @@ class NestedDictRAMDataStore(DataStore):
     resource = resources.TrialResource.from_name(trial.name)
     try:
       with self._lock:
-        trial_protos = self._owners[resource.owner_id].studies[
-            resource.study_id].trial_protos
+        study_node = self._owners[resource.owner_id].studies[
+            resource.study_id]
+        trial_protos = study_node.trial_protos
         if resource.trial_id not in trial_protos:
           raise NotFoundError('Trial %s does not exist.' % trial.name)
-        trial_protos[resource.trial_id] = copy.deepcopy(trial)
+        trial_protos[resource.trial_id], measurements = (
+            split_trial_measurements(trial))
+        study_node.trial_measurements[resource.trial_id] = measurements
       return resource
     except KeyError as err:
       raise NotFoundError('Could not update Trial with name:',
@@ -420,9 +484,11 @@ class NestedDictRAMDataStore(DataStore):
     resource = resources.StudyResource.from_name(study_name)
     try:
       with self._lock:
-        return copy.deepcopy(
-            list(self._owners[resource.owner_id].studies[
-                resource.study_id].trial_protos.values()))
+        study_node = self._owners[resource.owner_id].studies[resource.study_id]
+        return [
+            self._assemble_trial(study_node, trial_id)
+            for trial_id in study_node.trial_protos
+        ]
     except KeyError as err:
       raise NotFoundError('Study does not exist:', study_name) from err
 
@@ -430,11 +496,48 @@ class NestedDictRAMDataStore(DataStore):
     resource = resources.TrialResource.from_name(trial_name)
     try:
       with self._lock:
-        del self._owners[resource.owner_id].studies[
-            resource.study_id].trial_protos[resource.trial_id]
+        study_node = self._owners[resource.owner_id].studies[resource.study_id]
+        del study_node.trial_protos[resource.trial_id]
+        study_node.trial_measurements.pop(resource.trial_id, None)
     except KeyError as err:
       raise NotFoundError('Trial does not exist:', trial_name) from err
 
+  def add_trial_measurement(
+      self, trial_name: str,
+      measurement: study_pb2.Measurement) -> study_pb2.Trial:
+    resource = resources.TrialResource.from_name(trial_name)
+    try:
+      with self._lock:
+        study_node = self._owners[resource.owner_id].studies[resource.study_id]
+        if resource.trial_id not in study_node.trial_protos:
+          raise NotFoundError('Trial %s does not exist.' % trial_name)
+        study_node.trial_measurements.setdefault(resource.trial_id, []).append(
+            copy.deepcopy(measurement))
+        trial = copy.deepcopy(study_node.trial_protos[resource.trial_id])
+      trial.measurements.append(measurement)
+      return trial
+    except KeyError as err:
+      raise NotFoundError('Could not add measurement to Trial with name:',
+                          resource.name) from err
+
+  def list_trial_measurements(
+      self,
+      trial_name: str,
+      last_k: Optional[int] = None) -> List[study_pb2.Measurement]:
+    resource = resources.TrialResource.from_name(trial_name)
+    try:
+      with self._lock:
+        study_node = self._owners[resource.owner_id].studies[resource.study_id]
+        if resource.trial_id not in study_node.trial_protos:
+          raise NotFoundError('Trial %s does not exist.' % trial_name)
+        measurements = study_node.trial_measurements.get(resource.trial_id, [])
+        if last_k is not None:
+          measurements = measurements[-last_k:] if last_k > 0 else []
+        return copy.deepcopy(measurements)
+    except KeyError as err:
+      raise NotFoundError('Could not list measurements of Trial with name:',
+                          resource.name) from err
+
   def max_trial_id(self, study_name: str) -> int:
     resource = resources.StudyResource.from_name(study_name)
     try:
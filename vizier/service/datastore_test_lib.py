@@ -124,6 +124,66 @@ class DataStoreTestCase(parameterized.TestCase):
     self.assertEqual(leftover_trials, trials[1:])
     self.assertIsNot(leftover_trials, trials[1:])  # Check pass-by-value.
 
+  def assertMeasurementAPI(self, ds: datastore.DataStore,
+                           study: study_pb2.Study,
+                           trials: List[study_pb2.Trial]):
+    """Tests if the datastore appends and lists measurements correctly."""
+    ds.create_study(study)
+    for trial in trials:
+      ds.create_trial(trial)
+
+    first_trial = trials[0]
+    missing_trial_name = first_trial.name + str(len(trials))
+    measurements = [
+        study_pb2.Measurement(
+            step_count=i,
+            metrics=[study_pb2.Measurement.Metric(metric_id='x', value=i)])
+        for i in range(5)
+    ]
+    for measurement in measurements:
+      expected_trial = copy.deepcopy(first_trial)
+      expected_trial.measurements.append(measurement)
+      self.assertEqual(
+          ds.add_trial_measurement(first_trial.name, measurement),
+          expected_trial)
+    with self.assertRaises(datastore.NotFoundError):
+      ds.add_trial_measurement(missing_trial_name, measurements[0])
+
+    self.assertEqual(
+        ds.list_trial_measurements(first_trial.name), measurements)
+    self.assertEqual(
+        ds.list_trial_measurements(first_trial.name, last_k=2),
+        measurements[-2:])
+    self.assertEmpty(ds.list_trial_measurements(first_trial.name, last_k=0))
+    self.assertEmpty(ds.list_trial_measurements(trials[1].name))
+    with self.assertRaises(datastore.NotFoundError):
+      ds.list_trial_measurements(missing_trial_name)
+
+    # Measurements are assembled back into the trial.
+    first_trial.measurements.extend(measurements)
+    self.assertEqual(ds.get_trial(first_trial.name), first_trial)
+    self.assertEqual(ds.list_trials(study.name), trials)
+
+    # Updating a trial replaces its measurements.
+    first_trial.measurements.pop()
+    ds.update_trial(first_trial)
+    self.assertEqual(ds.get_trial(first_trial.name), first_trial)
+    self.assertEqual(
+        ds.list_trial_measurements(first_trial.name), measurements[:-1])
+
+    # Metadata updates leave measurements intact.
+    ds.update_metadata(study.name, [], [
+        UnitMetadataUpdate(
+            trial_id=first_trial.id,
+            metadatum=key_value_pb2.KeyValue(key='k', ns='t', value='v'))
+    ])
+    self.assertEqual(
+        ds.list_trial_measurements(first_trial.name), measurements[:-1])
+
+    ds.delete_trial(first_trial.name)
+    ds.create_trial(study_pb2.Trial(name=first_trial.name, id=first_trial.id))
+    self.assertEmpty(ds.list_trial_measurements(first_trial.name))
+
   def assertSuggestOpAPI(self, ds: datastore.DataStore, study: study_pb2.Study,
                          client_id: str,
                          suggestion_ops: List[operations_pb2.Operation]):
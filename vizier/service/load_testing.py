@@ -0,0 +1,310 @@
+# Copyright 2022 Google LLC.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Load generator for the Vizier Service.
+
+Simulates `num_clients_per_study` x `num_studies` concurrent clients running a
+mix of algorithms against a running Vizier Service, and reports the throughput
+as well as latency percentiles for every RPC.
+
+Example:
+  service = vizier_service.DistributedPythiaVizierService()
+  config = LoadTestConfig(
+      num_studies=4,
+      num_clients_per_study=8,
+      algorithms=('RANDOM_SEARCH', 'NSGA2'),
+      experimenter_factory=benchmarks.BBOBExperimenterFactory('Sphere', 2),
+      evaluation_time=exponential_evaluation_time(0.1))
+  result = run_load_test(service.endpoint, config)
+  print(result.to_json())
+"""
+
+import collections
+import json
+import multiprocessing.pool
+import threading
+import time
+from typing import Any, Callable, Dict, List, Protocol, Sequence
+
+import attr
+import grpc
+import numpy as np
+
+from vizier.service import pyvizier
+from vizier.service import resources
+from vizier.service import study_pb2
+from vizier.service import vizier_client
+from vizier.service import vizier_service_pb2
+from vizier.service import vizier_service_pb2_grpc
+
+# Samples the number of seconds that a single trial evaluation takes.
+EvaluationTimeSampler = Callable[[np.random.Generator], float]
+
+# Seconds to wait for the connection of a client to the service.
+_CHANNEL_READY_TIMEOUT_SECS = 60.0
+
+
+class Experimenter(Protocol):
+  """Objective evaluated by the clients, e.g. a benchmarks Experimenter."""
+
+  def problem_statement(self) -> pyvizier.ProblemStatement:
+    ...
+
+  def evaluate(self, suggestions: Sequence[pyvizier.Trial]) -> None:
+    ...
+
+
+# Creates the objective of a client, e.g. BBOBExperimenterFactory.
+ExperimenterFactory = Callable[[], Experimenter]
+
+# Name of the client-side operation that covers SuggestTrials and the
+# subsequent GetOperation polls.
+GET_SUGGESTIONS = 'client/get_suggestions'
+
+
+def constant_evaluation_time(seconds: float) -> EvaluationTimeSampler:
+  return lambda rng: seconds
+
+
+def exponential_evaluation_time(mean_seconds: float) -> EvaluationTimeSampler:
+  return lambda rng: rng.exponential(mean_seconds)
+
+
+def lognormal_evaluation_time(median_seconds: float,
+                              sigma: float) -> EvaluationTimeSampler:
+  return lambda rng: rng.lognormal(np.log(median_seconds), sigma)
+
+
+@attr.define(frozen=True)
+class LoadTestConfig:
+  """Configuration of a load test.
+
+  Attributes:
+    num_studies: Number of studies.
+    num_clients_per_study: Number of concurrent clients working on each study.
+    num_trials_per_client: Number of suggest/evaluate/complete rounds per
+      client.
+    experimenter_factory: Creates the objective that the clients evaluate.
+    algorithms: Algorithms assigned to the studies in a round-robin fashion.
+    evaluation_time: Sampled after each suggestion to simulate the time spent
+      evaluating a trial.
+    suggestion_count: Number of suggestions requested per round.
+    owner_id: Owner of the created studies. Use a fresh owner per load test to
+      avoid loading studies of a previous run.
+    seed: Seed of the evaluation time samplers.
+  """
+  num_studies: int = attr.field(default=1, validator=attr.validators.gt(0))
+  num_clients_per_study: int = attr.field(
+      default=1, validator=attr.validators.gt(0))
+  num_trials_per_client: int = attr.field(
+      default=10, validator=attr.validators.gt(0))
+  experimenter_factory: ExperimenterFactory = attr.field(kw_only=True)
+  algorithms: Sequence[str] = attr.field(
+      default=('RANDOM_SEARCH',), converter=tuple)
+  evaluation_time: EvaluationTimeSampler = attr.field(
+      default=constant_evaluation_time(0.0))
+  suggestion_count: int = attr.field(default=1, validator=attr.validators.gt(0))
+  owner_id: str = attr.field(default='load_test')
+  seed: int = attr.field(default=0)
+
+  def to_dict(self) -> Dict[str, Any]:
+    return {
+        'num_studies': self.num_studies,
+        'num_clients_per_study': self.num_clients_per_study,
+        'num_trials_per_client': self.num_trials_per_client,
+        'algorithms': list(self.algorithms),
+        'experimenter_factory': repr(self.experimenter_factory),
+        'suggestion_count': self.suggestion_count,
+        'seed': self.seed,
+    }
+
+
+@attr.define(frozen=True)
+class LatencySummary:
+  """Latency percentiles of a single RPC or client operation, in seconds."""
+  count: int
+  error_count: int
+  mean: float
+  p50: float
+  p95: float
+  p99: float
+  max: float
+
+  @classmethod
+  def from_latencies(cls, latencies: Sequence[float],
+                     error_count: int) -> 'LatencySummary':
+    if not latencies:
+      return cls(0, error_count, 0.0, 0.0, 0.0, 0.0, 0.0)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return cls(
+        count=len(latencies),
+        error_count=error_count,
+        mean=float(np.mean(latencies)),
+        p50=float(p50),
+        p95=float(p95),
+        p99=float(p99),
+        max=float(np.max(latencies)))
+
+
+@attr.define(frozen=True)
+class LoadTestResult:
+  """Result of a load test.
+
+  Attributes:
+    config: Configuration of the load test.
+    elapsed_secs: Wall time of the whole load test.
+    num_completed_trials: Number of trials completed by all clients.
+    trials_per_second: Throughput of completed trials.
+    latencies: Latency summaries keyed by RPC method name, e.g.
+      'SuggestTrials', plus `GET_SUGGESTIONS`.
+  """
+  config: LoadTestConfig
+  elapsed_secs: float
+  num_completed_trials: int
+  trials_per_second: float
+  latencies: Dict[str, LatencySummary]
+
+  def to_dict(self) -> Dict[str, Any]:
+    return {
+        'config': self.config.to_dict(),
+        'elapsed_secs': self.elapsed_secs,
+        'num_completed_trials': self.num_completed_trials,
+        'trials_per_second': self.trials_per_second,
+        'latencies': {k: attr.asdict(v) for k, v in self.latencies.items()},
+    }
+
+  def to_json(self) -> str:
+    """Returns a stable JSON encoding that can be diffed across runs."""
+    return json.dumps(self.to_dict(), indent=2, sort_keys=True)
+
+
+class _LatencyRecorder(grpc.UnaryUnaryClientInterceptor):
+  """Records the latency of every unary RPC and of client operations."""
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._latencies: Dict[str, List[float]] = collections.defaultdict(list)
+    self._error_counts: Dict[str, int] = collections.defaultdict(int)
+
+  def record(self, name: str, seconds: float, error: bool = False) -> None:
+    with self._lock:
+      if error:
+        self._error_counts[name] += 1
+      else:
+        self._latencies[name].append(seconds)
+
+  def intercept_unary_unary(self, continuation, client_call_details, request):
+    start = time.perf_counter()
+    outcome = continuation(client_call_details, request)
+    error = outcome.exception() is not None
+    self.record(
+        client_call_details.method.split('/')[-1],
+        time.perf_counter() - start, error)
+    return outcome
+
+  def summaries(self) -> Dict[str, LatencySummary]:
+    with self._lock:
+      names = set(self._latencies) | set(self._error_counts)
+      return {
+          name: LatencySummary.from_latencies(self._latencies[name],
+                                              self._error_counts[name])
+          for name in sorted(names)
+      }
+
+
+def _run_client(endpoint: str, config: LoadTestConfig,
+                recorder: _LatencyRecorder, study_index: int,
+                client_index: int) -> int:
+  """Runs a single client with its own channel, and returns its trial count."""
+  with grpc.secure_channel(endpoint,
+                           grpc.local_channel_credentials()) as channel:
+    grpc.channel_ready_future(channel).result(
+        timeout=_CHANNEL_READY_TIMEOUT_SECS)
+    stub = vizier_service_pb2_grpc.VizierServiceStub(
+        grpc.intercept_channel(channel, recorder))
+    return _run_client_with_stub(stub, config, recorder, study_index,
+                                 client_index)
+
+
+def _run_client_with_stub(stub: vizier_service_pb2_grpc.VizierServiceStub,
+                          config: LoadTestConfig, recorder: _LatencyRecorder,
+                          study_index: int, client_index: int) -> int:
+  """Runs the rounds of a single client and returns its trial count."""
+  rng = np.random.default_rng([config.seed, study_index, client_index])
+  experimenter = config.experimenter_factory()
+  study_config = pyvizier.StudyConfig.from_problem(
+      experimenter.problem_statement())
+  study_config.algorithm = pyvizier.Algorithm(
+      config.algorithms[study_index % len(config.algorithms)])
+
+  study = stub.CreateStudy(
+      vizier_service_pb2.CreateStudyRequest(
+          parent=resources.OwnerResource(config.owner_id).name,
+          study=study_pb2.Study(
+              display_name=f'study_{study_index}',
+              study_spec=study_config.to_proto())))
+  client = vizier_client.VizierClient(stub, study.name, str(client_index))
+
+  num_completed = 0
+  for _ in range(config.num_trials_per_client):
+    start = time.perf_counter()
+    suggestions = client.get_suggestions(
+        suggestion_count=config.suggestion_count)
+    recorder.record(GET_SUGGESTIONS, time.perf_counter() - start)
+    if not suggestions:
+      break
+    time.sleep(config.evaluation_time(rng))
+    experimenter.evaluate(suggestions)
+    for trial in suggestions:
+      client.complete_trial(trial.id, trial.final_measurement)
+      num_completed += 1
+  return num_completed
+
+
+def run_load_test(endpoint: str, config: LoadTestConfig) -> LoadTestResult:
+  """Runs a load test against the Vizier Service at $endpoint.
+
+  Args:
+    endpoint: Address of a running VizierService, e.g. the `endpoint` of
+      `DefaultVizierService` or `DistributedPythiaVizierService`.
+    config: Configuration of the load test.
+
+  Returns:
+    Throughput and per-RPC latency summaries.
+
+  Raises:
+    grpc.FutureTimeoutError: If a client can't connect to the service.
+    Exception: The first error raised by any of the clients.
+  """
+  recorder = _LatencyRecorder()
+  client_indices = [(study_index, client_index)
+                    for study_index in range(config.num_studies)
+                    for client_index in range(config.num_clients_per_study)]
+  pool = multiprocessing.pool.ThreadPool(len(client_indices))
+  start = time.perf_counter()
+  try:
+    num_completed = pool.starmap(
+        lambda s, c: _run_client(endpoint, config, recorder, s, c),
+        client_indices)
+  finally:
+    pool.close()
+    pool.join()
+  elapsed = time.perf_counter() - start
+
+  return LoadTestResult(
+      config=config,
+      elapsed_secs=elapsed,
+      num_completed_trials=sum(num_completed),
+      trials_per_second=sum(num_completed) / elapsed,
+      latencies=recorder.summaries())
@@ -0,0 +1,144 @@
+# Copyright 2022 Google LLC.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Incrementally maintained set of optimal trials of a study."""
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+import numpy as np
+
+from vizier._src.pyvizier.multimetric import pareto_optimal
+from vizier.service import study_pb2
+
+MetricSpec = study_pb2.StudySpec.MetricSpec
+
+
+def _dominates(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+  """Returns whether $a strictly dominates $b, broadcast over leading axes."""
+  return np.all(a >= b, axis=-1) & np.any(a > b, axis=-1)
+
+
+class OptimalTrialSet:
+  """Pareto-optimal trials of a single study.
+
+  The set stores the objective vector of every SUCCEEDED trial that reports all
+  of the study's metrics, with MINIMIZE metrics sign-flipped so that larger is
+  always better. Adding or updating a trial costs O(|front|). Removing a trial
+  on the front re-examines only the trials that it dominated.
+
+  A trial is optimal iff no other trial strictly dominates it, so trials with
+  equal objective vectors are all optimal.
+
+  This class is thread-safe.
+  """
+
+  def __init__(self, metric_specs: Sequence[MetricSpec]):
+    self._metric_specs = [
+        MetricSpec(metric_id=m.metric_id, goal=m.goal) for m in metric_specs
+    ]
+    self._signs = np.array([
+        -1.0 if m.goal == MetricSpec.GoalType.MINIMIZE else 1.0
+        for m in self._metric_specs
+    ])
+    # Keys are `trial_id`.
+    self._objectives: Dict[int, np.ndarray] = {}
+    self._optimal_ids: Set[int] = set()
+    self._lock = threading.Lock()
+
+  @classmethod
+  def from_trials(cls, metric_specs: Sequence[MetricSpec],
+                  trials: Iterable[study_pb2.Trial]) -> 'OptimalTrialSet':
+    """Builds the set from all trials of a study at once."""
+    optimal_set = cls(metric_specs)
+    for trial in trials:
+      objective = optimal_set._objective_vector(trial)
+      if objective is not None:
+        optimal_set._objectives[int(trial.id)] = objective
+    optimal_set._optimal_ids = optimal_set._compute_optimal_ids(
+        list(optimal_set._objectives))
+    return optimal_set
+
+  def matches(self, metric_specs: Sequence[MetricSpec]) -> bool:
+    """Returns True if the set was built for $metric_specs."""
+    return self._metric_specs == [
+        MetricSpec(metric_id=m.metric_id, goal=m.goal) for m in metric_specs
+    ]
+
+  def _objective_vector(self, trial: study_pb2.Trial) -> Optional[np.ndarray]:
+    """Returns the objective vector, or None if $trial is not considered."""
+    if trial.state != study_pb2.Trial.State.SUCCEEDED:
+      return None
+    metric_id_to_value = {
+        m.metric_id: m.value for m in trial.final_measurement.metrics
+    }
+    try:
+      values = [metric_id_to_value[m.metric_id] for m in self._metric_specs]
+    except KeyError:
+      return None
+    return self._signs * np.array(values, dtype=float)
+
+  def _compute_optimal_ids(self, trial_ids: List[int]) -> Set[int]:
+    """Computes the optimal subset of $trial_ids from scratch."""
+    if not trial_ids:
+      return set()
+    points = np.stack([self._objectives[i] for i in trial_ids])
+    is_optimal = pareto_optimal.FastParetoOptimalAlgorithm().is_pareto_optimal(
+        points)
+    return {i for i, optimal in zip(trial_ids, is_optimal) if optimal}
+
+  def _remove(self, trial_id: int) -> None:
+    objective = self._objectives.pop(trial_id, None)
+    if objective is None or trial_id not in self._optimal_ids:
+      return
+    self._optimal_ids.discard(trial_id)
+    # Only trials dominated by the removed one can enter the front.
+    candidate_ids = [
+        i for i, y in self._objectives.items()
+        if i not in self._optimal_ids and _dominates(objective, y)
+    ]
+    if not candidate_ids:
+      return
+    self._optimal_ids = self._compute_optimal_ids(
+        sorted(self._optimal_ids) + candidate_ids)
+
+  def _add(self, trial_id: int, objective: np.ndarray) -> None:
+    self._objectives[trial_id] = objective
+    optimal_ids = list(self._optimal_ids)
+    if optimal_ids:
+      front = np.stack([self._objectives[i] for i in optimal_ids])
+      if np.any(_dominates(front, objective)):
+        return
+      for i, is_dominated in zip(optimal_ids, _dominates(objective, front)):
+        if is_dominated:
+          self._optimal_ids.discard(i)
+    self._optimal_ids.add(trial_id)
+
+  def update(self, trial: study_pb2.Trial) -> None:
+    """Adds, updates or removes $trial depending on its current state."""
+    trial_id = int(trial.id)
+    objective = self._objective_vector(trial)
+    with self._lock:
+      self._remove(trial_id)
+      if objective is not None:
+        self._add(trial_id, objective)
+
+  def remove(self, trial_id: int) -> None:
+    """Removes a (deleted) trial from the set."""
+    with self._lock:
+      self._remove(trial_id)
+
+  def optimal_trial_ids(self) -> List[int]:
+    """Returns the ids of the optimal trials in ascending order."""
+    with self._lock:
+      return sorted(self._optimal_ids)
@@ -0,0 +1,107 @@
+# Copyright 2022 Google LLC.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for vizier.service.optimal_trials."""
+from typing import Dict, List
+
+import numpy as np
+
+from vizier.service import optimal_trials
+from vizier.service import study_pb2
+from vizier.service.testing import util as test_util
+
+from absl.testing import absltest
+
+MetricSpec = study_pb2.StudySpec.MetricSpec
+
+_METRIC_SPECS = [
+    MetricSpec(metric_id='x1', goal=MetricSpec.MAXIMIZE),
+    MetricSpec(metric_id='x2', goal=MetricSpec.MINIMIZE),
+]
+
+
+def _make_trial(trial_id: int, x1: float, x2: float) -> study_pb2.Trial:
+  return test_util.generate_trials(
+      [trial_id],
+      final_measurement=study_pb2.Measurement(metrics=[
+          study_pb2.Measurement.Metric(metric_id='x1', value=x1),
+          study_pb2.Measurement.Metric(metric_id='x2', value=x2),
+      ]),
+      state=study_pb2.Trial.State.SUCCEEDED)[0]
+
+
+def _brute_force_optimal_ids(
+    trials: Dict[int, study_pb2.Trial]) -> List[int]:
+  ids = sorted(trials)
+  ys = np.array([[
+      trials[i].final_measurement.metrics[0].value,
+      -trials[i].final_measurement.metrics[1].value
+  ] for i in ids])
+  return [
+      i for i, y in zip(ids, ys)
+      if not np.any(np.all(ys >= y, axis=1) & np.any(ys > y, axis=1))
+  ]
+
+
+class OptimalTrialSetTest(absltest.TestCase):
+
+  def test_ignores_incomplete_trials(self):
+    optimal_set = optimal_trials.OptimalTrialSet(_METRIC_SPECS)
+    optimal_set.update(test_util.generate_trials([1])[0])
+    missing_metric = _make_trial(2, 0.0, 0.0)
+    missing_metric.final_measurement.metrics.pop()
+    optimal_set.update(missing_metric)
+    self.assertEmpty(optimal_set.optimal_trial_ids())
+
+  def test_trial_leaves_front_when_no_longer_succeeded(self):
+    optimal_set = optimal_trials.OptimalTrialSet(_METRIC_SPECS)
+    trial = _make_trial(1, 0.0, 0.0)
+    optimal_set.update(trial)
+    self.assertEqual(optimal_set.optimal_trial_ids(), [1])
+    trial.state = study_pb2.Trial.State.STOPPING
+    optimal_set.update(trial)
+    self.assertEmpty(optimal_set.optimal_trial_ids())
+
+  def test_matches(self):
+    optimal_set = optimal_trials.OptimalTrialSet(_METRIC_SPECS)
+    self.assertTrue(optimal_set.matches(_METRIC_SPECS))
+    self.assertFalse(optimal_set.matches(_METRIC_SPECS[:1]))
+
+  def test_incremental_updates_match_brute_force(self):
+    rng = np.random.default_rng(0)
+    optimal_set = optimal_trials.OptimalTrialSet(_METRIC_SPECS)
+    trials: Dict[int, study_pb2.Trial] = {}
+    for step in range(300):
+      if trials and rng.random() < 0.3:
+        trial_id = int(rng.choice(sorted(trials)))
+        del trials[trial_id]
+        optimal_set.remove(trial_id)
+      else:
+        # Values on a coarse grid so that ties and duplicates occur.
+        trial_id = int(rng.integers(1, 100))
+        trials[trial_id] = _make_trial(trial_id, *rng.integers(0, 5, size=2))
+        optimal_set.update(trials[trial_id])
+      self.assertEqual(
+          optimal_set.optimal_trial_ids(),
+          _brute_force_optimal_ids(trials),
+          msg=f'Mismatch at step {step}.')
+
+    rebuilt = optimal_trials.OptimalTrialSet.from_trials(
+        _METRIC_SPECS, trials.values())
+    self.assertEqual(rebuilt.optimal_trial_ids(),
+                     optimal_set.optimal_trial_ids())
+
+
+if __name__ == '__main__':
+  absltest.main()
@@ -14,13 +14,10 @@
 
 """Large-scale stress tests (multiple clients, mulithreading, etc.) for Vizier Service."""
 
-import multiprocessing.pool
-import time
 from absl import logging
 
 from vizier import benchmarks
-from vizier.service import pyvizier
-from vizier.service import vizier_client
+from vizier.service import load_testing
 from vizier.service import vizier_service
 
 from absl.testing import absltest
@@ -42,44 +39,43 @@ class PerformanceTest(parameterized.TestCase):
   )
   def test_multiple_clients_basic(self, num_simultaneous_clients,
                                   num_trials_per_client, dimension):
-
-    def fn(client_id: int):
-      experimenter = benchmarks.BBOBExperimenterFactory('Sphere', dimension)()
-      problem_statement = experimenter.problem_statement()
-      study_config = pyvizier.StudyConfig.from_problem(problem_statement)
-      study_config.algorithm = pyvizier.Algorithm.NSGA2
-
-      client = vizier_client.create_or_load_study(
-          service_endpoint=self.service.endpoint,
-          owner_id='my_username',
-          study_id=self.id(),  # Use the testcase name.
-          study_config=study_config,
-          client_id=str(client_id))
-
-      for _ in range(num_trials_per_client):
-        suggestions = client.get_suggestions(suggestion_count=1)
-        experimenter.evaluate(suggestions)
-        for completed_trial in suggestions:
-          client.complete_trial(completed_trial.id,
-                                completed_trial.final_measurement)
-
-      return client
-
-    client_ids = range(num_simultaneous_clients)
-    pool = multiprocessing.pool.ThreadPool(num_simultaneous_clients)
-
-    start = time.time()
-    clients = pool.map(fn, client_ids)
-    end = time.time()
-    pool.close()
-
-    self.assertEqual(
-        max({t.id for t in clients[0].list_trials()}),
-        num_simultaneous_clients * num_trials_per_client)
-
+    config = load_testing.LoadTestConfig(
+        num_clients_per_study=num_simultaneous_clients,
+        num_trials_per_client=num_trials_per_client,
+        algorithms=('NSGA2',),
+        experimenter_factory=benchmarks.BBOBExperimenterFactory(
+            'Sphere', dimension),
+        owner_id=self.id())  # Use the testcase name.
+    result = load_testing.run_load_test(self.service.endpoint, config)
+
+    self.assertEqual(result.num_completed_trials,
+                     num_simultaneous_clients * num_trials_per_client)
     logging.info(
         'For %d clients to evaluate %d trials each, it took %f seconds total.',
-        num_simultaneous_clients, num_trials_per_client, end - start)
+        num_simultaneous_clients, num_trials_per_client, result.elapsed_secs)
+
+  @parameterized.parameters(
+      (vizier_service.DefaultVizierService,),
+      (vizier_service.DistributedPythiaVizierService,),
+  )
+  def test_multiple_studies_algorithm_mix(self, service_cls):
+    service = service_cls()
+    config = load_testing.LoadTestConfig(
+        num_studies=3,
+        num_clients_per_study=4,
+        num_trials_per_client=3,
+        algorithms=('RANDOM_SEARCH', 'QUASI_RANDOM_SEARCH', 'NSGA2'),
+        experimenter_factory=benchmarks.BBOBExperimenterFactory('Sphere', 2),
+        evaluation_time=load_testing.exponential_evaluation_time(0.01))
+    result = load_testing.run_load_test(service.endpoint, config)
+
+    self.assertEqual(result.num_completed_trials, 3 * 4 * 3)
+    for name in ('CreateStudy', 'SuggestTrials', 'CompleteTrial',
+                 load_testing.GET_SUGGESTIONS):
+      self.assertIn(name, result.latencies)
+      self.assertEqual(result.latencies[name].error_count, 0)
+    self.assertEqual(result.latencies['CompleteTrial'].count, 3 * 4 * 3)
+    logging.info('Load test result: %s', result.to_json())
 
 
 if __name__ == '__main__':
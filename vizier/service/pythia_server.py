@@ -14,6 +14,8 @@
 
 """Separate Pythia service for handling algorithmic logic."""
 # pylint:disable=g-import-not-at-top
+import datetime
+import math
 from typing import Optional, Union
 from absl import logging
 import grpc
@@ -23,46 +25,71 @@ from vizier._src.algorithms.policies import designer_policy as dp
 from vizier.service import pythia_service_pb2
 from vizier.service import pythia_service_pb2_grpc
 from vizier.service import pyvizier as vz
+from vizier.service import service_metrics
 from vizier.service import service_policy_supporter
 from vizier.service import stubs_util
 from vizier.service import vizier_service_pb2_grpc
 
 
-def policy_creator(problem_statement: vz.ProblemStatement, algorithm: str,
-                   policy_supporter: pythia.PolicySupporter) -> pythia.Policy:
-  """Creates a policy."""
+def policy_creator(
+    problem_statement: vz.ProblemStatement,
+    algorithm: str,
+    policy_supporter: pythia.PolicySupporter,
+    profiler: Optional[pythia.Profiler] = None) -> pythia.Policy:
+  """Creates a policy.
+
+  Args:
+    problem_statement:
+    algorithm: Name of the algorithm.
+    policy_supporter:
+    profiler: Passed to the designer policies to profile their phases.
+
+  Returns:
+    Policy that runs $algorithm.
+  """
   if algorithm in ('ALGORITHM_UNSPECIFIED', 'RANDOM_SEARCH'):
     from vizier._src.algorithms.policies import random_policy
     return random_policy.RandomPolicy(policy_supporter)
   elif algorithm == 'QUASI_RANDOM_SEARCH':
     from vizier._src.algorithms.designers import quasi_random
     return dp.PartiallySerializableDesignerPolicy(
-        problem_statement, policy_supporter,
-        quasi_random.QuasiRandomDesigner.from_problem)
+        problem_statement,
+        policy_supporter,
+        quasi_random.QuasiRandomDesigner.from_problem,
+        profiler=profiler)
   elif algorithm == 'GRID_SEARCH':
     from vizier._src.algorithms.designers import grid
     return dp.PartiallySerializableDesignerPolicy(
-        problem_statement, policy_supporter,
-        grid.GridSearchDesigner.from_problem)
+        problem_statement,
+        policy_supporter,
+        grid.GridSearchDesigner.from_problem,
+        profiler=profiler)
   elif algorithm == 'NSGA2':
     from vizier._src.algorithms.evolution import nsga2
-    return dp.PartiallySerializableDesignerPolicy(problem_statement,
-                                                  policy_supporter,
-                                                  nsga2.create_nsga2)
+    return dp.PartiallySerializableDesignerPolicy(
+        problem_statement,
+        policy_supporter,
+        nsga2.create_nsga2,
+        profiler=profiler)
   elif algorithm == 'EMUKIT_GP_EI':
     from vizier._src.algorithms.designers import emukit
-    return dp.DesignerPolicy(policy_supporter, emukit.EmukitDesigner)
+    return dp.DesignerPolicy(
+        policy_supporter, emukit.EmukitDesigner, profiler=profiler)
   elif algorithm == 'BOCS':
     from vizier._src.algorithms.designers import bocs
-    return dp.DesignerPolicy(policy_supporter, bocs.BOCSDesigner)
+    return dp.DesignerPolicy(
+        policy_supporter, bocs.BOCSDesigner, profiler=profiler)
   elif algorithm == 'HARMONICA':
     from vizier._src.algorithms.designers import harmonica
-    return dp.DesignerPolicy(policy_supporter, harmonica.HarmonicaDesigner)
+    return dp.DesignerPolicy(
+        policy_supporter, harmonica.HarmonicaDesigner, profiler=profiler)
   elif algorithm == 'CMA_ES':
     from vizier._src.algorithms.designers import cmaes
-    return dp.PartiallySerializableDesignerPolicy(problem_statement,
-                                                  policy_supporter,
-                                                  cmaes.CMAESDesigner)
+    return dp.PartiallySerializableDesignerPolicy(
+        problem_statement,
+        policy_supporter,
+        cmaes.CMAESDesigner,
+        profiler=profiler)
   else:
     raise ValueError(f'Algorithm {algorithm} is not registered.')
 
@@ -70,19 +97,94 @@ def policy_creator(problem_statement: vz.ProblemStatement, algorithm: str,
 VizierService = Union[vizier_service_pb2_grpc.VizierServiceStub,
                       vizier_service_pb2_grpc.VizierServiceServicer]
 
+# Study metadata namespace and key of the time budget of a Pythia computation
+# in seconds, e.g. to bound the latency of suggestions.
+TIME_BUDGET_NAMESPACE = 'pythia'
+TIME_BUDGET_KEY = 'time_budget_secs'
+
+# gRPC reports a huge time remaining for RPCs without deadline. Longer times are
+# treated as no deadline.
+_MAX_TIME_REMAINING = datetime.timedelta(days=365)
+
+
+def time_remaining(
+    context: Optional[grpc.ServicerContext]) -> Optional[float]:
+  """Returns the seconds left until the deadline of an RPC, if it has one."""
+  seconds = context.time_remaining() if context is not None else None
+  if (seconds is None or not math.isfinite(seconds) or
+      seconds >= _MAX_TIME_REMAINING.total_seconds()):
+    return None
+  return seconds
+
+
+def compute_deadline(
+    study_config: vz.ProblemStatement,
+    context: Optional[grpc.ServicerContext] = None,
+    default_time_budget: Optional[datetime.timedelta] = None
+) -> Optional[datetime.datetime]:
+  """Returns the deadline of a Pythia computation.
+
+  Args:
+    study_config:
+    context: Context of the RPC. Its deadline, if any, is honored.
+    default_time_budget: Time budget for studies which don't set one in their
+      metadata.
+
+  Returns:
+    The earliest of the RPC deadline and the end of the time budget of the
+    study, or None if there is neither.
+  """
+  now = datetime.datetime.now()
+  deadlines = []
+  rpc_time_remaining = time_remaining(context)
+  if rpc_time_remaining is not None:
+    deadlines.append(now + datetime.timedelta(seconds=rpc_time_remaining))
+  time_budget = study_config.metadata.ns(TIME_BUDGET_NAMESPACE).get(
+      TIME_BUDGET_KEY, cls=str)
+  if time_budget is not None:
+    deadlines.append(now + datetime.timedelta(seconds=float(time_budget)))
+  elif default_time_budget is not None:
+    deadlines.append(now + default_time_budget)
+  return min(deadlines, default=None)
+
 
 class PythiaService(pythia_service_pb2_grpc.PythiaServiceServicer):
   """Implements the GRPC functions outlined in pythia_service.proto."""
 
-  def __init__(self, vizier_service: Optional[VizierService] = None):
+  def __init__(self,
+               vizier_service: Optional[VizierService] = None,
+               metrics: Optional[service_metrics.ServiceMetrics] = None,
+               profiler: Optional[pythia.Profiler] = None,
+               default_time_budget: Optional[datetime.timedelta] = None):
     """Initialization.
 
     Args:
       vizier_service: Can be either an actual VizierService object or a stub. An
         actual VizierService should be passed only for local testing/local
         development.
+      metrics: Collects the time spent computing inside policies. If None, no
+        statistics are collected.
+      profiler: Profiles policy creation and the phases of each policy
+        computation. If None, nothing is profiled.
+      default_time_budget: Time budget of the computations for studies which
+        don't set one in their metadata. See `compute_deadline`.
     """
     self._vizier_service = vizier_service
+    self._metrics = metrics or service_metrics.ServiceMetrics(enabled=False)
+    self._profiler = profiler or pythia.NoOpProfiler()
+    self._default_time_budget = default_time_budget
+
+  def _create_policy_supporter(
+      self, study_guid: str, study_config: vz.ProblemStatement,
+      context: Optional[grpc.ServicerContext]
+  ) -> service_policy_supporter.ServicePolicySupporter:
+    """Creates a policy supporter which honors the deadline of the RPC."""
+    return service_policy_supporter.ServicePolicySupporter(
+        study_guid,
+        self._vizier_service,
+        deadline=compute_deadline(study_config, context,
+                                  self._default_time_budget),
+        is_cancelled=(lambda: not context.is_active()) if context else None)
 
   def connect_to_vizier(self, vizier_service_endpoint: str) -> None:
     """Only needs to be called if VizierService wasn't passed in init."""
@@ -99,22 +201,37 @@ class PythiaService(pythia_service_pb2_grpc.PythiaServiceServicer):
     """Performs Suggest RPC call."""
     # Setup Policy Supporter.
     study_config = vz.SuggestConverter.from_request_proto(request).study_config
-    policy_supporter = service_policy_supporter.ServicePolicySupporter(
-        request.study_descriptor.guid, self._vizier_service)
-    pythia_policy = policy_creator(study_config, request.algorithm,
-                                   policy_supporter)
+    policy_supporter = self._create_policy_supporter(
+        request.study_descriptor.guid, study_config, context)
+    try:
+      with self._profiler.span('create_policy'):
+        pythia_policy = policy_creator(study_config, request.algorithm,
+                                       policy_supporter, self._profiler)
+    except Exception:
+      # Spans of a failed request must not be reported with the next one.
+      self._profiler.discard()
+      raise
 
     # Perform algorithmic computation.
     suggest_request = vz.SuggestConverter.from_request_proto(request)
     try:
-      suggest_decision = pythia_policy.suggest(suggest_request)
+      with self._metrics.timer(service_metrics.PYTHIA_COMPUTE, 'Suggest'):
+        suggest_decision = pythia_policy.suggest(suggest_request)
+    except pythia.CancelComputeError:
+      self._profiler.discard()
+      logging.warning('Pythia computation was cancelled for request: %s',
+                      request)
+      raise
     # Leaving a broad catch for now since Pythia can raise any exception.
     # TODO: Be more specific about exception raised,
     # e.g. AttributeError, ModuleNotFoundError, SyntaxError
     except Exception as e:  # pylint: disable=broad-except
+      self._profiler.discard()
       logging.error('Failed to request trials from Pythia for request: %s',
                     request)
       raise RuntimeError('Pythia has encountered an error: ' + str(e)) from e
+    # Reports any spans that the policy itself did not report.
+    self._profiler.report(suggest_decision.metadata)
 
     return vz.SuggestConverter.to_decision_proto(suggest_decision)
 
@@ -127,13 +244,14 @@ class PythiaService(pythia_service_pb2_grpc.PythiaServiceServicer):
     # Setup Policy Supporter.
     study_config = vz.EarlyStopConverter.from_request_proto(
         request).study_config
-    policy_supporter = service_policy_supporter.ServicePolicySupporter(
-        request.study_descriptor.guid, self._vizier_service)
+    policy_supporter = self._create_policy_supporter(
+        request.study_descriptor.guid, study_config, context)
     pythia_policy = policy_creator(study_config, request.algorithm,
                                    policy_supporter)
 
     # Perform algorithmic computation.
     early_stop_request = vz.EarlyStopConverter.from_request_proto(request)
-    early_stopping_decisions = pythia_policy.early_stop(early_stop_request)
+    with self._metrics.timer(service_metrics.PYTHIA_COMPUTE, 'EarlyStop'):
+      early_stopping_decisions = pythia_policy.early_stop(early_stop_request)
 
     return vz.EarlyStopConverter.to_decisions_proto(early_stopping_decisions)
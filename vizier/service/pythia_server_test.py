@@ -0,0 +1,114 @@
+# Copyright 2022 Google LLC.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for vizier.service.pythia_server."""
+
+import datetime
+from unittest import mock
+
+from vizier import pythia
+from vizier.service import pythia_server
+from vizier.service import pyvizier as vz
+from vizier.service import vizier_client
+from vizier.service import vizier_service
+
+from absl.testing import absltest
+from absl.testing import parameterized
+
+
+def _context(time_remaining):
+  context = mock.create_autospec(pythia_server.grpc.ServicerContext)
+  context.time_remaining.return_value = time_remaining
+  return context
+
+
+class ComputeDeadlineTest(parameterized.TestCase):
+
+  @parameterized.parameters(None, float('inf'), 1e300, 2.0**63)
+  def test_no_rpc_deadline(self, time_remaining):
+    self.assertIsNone(
+        pythia_server.compute_deadline(vz.StudyConfig(),
+                                       _context(time_remaining)))
+
+  def test_rpc_deadline(self):
+    deadline = pythia_server.compute_deadline(vz.StudyConfig(), _context(10.0))
+    remaining = deadline - datetime.datetime.now()
+    self.assertGreater(remaining, datetime.timedelta(seconds=9))
+    self.assertLessEqual(remaining, datetime.timedelta(seconds=10))
+
+  def test_time_budget_without_rpc_deadline(self):
+    study_config = vz.StudyConfig()
+    study_config.metadata.ns(pythia_server.TIME_BUDGET_NAMESPACE)[
+        pythia_server.TIME_BUDGET_KEY] = '5'
+    deadline = pythia_server.compute_deadline(study_config, _context(1e300))
+    self.assertLessEqual(deadline - datetime.datetime.now(),
+                         datetime.timedelta(seconds=5))
+
+
+class PythiaServiceTest(parameterized.TestCase):
+
+  def test_suggest_over_grpc_without_deadline(self):
+    service = vizier_service.DistributedPythiaVizierService()
+    study_config = vz.StudyConfig(algorithm=vz.Algorithm.RANDOM_SEARCH)
+    study_config.search_space.root.add_float_param('x', 0.0, 1.0)
+    study_config.metric_information.append(
+        vz.MetricInformation(
+            name='y', goal=vz.ObjectiveMetricGoal.MAXIMIZE))
+    client = vizier_client.create_or_load_study(
+        service.endpoint,
+        owner_id='owner',
+        client_id='client',
+        study_id='no_deadline',
+        study_config=study_config)
+    self.assertLen(client.get_suggestions(suggestion_count=2), 2)
+
+  def _suggest_request(self):
+    study_config = vz.StudyConfig(algorithm=vz.Algorithm.RANDOM_SEARCH)
+    study_config.search_space.root.add_float_param('x', 0.0, 1.0)
+    return vz.SuggestConverter.to_request_proto(
+        pythia.SuggestRequest(
+            study_descriptor=vz.StudyDescriptor(
+                config=study_config, guid='study', max_trial_id=0),
+            count=1))
+
+  def test_failed_policy_creation_discards_spans(self):
+    profiler = pythia.RecordingProfiler(log_spans=False)
+    service = pythia_server.PythiaService(profiler=profiler)
+    with mock.patch.object(
+        pythia_server, 'policy_creator', side_effect=ValueError('bad')):
+      with self.assertRaises(ValueError):
+        service.Suggest(self._suggest_request())
+    self.assertEmpty(profiler.spans())
+
+  @parameterized.parameters(pythia.CancelComputeError, ValueError)
+  def test_failed_suggest_discards_spans(self, error):
+    profiler = pythia.RecordingProfiler(log_spans=False)
+    service = pythia_server.PythiaService(profiler=profiler)
+
+    def suggest(request):
+      del request
+      with profiler.span('suggest'):
+        raise error('failed')
+
+    policy = mock.create_autospec(pythia.Policy, instance=True)
+    policy.suggest.side_effect = suggest
+    with mock.patch.object(
+        pythia_server, 'policy_creator', return_value=policy):
+      with self.assertRaises(Exception):
+        service.Suggest(self._suggest_request())
+    self.assertEmpty(profiler.spans())
+
+
+if __name__ == '__main__':
+  absltest.main()
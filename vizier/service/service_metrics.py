@@ -0,0 +1,375 @@
+# Copyright 2022 Google LLC.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Latency instrumentation for the Vizier and Pythia services.
+
+`ServiceMetrics` is a registry of latency histograms, keyed by metric name and
+operation. The service records:
+
+  * RPC_LATENCY: Time spent in each RPC handler (via `MetricsInterceptor`).
+  * SERIALIZATION_LATENCY: Proto (de)serialization of RPC messages.
+  * LOCK_WAIT: Time spent waiting to acquire the service's locks.
+  * DATASTORE_LATENCY: Time spent in each datastore call.
+  * PYTHIA_ROUNDTRIP: Time the Vizier service waits on Pythia calls.
+  * PYTHIA_COMPUTE: Time Pythia spends inside the policy. The difference with
+    PYTHIA_ROUNDTRIP is queueing and transport.
+
+When disabled, `timer` returns a shared no-op context manager and none of the
+wrappers below are installed, so the cost is a single attribute check.
+"""
+import contextlib
+import threading
+import time
+from typing import (Callable, ContextManager, Dict, Iterable, List, Optional,
+                    Sequence, Tuple)
+
+import grpc
+
+from vizier.service import datastore
+from vizier.service import key_value_pb2
+from vizier.service import resources
+from vizier.service import study_pb2
+from vizier.service import vizier_oss_pb2
+from vizier.service import vizier_service_pb2
+
+from google.longrunning import operations_pb2
+
+RPC_LATENCY = 'vizier_rpc_latency_seconds'
+SERIALIZATION_LATENCY = 'vizier_serialization_latency_seconds'
+LOCK_WAIT = 'vizier_lock_wait_seconds'
+DATASTORE_LATENCY = 'vizier_datastore_latency_seconds'
+PYTHIA_ROUNDTRIP = 'vizier_pythia_roundtrip_seconds'
+PYTHIA_COMPUTE = 'vizier_pythia_compute_seconds'
+
+DEFAULT_BUCKET_UPPER_BOUNDS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                               0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                               10.0, 30.0, 60.0)
+
+_NULL_TIMER = contextlib.nullcontext()
+
+
+class LatencyHistogram:
+  """Thread-safe histogram of durations, in seconds."""
+
+  def __init__(self, bucket_upper_bounds: Sequence[float]):
+    self._bucket_upper_bounds = tuple(bucket_upper_bounds)
+    # The last bucket is unbounded.
+    self._bucket_counts = [0] * (len(self._bucket_upper_bounds) + 1)
+    self._count = 0
+    self._sum = 0.0
+    self._lock = threading.Lock()
+
+  def observe(self, seconds: float) -> None:
+    index = len(self._bucket_upper_bounds)
+    for i, upper_bound in enumerate(self._bucket_upper_bounds):
+      if seconds <= upper_bound:
+        index = i
+        break
+    with self._lock:
+      self._bucket_counts[index] += 1
+      self._count += 1
+      self._sum += seconds
+
+  def to_proto(self, name: str,
+               operation: str) -> vizier_service_pb2.LatencyStats:
+    with self._lock:
+      return vizier_service_pb2.LatencyStats(
+          name=name,
+          operation=operation,
+          count=self._count,
+          sum_seconds=self._sum,
+          bucket_upper_bounds=self._bucket_upper_bounds,
+          bucket_counts=self._bucket_counts)
+
+
+class _Timer:
+  """Context manager which records its duration into a histogram."""
+
+  def __init__(self, histogram: LatencyHistogram):
+    self._histogram = histogram
+    self._start = 0.0
+
+  def __enter__(self) -> '_Timer':
+    self._start = time.perf_counter()
+    return self
+
+  def __exit__(self, *unused_exc_info) -> None:
+    self._histogram.observe(time.perf_counter() - self._start)
+
+
+class ServiceMetrics:
+  """Registry of latency histograms, keyed by (metric name, operation)."""
+
+  def __init__(
+      self,
+      enabled: bool = True,
+      bucket_upper_bounds: Sequence[float] = DEFAULT_BUCKET_UPPER_BOUNDS):
+    self._enabled = enabled
+    self._bucket_upper_bounds = tuple(bucket_upper_bounds)
+    self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+    self._lock = threading.Lock()
+
+  @property
+  def enabled(self) -> bool:
+    return self._enabled
+
+  def _histogram(self, name: str, operation: str) -> LatencyHistogram:
+    key = (name, operation)
+    histogram = self._histograms.get(key)
+    if histogram is None:
+      with self._lock:
+        histogram = self._histograms.setdefault(
+            key, LatencyHistogram(self._bucket_upper_bounds))
+    return histogram
+
+  def observe(self, name: str, operation: str, seconds: float) -> None:
+    """Records a single duration."""
+    if self._enabled:
+      self._histogram(name, operation).observe(seconds)
+
+  def timer(self, name: str, operation: str) -> ContextManager[object]:
+    """Returns a context manager timing its body; a no-op when disabled."""
+    if not self._enabled:
+      return _NULL_TIMER
+    return _Timer(self._histogram(name, operation))
+
+  def reset(self) -> None:
+    with self._lock:
+      self._histograms.clear()
+
+  def stats(self) -> List[vizier_service_pb2.LatencyStats]:
+    with self._lock:
+      items = sorted(self._histograms.items())
+    return [h.to_proto(name, op) for (name, op), h in items]
+
+  def to_proto(self) -> vizier_service_pb2.GetServiceStatsResponse:
+    stats = self.stats()
+    return vizier_service_pb2.GetServiceStatsResponse(
+        enabled=self._enabled,
+        stats=stats,
+        text_exposition=text_exposition(stats))
+
+
+def _escape_label(value: str) -> str:
+  return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def text_exposition(stats: Sequence[vizier_service_pb2.LatencyStats]) -> str:
+  """Formats $stats as histograms in the Prometheus text exposition format."""
+  lines = []
+  previous_name = None
+  for stat in stats:
+    if stat.name != previous_name:
+      lines.append(f'# TYPE {stat.name} histogram')
+      previous_name = stat.name
+    label = f'operation="{_escape_label(stat.operation)}"'
+    cumulative = 0
+    upper_bounds = [repr(b) for b in stat.bucket_upper_bounds] + ['+Inf']
+    for upper_bound, count in zip(upper_bounds, stat.bucket_counts):
+      cumulative += count
+      lines.append(
+          f'{stat.name}_bucket{{{label},le="{upper_bound}"}} {cumulative}')
+    lines.append(f'{stat.name}_sum{{{label}}} {stat.sum_seconds!r}')
+    lines.append(f'{stat.name}_count{{{label}}} {stat.count}')
+  return '\n'.join(lines) + '\n' if lines else ''
+
+
+class TimedLock:
+  """A `threading.Lock` which records how long callers wait to acquire it."""
+
+  def __init__(self, metrics: ServiceMetrics, operation: str):
+    self._lock = threading.Lock()
+    self._metrics = metrics
+    self._operation = operation
+
+  def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+    start = time.perf_counter()
+    acquired = self._lock.acquire(blocking, timeout)
+    self._metrics.observe(LOCK_WAIT, self._operation,
+                          time.perf_counter() - start)
+    return acquired
+
+  def release(self) -> None:
+    self._lock.release()
+
+  def locked(self) -> bool:
+    return self._lock.locked()
+
+  def __enter__(self) -> bool:
+    return self.acquire()
+
+  def __exit__(self, *unused_exc_info) -> None:
+    self.release()
+
+
+class MetricsInterceptor(grpc.ServerInterceptor):
+  """Records the latency and (de)serialization time of unary-unary RPCs."""
+
+  def __init__(self, metrics: ServiceMetrics):
+    self._metrics = metrics
+
+  def intercept_service(self, continuation, handler_call_details):
+    handler = continuation(handler_call_details)
+    if (not self._metrics.enabled or handler is None or
+        handler.unary_unary is None):
+      return handler
+    method = handler_call_details.method
+    metrics = self._metrics
+
+    def behavior(request, context):
+      with metrics.timer(RPC_LATENCY, method):
+        return handler.unary_unary(request, context)
+
+    def request_deserializer(serialized_request):
+      with metrics.timer(SERIALIZATION_LATENCY, f'{method}:request'):
+        return handler.request_deserializer(serialized_request)
+
+    def response_serializer(response):
+      with metrics.timer(SERIALIZATION_LATENCY, f'{method}:response'):
+        return handler.response_serializer(response)
+
+    return grpc.unary_unary_rpc_method_handler(
+        behavior,
+        request_deserializer=(request_deserializer
+                              if handler.request_deserializer else None),
+        response_serializer=(response_serializer
+                             if handler.response_serializer else None))
+
+
+class InstrumentedDataStore(datastore.DataStore):
+  """Delegates to another DataStore, timing every call."""
+
+  def __init__(self, wrapped: datastore.DataStore, metrics: ServiceMetrics):
+    self._wrapped = wrapped
+    self._metrics = metrics
+
+  @property
+  def wrapped(self) -> datastore.DataStore:
+    return self._wrapped
+
+  def _timer(self, operation: str) -> ContextManager[object]:
+    return self._metrics.timer(DATASTORE_LATENCY, operation)
+
+  def create_study(self, study: study_pb2.Study) -> resources.StudyResource:
+    with self._timer('create_study'):
+      return self._wrapped.create_study(study)
+
+  def load_study(self, study_name: str) -> study_pb2.Study:
+    with self._timer('load_study'):
+      return self._wrapped.load_study(study_name)
+
+  def delete_study(self, study_name: str) -> None:
+    with self._timer('delete_study'):
+      return self._wrapped.delete_study(study_name)
+
+  def list_studies(self, owner_name: str) -> List[study_pb2.Study]:
+    with self._timer('list_studies'):
+      return self._wrapped.list_studies(owner_name)
+
+  def create_trial(self, trial: study_pb2.Trial) -> resources.TrialResource:
+    with self._timer('create_trial'):
+      return self._wrapped.create_trial(trial)
+
+  def get_trial(self, trial_name: str) -> study_pb2.Trial:
+    with self._timer('get_trial'):
+      return self._wrapped.get_trial(trial_name)
+
+  def update_trial(self, trial: study_pb2.Trial) -> resources.TrialResource:
+    with self._timer('update_trial'):
+      return self._wrapped.update_trial(trial)
+
+  def list_trials(self, study_name: str) -> List[study_pb2.Trial]:
+    with self._timer('list_trials'):
+      return self._wrapped.list_trials(study_name)
+
+  def delete_trial(self, trial_name: str) -> None:
+    with self._timer('delete_trial'):
+      return self._wrapped.delete_trial(trial_name)
+
+  def add_trial_measurement(
+      self, trial_name: str,
+      measurement: study_pb2.Measurement) -> study_pb2.Trial:
+    with self._timer('add_trial_measurement'):
+      return self._wrapped.add_trial_measurement(trial_name, measurement)
+
+  def list_trial_measurements(
+      self,
+      trial_name: str,
+      last_k: Optional[int] = None) -> List[study_pb2.Measurement]:
+    with self._timer('list_trial_measurements'):
+      return self._wrapped.list_trial_measurements(trial_name, last_k)
+
+  def max_trial_id(self, study_name: str) -> int:
+    with self._timer('max_trial_id'):
+      return self._wrapped.max_trial_id(study_name)
+
+  def create_suggestion_operation(
+      self, operation: operations_pb2.Operation
+  ) -> resources.SuggestionOperationResource:
+    with self._timer('create_suggestion_operation'):
+      return self._wrapped.create_suggestion_operation(operation)
+
+  def get_suggestion_operation(self,
+                               operation_name: str) -> operations_pb2.Operation:
+    with self._timer('get_suggestion_operation'):
+      return self._wrapped.get_suggestion_operation(operation_name)
+
+  def update_suggestion_operation(
+      self, operation: operations_pb2.Operation
+  ) -> resources.SuggestionOperationResource:
+    with self._timer('update_suggestion_operation'):
+      return self._wrapped.update_suggestion_operation(operation)
+
+  def list_suggestion_operations(
+      self,
+      study_name: str,
+      client_id: str,
+      filter_fn: Optional[Callable[[operations_pb2.Operation], bool]] = None
+  ) -> List[operations_pb2.Operation]:
+    with self._timer('list_suggestion_operations'):
+      return self._wrapped.list_suggestion_operations(study_name, client_id,
+                                                      filter_fn)
+
+  def max_suggestion_operation_number(self, study_name: str,
+                                      client_id: str) -> int:
+    with self._timer('max_suggestion_operation_number'):
+      return self._wrapped.max_suggestion_operation_number(
+          study_name, client_id)
+
+  def create_early_stopping_operation(
+      self, operation: vizier_oss_pb2.EarlyStoppingOperation
+  ) -> resources.EarlyStoppingOperationResource:
+    with self._timer('create_early_stopping_operation'):
+      return self._wrapped.create_early_stopping_operation(operation)
+
+  def get_early_stopping_operation(
+      self, operation_name: str) -> vizier_oss_pb2.EarlyStoppingOperation:
+    with self._timer('get_early_stopping_operation'):
+      return self._wrapped.get_early_stopping_operation(operation_name)
+
+  def update_early_stopping_operation(
+      self, operation: vizier_oss_pb2.EarlyStoppingOperation
+  ) -> resources.EarlyStoppingOperationResource:
+    with self._timer('update_early_stopping_operation'):
+      return self._wrapped.update_early_stopping_operation(operation)
+
+  def update_metadata(
+      self,
+      study_name: str,
+      study_metadata: Iterable[key_value_pb2.KeyValue],
+      trial_metadata: Iterable[datastore.UnitMetadataUpdate],
+  ) -> None:
+    with self._timer('update_metadata'):
+      return self._wrapped.update_metadata(study_name, study_metadata,
+                                           trial_metadata)
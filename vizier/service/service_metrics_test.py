@@ -0,0 +1,120 @@
+# Copyright 2022 Google LLC.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for vizier.service.service_metrics."""
+from vizier.service import resources
+from vizier.service import service_metrics
+from vizier.service import study_pb2
+from vizier.service import vizier_service
+from vizier.service import vizier_service_pb2
+from vizier.service.testing import util as test_util
+
+from absl.testing import absltest
+
+
+class ServiceMetricsTest(absltest.TestCase):
+
+  def test_histogram_buckets(self):
+    metrics = service_metrics.ServiceMetrics(bucket_upper_bounds=(0.1, 1.0))
+    for seconds in (0.05, 0.5, 0.7, 5.0):
+      metrics.observe('latency', 'op', seconds)
+    stats, = metrics.stats()
+    self.assertEqual(stats.count, 4)
+    self.assertAlmostEqual(stats.sum_seconds, 6.25)
+    self.assertSequenceEqual(stats.bucket_counts, [1, 2, 1])
+
+  def test_disabled_metrics_record_nothing(self):
+    metrics = service_metrics.ServiceMetrics(enabled=False)
+    with metrics.timer('latency', 'op'):
+      pass
+    metrics.observe('latency', 'op', 1.0)
+    self.assertEmpty(metrics.stats())
+    self.assertFalse(metrics.to_proto().enabled)
+
+  def test_timed_lock(self):
+    metrics = service_metrics.ServiceMetrics()
+    lock = service_metrics.TimedLock(metrics, 'my_lock')
+    with lock:
+      self.assertTrue(lock.locked())
+    self.assertFalse(lock.locked())
+    stats, = metrics.stats()
+    self.assertEqual(stats.name, service_metrics.LOCK_WAIT)
+    self.assertEqual(stats.operation, 'my_lock')
+    self.assertEqual(stats.count, 1)
+
+  def test_text_exposition(self):
+    metrics = service_metrics.ServiceMetrics(bucket_upper_bounds=(0.1,))
+    metrics.observe('latency', 'op', 0.05)
+    metrics.observe('latency', 'op', 0.5)
+    self.assertEqual(
+        metrics.to_proto().text_exposition, '# TYPE latency histogram\n'
+        'latency_bucket{operation="op",le="0.1"} 1\n'
+        'latency_bucket{operation="op",le="+Inf"} 2\n'
+        'latency_sum{operation="op"} 0.55\n'
+        'latency_count{operation="op"} 2\n')
+
+
+class ServiceStatsRpcTest(absltest.TestCase):
+
+  def _run_study(self, service: vizier_service.DefaultVizierService) -> None:
+    study = service.stub.CreateStudy(
+        vizier_service_pb2.CreateStudyRequest(
+            parent=resources.OwnerResource('my_username').name,
+            study=study_pb2.Study(
+                display_name='cifar10',
+                study_spec=test_util.generate_all_four_parameter_specs(
+                    algorithm='RANDOM_SEARCH'))))
+    service.stub.SuggestTrials(
+        vizier_service_pb2.SuggestTrialsRequest(
+            parent=study.name, suggestion_count=2, client_id='client'))
+
+  def test_stats_collected(self):
+    service = vizier_service.DefaultVizierService(enable_metrics=True)
+    self._run_study(service)
+    response = service.stub.GetServiceStats(
+        vizier_service_pb2.GetServiceStatsRequest(reset=True))
+
+    self.assertTrue(response.enabled)
+    names_and_operations = {(s.name, s.operation) for s in response.stats}
+    for expected in [
+        (service_metrics.RPC_LATENCY, '/vizier.VizierService/SuggestTrials'),
+        (service_metrics.SERIALIZATION_LATENCY,
+         '/vizier.VizierService/SuggestTrials:request'),
+        (service_metrics.LOCK_WAIT, 'operation_lock'),
+        (service_metrics.DATASTORE_LATENCY, 'create_trial'),
+        (service_metrics.PYTHIA_ROUNDTRIP, 'Suggest'),
+        (service_metrics.PYTHIA_COMPUTE, 'Suggest'),
+    ]:
+      self.assertIn(expected, names_and_operations)
+    self.assertIn(service_metrics.RPC_LATENCY, response.text_exposition)
+
+    after_reset = service.stub.GetServiceStats(
+        vizier_service_pb2.GetServiceStatsRequest())
+    self.assertNotIn(
+        '/vizier.VizierService/SuggestTrials',
+        {s.operation for s in after_reset.stats})
+
+  def test_stats_disabled_by_default(self):
+    service = vizier_service.DefaultVizierService()
+    self._run_study(service)
+    response = service.stub.GetServiceStats(
+        vizier_service_pb2.GetServiceStatsRequest())
+    self.assertFalse(response.enabled)
+    self.assertEmpty(response.stats)
+    self.assertNotIsInstance(service.datastore,
+                             service_metrics.InstrumentedDataStore)
+
+
+if __name__ == '__main__':
+  absltest.main()
@@ -17,7 +17,7 @@
 The Policy can use these methods to communicate with Vizier.
 """
 import datetime
-from typing import Iterable, List, Optional, Union
+from typing import Callable, Iterable, List, Optional, Union
 
 from vizier import pythia
 from vizier import pyvizier as vz
@@ -34,16 +34,27 @@ VizierService = Union[vizier_service_pb2_grpc.VizierServiceStub,
 class ServicePolicySupporter(pythia.PolicySupporter):
   """Service version of the PolicySupporter."""
 
-  def __init__(self, study_guid: str, vizier_service: VizierService):
+  def __init__(self,
+               study_guid: str,
+               vizier_service: VizierService,
+               *,
+               deadline: Optional[datetime.datetime] = None,
+               is_cancelled: Optional[Callable[[], bool]] = None):
     """Initalization.
 
     Args:
       study_guid: A default study_name; the name of this study.
       vizier_service: Vizier Service, in the form of a GRPC stub or actual
         class.
+      deadline: The time by which the computation must complete, e.g. the
+        deadline of the RPC. If None, there's no deadline.
+      is_cancelled: Returns True when the computation is cancelled, e.g. when
+        the client of the RPC disconnects. If None, it's never cancelled.
     """
     self._study_guid = study_guid
     self._vizier_service = vizier_service
+    self._deadline = deadline
+    self._is_cancelled = is_cancelled
 
   def GetStudyConfig(self, study_guid: str) -> vz.ProblemStatement:
     request = vizier_service_pb2.GetStudyRequest(name=study_guid)
@@ -84,11 +95,16 @@ class ServicePolicySupporter(pythia.PolicySupporter):
 
   def CheckCancelled(self, note: Optional[str] = None) -> None:
     """Throws a CancelComputeError on timeout or if Vizier cancels."""
-    pass  # Do nothing since it's one single process.
+    if self._is_cancelled is not None and self._is_cancelled():
+      raise pythia.CancelComputeError(f'Cancelled. Note: {note}')
+    if self.TimeRemaining() <= datetime.timedelta(0):
+      raise pythia.CancelComputeError(f'Deadline exceeded. Note: {note}')
 
   def TimeRemaining(self) -> datetime.timedelta:
     """The time remaining to compute a result."""
-    return datetime.timedelta.max  # RPCs don't have timeouts in OSS.
+    if self._deadline is None:
+      return datetime.timedelta.max
+    return max(self._deadline - datetime.datetime.now(), datetime.timedelta(0))
 
   def SendMetadata(self, delta: vz.MetadataDelta) -> None:
     """Updates the metadata."""
@@ -13,7 +13,10 @@
 # limitations under the License.
 
 """Tests for vizier.service.service_policy_supporter."""
+import datetime
 import logging
+
+from vizier import pythia
 from vizier.service import pyvizier
 from vizier.service import resources
 from vizier.service import service_policy_supporter
@@ -117,6 +120,35 @@ class PythiaSupporterTest(absltest.TestCase):
     self.assertNotEmpty(trials[0].metadata.ns('bax'))
     self.assertEqual(trials[0].metadata.ns('bax'), on_trial1_metadata.ns('bax'))
 
+  def test_no_deadline(self):
+    self.assertEqual(self.policy_supporter.TimeRemaining(),
+                     datetime.timedelta.max)
+    self.policy_supporter.CheckCancelled()
+
+  def test_deadline(self):
+    supporter = service_policy_supporter.ServicePolicySupporter(
+        self.study_name,
+        self.vs,
+        deadline=datetime.datetime.now() + datetime.timedelta(minutes=1))
+    self.assertBetween(supporter.TimeRemaining().total_seconds(), 50, 60)
+    supporter.CheckCancelled()
+
+    supporter = service_policy_supporter.ServicePolicySupporter(
+        self.study_name,
+        self.vs,
+        deadline=datetime.datetime.now() - datetime.timedelta(minutes=1))
+    self.assertEqual(supporter.TimeRemaining(), datetime.timedelta(0))
+    with self.assertRaises(pythia.CancelComputeError):
+      supporter.CheckCancelled()
+
+  def test_cancelled(self):
+    supporter = service_policy_supporter.ServicePolicySupporter(
+        self.study_name, self.vs, is_cancelled=lambda: True)
+    with self.assertRaises(pythia.CancelComputeError):
+      supporter.CheckCancelled()
+    with self.assertRaises(pythia.CancelComputeError):
+      supporter.SendMetadata(pyvizier.MetadataDelta())
+
 
 if __name__ == '__main__':
   absltest.main()
@@ -15,7 +15,7 @@
 """Implementation of SQL Datastore."""
 import collections
 import threading
-from typing import Callable, DefaultDict, Iterable, List, Optional
+from typing import Any, Callable, DefaultDict, Dict, Iterable, List, Optional
 from absl import logging
 
 import sqlalchemy as sqla
@@ -58,6 +58,18 @@ class SQLDataStore(datastore.DataStore):
         sqla.Column('trial_id', sqla.INTEGER),
         sqla.Column('serialized_trial', sqla.String),
     )
+    # Intermediate measurements are stored separately from `serialized_trial`,
+    # so that adding one does not require rewriting the whole trial.
+    self._measurements_table = sqla.Table(
+        'measurements',
+        self._root_metadata,
+        sqla.Column('trial_name', sqla.String, primary_key=True),
+        sqla.Column('measurement_index', sqla.INTEGER, primary_key=True),
+        sqla.Column('owner_id', sqla.String),
+        sqla.Column('study_id', sqla.String),
+        sqla.Column('trial_id', sqla.INTEGER),
+        sqla.Column('serialized_measurement', sqla.String),
+    )
     self._suggestion_operations_table = sqla.Table(
         'suggestion_operations',
         self._root_metadata,
@@ -130,6 +142,9 @@ class SQLDataStore(datastore.DataStore):
     delete_trials_query = self._trials_table.delete().where(
         self._trials_table.c.owner_id == study_resource.owner_id).where(
             self._trials_table.c.study_id == study_resource.study_id)
+    delete_measurements_query = self._measurements_table.delete().where(
+        self._measurements_table.c.owner_id == study_resource.owner_id).where(
+            self._measurements_table.c.study_id == study_resource.study_id)
 
     with self._lock:
       exists = self._connection.execute(exists_query).fetchone()[0]
@@ -137,6 +152,7 @@ class SQLDataStore(datastore.DataStore):
         raise datastore.NotFoundError('Study %s does not exist.' % study_name)
       self._connection.execute(delete_study_query)
       self._connection.execute(delete_trials_query)
+      self._connection.execute(delete_measurements_query)
 
   def list_studies(self, owner_name: str) -> List[study_pb2.Study]:
     owner_id = resources.OwnerResource.from_name(owner_name).owner_id
@@ -158,39 +174,69 @@ class SQLDataStore(datastore.DataStore):
         study_pb2.Study.FromString(row['serialized_study']) for row in result
     ]
 
+  def _measurement_rows(self, trial_resource: resources.TrialResource,
+                        measurements: Iterable[study_pb2.Measurement],
+                        start_index: int = 0) -> List[Dict[str, Any]]:
+    """Returns rows for `_measurements_table`, indexed from $start_index."""
+    return [
+        dict(
+            trial_name=trial_resource.name,
+            measurement_index=start_index + i,
+            owner_id=trial_resource.owner_id,
+            study_id=trial_resource.study_id,
+            trial_id=trial_resource.trial_id,
+            serialized_measurement=measurement.SerializeToString())
+        for i, measurement in enumerate(measurements)
+    ]
+
   def create_trial(self, trial: study_pb2.Trial) -> resources.TrialResource:
     trial_resource = resources.TrialResource.from_name(trial.name)
+    trial, measurements = datastore.split_trial_measurements(trial)
     query = self._trials_table.insert().values(
         trial_name=trial.name,
         owner_id=trial_resource.owner_id,
         study_id=trial_resource.study_id,
         trial_id=trial_resource.trial_id,
         serialized_trial=trial.SerializeToString())
+    measurement_rows = self._measurement_rows(trial_resource, measurements)
 
     with self._lock:
       try:
         self._connection.execute(query)
-        return trial_resource
       except sqla.exc.IntegrityError as integrity_error:
         raise datastore.AlreadyExistsError(
             'Trial with name %s already exists.' %
             trial.name) from integrity_error
+      if measurement_rows:
+        self._connection.execute(self._measurements_table.insert(),
+                                 measurement_rows)
+      return trial_resource
 
   def get_trial(self, trial_name: str) -> study_pb2.Trial:
     query = sqla.select([self._trials_table])
     query = query.where(self._trials_table.c.trial_name == trial_name)
+    measurements_query = sqla.select([
+        self._measurements_table.c.serialized_measurement
+    ]).where(self._measurements_table.c.trial_name == trial_name).order_by(
+        self._measurements_table.c.measurement_index)
 
     with self._lock:
-      result = self._connection.execute(query)
+      row = self._connection.execute(query).fetchone()
+      measurement_rows = self._connection.execute(measurements_query).fetchall()
 
-    row = result.fetchone()
     if not row:
       raise datastore.NotFoundError('Failed to find trial name: %s' %
                                     trial_name)
-    return study_pb2.Trial.FromString(row['serialized_trial'])
+    trial = study_pb2.Trial.FromString(row['serialized_trial'])
+    trial.measurements.extend([
+        study_pb2.Measurement.FromString(m_row['serialized_measurement'])
+        for m_row in measurement_rows
+    ])
+    return trial
 
   def update_trial(self, trial: study_pb2.Trial) -> resources.TrialResource:
     trial_resource = resources.TrialResource.from_name(trial.name)
+    trial, measurements = datastore.split_trial_measurements(trial)
     exists_query = sqla.exists(
         sqla.select([
             self._trials_table
@@ -202,12 +248,19 @@ class SQLDataStore(datastore.DataStore):
             study_id=trial_resource.study_id,
             trial_id=trial_resource.trial_id,
             serialized_trial=trial.SerializeToString())
+    delete_measurements_query = self._measurements_table.delete().where(
+        self._measurements_table.c.trial_name == trial.name)
+    measurement_rows = self._measurement_rows(trial_resource, measurements)
 
     with self._lock:
       exists = self._connection.execute(exists_query).fetchone()[0]
       if not exists:
         raise datastore.NotFoundError('Trial %s does not exist.' % trial.name)
       self._connection.execute(update_query)
+      self._connection.execute(delete_measurements_query)
+      if measurement_rows:
+        self._connection.execute(self._measurements_table.insert(),
+                                 measurement_rows)
 
     return trial_resource
 
@@ -221,17 +274,36 @@ class SQLDataStore(datastore.DataStore):
         self._trials_table
     ]).where(self._trials_table.c.owner_id == study_resource.owner_id).where(
         self._trials_table.c.study_id == study_resource.study_id)
+    measurements_query = sqla.select([
+        self._measurements_table.c.trial_name,
+        self._measurements_table.c.serialized_measurement
+    ]).where(
+        self._measurements_table.c.owner_id == study_resource.owner_id).where(
+            self._measurements_table.c.study_id ==
+            study_resource.study_id).order_by(
+                self._measurements_table.c.trial_id,
+                self._measurements_table.c.measurement_index)
 
     with self._lock:
       exists = self._connection.execute(exists_query).fetchone()[0]
       if not exists:
         raise datastore.NotFoundError('Study name %s does not exist.' %
                                       study_name)
-      result = self._connection.execute(list_query)
+      result = self._connection.execute(list_query).fetchall()
+      measurement_rows = self._connection.execute(measurements_query).fetchall()
 
-    return [
-        study_pb2.Trial.FromString(row['serialized_trial']) for row in result
-    ]
+    trial_name_to_measurements: DefaultDict[
+        str, List[study_pb2.Measurement]] = collections.defaultdict(list)
+    for m_row in measurement_rows:
+      trial_name_to_measurements[m_row['trial_name']].append(
+          study_pb2.Measurement.FromString(m_row['serialized_measurement']))
+
+    trials = []
+    for row in result:
+      trial = study_pb2.Trial.FromString(row['serialized_trial'])
+      trial.measurements.extend(trial_name_to_measurements[row['trial_name']])
+      trials.append(trial)
+    return trials
 
   def delete_trial(self, trial_name: str) -> None:
     exists_query = sqla.exists(
@@ -240,11 +312,65 @@ class SQLDataStore(datastore.DataStore):
         ]).where(self._trials_table.c.trial_name == trial_name)).select()
     delete_query = self._trials_table.delete().where(
         self._trials_table.c.trial_name == trial_name)
+    delete_measurements_query = self._measurements_table.delete().where(
+        self._measurements_table.c.trial_name == trial_name)
     with self._lock:
       exists = self._connection.execute(exists_query).fetchone()[0]
       if not exists:
         raise datastore.NotFoundError('Trial %s does not exist.' % trial_name)
       self._connection.execute(delete_query)
+      self._connection.execute(delete_measurements_query)
+
+  def add_trial_measurement(
+      self, trial_name: str,
+      measurement: study_pb2.Measurement) -> study_pb2.Trial:
+    trial_resource = resources.TrialResource.from_name(trial_name)
+    trial_query = sqla.select([
+        self._trials_table.c.serialized_trial
+    ]).where(self._trials_table.c.trial_name == trial_name)
+    max_index_query = sqla.select([
+        sqla.func.max(
+            self._measurements_table.c.measurement_index, type_=sqla.INT)
+    ]).where(self._measurements_table.c.trial_name == trial_name)
+
+    with self._lock:
+      row = self._connection.execute(trial_query).fetchone()
+      if not row:
+        raise datastore.NotFoundError('Trial %s does not exist.' % trial_name)
+      max_index = self._connection.execute(max_index_query).fetchone()[0]
+      start_index = 0 if max_index is None else max_index + 1
+      self._connection.execute(
+          self._measurements_table.insert(),
+          self._measurement_rows(trial_resource, [measurement], start_index))
+    trial = study_pb2.Trial.FromString(row['serialized_trial'])
+    trial.measurements.append(measurement)
+    return trial
+
+  def list_trial_measurements(
+      self,
+      trial_name: str,
+      last_k: Optional[int] = None) -> List[study_pb2.Measurement]:
+    exists_query = sqla.exists(
+        sqla.select([
+            self._trials_table
+        ]).where(self._trials_table.c.trial_name == trial_name)).select()
+    list_query = sqla.select([
+        self._measurements_table.c.serialized_measurement
+    ]).where(self._measurements_table.c.trial_name == trial_name).order_by(
+        self._measurements_table.c.measurement_index.desc())
+    if last_k is not None:
+      list_query = list_query.limit(max(last_k, 0))
+
+    with self._lock:
+      exists = self._connection.execute(exists_query).fetchone()[0]
+      if not exists:
+        raise datastore.NotFoundError('Trial %s does not exist.' % trial_name)
+      result = self._connection.execute(list_query).fetchall()
+
+    return [
+        study_pb2.Measurement.FromString(row['serialized_measurement'])
+        for row in reversed(result)
+    ]
 
   def max_trial_id(self, study_name: str) -> int:
     study_resource = resources.StudyResource.from_name(study_name)
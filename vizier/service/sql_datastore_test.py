@@ -46,6 +46,10 @@ class SQLDataStoreTest(datastore_test_lib.DataStoreTestCase):
   def test_trial(self):
     self.assertTrialAPI(self.datastore, self.example_study, self.example_trials)
 
+  def test_measurement(self):
+    self.assertMeasurementAPI(self.datastore, self.example_study,
+                              self.example_trials)
+
   def test_suggestion_operation(self):
     self.assertSuggestOpAPI(self.datastore, self.example_study, self.client_id,
                             self.example_suggestion_operations)
@@ -175,7 +175,18 @@ class VizierClient:
       metric_list: List[Mapping[str, Union[int, float]]],
       trial_id: int,
   ) -> pyvizier.Trial:
-    """Sends intermediate objective value for the trial identified by trial_id."""
+    """Sends intermediate objective value for the trial identified by trial_id.
+
+    Args:
+      step: Step count of the measurement.
+      elapsed_secs: Seconds elapsed since the trial started.
+      metric_list: Metric values keyed by metric name.
+      trial_id: Id of the trial.
+
+    Returns:
+      The trial with only the reported measurement. Use `get_trial` to fetch
+      all of its measurements.
+    """
     new_metric_list = []
     for metric in metric_list:
       for metric_name in metric:
@@ -15,22 +15,24 @@
 """RPC functions implemented from vizier_service.proto."""
 import collections
 import datetime
+import functools
 import threading
-from typing import Optional, Union
+from typing import Any, Callable, ContextManager, Dict, Optional, Union
 
 from absl import logging
 import grpc
-import numpy as np
 import sqlalchemy as sqla
 
 from vizier import pythia
 from vizier import pyvizier as base_pyvizier
 from vizier._src.pyvizier.oss import metadata_util
 from vizier.service import datastore
+from vizier.service import optimal_trials
 from vizier.service import pythia_server
 from vizier.service import pythia_service_pb2_grpc
 from vizier.service import pyvizier
 from vizier.service import resources
+from vizier.service import service_metrics
 from vizier.service import sql_datastore
 from vizier.service import stubs_util
 from vizier.service import study_pb2
@@ -67,7 +69,8 @@ class VizierService(vizier_service_pb2_grpc.VizierServiceServicer):
       self,
       database_url: Optional[str] = SQL_MEMORY_URL,
       early_stop_recycle_period: datetime.timedelta = datetime.timedelta(
-          seconds=60)):
+          seconds=60),
+      metrics: Optional[service_metrics.ServiceMetrics] = None):
     """Initializes the service.
 
     Creates the datastore and relevant locks for multhreading. Note that the
@@ -79,10 +82,14 @@ class VizierService(vizier_service_pb2_grpc.VizierServiceServicer):
       early_stop_recycle_period: Amount of time needed to pass before recycling
         an early stopping operation. See `CheckEarlyStoppingState` for more
         details.
+      metrics: Collects latency statistics of RPCs, locks, datastore and Pythia
+        calls. If None, no statistics are collected.
     """
+    self._metrics = metrics or service_metrics.ServiceMetrics(enabled=False)
+
     # By default, uses a local PythiaService instance.
     self._pythia_service: PythiaService = pythia_server.PythiaService(
-        vizier_service=self)
+        vizier_service=self, metrics=self._metrics)
 
     if database_url is None:
       self.datastore = datastore.NestedDictRAMDataStore()
@@ -94,21 +101,85 @@ class VizierService(vizier_service_pb2_grpc.VizierServiceServicer):
           poolclass=sqla.pool.StaticPool)
       self.datastore = sql_datastore.SQLDataStore(engine)
 
+    if self._metrics.enabled:
+      self.datastore = service_metrics.InstrumentedDataStore(
+          self.datastore, self._metrics)
+
     # For database edits using owner names.
-    self._owner_name_to_lock = collections.defaultdict(threading.Lock)
+    self._owner_name_to_lock = collections.defaultdict(
+        self._lock_factory('owner_name_lock'))
     # For database edits using study names.
-    self._study_name_to_lock = collections.defaultdict(threading.Lock)
+    self._study_name_to_lock = collections.defaultdict(
+        self._lock_factory('study_name_lock'))
     # For calls to Pythia (SuggestTrials and CheckTrialEarlyStoppingState).
-    self._operation_lock = collections.defaultdict(threading.Lock)
+    self._operation_lock = collections.defaultdict(
+        self._lock_factory('operation_lock'))
+    # Optimal trials of each study, built on first use by ListOptimalTrials and
+    # kept up to date by every RPC that changes a trial's state or metrics.
+    self._study_name_to_optimal_trials: Dict[
+        str, optimal_trials.OptimalTrialSet] = {}
+    self._optimal_trials_lock = threading.Lock()
 
     self._early_stop_recycle_period = early_stop_recycle_period
 
+  def _lock_factory(self, name: str) -> Callable[[], ContextManager[Any]]:
+    """Returns a lock constructor, timing lock waits if metrics are enabled."""
+    if self._metrics.enabled:
+      return functools.partial(service_metrics.TimedLock, self._metrics, name)
+    return threading.Lock
+
+  def _get_optimal_trial_set(
+      self, study_name: str) -> optimal_trials.OptimalTrialSet:
+    """Returns the study's optimal trial set, (re)building it if needed."""
+    metric_specs = self.datastore.load_study(study_name).study_spec.metrics
+    with self._optimal_trials_lock:
+      optimal_set = self._study_name_to_optimal_trials.get(study_name)
+      if optimal_set is None or not optimal_set.matches(metric_specs):
+        optimal_set = optimal_trials.OptimalTrialSet.from_trials(
+            metric_specs, self.datastore.list_trials(study_name))
+        self._study_name_to_optimal_trials[study_name] = optimal_set
+      return optimal_set
+
+  def _update_optimal_trials(self,
+                             trial: study_pb2.Trial,
+                             deleted: bool = False) -> None:
+    """Propagates a stored trial change into its study's optimal trial set."""
+    study_name = resources.TrialResource.from_name(
+        trial.name).study_resource.name
+    # Holding the lock orders this update after any concurrent rebuild.
+    with self._optimal_trials_lock:
+      optimal_set = self._study_name_to_optimal_trials.get(study_name)
+      if optimal_set is None:
+        return  # Built lazily from the datastore, which has the change.
+      if deleted:
+        optimal_set.remove(int(trial.id))
+      else:
+        optimal_set.update(trial)
+
   def connect_to_pythia(self, pythia_endpoint: str) -> None:
     # This replaces the local PythiaService.
     logging.info('Connecting to Pythia endpoint: %s', pythia_endpoint)
     self._pythia_service = stubs_util.create_pythia_server_stub(pythia_endpoint)
     logging.info('Created Pythia server stub: %s', self._pythia_service)
 
+  def _pythia_kwargs(
+      self, context: Optional[grpc.ServicerContext]) -> Dict[str, Any]:
+    """Returns the arguments of Pythia calls that pass on the RPC deadline.
+
+    A remote Pythia gets the time remaining as the timeout of its RPC. A local
+    PythiaService gets the context itself, so it also sees cancellations.
+
+    Args:
+      context: Context of the RPC to Vizier.
+
+    Returns:
+      Keyword arguments of the Pythia Suggest and EarlyStop calls.
+    """
+    if isinstance(self._pythia_service,
+                  pythia_service_pb2_grpc.PythiaServiceStub):
+      return {'timeout': pythia_server.time_remaining(context)}
+    return {'context': context}
+
   def CreateStudy(
       self,
       request: vizier_service_pb2.CreateStudyRequest,
@@ -185,6 +256,8 @@ class VizierService(vizier_service_pb2_grpc.VizierServiceServicer):
       context: Optional[grpc.ServicerContext] = None) -> empty_pb2.Empty:
     """Deletes a Study."""
     self.datastore.delete_study(request.name)
+    with self._optimal_trials_lock:
+      self._study_name_to_optimal_trials.pop(request.name, None)
     return empty_pb2.Empty()
 
   def SuggestTrials(
@@ -304,8 +377,9 @@ class VizierService(vizier_service_pb2_grpc.VizierServiceServicer):
         suggest_request_proto = pyvizier.SuggestConverter.to_request_proto(
             suggest_request)
         suggest_request_proto.algorithm = study.study_spec.algorithm
-        suggest_decision_proto = self._pythia_service.Suggest(
-            suggest_request_proto)
+        with self._metrics.timer(service_metrics.PYTHIA_ROUNDTRIP, 'Suggest'):
+          suggest_decision_proto = self._pythia_service.Suggest(
+              suggest_request_proto, **self._pythia_kwargs(context))
         # Check if we received enough suggestions.
         if len(suggest_decision_proto.suggestions
               ) < request.suggestion_count - len(output_trials):
@@ -323,6 +397,15 @@ class VizierService(vizier_service_pb2_grpc.VizierServiceServicer):
         output_op.done = True
         self.datastore.update_suggestion_operation(output_op)
         return output_op
+      # Raised by a local Pythia when the computation is cancelled.
+      except pythia.CancelComputeError as e:
+        output_op.error.CopyFrom(
+            status_pb2.Status(code=code_pb2.Code.CANCELLED, message=str(e)))
+        logging.warning('Pythia computation was cancelled for request: %s',
+                        request)
+        output_op.done = True
+        self.datastore.update_suggestion_operation(output_op)
+        return output_op
 
       suggest_decision = pyvizier.SuggestConverter.from_decision_proto(
           suggest_decision_proto)
@@ -403,6 +486,7 @@ class VizierService(vizier_service_pb2_grpc.VizierServiceServicer):
 
       trial.start_time.CopyFrom(_get_current_time())
       self.datastore.create_trial(trial)
+      self._update_optimal_trials(trial)
     return trial
 
   def GetTrial(self, request: vizier_service_pb2.GetTrialRequest,
@@ -437,15 +521,16 @@ class VizierService(vizier_service_pb2_grpc.VizierServiceServicer):
       context:
 
     Returns:
-      Trial whose measurement was appended.
+      Trial whose measurement was appended. It only contains the appended
+      measurement, so that reporting a measurement doesn't read all the
+      previous ones.
     """
     study_name = resources.TrialResource.from_name(
         request.trial_name).study_resource.name
     with self._study_name_to_lock[study_name]:
-      trial = self.datastore.get_trial(request.trial_name)
-      trial.measurements.extend([request.measurement])
-      self.datastore.update_trial(trial)
-    return trial
+      # Measurements are appended without rewriting the stored trial.
+      return self.datastore.add_trial_measurement(request.trial_name,
+                                                  request.measurement)
 
   # TODO: Auto selection defaults to the last measurement.
   # Add support for "best measurement" behavior.
@@ -479,6 +564,7 @@ class VizierService(vizier_service_pb2_grpc.VizierServiceServicer):
         trial.infeasible_reason = request.infeasible_reason
 
       self.datastore.update_trial(trial)
+      self._update_optimal_trials(trial)
     return trial
 
   def DeleteTrial(
@@ -486,7 +572,12 @@ class VizierService(vizier_service_pb2_grpc.VizierServiceServicer):
       request: vizier_service_pb2.DeleteTrialRequest,
       context: Optional[grpc.ServicerContext] = None) -> empty_pb2.Empty:
     """Deletes a Trial."""
-    self.datastore.delete_trial(request.name)
+    study_name = resources.TrialResource.from_name(
+        request.name).study_resource.name
+    with self._study_name_to_lock[study_name]:
+      trial = self.datastore.get_trial(request.name)
+      self.datastore.delete_trial(request.name)
+      self._update_optimal_trials(trial, deleted=True)
     return empty_pb2.Empty()
 
   # TODO: This curerntly uses the same algorithm as suggestion.
@@ -578,8 +669,9 @@ class VizierService(vizier_service_pb2_grpc.VizierServiceServicer):
       early_stop_request_proto.algorithm = study.study_spec.algorithm
 
       # Send request to Pythia.
-      early_stopping_decisions_proto = self._pythia_service.EarlyStop(
-          early_stop_request_proto)
+      with self._metrics.timer(service_metrics.PYTHIA_ROUNDTRIP, 'EarlyStop'):
+        early_stopping_decisions_proto = self._pythia_service.EarlyStop(
+            early_stop_request_proto, **self._pythia_kwargs(context))
       early_stopping_decisions = pyvizier.EarlyStopConverter.from_decisions_proto(
           early_stopping_decisions_proto)
       # Update metadata from result.
@@ -629,6 +721,7 @@ class VizierService(vizier_service_pb2_grpc.VizierServiceServicer):
       trial = self.datastore.get_trial(request.name)
       trial.state = study_pb2.Trial.STOPPING
       self.datastore.update_trial(trial)
+      self._update_optimal_trials(trial)
     return trial
 
   def ListOptimalTrials(
@@ -648,55 +741,19 @@ class VizierService(vizier_service_pb2_grpc.VizierServiceServicer):
       A list containing pareto-optimal Trials for multi-objective Study or the
       optimal Trials for single-objective Study.
     """
-    raw_trial_list = self.datastore.list_trials(request.parent)
-    if not raw_trial_list:
-      return vizier_service_pb2.ListOptimalTrialsResponse(optimal_trials=[])
-
-    study_spec = self.datastore.load_study(request.parent).study_spec
-    metric_id_to_goal = {m.metric_id: m.goal for m in study_spec.metrics}
-    required_metric_ids = set(metric_id_to_goal.keys())
-
-    considered_trials = []
-    considered_trial_objective_vectors = []
-
-    for trial in raw_trial_list:
-      trial_metric_id_to_value = {
-          m.metric_id: m.value for m in trial.final_measurement.metrics
-      }
-      trial_metric_ids = set(trial_metric_id_to_value.keys())
-      # Add trials ONLY if they succeeded and contain all supposed metrics.
-      if trial.state == study_pb2.Trial.State.SUCCEEDED and required_metric_ids.issubset(
-          trial_metric_ids):
-        objective_vector = []
-        for metric_id, goal in metric_id_to_goal.items():
-          # Flip sign for convenience when computing optimality.
-          if goal == study_pb2.StudySpec.MetricSpec.GoalType.MINIMIZE:
-            vector_value = -1.0 * trial_metric_id_to_value[metric_id]
-          else:
-            vector_value = trial_metric_id_to_value[metric_id]
-          objective_vector.append(vector_value)
-
-        considered_trials.append(trial)
-        considered_trial_objective_vectors.append(objective_vector)
-
-    if not considered_trials:
-      return vizier_service_pb2.ListOptimalTrialsResponse(optimal_trials=[])
-
-    # Find Pareto optimal trials.
-    ys = np.array(considered_trial_objective_vectors)
-    n = ys.shape[0]
-    dominated = np.asarray(
-        [[np.all(ys[i] <= ys[j]) & np.any(ys[j] > ys[i])
-          for i in range(n)]
-         for j in range(n)])
-    optimal_booleans = np.logical_not(np.any(dominated, axis=0))
-    optimal_trials = []
-    for i, boolean in enumerate(list(optimal_booleans)):
-      if boolean:
-        optimal_trials.append(considered_trials[i])
-
+    optimal_set = self._get_optimal_trial_set(request.parent)
+    study_resource = resources.StudyResource.from_name(request.parent)
+    optimal_trial_list = []
+    for trial_id in optimal_set.optimal_trial_ids():
+      try:
+        optimal_trial_list.append(
+            self.datastore.get_trial(
+                study_resource.trial_resource(str(trial_id)).name))
+      except datastore.NotFoundError:
+        # Deleted concurrently with this call.
+        continue
     return vizier_service_pb2.ListOptimalTrialsResponse(
-        optimal_trials=optimal_trials)
+        optimal_trials=optimal_trial_list)
 
   def UpdateMetadata(
       self,
@@ -713,3 +770,14 @@ class VizierService(vizier_service_pb2_grpc.VizierServiceServicer):
       return vizier_service_pb2.UpdateMetadataResponse(
           error_details=';'.join(e.args))
     return vizier_service_pb2.UpdateMetadataResponse()
+
+  def GetServiceStats(
+      self,
+      request: vizier_service_pb2.GetServiceStatsRequest,
+      context: Optional[grpc.ServicerContext] = None
+  ) -> vizier_service_pb2.GetServiceStatsResponse:
+    """Returns the latency statistics collected by this service."""
+    response = self._metrics.to_proto()
+    if request.reset:
+      self._metrics.reset()
+    return response
@@ -15,7 +15,12 @@
 """Tests for vizier.service.vizier_server."""
 # TODO: Change the test to create a vizier stub and call its
 # methods, instead of directly calling VizierService methods.
+from unittest import mock
+
+import grpc
+from vizier import pythia
 from vizier.service import key_value_pb2
+from vizier.service import pythia_service_pb2_grpc
 from vizier.service import resources
 from vizier.service import study_pb2
 from vizier.service import vizier_service
@@ -185,6 +190,49 @@ class VizierServerTest(parameterized.TestCase):
     self.assertLen(optimal_trial_list, 1)
     self.assertEqual(optimal_trial_list[0], hl_trial)
 
+  def test_list_optimal_tracks_trial_changes(self):
+    metric_id = 'accuracy'
+    study = test_util.generate_study(
+        self.owner_id,
+        self.study_id,
+        study_spec=study_pb2.StudySpec(metrics=[
+            study_pb2.StudySpec.MetricSpec(
+                metric_id=metric_id,
+                goal=study_pb2.StudySpec.MetricSpec.MAXIMIZE)
+        ]))
+    self.vs.datastore.create_study(study)
+    list_request = vizier_service_pb2.ListOptimalTrialsRequest(
+        parent=study.name)
+    self.assertEmpty(self.vs.ListOptimalTrials(list_request).optimal_trials)
+
+    def complete(value: float) -> study_pb2.Trial:
+      trial = self.vs.CreateTrial(
+          vizier_service_pb2.CreateTrialRequest(
+              parent=study.name, trial=study_pb2.Trial()))
+      return self.vs.CompleteTrial(
+          vizier_service_pb2.CompleteTrialRequest(
+              name=trial.name,
+              final_measurement=study_pb2.Measurement(metrics=[
+                  study_pb2.Measurement.Metric(
+                      metric_id=metric_id, value=value)
+              ])))
+
+    low_trial = complete(0.0)
+    self.assertEqual(
+        list(self.vs.ListOptimalTrials(list_request).optimal_trials),
+        [low_trial])
+
+    high_trial = complete(1.0)
+    self.assertEqual(
+        list(self.vs.ListOptimalTrials(list_request).optimal_trials),
+        [high_trial])
+
+    self.vs.DeleteTrial(
+        vizier_service_pb2.DeleteTrialRequest(name=high_trial.name))
+    self.assertEqual(
+        list(self.vs.ListOptimalTrials(list_request).optimal_trials),
+        [low_trial])
+
   def test_suggest_trials(self):
     suggestion_count = 10
 
@@ -227,6 +275,129 @@ class VizierServerTest(parameterized.TestCase):
     another_operation = self.vs.SuggestTrials(another_request)
     self.assertNotEqual(operation, another_operation)
 
+  def test_suggest_trials_with_expired_time_budget(self):
+    example_study_spec = test_util.generate_all_four_parameter_specs(
+        algorithm='QUASI_RANDOM_SEARCH')
+    example_study_spec.metadata.append(
+        key_value_pb2.KeyValue(ns='pythia', key='time_budget_secs', value='0'))
+    self.vs.datastore.create_study(
+        test_util.generate_study(
+            self.owner_id, self.study_id, study_spec=example_study_spec))
+
+    operation = self.vs.SuggestTrials(
+        vizier_service_pb2.SuggestTrialsRequest(
+            parent=resources.StudyResource(self.owner_id, self.study_id).name,
+            suggestion_count=2,
+            client_id=self.client_id))
+    # The best suggestions found so far are returned.
+    self.assertTrue(operation.done)
+    self.assertFalse(operation.HasField('error'))
+    self.assertLen(
+        vizier_service_pb2.SuggestTrialsResponse.FromString(
+            operation.response.value).trials, 2)
+
+  def test_suggest_trials_cancelled(self):
+    example_study_spec = test_util.generate_all_four_parameter_specs(
+        algorithm='RANDOM_SEARCH')
+    self.vs.datastore.create_study(
+        test_util.generate_study(
+            self.owner_id, self.study_id, study_spec=example_study_spec))
+    request = vizier_service_pb2.SuggestTrialsRequest(
+        parent=resources.StudyResource(self.owner_id, self.study_id).name,
+        suggestion_count=2,
+        client_id=self.client_id)
+
+    with mock.patch.object(
+        self.vs._pythia_service,
+        'Suggest',
+        side_effect=pythia.CancelComputeError('Deadline exceeded.')):
+      operation = self.vs.SuggestTrials(request)
+    self.assertTrue(operation.done)
+    self.assertIn('Deadline exceeded.', operation.error.message)
+    self.assertEqual(
+        self.vs.GetOperation(
+            operations_pb2.GetOperationRequest(name=operation.name)),
+        operation)
+
+    # The next call starts a new operation instead of returning the failed one.
+    next_operation = self.vs.SuggestTrials(request)
+    self.assertNotEqual(next_operation.name, operation.name)
+    self.assertTrue(next_operation.done)
+    self.assertFalse(next_operation.HasField('error'))
+
+  def test_suggest_trials_passes_deadline_to_local_pythia(self):
+    example_study_spec = test_util.generate_all_four_parameter_specs(
+        algorithm='QUASI_RANDOM_SEARCH')
+    self.vs.datastore.create_study(
+        test_util.generate_study(
+            self.owner_id, self.study_id, study_spec=example_study_spec))
+    context = mock.create_autospec(grpc.ServicerContext, instance=True)
+    context.time_remaining.return_value = 30.0
+    context.is_active.return_value = True
+
+    with mock.patch.object(
+        self.vs._pythia_service, 'Suggest',
+        wraps=self.vs._pythia_service.Suggest) as suggest:
+      operation = self.vs.SuggestTrials(
+          vizier_service_pb2.SuggestTrialsRequest(
+              parent=resources.StudyResource(self.owner_id,
+                                             self.study_id).name,
+              suggestion_count=2,
+              client_id=self.client_id), context)
+    self.assertFalse(operation.HasField('error'))
+    self.assertIs(suggest.call_args.kwargs['context'], context)
+
+  @parameterized.parameters((30.0, 30.0), (float('inf'), None))
+  def test_suggest_trials_passes_deadline_to_remote_pythia(
+      self, time_remaining, timeout):
+    example_study_spec = test_util.generate_all_four_parameter_specs(
+        algorithm='QUASI_RANDOM_SEARCH')
+    self.vs.datastore.create_study(
+        test_util.generate_study(
+            self.owner_id, self.study_id, study_spec=example_study_spec))
+    context = mock.create_autospec(grpc.ServicerContext, instance=True)
+    context.time_remaining.return_value = time_remaining
+    stub = pythia_service_pb2_grpc.PythiaServiceStub(mock.MagicMock())
+    stub.Suggest = mock.Mock(side_effect=grpc.RpcError())
+    self.vs._pythia_service = stub
+
+    operation = self.vs.SuggestTrials(
+        vizier_service_pb2.SuggestTrialsRequest(
+            parent=resources.StudyResource(self.owner_id, self.study_id).name,
+            suggestion_count=2,
+            client_id=self.client_id), context)
+    self.assertTrue(operation.done)
+    self.assertEqual(stub.Suggest.call_args.kwargs, {'timeout': timeout})
+
+  def test_add_trial_measurement(self):
+    study = test_util.generate_study(self.owner_id, self.study_id)
+    self.vs.datastore.create_study(study)
+    trial = test_util.generate_trials(
+        trial_id_list=[1],
+        owner_id=self.owner_id,
+        study_id=self.study_id,
+        state=study_pb2.Trial.State.ACTIVE)[0]
+    self.vs.datastore.create_trial(trial)
+
+    measurements = [
+        study_pb2.Measurement(
+            step_count=step,
+            metrics=[study_pb2.Measurement.Metric(metric_id='x', value=step)])
+        for step in range(3)
+    ]
+    with mock.patch.object(
+        self.vs.datastore, 'get_trial',
+        wraps=self.vs.datastore.get_trial) as get_trial:
+      for measurement in measurements:
+        output_trial = self.vs.AddTrialMeasurement(
+            vizier_service_pb2.AddTrialMeasurementRequest(
+                trial_name=trial.name, measurement=measurement))
+        self.assertEqual(list(output_trial.measurements), [measurement])
+      get_trial.assert_not_called()
+
+    stored_trial = self.vs.datastore.get_trial(trial.name)
+    self.assertEqual(list(stored_trial.measurements), measurements)
+
   @parameterized.named_parameters(('IncludeFinalMeasurement', True),
                                   ('NoFinalMeasurement', False))
   def test_complete_trial(self, include_final_measurement: bool):
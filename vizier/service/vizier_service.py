@@ -24,6 +24,7 @@ import portpicker
 from vizier.service import datastore
 from vizier.service import pythia_server
 from vizier.service import pythia_service_pb2_grpc
+from vizier.service import service_metrics
 from vizier.service import stubs_util
 from vizier.service import vizier_server
 from vizier.service import vizier_service_pb2_grpc
@@ -40,6 +41,9 @@ class DefaultVizierService:
       init=True, default=vizier_server.SQL_MEMORY_URL, kw_only=True)
   _early_stop_recycle_period: datetime.timedelta = attr.field(
       init=False, default=datetime.timedelta(seconds=0.1))
+  # If True, the service collects latency statistics, see `GetServiceStats`.
+  _enable_metrics: bool = attr.field(init=True, default=False, kw_only=True)
+  _metrics: service_metrics.ServiceMetrics = attr.field(init=False)
   _port: int = attr.field(init=False, factory=portpicker.pick_unused_port)
   _servicer: vizier_server.VizierService = attr.field(init=False)
   _server: grpc.Server = attr.field(init=False)
@@ -53,12 +57,22 @@ class DefaultVizierService:
   def endpoint(self) -> str:
     return f'{self._host}:{self._port}'
 
+  @property
+  def metrics(self) -> service_metrics.ServiceMetrics:
+    return self._metrics
+
   def __attrs_post_init__(self):
+    self._metrics = service_metrics.ServiceMetrics(
+        enabled=self._enable_metrics)
     # Setup Vizier server.
     self._servicer = vizier_server.VizierService(
         database_url=self._database_url,
-        early_stop_recycle_period=self._early_stop_recycle_period)
-    self._server = grpc.server(futures.ThreadPoolExecutor(max_workers=30))
+        early_stop_recycle_period=self._early_stop_recycle_period,
+        metrics=self._metrics)
+    interceptors = ([service_metrics.MetricsInterceptor(self._metrics)]
+                    if self._enable_metrics else [])
+    self._server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=30), interceptors=interceptors)
     vizier_service_pb2_grpc.add_VizierServiceServicer_to_server(
         self._servicer, self._server)
     self._server.add_secure_port(self.endpoint, grpc.local_server_credentials())
@@ -86,7 +100,7 @@ class DistributedPythiaVizierService(DefaultVizierService):
   def __attrs_post_init__(self):
     super().__attrs_post_init__()
     # Setup Pythia server.
-    self._pythia_servicer = pythia_server.PythiaService()
+    self._pythia_servicer = pythia_server.PythiaService(metrics=self._metrics)
     # `max_workers=1` is used since we can only run one Pythia thread at a time.
     self._pythia_server = grpc.server(futures.ThreadPoolExecutor(max_workers=1))
     pythia_service_pb2_grpc.add_PythiaServiceServicer_to_server(
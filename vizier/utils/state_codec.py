@@ -0,0 +1,131 @@
+# Copyright 2022 Google LLC.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Compact encoding of designer states that contain numpy arrays.
+
+States are JSON-serializable values (dicts, lists, strings, numbers...) which
+may contain numpy arrays, as encoded by `json_utils.NumpyEncoder`. Instead of
+writing the arrays as decimal text, `dumps` writes their raw buffers after a
+JSON header, compresses the result with zlib and encodes it with base64 so that
+it can be stored as a string in vz.Metadata. The bytes of the array elements
+are shuffled (first bytes of all elements, then second bytes...) before the
+compression, which groups the similar bytes such as the float exponents.
+
+The encoded string starts with a version tag. `loads` also decodes the states
+that were encoded as JSON with `json_utils.NumpyEncoder`.
+
+Example:
+  metadata.ns('my_designer')['state'] = state_codec.dumps({'xs': xs, 'n': 3})
+  state = state_codec.loads(metadata.ns('my_designer')['state'])
+"""
+
+import base64
+import json
+import struct
+import zlib
+from typing import Any, List, Tuple
+
+import numpy as np
+from vizier.utils import json_utils
+
+_VERSION_TAG = 'vzb1:'
+# Key of the JSON objects that replace the arrays in the header. Its value is
+# the offset of the array buffer.
+_ARRAY_KEY = '__ndarray__'
+# Format of the header length at the start of the payload.
+_HEADER_LENGTH_FORMAT = '<I'
+# Fast compression, as the array buffers are mostly incompressible mantissas.
+_COMPRESSION_LEVEL = 1
+
+
+class _ArrayExtractingEncoder(json.JSONEncoder):
+  """Replaces the arrays by references to their buffers."""
+
+  def __init__(self, *args, **kwargs):
+    super().__init__(*args, **kwargs)
+    self.buffers: List[bytes] = []
+    self.size = 0
+
+  def default(self, o: Any) -> Any:
+    if isinstance(o, np.ndarray):
+      if o.dtype.hasobject:
+        raise TypeError(f'Arrays of dtype {o.dtype} are not supported.')
+      buffer = _shuffle_bytes(o)
+      self.buffers.append(buffer)
+      self.size += len(buffer)
+      return {
+          _ARRAY_KEY: self.size - len(buffer),
+          'dtype': o.dtype.str,
+          'shape': o.shape,
+      }
+    return super().default(o)
+
+
+def _shuffle_bytes(array: np.ndarray) -> bytes:
+  elements = np.ascontiguousarray(array).reshape(-1)
+  return elements.view(np.uint8).reshape(-1, array.itemsize).T.tobytes()
+
+
+def _unshuffle_bytes(buffer: memoryview, offset: int, dtype: np.dtype,
+                     shape: Tuple[int, ...]) -> np.ndarray:
+  count = int(np.prod(shape))
+  shuffled = np.frombuffer(
+      buffer, dtype=np.uint8, count=count * dtype.itemsize, offset=offset)
+  elements = shuffled.reshape(dtype.itemsize, count).T.copy()
+  return elements.view(dtype).reshape(shape)
+
+
+def dumps(state: Any) -> str:
+  """Encodes a state that may contain numpy arrays into a string."""
+  encoder = _ArrayExtractingEncoder(separators=(',', ':'))
+  header = encoder.encode(state).encode('utf-8')
+  payload = b''.join(
+      [struct.pack(_HEADER_LENGTH_FORMAT, len(header)), header] +
+      encoder.buffers)
+  compressed = zlib.compress(payload, _COMPRESSION_LEVEL)
+  return _VERSION_TAG + base64.b64encode(compressed).decode('ascii')
+
+
+def loads(encoded: str) -> Any:
+  """Decodes a string created by `dumps` or `json_utils.NumpyEncoder`.
+
+  Args:
+    encoded:
+
+  Returns:
+    The state. Its arrays are writable copies.
+
+  Raises:
+    ValueError: If the string can't be decoded.
+  """
+  if not encoded.startswith(_VERSION_TAG):
+    return json.loads(encoded, object_hook=json_utils.numpy_hook)
+
+  try:
+    payload = zlib.decompress(
+        base64.b64decode(encoded[len(_VERSION_TAG):], validate=True))
+    header_start = struct.calcsize(_HEADER_LENGTH_FORMAT)
+    (header_length,) = struct.unpack_from(_HEADER_LENGTH_FORMAT, payload)
+    buffers = memoryview(payload)[header_start + header_length:]
+    header = payload[header_start:header_start + header_length]
+  except (zlib.error, struct.error) as e:
+    raise ValueError('Failed to decode the state payload.') from e
+
+  def array_hook(obj: Any) -> Any:
+    if _ARRAY_KEY not in obj:
+      return obj
+    return _unshuffle_bytes(buffers, obj[_ARRAY_KEY], np.dtype(obj['dtype']),
+                            tuple(obj['shape']))
+
+  return json.loads(header.decode('utf-8'), object_hook=array_hook)
@@ -0,0 +1,155 @@
+# Copyright 2022 Google LLC.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark of the dump and load of designer states.
+
+Compares `state_codec` with the JSON encoding of `json_utils.NumpyEncoder`, on
+states with the shapes of the states of the population-based designers, the
+GP bandit designer and the eagle strategy designer.
+
+Example:
+  results = run_benchmark(num_repeats=10)
+  print(json.dumps([attr.asdict(r) for r in results], indent=2))
+"""
+
+import json
+import time
+from typing import Any, Callable, Dict, List
+
+import attr
+import numpy as np
+from vizier.utils import json_utils
+from vizier.utils import state_codec
+
+
+@attr.define(frozen=True)
+class CodecBenchmarkResult:
+  """Sizes in characters and median times in seconds of a state encoding."""
+  state_name: str
+  codec_name: str
+  size: int
+  dump_secs: float
+  load_secs: float
+
+
+def _json_dumps(state: Any) -> str:
+  return json.dumps(state, cls=json_utils.NumpyEncoder)
+
+
+def _json_loads(encoded: str) -> Any:
+  return json.loads(encoded, object_hook=json_utils.numpy_hook)
+
+
+# Name of each codec and its dump and load functions.
+CODECS: Dict[str, tuple[Callable[[Any], str], Callable[[str], Any]]] = {
+    'json': (_json_dumps, _json_loads),
+    'state_codec': (state_codec.dumps, state_codec.loads),
+}
+
+
+def create_states(
+    *,
+    population_size: int = 1000,
+    num_observations: int = 500,
+    num_features: int = 20,
+    seed: int = 0,
+) -> Dict[str, Any]:
+  """Creates states with the shapes of the designer states.
+
+  Args:
+    population_size: The size of the population of the population state.
+    num_observations: The number of observations of the GP state.
+    num_features: The number of features of all the states.
+    seed:
+
+  Returns:
+    The states by name.
+  """
+  rng = np.random.default_rng(seed)
+  population = {
+      'xs': rng.uniform(size=(population_size, num_features)),
+      'ys': rng.normal(size=(population_size, 1)),
+      'cs': np.zeros((population_size, 0)),
+      'ages': rng.integers(10, size=population_size),
+      'generations': rng.integers(10, size=population_size),
+      'ids': np.arange(population_size),
+      'trial_ids': np.arange(population_size),
+  }
+  features = rng.uniform(size=(num_observations, num_features))
+  squared_distances = np.sum(
+      np.square(features[:, np.newaxis] - features), axis=-1)
+  gram = np.exp(-squared_distances) + 1e-3 * np.eye(num_observations)
+  gp = {
+      'surrogate': 'exact',
+      'gp': {
+          'log_params': rng.normal(size=num_features + 2),
+          'features': features,
+          'labels': rng.normal(size=num_observations),
+          'cholesky': np.linalg.cholesky(gram),
+      },
+      'is_fitted': True,
+      'squared_z_scores': rng.uniform(size=10).tolist(),
+  }
+  pool_size = 10 + int(0.5 * num_features + num_features**1.2)
+  firefly_pool = {
+      'capacity': pool_size,
+      '_last_id': 3,
+      '_max_fly_id': pool_size,
+      'ids': np.arange(pool_size),
+      'features': rng.uniform(size=(pool_size, num_features)),
+      'rewards': rng.normal(size=pool_size),
+      'perturbations': rng.uniform(size=pool_size),
+      'generations': rng.integers(10, size=pool_size),
+  }
+  return {'population': population, 'gp': gp, 'firefly_pool': firefly_pool}
+
+
+def benchmark_state(state_name: str,
+                    state: Any,
+                    *,
+                    num_repeats: int = 10) -> List[CodecBenchmarkResult]:
+  """Measures the dump and load of a state with every codec."""
+  results = []
+  for codec_name, (dumps, loads) in CODECS.items():
+    dump_secs, load_secs = [], []
+    for _ in range(num_repeats):
+      start = time.perf_counter()
+      encoded = dumps(state)
+      dump_secs.append(time.perf_counter() - start)
+      start = time.perf_counter()
+      loads(encoded)
+      load_secs.append(time.perf_counter() - start)
+    results.append(
+        CodecBenchmarkResult(
+            state_name=state_name,
+            codec_name=codec_name,
+            size=len(encoded),
+            dump_secs=float(np.median(dump_secs)),
+            load_secs=float(np.median(load_secs))))
+  return results
+
+
+def run_benchmark(*,
+                  num_repeats: int = 10,
+                  **create_states_kwargs) -> List[CodecBenchmarkResult]:
+  """Benchmarks all the codecs on all the states of `create_states`."""
+  results = []
+  for state_name, state in create_states(**create_states_kwargs).items():
+    results.extend(benchmark_state(state_name, state, num_repeats=num_repeats))
+  return results
+
+
+if __name__ == '__main__':
+  for result in run_benchmark():
+    print(json.dumps(attr.asdict(result)))
@@ -0,0 +1,35 @@
+# Copyright 2022 Google LLC.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for state_codec_benchmark."""
+
+from vizier.utils import state_codec_benchmark
+
+from absl.testing import absltest
+
+
+class StateCodecBenchmarkTest(absltest.TestCase):
+
+  def test_run_benchmark(self):
+    results = state_codec_benchmark.run_benchmark(
+        num_repeats=2, population_size=50, num_observations=20, num_features=4)
+    self.assertLen(results, 3 * len(state_codec_benchmark.CODECS))
+    sizes = {(r.state_name, r.codec_name): r.size for r in results}
+    for state_name in ['population', 'gp', 'firefly_pool']:
+      self.assertLess(sizes[state_name, 'state_codec'],
+                      sizes[state_name, 'json'])
+
+
+if __name__ == '__main__':
+  absltest.main()
@@ -0,0 +1,72 @@
+# Copyright 2022 Google LLC.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for state_codec."""
+
+import json
+
+import numpy as np
+from vizier.utils import json_utils
+from vizier.utils import state_codec
+
+from absl.testing import absltest
+from absl.testing import parameterized
+
+
+class StateCodecTest(parameterized.TestCase):
+
+  @parameterized.parameters(
+      dict(array=np.zeros([3, 0])),
+      dict(array=np.arange(12.0).reshape(3, 4)),
+      dict(array=np.arange(12).reshape(3, 4).T),
+      dict(array=np.array(2.5)),
+      dict(array=np.array([True, False])),
+      dict(array=np.array(['a', 'bcd'])),
+      dict(array=np.array([1.0, np.nan, -np.inf], dtype=np.float32)),
+  )
+  def test_dump_and_recover(self, array):
+    original = {'a': array, 'b': [3, 'x', None], 'c': {'d': array}}
+    loaded = state_codec.loads(state_codec.dumps(original))
+    for restored in [loaded['a'], loaded['c']['d']]:
+      np.testing.assert_array_equal(restored, array)
+      self.assertEqual(restored.dtype, array.dtype)
+      self.assertEqual(restored.shape, array.shape)
+      self.assertTrue(restored.flags.writeable)
+    self.assertEqual(loaded['b'], original['b'])
+
+  def test_loads_json(self):
+    original = {'a': np.arange(6.0).reshape(2, 3), 'b': 3}
+    loaded = state_codec.loads(
+        json.dumps(original, cls=json_utils.NumpyEncoder))
+    np.testing.assert_array_equal(loaded['a'], original['a'])
+    self.assertEqual(loaded['b'], 3)
+
+  def test_smaller_than_json(self):
+    original = {'xs': np.random.default_rng(0).uniform(size=(100, 10))}
+    self.assertLess(
+        len(state_codec.dumps(original)),
+        len(json.dumps(original, cls=json_utils.NumpyEncoder)) / 2)
+
+  @parameterized.parameters('', 'vzb1:', 'vzb1:abc', 'vzb1:eJwDAAAAAAE=')
+  def test_loads_invalid(self, encoded):
+    with self.assertRaises(ValueError):
+      state_codec.loads(encoded)
+
+  def test_object_arrays_are_not_supported(self):
+    with self.assertRaises(TypeError):
+      state_codec.dumps({'a': np.array([{}, None])})
+
+
+if __name__ == '__main__':
+  absltest.main()